@@ -8,10 +8,12 @@ templates, and calling LLM for generating control recommendations.
 Main Components:
 - DataExtractor: Extract data from PostgreSQL database
 - CLIPMatcher: Find similar historical cases using vector similarity
+- HistoricalEmbeddingIndex: In-process top-k index over historical embeddings
 - TemplateRenderer: Render decision prompts using Jinja2 templates
 - LLMClient: Call LLaMA API for decision generation
 - OutputHandler: Validate and format decision outputs
 - DecisionAnalyzer: Main controller orchestrating the entire workflow
+- DecisionAnalysisContext: Read-only components shared by all rooms of a batch
 """
 
 from decision_analysis.data_models import (
@@ -0,0 +1,198 @@
+"""
+Decision Analysis Context Module
+
+Batch-scoped, read-only components shared by every room of a decision batch.
+
+Per-room setup used to resolve the prompt template, re-read the monitoring-point /
+threshold / static / skill-library JSON files and rebuild DecisionAnalyzer (with
+DataExtractor, CLIPMatcher, TemplateRenderer, LLMClient, OutputHandler,
+DeviceConfigAdapter) plus CultivationSkillEngine. None of these hold per-room
+state after construction, so one instance serves all rooms, including parallel
+room threads.
+
+- The context is keyed by a config version: config-file mtimes + a hash of the
+  resolved prompt template + the skill KB prior switch
+- Any version change rebuilds the context; otherwise the cached one is reused
+- One process-wide instance, built under a lock so concurrent rooms build once
+"""
+
+import hashlib
+import json
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+from dynaconf import Dynaconf
+from loguru import logger
+from sqlalchemy import Engine
+
+from decision_analysis.decision_analyzer import DecisionAnalyzer
+from decision_analysis.prompt_manager import resolve_decision_prompt_template
+from decision_analysis.skills.cultivation_skill import CultivationSkillEngine
+
+TEMPLATE_FILE = "decision_prompt.jinja"
+MONITORING_POINTS_FILE = "monitoring_points_config.json"
+STATIC_CONFIG_FILE = "static_config.json"
+SKILL_LIBRARY_FILE = "cultivation_skill_library.json"
+# 决定上下文内容的配置文件（任一 mtime 变化即重建）
+CONTEXT_CONFIG_FILES = (
+    TEMPLATE_FILE,
+    MONITORING_POINTS_FILE,
+    "setpoint_monitor_config.json",
+    STATIC_CONFIG_FILE,
+    SKILL_LIBRARY_FILE,
+)
+
+
+@dataclass(frozen=True)
+class DecisionAnalysisContext:
+    """
+    Read-only decision analysis components shared across rooms
+
+    Attributes:
+        analyzer: DecisionAnalyzer with all sub-components initialised
+        skill_engine: CultivationSkillEngine with the skill library loaded
+        monitoring_config: monitoring_points_config.json content
+        static_config: static_config.json content
+        prompt_meta: Prompt template source metadata
+        version: Config version the context was built from
+        build_seconds: Time spent building the context
+        built_at: Build timestamp (time.time())
+    """
+
+    analyzer: DecisionAnalyzer
+    skill_engine: CultivationSkillEngine
+    monitoring_config: Dict[str, Any]
+    static_config: Dict[str, Any]
+    prompt_meta: Dict[str, Any] = field(default_factory=dict)
+    version: Tuple = ()
+    build_seconds: float = 0.0
+    built_at: float = 0.0
+
+
+def _mtime(path: Path) -> Optional[float]:
+    try:
+        return path.stat().st_mtime
+    except OSError:
+        return None
+
+
+def _load_json(path: Path) -> Dict[str, Any]:
+    if not path.exists():
+        logger.warning(f"[AnalysisContext] 未找到配置文件: {path}")
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def context_config_version(
+    config_dir: Path, template_content: str, enable_skill_kb_prior: bool
+) -> Tuple:
+    """配置版本：配置文件 mtime + 提示词模板内容哈希 + Skill KB 先验开关"""
+    mtimes = tuple(_mtime(config_dir / name) for name in CONTEXT_CONFIG_FILES)
+    template_hash = hashlib.sha256(template_content.encode("utf-8")).hexdigest()
+    return mtimes + (template_hash, bool(enable_skill_kb_prior))
+
+
+def build_decision_analysis_context(
+    db_engine: Engine,
+    settings: Dynaconf,
+    static_settings: Dict,
+    config_dir: Path,
+    template_content: str,
+    prompt_meta: Dict[str, Any],
+    enable_skill_kb_prior: bool,
+    version: Tuple = (),
+) -> DecisionAnalysisContext:
+    """构建一份新的上下文（不经过缓存）"""
+    start = time.perf_counter()
+    analyzer = DecisionAnalyzer(
+        db_engine=db_engine,
+        settings=settings,
+        static_config=static_settings,
+        template_path=str(config_dir / TEMPLATE_FILE),
+        template_content=template_content,
+    )
+    skill_engine = CultivationSkillEngine(
+        config_path=config_dir / SKILL_LIBRARY_FILE,
+        enable_kb_prior=enable_skill_kb_prior,
+    )
+    return DecisionAnalysisContext(
+        analyzer=analyzer,
+        skill_engine=skill_engine,
+        monitoring_config=_load_json(config_dir / MONITORING_POINTS_FILE),
+        static_config=_load_json(config_dir / STATIC_CONFIG_FILE),
+        prompt_meta=dict(prompt_meta or {}),
+        version=version,
+        build_seconds=time.perf_counter() - start,
+        built_at=time.time(),
+    )
+
+
+# ===================== 进程级单例 =====================
+_CONTEXT_INSTANCE: Optional[DecisionAnalysisContext] = None
+_CONTEXT_LOCK = threading.Lock()
+
+
+def get_decision_analysis_context(
+    db_engine: Engine,
+    settings: Dynaconf,
+    static_settings: Dict,
+    config_dir: Path,
+    enable_skill_kb_prior: bool,
+) -> DecisionAnalysisContext:
+    """
+    Get the process-wide decision analysis context, rebuilding it on config change
+
+    The prompt template is resolved on every call (resolve_decision_prompt_template
+    caches it in-process), so a newly published prompt also bumps the version.
+
+    Args:
+        db_engine: Database engine (pgsql_engine)
+        settings: Dynaconf settings
+        static_settings: Static configuration passed to DecisionAnalyzer
+        config_dir: Directory holding the prompt template and JSON configs
+        enable_skill_kb_prior: Skill engine cluster KB prior switch
+    """
+    global _CONTEXT_INSTANCE
+
+    config_dir = Path(config_dir)
+    template_content, prompt_meta = resolve_decision_prompt_template(
+        settings=settings,
+        urls=settings.data_source_url,
+        fallback_template_path=config_dir / TEMPLATE_FILE,
+    )
+    version = context_config_version(
+        config_dir, template_content, enable_skill_kb_prior
+    )
+
+    with _CONTEXT_LOCK:
+        if _CONTEXT_INSTANCE is not None and _CONTEXT_INSTANCE.version == version:
+            return _CONTEXT_INSTANCE
+
+        reason = "首次构建" if _CONTEXT_INSTANCE is None else "配置版本变化"
+        _CONTEXT_INSTANCE = build_decision_analysis_context(
+            db_engine=db_engine,
+            settings=settings,
+            static_settings=static_settings,
+            config_dir=config_dir,
+            template_content=template_content,
+            prompt_meta=prompt_meta,
+            enable_skill_kb_prior=enable_skill_kb_prior,
+            version=version,
+        )
+        logger.info(
+            f"[AnalysisContext] 决策分析上下文已构建（{reason}），"
+            f"耗时 {_CONTEXT_INSTANCE.build_seconds:.2f}s, "
+            f"prompt_source={prompt_meta.get('source')}"
+        )
+        return _CONTEXT_INSTANCE
+
+
+def reset_decision_analysis_context() -> None:
+    """丢弃缓存的上下文（下次获取时重建）"""
+    global _CONTEXT_INSTANCE
+    with _CONTEXT_LOCK:
+        _CONTEXT_INSTANCE = None
@@ -26,14 +26,17 @@ class CLIPMatcher:
     to find the most similar historical cases, excluding current batch data.
     """
 
-    def __init__(self, db_engine: Engine):
+    def __init__(self, db_engine: Engine, embedding_index=None):
         """
         Initialize CLIP matcher
 
         Args:
             db_engine: SQLAlchemy database engine (pgsql_engine)
+            embedding_index: Optional HistoricalEmbeddingIndex; when given,
+                similar cases are ranked in memory instead of via SQL
         """
         self.db_engine = db_engine
+        self.embedding_index = embedding_index
         logger.info("[CLIPMatcher] Initialized")
 
     def find_similar_cases(
@@ -103,7 +106,9 @@ class CLIPMatcher:
             # Use DataExtractor to find similar historical cases
             from decision_analysis.data_extractor import DataExtractor
 
-            data_extractor = DataExtractor(self.db_engine)
+            data_extractor = DataExtractor(
+                self.db_engine, embedding_index=self.embedding_index
+            )
 
             similar_df = data_extractor.find_top_similar_historical_cases(
                 current_embedding=query_embedding,
@@ -117,6 +122,7 @@ class CLIPMatcher:
                 date_window_days=date_window_days,
                 embedding_similarity_weight=embedding_similarity_weight,
                 env_similarity_weight=env_similarity_weight,
+                search_mode="index" if self.embedding_index is not None else None,
             )
 
             if similar_df.empty:
@@ -0,0 +1,248 @@
+"""
+Cluster Knowledge Base Snapshot Module
+
+In-process snapshot of the active control-strategy cluster knowledge base
+(``control_strategy_kb_runs`` + ``control_strategy_kb_cluster_rules``) used by
+CultivationSkillEngine KB priors and the DecisionAnalyzer human-prior prompt
+section instead of per-room SQL.
+
+- Loaded once per active run_id; the KB only changes when
+  ``build_and_persist_cluster_kb`` persists a new run, which invalidates it
+- Rules are indexed by (device_type, point_key) and by growth-day interval:
+  rules sorted by ``growth_day_min`` so the rules covering a day resolve via
+  ``bisect`` plus a ``growth_day_max`` filter
+- The active run_id is re-checked at most every
+  CLUSTER_KB_SNAPSHOT_CHECK_SECONDS to pick up runs persisted by other processes
+"""
+
+import heapq
+import threading
+import time
+from bisect import bisect_right
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+from loguru import logger
+from sqlalchemy import Engine, text
+
+# 无 growth_day_min/max 的规则视为覆盖所有生长天（与 SQL 中 COALESCE 语义一致）
+_UNBOUNDED_LOW = float("-inf")
+_UNBOUNDED_HIGH = float("inf")
+
+
+@dataclass(frozen=True)
+class ClusterRule:
+    """One row of control_strategy_kb_cluster_rules"""
+
+    device_type: str
+    point_key: str
+    point_display: Optional[str]
+    value_median: Optional[float]
+    value_p25: Optional[float]
+    value_p75: Optional[float]
+    sample_days: Optional[int]
+    growth_window: Optional[str]
+    preferred_change_type: Optional[str]
+    preferred_hour: Optional[float]
+    growth_day_min: Optional[int]
+    growth_day_max: Optional[int]
+    growth_day_median: Optional[float]
+
+    def covers(self, day: int) -> bool:
+        low = _UNBOUNDED_LOW if self.growth_day_min is None else self.growth_day_min
+        high = _UNBOUNDED_HIGH if self.growth_day_max is None else self.growth_day_max
+        return low <= day <= high
+
+    def day_gap(self, day: int) -> float:
+        if self.growth_day_median is None:
+            return 0.0
+        return abs(float(self.growth_day_median) - day)
+
+
+def _by_sample_days(rule: ClusterRule) -> Tuple[bool, int]:
+    """sample_days DESC NULLS LAST"""
+    return rule.sample_days is None, -(rule.sample_days or 0)
+
+
+class ClusterKBSnapshot:
+    """Immutable in-memory view of one cluster KB run"""
+
+    def __init__(self, run_id: Any, rules: List[ClusterRule]):
+        self.run_id = run_id
+        self.rules = sorted(rules, key=_by_sample_days)
+        self.loaded_at = time.time()
+
+        self.by_point: Dict[Tuple[str, str], List[ClusterRule]] = {}
+        self.by_device_type: Dict[str, List[ClusterRule]] = {}
+        for rule in self.rules:
+            self.by_point.setdefault((rule.device_type, rule.point_key), []).append(
+                rule
+            )
+            self.by_device_type.setdefault(rule.device_type, []).append(rule)
+
+        # 生长天区间索引：按 growth_day_min 升序
+        self._interval_rules = sorted(
+            self.rules,
+            key=lambda r: (
+                _UNBOUNDED_LOW if r.growth_day_min is None else r.growth_day_min
+            ),
+        )
+        self._interval_starts = [
+            _UNBOUNDED_LOW if r.growth_day_min is None else r.growth_day_min
+            for r in self._interval_rules
+        ]
+
+    def __len__(self) -> int:
+        return len(self.rules)
+
+    def covering(self, day: int) -> List[ClusterRule]:
+        """growth_day_min <= day <= growth_day_max 的规则"""
+        end = bisect_right(self._interval_starts, day)
+        return [rule for rule in self._interval_rules[:end] if rule.covers(day)]
+
+    def nearest(
+        self,
+        target_day: Optional[int],
+        limit: int,
+        covering_only: bool = False,
+    ) -> List[ClusterRule]:
+        """
+        Rules ordered like ``ORDER BY day_gap ASC, sample_days DESC NULLS LAST``
+
+        Args:
+            target_day: Growth day; None orders by sample_days only
+            limit: Maximum number of rules
+            covering_only: Keep only rules whose growth-day interval covers target_day
+        """
+        if target_day is None:
+            return self.rules[:limit]
+        day = int(target_day)
+        candidates = self.covering(day) if covering_only else self.rules
+        return heapq.nsmallest(
+            limit,
+            candidates,
+            key=lambda r: (r.day_gap(day), *_by_sample_days(r)),
+        )
+
+
+def load_cluster_kb_snapshot(db_engine: Engine) -> Optional[ClusterKBSnapshot]:
+    """Load the active cluster KB run (None when no run exists)"""
+    with db_engine.connect() as conn:
+        run_id = _query_active_run_id(conn)
+        if run_id is None:
+            return None
+        rows = conn.execute(
+            text(
+                """
+                SELECT device_type, point_key, point_display, value_median,
+                       value_p25, value_p75, sample_days, growth_window,
+                       preferred_change_type, preferred_hour,
+                       growth_day_min, growth_day_max, growth_day_median
+                FROM control_strategy_kb_cluster_rules
+                WHERE run_id = :run_id
+                """
+            ),
+            {"run_id": run_id},
+        ).fetchall()
+
+    rules = [
+        ClusterRule(
+            device_type=str(row[0]) if row[0] is not None else "",
+            point_key=str(row[1]) if row[1] is not None else "",
+            point_display=row[2],
+            value_median=_to_float(row[3]),
+            value_p25=_to_float(row[4]),
+            value_p75=_to_float(row[5]),
+            sample_days=int(row[6]) if row[6] is not None else None,
+            growth_window=row[7],
+            preferred_change_type=row[8],
+            preferred_hour=_to_float(row[9]),
+            growth_day_min=int(row[10]) if row[10] is not None else None,
+            growth_day_max=int(row[11]) if row[11] is not None else None,
+            growth_day_median=_to_float(row[12]),
+        )
+        for row in rows
+    ]
+    return ClusterKBSnapshot(run_id, rules)
+
+
+def _query_active_run_id(conn) -> Any:
+    row = conn.execute(
+        text(
+            """
+            SELECT id
+            FROM control_strategy_kb_runs
+            WHERE kb_type = 'cluster'
+            ORDER BY is_active DESC, generated_at DESC
+            LIMIT 1
+            """
+        )
+    ).fetchone()
+    return row[0] if row else None
+
+
+def _to_float(value: Any) -> Optional[float]:
+    return None if value is None else float(value)
+
+
+# ===================== 进程级快照 =====================
+_SNAPSHOT: Optional[ClusterKBSnapshot] = None
+_SNAPSHOT_CHECKED_AT: float = 0.0
+_SNAPSHOT_LOCK = threading.Lock()
+
+
+def get_cluster_kb_snapshot(
+    db_engine: Optional[Engine] = None,
+) -> Optional[ClusterKBSnapshot]:
+    """
+    Get the process-wide cluster KB snapshot (loaded on first use)
+
+    Within CLUSTER_KB_SNAPSHOT_CHECK_SECONDS of the last check the cached snapshot
+    is returned without touching the database; afterwards only the active run_id
+    is queried and the rules are reloaded if it changed.
+
+    Args:
+        db_engine: Database engine (defaults to pgsql_engine)
+    """
+    global _SNAPSHOT, _SNAPSHOT_CHECKED_AT
+    from global_const.const_config import CLUSTER_KB_SNAPSHOT_CHECK_SECONDS
+
+    with _SNAPSHOT_LOCK:
+        now = time.time()
+        if (
+            _SNAPSHOT_CHECKED_AT
+            and now - _SNAPSHOT_CHECKED_AT < CLUSTER_KB_SNAPSHOT_CHECK_SECONDS
+        ):
+            return _SNAPSHOT
+
+        if db_engine is None:
+            from global_const.global_const import pgsql_engine
+
+            db_engine = pgsql_engine
+
+        if _SNAPSHOT is not None:
+            with db_engine.connect() as conn:
+                active_run_id = _query_active_run_id(conn)
+            if active_run_id == _SNAPSHOT.run_id:
+                _SNAPSHOT_CHECKED_AT = now
+                return _SNAPSHOT
+
+        start = time.perf_counter()
+        _SNAPSHOT = load_cluster_kb_snapshot(db_engine)
+        _SNAPSHOT_CHECKED_AT = now
+        if _SNAPSHOT is not None:
+            logger.info(
+                f"[ClusterKB] 已加载聚类知识库快照: run_id={_SNAPSHOT.run_id}, "
+                f"rules={len(_SNAPSHOT)}, points={len(_SNAPSHOT.by_point)}, "
+                f"耗时 {time.perf_counter() - start:.3f}s"
+            )
+        return _SNAPSHOT
+
+
+def invalidate_cluster_kb_snapshot() -> None:
+    """Drop the cached snapshot (called after a new cluster KB run is persisted)"""
+    global _SNAPSHOT, _SNAPSHOT_CHECKED_AT
+    with _SNAPSHOT_LOCK:
+        _SNAPSHOT = None
+        _SNAPSHOT_CHECKED_AT = 0.0
+    logger.info("[ClusterKB] 聚类知识库快照已失效，下次访问时重新加载")
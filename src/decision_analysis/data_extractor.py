@@ -11,12 +11,15 @@ The extractor implements intelligent filtering based on room, time windows, and
 """
 
 from datetime import date, datetime, timedelta
-from typing import Dict, List, Optional
+from typing import TYPE_CHECKING, Dict, List, Optional
 
 import pandas as pd
 from loguru import logger
 from sqlalchemy import Engine
 
+if TYPE_CHECKING:
+    import numpy as np
+
 
 class DataExtractor:
     """
@@ -26,14 +29,17 @@ class DataExtractor:
     and preprocessing capabilities.
     """
 
-    def __init__(self, db_engine: Engine):
+    def __init__(self, db_engine: Engine, embedding_index=None):
         """
         Initialize data extractor
 
         Args:
             db_engine: SQLAlchemy database engine (pgsql_engine)
+            embedding_index: Optional HistoricalEmbeddingIndex used by the
+                "index" similarity search mode (defaults to the process-wide index)
         """
         self.db_engine = db_engine
+        self.embedding_index = embedding_index
         logger.info("[DataExtractor] Initialized")
 
     def extract_embedding_data(
@@ -104,10 +110,10 @@ class DataExtractor:
         )
 
         try:
-            from sqlalchemy import and_, func, select
+            from sqlalchemy import and_, select, true
             from sqlalchemy.orm import Session
 
-            from utils.create_table import ImageTextQuality, MushroomImageEmbedding
+            from utils.create_table import MushroomImageEmbedding
 
             # Calculate time window for image aggregation (still used for metadata)
             aggregation_start = target_datetime - timedelta(
@@ -150,33 +156,8 @@ class DataExtractor:
                     f"range=[{min_growth_day}, {max_growth_day}]"
                 )
 
-                latest_text_quality = (
-                    select(
-                        ImageTextQuality.image_path.label("image_path"),
-                        func.max(ImageTextQuality.created_at).label("max_created_at"),
-                    )
-                    .group_by(ImageTextQuality.image_path)
-                    .subquery()
-                )
-
-                latest_quality = (
-                    select(
-                        ImageTextQuality.image_path.label("image_path"),
-                        ImageTextQuality.llama_description.label("llama_description"),
-                        ImageTextQuality.image_quality_score.label(
-                            "image_quality_score"
-                        ),
-                    )
-                    .join(
-                        latest_text_quality,
-                        and_(
-                            ImageTextQuality.image_path
-                            == latest_text_quality.c.image_path,
-                            ImageTextQuality.created_at
-                            == latest_text_quality.c.max_created_at,
-                        ),
-                    )
-                    .subquery()
+                latest_quality = self._latest_quality_lateral(
+                    MushroomImageEmbedding.image_path
                 )
 
                 # Step 2: Query data directly based on growth day window
@@ -201,11 +182,7 @@ class DataExtractor:
                         MushroomImageEmbedding.image_path,
                         MushroomImageEmbedding.collection_ip,
                     )
-                    .outerjoin(
-                        latest_quality,
-                        latest_quality.c.image_path
-                        == MushroomImageEmbedding.image_path,
-                    )
+                    .outerjoin(latest_quality, true())
                     .where(
                         and_(
                             # Growth day window filter (primary filter)
@@ -311,43 +288,18 @@ class DataExtractor:
         )
 
         try:
-            from sqlalchemy import and_, func, select
+            from sqlalchemy import and_, select, true
             from sqlalchemy.orm import Session
 
-            from utils.create_table import ImageTextQuality, MushroomImageEmbedding
+            from utils.create_table import MushroomImageEmbedding
 
             day_start = target_datetime.replace(
                 hour=0, minute=0, second=0, microsecond=0
             )
 
             with Session(self.db_engine) as session:
-                latest_text_quality = (
-                    select(
-                        ImageTextQuality.image_path.label("image_path"),
-                        func.max(ImageTextQuality.created_at).label("max_created_at"),
-                    )
-                    .group_by(ImageTextQuality.image_path)
-                    .subquery()
-                )
-
-                latest_quality = (
-                    select(
-                        ImageTextQuality.image_path.label("image_path"),
-                        ImageTextQuality.llama_description.label("llama_description"),
-                        ImageTextQuality.image_quality_score.label(
-                            "image_quality_score"
-                        ),
-                    )
-                    .join(
-                        latest_text_quality,
-                        and_(
-                            ImageTextQuality.image_path
-                            == latest_text_quality.c.image_path,
-                            ImageTextQuality.created_at
-                            == latest_text_quality.c.max_created_at,
-                        ),
-                    )
-                    .subquery()
+                latest_quality = self._latest_quality_lateral(
+                    MushroomImageEmbedding.image_path
                 )
 
                 query = (
@@ -370,11 +322,7 @@ class DataExtractor:
                         MushroomImageEmbedding.image_path,
                         MushroomImageEmbedding.collection_ip,
                     )
-                    .outerjoin(
-                        latest_quality,
-                        latest_quality.c.image_path
-                        == MushroomImageEmbedding.image_path,
-                    )
+                    .outerjoin(latest_quality, true())
                     .where(
                         and_(
                             MushroomImageEmbedding.room_id == room_id,
@@ -479,10 +427,10 @@ class DataExtractor:
         )
 
         try:
-            from sqlalchemy import and_, func, select
+            from sqlalchemy import and_, select, true
             from sqlalchemy.orm import Session
 
-            from utils.create_table import ImageTextQuality, MushroomImageEmbedding
+            from utils.create_table import MushroomImageEmbedding
 
             # Calculate growth day range
             min_growth_day = target_growth_day - growth_day_window
@@ -499,33 +447,8 @@ class DataExtractor:
             )
 
             with Session(self.db_engine) as session:
-                latest_text_quality = (
-                    select(
-                        ImageTextQuality.image_path.label("image_path"),
-                        func.max(ImageTextQuality.created_at).label("max_created_at"),
-                    )
-                    .group_by(ImageTextQuality.image_path)
-                    .subquery()
-                )
-
-                latest_quality = (
-                    select(
-                        ImageTextQuality.image_path.label("image_path"),
-                        ImageTextQuality.llama_description.label("llama_description"),
-                        ImageTextQuality.image_quality_score.label(
-                            "image_quality_score"
-                        ),
-                    )
-                    .join(
-                        latest_text_quality,
-                        and_(
-                            ImageTextQuality.image_path
-                            == latest_text_quality.c.image_path,
-                            ImageTextQuality.created_at
-                            == latest_text_quality.c.max_created_at,
-                        ),
-                    )
-                    .subquery()
+                latest_quality = self._latest_quality_lateral(
+                    MushroomImageEmbedding.image_path
                 )
 
                 # Query historical data excluding current batch
@@ -548,13 +471,11 @@ class DataExtractor:
                         MushroomImageEmbedding.light_config,
                         MushroomImageEmbedding.image_path,
                     )
-                    .outerjoin(
-                        latest_quality,
-                        latest_quality.c.image_path
-                        == MushroomImageEmbedding.image_path,
-                    )
+                    .outerjoin(latest_quality, true())
                     .where(
                         and_(
+                            # Same room as the pgvector / index search modes
+                            MushroomImageEmbedding.room_id == str(room_id),
                             # Exclude current batch
                             MushroomImageEmbedding.in_date != current_in_date,
                             # Growth day window filter
@@ -586,7 +507,7 @@ class DataExtractor:
                 if not rows:
                     logger.warning(
                         f"[DataExtractor] No historical data found for similarity matching: "
-                        f"exclude_in_date={current_in_date}, "
+                        f"room_id={room_id}, exclude_in_date={current_in_date}, "
                         f"growth_day_range=[{min_growth_day}, {max_growth_day}]"
                     )
                     return pd.DataFrame()
@@ -723,11 +644,23 @@ class DataExtractor:
         date_window_days: int = 3,
         embedding_similarity_weight: float = 0.7,
         env_similarity_weight: float = 0.3,
+        search_mode: Optional[str] = None,
     ) -> pd.DataFrame:
         """
         Find top-k most similar historical cases based on embedding similarity
         and environmental parameter closeness
 
+        Search modes:
+        - "index": cosine ranking against the in-process HistoricalEmbeddingIndex;
+          only the top candidates' details are fetched by primary key.
+          Falls back to "pgvector" if the index is unavailable.
+        - "pgvector": cosine ranking is pushed into PostgreSQL via the ``<=>``
+          operator (room / growth-day window / in_date exclusion in the same
+          query); only the top ``top_k * 5`` candidates are returned, without
+          embeddings. Falls back to "pandas" if the query fails.
+        - "pandas": legacy mode, all candidates (with embeddings) are loaded
+          and ranked in Python.
+
         Args:
             current_embedding: Current embedding vector
             current_env_params: Current environmental parameters (temp, humidity, co2)
@@ -736,118 +669,85 @@ class DataExtractor:
             target_growth_day: Target growth day
             growth_day_window: Growth day window (±days)
             top_k: Number of top similar cases to return
+            search_mode: "index", "pgvector" or "pandas" (default: DECISION_ANALYSIS_SIMILARITY_SEARCH_MODE)
 
         Returns:
             DataFrame with top-k most similar historical cases
             Includes similarity scores and environmental parameter differences
         """
+        from global_const.const_config import DECISION_ANALYSIS_SIMILARITY_SEARCH_MODE
+
+        search_mode = search_mode or DECISION_ANALYSIS_SIMILARITY_SEARCH_MODE
         logger.info(
             f"[DataExtractor] Finding top-{top_k} similar historical cases: "
             f"room_id={room_id}, current_in_date={current_in_date}, "
-            f"target_growth_day={target_growth_day}"
+            f"target_growth_day={target_growth_day}, search_mode={search_mode}"
         )
 
         try:
             import numpy as np
-            from sklearn.metrics.pairwise import cosine_similarity
-
-            # Get historical data
-            historical_df = self.extract_historical_embedding_data_for_similarity(
-                room_id=room_id,
-                current_in_date=current_in_date,
-                target_growth_day=target_growth_day,
-                growth_day_window=growth_day_window,
-                top_k=top_k * 5,  # Get more candidates for better selection
-                analysis_datetime=analysis_datetime,
-                date_window_days=date_window_days,
-            )
 
-            if historical_df.empty:
-                logger.warning(
-                    "[DataExtractor] No historical data available for similarity matching"
-                )
-                return pd.DataFrame()
+            current_embedding = np.asarray(current_embedding, dtype=np.float32)
+            candidate_limit = top_k * 5  # Get more candidates for better selection
 
-            # Calculate embedding similarities
-            similarities = []
-            valid_indices = []
+            valid_df = None
+            if search_mode == "index":
+                try:
+                    valid_df = self._query_similar_candidates_index(
+                        current_embedding=current_embedding,
+                        room_id=room_id,
+                        current_in_date=current_in_date,
+                        target_growth_day=target_growth_day,
+                        growth_day_window=growth_day_window,
+                        limit=candidate_limit,
+                        analysis_datetime=analysis_datetime,
+                        date_window_days=date_window_days,
+                    )
+                except Exception as e:
+                    logger.warning(
+                        f"[DataExtractor] Embedding index search failed, "
+                        f"falling back to pgvector mode: {e}"
+                    )
+                    search_mode = "pgvector"
 
-            for idx, row in historical_df.iterrows():
+            if valid_df is None and search_mode == "pgvector":
                 try:
-                    if row["embedding"] is not None:
-                        hist_embedding = np.array(row["embedding"])
-                        if hist_embedding.shape == current_embedding.shape:
-                            similarity = cosine_similarity(
-                                [current_embedding], [hist_embedding]
-                            )[0][0]
-                            similarities.append(similarity)
-                            valid_indices.append(idx)
-                        else:
-                            logger.debug(
-                                f"[DataExtractor] Embedding shape mismatch for row {idx}"
-                            )
-                    else:
-                        logger.debug(f"[DataExtractor] No embedding data for row {idx}")
+                    valid_df = self._query_similar_candidates_pgvector(
+                        current_embedding=current_embedding,
+                        room_id=room_id,
+                        current_in_date=current_in_date,
+                        target_growth_day=target_growth_day,
+                        growth_day_window=growth_day_window,
+                        limit=candidate_limit,
+                        analysis_datetime=analysis_datetime,
+                        date_window_days=date_window_days,
+                    )
                 except Exception as e:
-                    logger.debug(
-                        f"[DataExtractor] Error calculating similarity for row {idx}: {e}"
+                    logger.warning(
+                        f"[DataExtractor] pgvector similarity search failed, "
+                        f"falling back to pandas mode: {e}"
                     )
-                    continue
 
-            if not similarities:
+            if valid_df is None:
+                valid_df = self._score_similar_candidates_pandas(
+                    current_embedding=current_embedding,
+                    room_id=room_id,
+                    current_in_date=current_in_date,
+                    target_growth_day=target_growth_day,
+                    growth_day_window=growth_day_window,
+                    top_k=candidate_limit,
+                    analysis_datetime=analysis_datetime,
+                    date_window_days=date_window_days,
+                )
+
+            if valid_df.empty:
                 logger.warning(
                     "[DataExtractor] No valid embeddings found for similarity calculation"
                 )
                 return pd.DataFrame()
 
-            # Filter to valid rows and add similarity scores
-            valid_df = historical_df.loc[valid_indices].copy()
-            valid_df["embedding_similarity"] = similarities
-
-            # Calculate environmental parameter differences
-            current_temp = current_env_params.get("temperature")
-            current_humidity = current_env_params.get("humidity")
-            current_co2 = current_env_params.get("co2")
-
-            valid_df["temp_diff"] = None
-            valid_df["humidity_diff"] = None
-            valid_df["co2_diff"] = None
-            valid_df["env_similarity_score"] = 0.0
-
-            for idx, row in valid_df.iterrows():
-                temp_diff = (
-                    abs(row["temperature"] - current_temp)
-                    if (current_temp is not None and row["temperature"] is not None)
-                    else float("inf")
-                )
-
-                humidity_diff = (
-                    abs(row["humidity"] - current_humidity)
-                    if (current_humidity is not None and row["humidity"] is not None)
-                    else float("inf")
-                )
-
-                co2_diff = (
-                    abs(row["co2"] - current_co2)
-                    if (current_co2 is not None and row["co2"] is not None)
-                    else float("inf")
-                )
-
-                valid_df.at[idx, "temp_diff"] = temp_diff
-                valid_df.at[idx, "humidity_diff"] = humidity_diff
-                valid_df.at[idx, "co2_diff"] = co2_diff
-
-                # Calculate combined environmental similarity score
-                # Lower differences = higher similarity
-                env_score = 0.0
-                if temp_diff != float("inf"):
-                    env_score += 1.0 / (1.0 + temp_diff / 10.0)  # Normalize by 10°C
-                if humidity_diff != float("inf"):
-                    env_score += 1.0 / (1.0 + humidity_diff / 20.0)  # Normalize by 20%
-                if co2_diff != float("inf"):
-                    env_score += 1.0 / (1.0 + co2_diff / 500.0)  # Normalize by 500ppm
-
-                valid_df.at[idx, "env_similarity_score"] = env_score
+            # Calculate environmental parameter differences (vectorised)
+            valid_df = self._compute_env_similarity(valid_df, current_env_params)
 
             # Calculate combined similarity score
             # 权重可配置，默认 70% embedding + 30% environmental
@@ -867,8 +767,7 @@ class DataExtractor:
                 normalized_env_scores = 0.0
 
             valid_df["combined_similarity"] = (
-                emb_w * valid_df["embedding_similarity"]
-                + env_w * normalized_env_scores
+                emb_w * valid_df["embedding_similarity"] + env_w * normalized_env_scores
             )
 
             # Sort by combined similarity and select top-k
@@ -901,6 +800,329 @@ class DataExtractor:
             )
             return pd.DataFrame()
 
+    def _query_similar_candidates_pgvector(
+        self,
+        current_embedding: "np.ndarray",
+        room_id: str,
+        current_in_date: date,
+        target_growth_day: int,
+        growth_day_window: int,
+        limit: int,
+        analysis_datetime: Optional[datetime] = None,
+        date_window_days: int = 3,
+    ) -> pd.DataFrame:
+        """
+        Rank historical candidates inside PostgreSQL using pgvector cosine distance
+
+        The ``<=>`` ordering, room filter, growth-day window and current batch
+        exclusion run in one query; only the top ``limit`` rows are transferred
+        and embeddings are not returned.
+
+        Returns:
+            DataFrame with an ``embedding_similarity`` column (1 - cosine distance)
+            plus the environmental parameter columns
+        """
+        from sqlalchemy import and_, select
+
+        from utils.create_table import MushroomImageEmbedding
+
+        min_growth_day = target_growth_day - growth_day_window
+        max_growth_day = target_growth_day + growth_day_window
+
+        distance = MushroomImageEmbedding.embedding.cosine_distance(
+            current_embedding.tolist()
+        )
+        conditions = [
+            MushroomImageEmbedding.room_id == str(room_id),
+            MushroomImageEmbedding.in_date != current_in_date,
+            MushroomImageEmbedding.growth_day >= min_growth_day,
+            MushroomImageEmbedding.growth_day <= max_growth_day,
+            MushroomImageEmbedding.embedding.isnot(None),
+            MushroomImageEmbedding.env_sensor_status.isnot(None),
+        ]
+        if analysis_datetime is not None and date_window_days > 0:
+            conditions.extend(
+                [
+                    MushroomImageEmbedding.collection_datetime
+                    >= analysis_datetime - timedelta(days=date_window_days),
+                    MushroomImageEmbedding.collection_datetime <= analysis_datetime,
+                ]
+            )
+
+        ranked = (
+            select(
+                *self._candidate_columns(),
+                (1 - distance).label("embedding_similarity"),
+            )
+            .where(and_(*conditions))
+            .order_by(distance)
+            .limit(limit)
+            .cte("ranked_candidates")
+        )
+
+        df = self._load_candidate_rows(ranked)
+        if df.empty:
+            logger.warning(
+                f"[DataExtractor] No historical data found for pgvector similarity search: "
+                f"room_id={room_id}, exclude_in_date={current_in_date}, "
+                f"growth_day_range=[{min_growth_day}, {max_growth_day}]"
+            )
+            return df
+
+        df["embedding_similarity"] = df["embedding_similarity"].astype(float)
+        df = df.sort_values("embedding_similarity", ascending=False)
+        df = self._extract_env_parameters_from_sensor_data(df)
+        df["is_historical_batch"] = True
+        df["excluded_current_batch"] = current_in_date
+
+        logger.debug(
+            f"[DataExtractor] pgvector search returned {len(df)} candidates "
+            f"from {df['in_date'].nunique()} batches"
+        )
+        return df
+
+    def _query_similar_candidates_index(
+        self,
+        current_embedding: "np.ndarray",
+        room_id: str,
+        current_in_date: date,
+        target_growth_day: int,
+        growth_day_window: int,
+        limit: int,
+        analysis_datetime: Optional[datetime] = None,
+        date_window_days: int = 3,
+    ) -> pd.DataFrame:
+        """
+        Rank historical candidates with the in-process HistoricalEmbeddingIndex
+
+        Ranking happens in memory; only the top ``limit`` rows' details are
+        loaded from the database by primary key.
+
+        Returns:
+            DataFrame with an ``embedding_similarity`` column plus the
+            environmental parameter columns
+        """
+        from sqlalchemy import select
+
+        from decision_analysis.embedding_index import get_historical_embedding_index
+        from utils.create_table import MushroomImageEmbedding
+
+        index = self.embedding_index or get_historical_embedding_index(self.db_engine)
+
+        date_range = None
+        if analysis_datetime is not None and date_window_days > 0:
+            date_range = (
+                analysis_datetime - timedelta(days=date_window_days),
+                analysis_datetime,
+            )
+
+        hits = index.search(
+            current_embedding,
+            top_k=limit,
+            room_id=room_id,
+            growth_day_range=(
+                target_growth_day - growth_day_window,
+                target_growth_day + growth_day_window,
+            ),
+            exclude_in_date=current_in_date,
+            date_range=date_range,
+            require_env_status=True,
+        )
+        if hits.empty:
+            logger.warning(
+                f"[DataExtractor] No historical data found in embedding index: "
+                f"room_id={room_id}, exclude_in_date={current_in_date}"
+            )
+            return pd.DataFrame()
+
+        ranked = (
+            select(*self._candidate_columns())
+            .where(MushroomImageEmbedding.id.in_(hits["id"].tolist()))
+            .cte("ranked_candidates")
+        )
+        df = self._load_candidate_rows(ranked)
+        if df.empty:
+            return df
+
+        similarity_by_id = dict(zip(hits["id"], hits["similarity"]))
+        df["embedding_similarity"] = df["id"].map(similarity_by_id).astype(float)
+        df = df.sort_values("embedding_similarity", ascending=False)
+        df = self._extract_env_parameters_from_sensor_data(df)
+        df["is_historical_batch"] = True
+        df["excluded_current_batch"] = current_in_date
+
+        logger.debug(
+            f"[DataExtractor] Embedding index search returned {len(df)} candidates "
+            f"(index size={index.size})"
+        )
+        return df
+
+    @staticmethod
+    def _candidate_columns() -> list:
+        """Embedding table columns returned for similarity candidates (no vectors)"""
+        from utils.create_table import MushroomImageEmbedding
+
+        return [
+            MushroomImageEmbedding.id,
+            MushroomImageEmbedding.collection_datetime,
+            MushroomImageEmbedding.room_id,
+            MushroomImageEmbedding.in_date,
+            MushroomImageEmbedding.in_num,
+            MushroomImageEmbedding.growth_day,
+            MushroomImageEmbedding.semantic_description,
+            MushroomImageEmbedding.env_sensor_status,
+            MushroomImageEmbedding.air_cooler_config,
+            MushroomImageEmbedding.fresh_fan_config,
+            MushroomImageEmbedding.humidifier_config,
+            MushroomImageEmbedding.light_config,
+            MushroomImageEmbedding.image_path,
+        ]
+
+    @staticmethod
+    def _latest_quality_lateral(image_path_column):
+        """
+        Latest ImageTextQuality record of each image, as a LATERAL subquery
+        correlated on ``image_path_column`` (join with ``true()``)
+
+        Each outer row costs one backward scan of the (image_path, created_at)
+        index, so the join grows with the queried window instead of with the
+        whole image_text_quality history.
+        """
+        from sqlalchemy import select
+
+        from utils.create_table import ImageTextQuality
+
+        return (
+            select(
+                ImageTextQuality.llama_description.label("llama_description"),
+                ImageTextQuality.image_quality_score.label("image_quality_score"),
+            )
+            .where(
+                ImageTextQuality.image_path == image_path_column,
+                ImageTextQuality.created_at.isnot(None),
+            )
+            .order_by(ImageTextQuality.created_at.desc())
+            .limit(1)
+            .lateral("latest_quality")
+        )
+
+    def _load_candidate_rows(self, ranked) -> pd.DataFrame:
+        """
+        Load candidate rows from a ranked CTE, joined with the latest
+        ImageTextQuality record of each candidate image
+
+        Args:
+            ranked: CTE selecting ``_candidate_columns()`` (optionally plus
+                ``embedding_similarity``)
+        """
+        from sqlalchemy import select, true
+        from sqlalchemy.orm import Session
+
+        latest_quality = self._latest_quality_lateral(ranked.c.image_path)
+        query = select(
+            ranked,
+            latest_quality.c.llama_description,
+            latest_quality.c.image_quality_score,
+        ).outerjoin(latest_quality, true())
+
+        with Session(self.db_engine) as session:
+            rows = session.execute(query).fetchall()
+
+        if not rows:
+            return pd.DataFrame()
+        return pd.DataFrame(rows, columns=list(query.selected_columns.keys()))
+
+    def _score_similar_candidates_pandas(
+        self,
+        current_embedding: "np.ndarray",
+        room_id: str,
+        current_in_date: date,
+        target_growth_day: int,
+        growth_day_window: int,
+        top_k: int,
+        analysis_datetime: Optional[datetime] = None,
+        date_window_days: int = 3,
+    ) -> pd.DataFrame:
+        """
+        Legacy candidate scoring: load historical embeddings and compute cosine
+        similarity in Python
+
+        Returns:
+            DataFrame of rows with a valid embedding and an
+            ``embedding_similarity`` column (empty if none)
+        """
+        import numpy as np
+
+        historical_df = self.extract_historical_embedding_data_for_similarity(
+            room_id=room_id,
+            current_in_date=current_in_date,
+            target_growth_day=target_growth_day,
+            growth_day_window=growth_day_window,
+            top_k=top_k,
+            analysis_datetime=analysis_datetime,
+            date_window_days=date_window_days,
+        )
+
+        if historical_df.empty:
+            logger.warning(
+                "[DataExtractor] No historical data available for similarity matching"
+            )
+            return pd.DataFrame()
+
+        valid_mask = historical_df["embedding"].map(
+            lambda e: e is not None and np.shape(e) == current_embedding.shape
+        )
+        if not valid_mask.any():
+            return pd.DataFrame()
+
+        valid_df = historical_df.loc[valid_mask].copy()
+        matrix = np.stack(valid_df["embedding"].map(np.asarray).to_list()).astype(
+            np.float32
+        )
+        norms = np.linalg.norm(matrix, axis=1) * np.linalg.norm(current_embedding)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            similarities = np.where(norms > 0, matrix @ current_embedding / norms, 0.0)
+        valid_df["embedding_similarity"] = similarities.astype(float)
+        return valid_df
+
+    @staticmethod
+    def _compute_env_similarity(
+        df: pd.DataFrame, current_env_params: dict
+    ) -> pd.DataFrame:
+        """
+        Vectorised environmental parameter differences and similarity score
+
+        Missing values (current or historical) give an infinite difference
+        and contribute nothing to ``env_similarity_score``.
+        """
+        import numpy as np
+
+        env_score = np.zeros(len(df), dtype=float)
+        # (column, diff column, normalisation scale): 10°C, 20%, 500ppm
+        for column, diff_column, scale in (
+            ("temperature", "temp_diff", 10.0),
+            ("humidity", "humidity_diff", 20.0),
+            ("co2", "co2_diff", 500.0),
+        ):
+            current_value = current_env_params.get(column)
+            if current_value is None or column not in df.columns:
+                diff = np.full(len(df), np.inf)
+            else:
+                values = pd.to_numeric(df[column], errors="coerce").to_numpy(
+                    dtype=float
+                )
+                diff = np.abs(values - float(current_value))
+                diff[np.isnan(diff)] = np.inf
+
+            finite = np.isfinite(diff)
+            env_score += np.where(
+                finite, 1.0 / (1.0 + np.where(finite, diff, 0.0) / scale), 0.0
+            )
+            df[diff_column] = diff
+
+        df["env_similarity_score"] = env_score
+        return df
+
     def _add_multi_image_metadata(
         self, df: pd.DataFrame, aggregation_start: datetime, aggregation_end: datetime
     ) -> pd.DataFrame:
@@ -1676,6 +1898,7 @@ class DataExtractor:
         start_time: datetime,
         end_time: datetime,
         device_types: Optional[List[str]] = None,
+        raise_on_error: bool = False,
     ) -> pd.DataFrame:
         """
         Extract device setpoint change records from DeviceSetpointChange table
@@ -1693,6 +1916,8 @@ class DataExtractor:
             end_time: End time of the query range
             device_types: List of device types to filter (optional)
                          e.g., ['air_cooler', 'fresh_air_fan', 'humidifier', 'grow_light']
+            raise_on_error: Re-raise query errors instead of returning an empty
+                DataFrame, so callers can tell a failure from "no changes"
 
         Returns:
             DataFrame containing device change records with columns:
@@ -1812,6 +2037,8 @@ class DataExtractor:
             logger.error(
                 f"[DataExtractor] Failed to extract device changes: {e}", exc_info=True
             )
+            if raise_on_error:
+                raise
             return pd.DataFrame()
 
     def validate_env_params(self, data: pd.DataFrame) -> List[str]:
@@ -11,14 +11,14 @@ import time
 from datetime import datetime
 from pathlib import Path
 from statistics import mean, pstdev
-from typing import Dict, Optional
+from typing import Any, Dict, Optional
 
 from dynaconf import Dynaconf
 from loguru import logger
-from sqlalchemy import Engine, text
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy import Engine
 
 from decision_analysis.clip_matcher import CLIPMatcher
+from decision_analysis.cluster_kb import get_cluster_kb_snapshot
 from decision_analysis.data_extractor import DataExtractor
 from decision_analysis.data_models import (
     DecisionOutput,
@@ -74,7 +74,10 @@ class DecisionAnalyzer:
         logger.info("[DecisionAnalyzer] 正在初始化决策分析器...")
 
         # Import decision analysis configuration
-        from global_const.const_config import DECISION_ANALYSIS_CONFIG
+        from global_const.const_config import (
+            DECISION_ANALYSIS_CONFIG,
+            DECISION_ANALYSIS_USE_EMBEDDING_INDEX,
+        )
 
         self.db_engine = db_engine
         self.settings = settings
@@ -125,8 +128,18 @@ class DecisionAnalyzer:
             logger.debug("[DecisionAnalyzer] 正在初始化 DataExtractor...")
             self.data_extractor = DataExtractor(db_engine)
 
+            self.embedding_index = None
+            if DECISION_ANALYSIS_USE_EMBEDDING_INDEX:
+                from decision_analysis.embedding_index import (
+                    get_historical_embedding_index,
+                )
+
+                self.embedding_index = get_historical_embedding_index(db_engine)
+
             logger.debug("[DecisionAnalyzer] 正在初始化 CLIPMatcher...")
-            self.clip_matcher = CLIPMatcher(db_engine)
+            self.clip_matcher = CLIPMatcher(
+                db_engine, embedding_index=self.embedding_index
+            )
 
             logger.debug("[DecisionAnalyzer] 正在初始化 TemplateRenderer...")
             self.template_renderer = TemplateRenderer(
@@ -663,6 +676,7 @@ class DecisionAnalyzer:
         env_similarity_weight: float = 0.3,
         enable_kb_human_prior: bool = False,
         multi_image_boost: bool = True,
+        extracted_frames: Optional[Dict[str, Any]] = None,
     ) -> "EnhancedDecisionOutput":
         """
         Execute enhanced decision analysis workflow with multi-image support
@@ -676,6 +690,10 @@ class DecisionAnalyzer:
         Args:
             room_id: Room number (607/608/611/612)
             analysis_datetime: Analysis timestamp
+            extracted_frames: Optional dict filled with frames extracted in STEP 1
+                ("device_changes": 7-day device changes before truncation, or
+                None if the extraction failed) so callers can reuse them
+                without querying again
 
         Returns:
             EnhancedDecisionOutput with structured parameter adjustments
@@ -932,11 +950,22 @@ class DecisionAnalyzer:
             from datetime import timedelta
 
             start_time_changes = analysis_datetime - timedelta(days=7)
-            device_changes = self.data_extractor.extract_device_changes(
-                room_id=room_id,
-                start_time=start_time_changes,
-                end_time=analysis_datetime,
-            )
+            try:
+                device_changes = self.data_extractor.extract_device_changes(
+                    room_id=room_id,
+                    start_time=start_time_changes,
+                    end_time=analysis_datetime,
+                    raise_on_error=True,
+                )
+                extracted_device_changes = device_changes
+            except Exception:
+                # 提取失败（已记录错误）时按无变更继续分析，但不交给调用方复用
+                import pandas as pd
+
+                device_changes = pd.DataFrame()
+                extracted_device_changes = None
+            if extracted_frames is not None:
+                extracted_frames["device_changes"] = extracted_device_changes
 
             # Limit device changes to prevent prompt overflow
             MAX_DEVICE_CHANGES = 30
@@ -1463,54 +1492,23 @@ class DecisionAnalyzer:
         except Exception:
             target_day = None
 
-        Session = sessionmaker(bind=self.db_engine)
         try:
-            with Session() as session:
-                run_row = session.execute(
-                    text(
-                        """
-                    SELECT id
-                    FROM control_strategy_kb_runs
-                    WHERE kb_type = 'cluster'
-                    ORDER BY is_active DESC, generated_at DESC
-                    LIMIT 1
-                    """
-                    )
-                ).fetchone()
-
-                if not run_row:
-                    return ""
-
-                run_id = run_row[0]
-                if target_day is None:
-                    rows = session.execute(
-                        text(
-                            """
-                        SELECT device_type, point_display, growth_window, value_median,
-                               value_p25, value_p75, preferred_change_type, preferred_hour
-                        FROM control_strategy_kb_cluster_rules
-                        WHERE run_id = :run_id
-                        ORDER BY sample_days DESC NULLS LAST
-                        LIMIT 8
-                        """
-                        ),
-                        {"run_id": run_id},
-                    ).fetchall()
-                else:
-                    rows = session.execute(
-                        text(
-                            """
-                        SELECT device_type, point_display, growth_window, value_median,
-                               value_p25, value_p75, preferred_change_type, preferred_hour,
-                               ABS(COALESCE(growth_day_median, :target_day) - :target_day) AS day_gap
-                        FROM control_strategy_kb_cluster_rules
-                        WHERE run_id = :run_id
-                        ORDER BY day_gap ASC, sample_days DESC NULLS LAST
-                        LIMIT 8
-                        """
-                        ),
-                        {"run_id": run_id, "target_day": target_day},
-                    ).fetchall()
+            snapshot = get_cluster_kb_snapshot(self.db_engine)
+            if snapshot is None:
+                return ""
+            rows = [
+                (
+                    rule.device_type,
+                    rule.point_display,
+                    rule.growth_window,
+                    rule.value_median,
+                    rule.value_p25,
+                    rule.value_p75,
+                    rule.preferred_change_type,
+                    rule.preferred_hour,
+                )
+                for rule in snapshot.nearest(target_day, limit=8)
+            ]
 
             if not rows:
                 return ""
@@ -1810,6 +1808,18 @@ class DecisionAnalyzer:
                 )
                 return 1.0
 
+            if getattr(self, "embedding_index", None) is not None:
+                try:
+                    index_consistency = self._calculate_image_consistency_from_index(
+                        embedding_df
+                    )
+                    if index_consistency is not None:
+                        return index_consistency
+                except Exception as e:
+                    logger.warning(
+                        f"[DecisionAnalyzer] Embedding index consistency failed, using pgvector: {e}"
+                    )
+
             import numpy as np
             from sqlalchemy import text
             from sqlalchemy.orm import sessionmaker
@@ -2125,6 +2135,60 @@ class DecisionAnalyzer:
                 f"[DecisionAnalyzer] Camera IP-based consistency calculation completed in {consistency_time:.2f}s"
             )
 
+    def _calculate_image_consistency_from_index(self, embedding_df) -> Optional[float]:
+        """
+        Camera IP-based image consistency computed against the in-process
+        HistoricalEmbeddingIndex (same steps as the pgvector version, no SQL)
+
+        Args:
+            embedding_df: DataFrame with 'room_id' and 'in_date' columns
+
+        Returns:
+            Consistency score between 0.0 and 1.0, or None when the index has
+            too little data (caller falls back to the pgvector path)
+        """
+        import numpy as np
+
+        room_id = embedding_df.iloc[0].get("room_id")
+        current_in_date = embedding_df.iloc[0].get("in_date")
+        if not room_id:
+            return None
+
+        # STEP 1: latest image from each camera IP (current batch excluded)
+        camera_embeddings = self.embedding_index.latest_by_camera(
+            str(room_id), exclude_in_date=current_in_date
+        )
+        if len(camera_embeddings) < 2:
+            return None
+
+        # STEP 3: top-5 cross-camera matches per camera
+        all_similarity_scores = []
+        for camera_ip, embedding in camera_embeddings.items():
+            matches = self.embedding_index.search(
+                embedding,
+                top_k=5,
+                room_id=str(room_id),
+                exclude_in_date=current_in_date,
+                exclude_collection_ip=camera_ip,
+                require_collection_ip=True,
+                refresh=False,
+            )
+            all_similarity_scores.extend(
+                np.maximum(0.0, matches["similarity"].to_numpy(dtype=float))
+            )
+
+        # STEP 4: overall consistency
+        if not all_similarity_scores:
+            return 0.5  # Default moderate consistency
+
+        overall_consistency = max(0.0, min(1.0, float(np.mean(all_similarity_scores))))
+        logger.info(
+            f"[DecisionAnalyzer] Cross-camera consistency (embedding index): "
+            f"cameras={len(camera_embeddings)}, pairs={len(all_similarity_scores)}, "
+            f"consistency={overall_consistency:.3f}"
+        )
+        return overall_consistency
+
     def _calculate_image_consistency_fallback(self, embedding_df) -> float:
         """
         Fallback method for image consistency calculation using manual cosine similarity
@@ -0,0 +1,534 @@
+"""
+Historical Embedding Index Module
+
+In-process vector index over ``mushroom_embedding`` used by CLIPMatcher and the
+image consistency scorer instead of per-room pgvector queries.
+
+- All embeddings live in one contiguous, L2-normalised float32 matrix
+- Rows are partitioned by room_id and sorted by growth_day, so growth-day
+  windows resolve to a slice via ``searchsorted``
+- Incremental refresh loads only ``id > last_seen_id``; a periodic full
+  rebuild picks up updated / deleted rows
+- Optional persistence to ``<path>.npy`` (memory-mapped on load) plus a
+  ``<path>.meta.npz`` sidecar for fast restarts
+"""
+
+import json
+import threading
+import time
+from datetime import date, datetime
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from loguru import logger
+from sqlalchemy import Engine, select
+
+# 元数据字段 -> numpy dtype（持久化时按此顺序写入 .meta.npz）
+_META_DTYPES: Dict[str, str] = {
+    "ids": "int64",
+    "room_ids": "U10",
+    "growth_days": "int32",
+    "in_dates": "datetime64[D]",
+    "collection_datetimes": "datetime64[us]",
+    "collection_ips": "U15",
+    "has_env_status": "bool",
+}
+
+
+class HistoricalEmbeddingIndex:
+    """
+    In-memory cosine top-k index over historical mushroom image embeddings
+
+    Thread-safe: refresh and search share one re-entrant lock.
+    """
+
+    def __init__(
+        self,
+        db_engine: Engine,
+        persist_path: Optional[str] = None,
+        refresh_interval_seconds: int = 300,
+        full_rebuild_interval_seconds: int = 86400,
+        fetch_batch_size: int = 5000,
+    ):
+        """
+        Initialize the index (data is loaded lazily on first search)
+
+        Args:
+            db_engine: SQLAlchemy database engine (pgsql_engine)
+            persist_path: File prefix for .npy/.meta.npz persistence (None = disabled)
+            refresh_interval_seconds: Minimum interval between incremental refreshes
+            full_rebuild_interval_seconds: Interval for a full reload from the database
+            fetch_batch_size: Rows per streamed fetch while loading
+        """
+        self.db_engine = db_engine
+        self.persist_path = Path(persist_path) if persist_path else None
+        self.refresh_interval_seconds = refresh_interval_seconds
+        self.full_rebuild_interval_seconds = full_rebuild_interval_seconds
+        self.fetch_batch_size = fetch_batch_size
+
+        self._lock = threading.RLock()
+        self._matrix: Optional[np.ndarray] = None
+        self._meta: Dict[str, np.ndarray] = {}
+        self._size = 0
+        self._partitions: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+        self.last_seen_id = 0
+        self._last_refresh = 0.0
+        self._last_full_rebuild = 0.0
+
+    # ------------------------------------------------------------------
+    # Properties
+    # ------------------------------------------------------------------
+    @property
+    def size(self) -> int:
+        """Number of indexed embeddings"""
+        return self._size
+
+    @property
+    def dim(self) -> int:
+        """Embedding dimension (0 if empty)"""
+        return 0 if self._matrix is None else int(self._matrix.shape[1])
+
+    # ------------------------------------------------------------------
+    # Loading
+    # ------------------------------------------------------------------
+    def ensure_fresh(self) -> None:
+        """Load / refresh the index if the refresh interval has elapsed"""
+        now = time.time()
+        with self._lock:
+            if self._matrix is None and self.persist_path and self.load():
+                self._last_full_rebuild = now
+            if now - self._last_full_rebuild >= self.full_rebuild_interval_seconds:
+                self.rebuild()
+            elif now - self._last_refresh >= self.refresh_interval_seconds:
+                self.refresh()
+
+    def rebuild(self) -> int:
+        """Drop everything and reload all embeddings from the database"""
+        with self._lock:
+            previous = (
+                self._matrix,
+                self._meta,
+                self._size,
+                self._partitions,
+                self.last_seen_id,
+            )
+            self._matrix = None
+            self._meta = {}
+            self._size = 0
+            self._partitions = {}
+            self.last_seen_id = 0
+            try:
+                added = self.refresh()
+            except Exception:
+                # 重建失败时保留旧索引继续服务
+                (
+                    self._matrix,
+                    self._meta,
+                    self._size,
+                    self._partitions,
+                    self.last_seen_id,
+                ) = previous
+                raise
+            self._last_full_rebuild = time.time()
+            logger.info(
+                f"[EmbeddingIndex] Full rebuild completed: {self._size} embeddings"
+            )
+            return added
+
+    def refresh(self) -> int:
+        """
+        Incrementally load embeddings with ``id > last_seen_id``
+
+        Returns:
+            Number of newly added rows
+        """
+        from utils.create_table import MushroomImageEmbedding
+
+        start_time = time.time()
+        query = (
+            select(
+                MushroomImageEmbedding.id,
+                MushroomImageEmbedding.room_id,
+                MushroomImageEmbedding.growth_day,
+                MushroomImageEmbedding.in_date,
+                MushroomImageEmbedding.collection_datetime,
+                MushroomImageEmbedding.collection_ip,
+                MushroomImageEmbedding.env_sensor_status.isnot(None),
+                MushroomImageEmbedding.embedding,
+            )
+            .where(MushroomImageEmbedding.id > self.last_seen_id)
+            .where(MushroomImageEmbedding.embedding.isnot(None))
+            .order_by(MushroomImageEmbedding.id)
+        )
+
+        added = 0
+        with self._lock:
+            try:
+                with self.db_engine.connect() as conn:
+                    result = conn.execution_options(
+                        stream_results=True, yield_per=self.fetch_batch_size
+                    ).execute(query)
+                    for rows in result.partitions():
+                        added += self.add_rows(rows, rebuild_partitions=False)
+            finally:
+                # 所有分块追加完成后统一重建一次分区（含中途失败时已追加的行）
+                if added:
+                    self._rebuild_partitions()
+
+            self._last_refresh = time.time()
+            if added and self.persist_path:
+                self.save()
+
+        if added:
+            logger.info(
+                f"[EmbeddingIndex] Refreshed +{added} embeddings "
+                f"(total={self._size}, last_seen_id={self.last_seen_id}, "
+                f"time={time.time() - start_time:.2f}s)"
+            )
+        return added
+
+    def add_rows(self, rows, rebuild_partitions: bool = True) -> int:
+        """
+        Append rows of (id, room_id, growth_day, in_date, collection_datetime,
+        collection_ip, has_env_status, embedding) to the index
+
+        Args:
+            rows: Row iterable in the refresh() query shape
+            rebuild_partitions: Re-partition the index after appending; callers
+                appending several chunks pass False and call
+                _rebuild_partitions() once at the end (under the lock)
+
+        Returns:
+            Number of rows added
+        """
+        vectors, meta = [], {name: [] for name in _META_DTYPES}
+        expected_dim = self.dim
+        for row in rows:
+            embedding = row[7]
+            if isinstance(embedding, str):
+                embedding = json.loads(embedding)
+            vector = np.asarray(embedding, dtype=np.float32)
+            if vector.ndim != 1 or (expected_dim and vector.shape[0] != expected_dim):
+                continue
+            expected_dim = vector.shape[0]
+            vectors.append(vector)
+            meta["ids"].append(int(row[0]))
+            meta["room_ids"].append(str(row[1]))
+            meta["growth_days"].append(int(row[2]))
+            meta["in_dates"].append(row[3])
+            meta["collection_datetimes"].append(row[4])
+            meta["collection_ips"].append(row[5] or "")
+            meta["has_env_status"].append(bool(row[6]))
+
+        if not vectors:
+            return 0
+
+        matrix = np.vstack(vectors)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        matrix = np.divide(matrix, norms, out=np.zeros_like(matrix), where=norms > 0)
+
+        with self._lock:
+            self._append(
+                matrix,
+                {
+                    name: np.asarray(values, dtype=_META_DTYPES[name])
+                    for name, values in meta.items()
+                },
+            )
+            if rebuild_partitions:
+                self._rebuild_partitions()
+        return len(vectors)
+
+    def _append(self, matrix: np.ndarray, meta: Dict[str, np.ndarray]) -> None:
+        """Append to the contiguous buffers (capacity doubling)"""
+        n_new = matrix.shape[0]
+        required = self._size + n_new
+        capacity = 0 if self._matrix is None else self._matrix.shape[0]
+
+        if required > capacity or not self._matrix.flags.writeable:
+            new_capacity = max(required, capacity * 2, 1024)
+            new_matrix = np.empty((new_capacity, matrix.shape[1]), dtype=np.float32)
+            if self._size:
+                new_matrix[: self._size] = self._matrix[: self._size]
+            self._matrix = new_matrix
+            for name, dtype in _META_DTYPES.items():
+                new_values = np.empty(new_capacity, dtype=dtype)
+                if self._size:
+                    new_values[: self._size] = self._meta[name][: self._size]
+                self._meta[name] = new_values
+
+        self._matrix[self._size : required] = matrix
+        for name in _META_DTYPES:
+            self._meta[name][self._size : required] = meta[name]
+        self._size = required
+        self.last_seen_id = max(self.last_seen_id, int(meta["ids"].max()))
+
+    def _rebuild_partitions(self) -> None:
+        """Partition row indices by room_id, sorted by growth_day"""
+        room_ids = self._meta["room_ids"][: self._size]
+        growth_days = self._meta["growth_days"][: self._size]
+        order = np.lexsort((growth_days, room_ids))
+        sorted_rooms = room_ids[order]
+        boundaries = np.flatnonzero(sorted_rooms[1:] != sorted_rooms[:-1]) + 1
+        partitions = {}
+        for rows in np.split(order, boundaries):
+            if rows.size:
+                partitions[str(room_ids[rows[0]])] = (rows, growth_days[rows])
+        self._partitions = partitions
+
+    # ------------------------------------------------------------------
+    # Persistence
+    # ------------------------------------------------------------------
+    def save(self) -> bool:
+        """Persist matrix (.npy) and metadata (.meta.npz) to persist_path"""
+        if not self.persist_path or self._matrix is None:
+            return False
+        try:
+            self.persist_path.parent.mkdir(parents=True, exist_ok=True)
+            with self._lock:
+                matrix_tmp = self.persist_path.with_suffix(".npy.tmp")
+                meta_tmp = self.persist_path.with_suffix(".meta.npz.tmp")
+                with open(matrix_tmp, "wb") as f:
+                    np.save(f, self._matrix[: self._size])
+                with open(meta_tmp, "wb") as f:
+                    np.savez(f, **{k: v[: self._size] for k, v in self._meta.items()})
+            matrix_tmp.replace(self.persist_path.with_suffix(".npy"))
+            meta_tmp.replace(self.persist_path.with_suffix(".meta.npz"))
+            return True
+        except Exception as e:
+            logger.warning(f"[EmbeddingIndex] Failed to persist index: {e}")
+            return False
+
+    def load(self) -> bool:
+        """Load a persisted index (matrix memory-mapped read-only)"""
+        matrix_path = self.persist_path.with_suffix(".npy")
+        meta_path = self.persist_path.with_suffix(".meta.npz")
+        if not matrix_path.exists() or not meta_path.exists():
+            return False
+        try:
+            matrix = np.load(matrix_path, mmap_mode="r")
+            with np.load(meta_path) as meta:
+                loaded_meta = {name: meta[name] for name in _META_DTYPES}
+            with self._lock:
+                self._matrix = matrix
+                self._meta = loaded_meta
+                self._size = int(matrix.shape[0])
+                self.last_seen_id = int(loaded_meta["ids"].max()) if self._size else 0
+                self._rebuild_partitions()
+            logger.info(
+                f"[EmbeddingIndex] Loaded {self._size} embeddings from {matrix_path}"
+            )
+            return True
+        except Exception as e:
+            logger.warning(f"[EmbeddingIndex] Failed to load persisted index: {e}")
+            return False
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+    def _filter_rows(
+        self,
+        room_id: Optional[str] = None,
+        growth_day_range: Optional[Tuple[int, int]] = None,
+        exclude_in_date: Optional[date] = None,
+        date_range: Optional[Tuple[datetime, datetime]] = None,
+        exclude_collection_ip: Optional[str] = None,
+        require_collection_ip: bool = False,
+        require_env_status: bool = False,
+    ) -> np.ndarray:
+        """Resolve filters to candidate row indices"""
+        if room_id is not None:
+            partition = self._partitions.get(str(room_id))
+            if partition is None:
+                return np.empty(0, dtype=np.int64)
+            rows, days = partition
+            if growth_day_range is not None:
+                lo = np.searchsorted(days, growth_day_range[0], side="left")
+                hi = np.searchsorted(days, growth_day_range[1], side="right")
+                rows = rows[lo:hi]
+        else:
+            rows = np.arange(self._size)
+            if growth_day_range is not None:
+                days = self._meta["growth_days"][rows]
+                rows = rows[
+                    (days >= growth_day_range[0]) & (days <= growth_day_range[1])
+                ]
+
+        mask = np.ones(rows.size, dtype=bool)
+        if exclude_in_date is not None:
+            mask &= self._meta["in_dates"][rows] != np.datetime64(
+                pd.Timestamp(exclude_in_date).date(), "D"
+            )
+        if date_range is not None:
+            times = self._meta["collection_datetimes"][rows]
+            mask &= (times >= np.datetime64(date_range[0], "us")) & (
+                times <= np.datetime64(date_range[1], "us")
+            )
+        if exclude_collection_ip is not None:
+            mask &= self._meta["collection_ips"][rows] != str(exclude_collection_ip)
+        if require_collection_ip:
+            mask &= self._meta["collection_ips"][rows] != ""
+        if require_env_status:
+            mask &= self._meta["has_env_status"][rows]
+        return rows[mask]
+
+    def search(
+        self,
+        query: np.ndarray,
+        top_k: int = 5,
+        room_id: Optional[str] = None,
+        growth_day_range: Optional[Tuple[int, int]] = None,
+        exclude_in_date: Optional[date] = None,
+        date_range: Optional[Tuple[datetime, datetime]] = None,
+        exclude_collection_ip: Optional[str] = None,
+        require_collection_ip: bool = False,
+        require_env_status: bool = False,
+        refresh: bool = True,
+    ) -> pd.DataFrame:
+        """
+        Filtered top-k cosine search
+
+        Args:
+            query: Query embedding (normalised internally)
+            top_k: Number of results
+            room_id: Restrict to one room partition
+            growth_day_range: Inclusive (min, max) growth day
+            exclude_in_date: Exclude this batch entry date
+            date_range: Inclusive collection_datetime range
+            exclude_collection_ip: Exclude images from this camera
+            require_collection_ip: Only rows with a camera IP
+            require_env_status: Only rows with env_sensor_status
+            refresh: Call ensure_fresh() before searching
+
+        Returns:
+            DataFrame (id, room_id, growth_day, in_date, collection_datetime,
+            collection_ip, similarity) sorted by similarity desc
+        """
+        if refresh:
+            self.ensure_fresh()
+
+        columns = [
+            "id",
+            "room_id",
+            "growth_day",
+            "in_date",
+            "collection_datetime",
+            "collection_ip",
+            "similarity",
+        ]
+        with self._lock:
+            if self._matrix is None or top_k <= 0:
+                return pd.DataFrame(columns=columns)
+
+            rows = self._filter_rows(
+                room_id=room_id,
+                growth_day_range=growth_day_range,
+                exclude_in_date=exclude_in_date,
+                date_range=date_range,
+                exclude_collection_ip=exclude_collection_ip,
+                require_collection_ip=require_collection_ip,
+                require_env_status=require_env_status,
+            )
+            if rows.size == 0:
+                return pd.DataFrame(columns=columns)
+
+            q = np.asarray(query, dtype=np.float32).ravel()
+            q_norm = np.linalg.norm(q)
+            if q.shape[0] != self.dim or q_norm == 0:
+                raise ValueError(
+                    f"Query dimension {q.shape[0]} does not match index dimension {self.dim}"
+                )
+            similarities = self._matrix[rows] @ (q / q_norm)
+
+            k = min(top_k, rows.size)
+            top = np.argpartition(-similarities, k - 1)[:k]
+            top = top[np.argsort(-similarities[top], kind="stable")]
+            hit_rows = rows[top]
+
+            return pd.DataFrame(
+                {
+                    "id": self._meta["ids"][hit_rows],
+                    "room_id": self._meta["room_ids"][hit_rows],
+                    "growth_day": self._meta["growth_days"][hit_rows],
+                    "in_date": pd.to_datetime(self._meta["in_dates"][hit_rows]).date,
+                    "collection_datetime": pd.to_datetime(
+                        self._meta["collection_datetimes"][hit_rows]
+                    ),
+                    "collection_ip": self._meta["collection_ips"][hit_rows],
+                    "similarity": similarities[top].astype(float),
+                }
+            )
+
+    def latest_by_camera(
+        self,
+        room_id: str,
+        exclude_in_date: Optional[date] = None,
+        refresh: bool = True,
+    ) -> Dict[str, np.ndarray]:
+        """
+        Latest embedding per camera (collection_ip) in a room
+
+        Returns:
+            {collection_ip: normalised embedding}, ordered by collection_ip
+        """
+        if refresh:
+            self.ensure_fresh()
+
+        with self._lock:
+            if self._matrix is None:
+                return {}
+            rows = self._filter_rows(
+                room_id=room_id,
+                exclude_in_date=exclude_in_date,
+                require_collection_ip=True,
+            )
+            if rows.size == 0:
+                return {}
+            ips = self._meta["collection_ips"][rows]
+            times = self._meta["collection_datetimes"][rows]
+            # 按 (ip, time) 排序后取每个 ip 的最后一行
+            order = np.lexsort((times, ips))
+            sorted_ips = ips[order]
+            last = np.flatnonzero(np.append(sorted_ips[1:] != sorted_ips[:-1], True))
+            return {
+                str(sorted_ips[i]): np.array(self._matrix[rows[order[i]]]) for i in last
+            }
+
+
+# ===================== 进程级单例 =====================
+_INDEX_INSTANCE: Optional[HistoricalEmbeddingIndex] = None
+_INDEX_LOCK = threading.Lock()
+
+
+def get_historical_embedding_index(
+    db_engine: Optional[Engine] = None,
+) -> HistoricalEmbeddingIndex:
+    """
+    Get the process-wide HistoricalEmbeddingIndex (created on first use)
+
+    Args:
+        db_engine: Database engine (defaults to pgsql_engine)
+    """
+    global _INDEX_INSTANCE
+    with _INDEX_LOCK:
+        if _INDEX_INSTANCE is None:
+            from global_const.const_config import (
+                EMBEDDING_INDEX_FULL_REBUILD_INTERVAL_SECONDS,
+                EMBEDDING_INDEX_PERSIST_PATH,
+                EMBEDDING_INDEX_REFRESH_INTERVAL_SECONDS,
+            )
+
+            if db_engine is None:
+                from global_const.global_const import pgsql_engine
+
+                db_engine = pgsql_engine
+
+            _INDEX_INSTANCE = HistoricalEmbeddingIndex(
+                db_engine,
+                persist_path=EMBEDDING_INDEX_PERSIST_PATH or None,
+                refresh_interval_seconds=EMBEDDING_INDEX_REFRESH_INTERVAL_SECONDS,
+                full_rebuild_interval_seconds=EMBEDDING_INDEX_FULL_REBUILD_INTERVAL_SECONDS,
+            )
+        return _INDEX_INSTANCE
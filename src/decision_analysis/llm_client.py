@@ -7,12 +7,20 @@ decision recommendations based on rendered prompts.
 
 import json
 import re
+import threading
 from typing import Dict, Optional
 
 import requests
 from dynaconf import Dynaconf
 from loguru import logger
 
+from global_const.const_config import DECISION_ANALYSIS_MAX_CONCURRENT_LLM
+
+# 进程级LLM并发上限：批量决策分析多库房并行时，所有 LLMClient 实例共享
+_LLM_REQUEST_SEMAPHORE = threading.BoundedSemaphore(
+    max(1, DECISION_ANALYSIS_MAX_CONCURRENT_LLM)
+)
+
 
 class LLMClient:
     """
@@ -49,6 +57,13 @@ class LLMClient:
             f"endpoint: {self.api_url}"
         )
 
+    def _post(self, payload: Dict, headers: Dict) -> requests.Response:
+        """发送补全请求，受进程级LLM并发上限约束"""
+        with _LLM_REQUEST_SEMAPHORE:
+            return requests.post(
+                self.api_url, json=payload, headers=headers, timeout=self.timeout
+            )
+
     def generate_decision(
         self, prompt: str, temperature: float = 0.7, max_tokens: int = -1
     ) -> Dict:
@@ -108,9 +123,7 @@ class LLMClient:
                 headers["X-API-Key"] = self.settings.llama_vl.api_key
 
             # Send POST request with timeout and headers
-            response = requests.post(
-                self.api_url, json=payload, headers=headers, timeout=self.timeout
-            )
+            response = self._post(payload, headers)
 
             # Check response status
             if response.status_code != 200:
@@ -476,9 +489,7 @@ class LLMClient:
                 headers["X-API-Key"] = self.settings.llama_vl.api_key
 
             # Send POST request with timeout and headers
-            response = requests.post(
-                self.api_url, json=payload, headers=headers, timeout=self.timeout
-            )
+            response = self._post(payload, headers)
 
             if (
                 response.status_code == 400
@@ -488,12 +499,7 @@ class LLMClient:
                     "[LLMClient] Backend rejected response_format, retrying without schema constraint"
                 )
                 payload.pop("response_format", None)
-                response = requests.post(
-                    self.api_url,
-                    json=payload,
-                    headers=headers,
-                    timeout=self.timeout,
-                )
+                response = self._post(payload, headers)
 
             # Retry once for llama.cpp-style context overflow
             if response.status_code == 400 and self._is_context_overflow_error(
@@ -505,9 +511,7 @@ class LLMClient:
                 shortened_prompt = self._shorten_prompt_for_context(prompt)
                 payload["messages"][1]["content"] = shortened_prompt
                 payload["max_tokens"] = min(max_tokens, 1024)
-                response = requests.post(
-                    self.api_url, json=payload, headers=headers, timeout=self.timeout
-                )
+                response = self._post(payload, headers)
 
             # Check response status
             if response.status_code != 200:
@@ -581,24 +585,14 @@ class LLMClient:
                     "max_tokens": min(max_tokens, 1536),
                     "response_format": self._get_enhanced_json_schema_response_format(),
                 }
-                retry_response = requests.post(
-                    self.api_url,
-                    json=retry_payload,
-                    headers=headers,
-                    timeout=self.timeout,
-                )
+                retry_response = self._post(retry_payload, headers)
 
                 if (
                     retry_response.status_code == 400
                     and "response_format" in retry_response.text.lower()
                 ):
                     retry_payload.pop("response_format", None)
-                    retry_response = requests.post(
-                        self.api_url,
-                        json=retry_payload,
-                        headers=headers,
-                        timeout=self.timeout,
-                    )
+                    retry_response = self._post(retry_payload, headers)
 
                 if (
                     retry_response.status_code == 400
@@ -608,12 +602,7 @@ class LLMClient:
                         self._shorten_prompt_for_context(prompt)
                     )
                     retry_payload["max_tokens"] = min(retry_payload["max_tokens"], 1024)
-                    retry_response = requests.post(
-                        self.api_url,
-                        json=retry_payload,
-                        headers=headers,
-                        timeout=self.timeout,
-                    )
+                    retry_response = self._post(retry_payload, headers)
 
                 if retry_response.status_code == 200:
                     retry_data = retry_response.json()
@@ -11,13 +11,15 @@
 from __future__ import annotations
 
 import json
-from dataclasses import dataclass, field
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass, field, replace
 from datetime import datetime, timedelta
 from pathlib import Path
 from typing import Any, Dict, List, Optional, Tuple
 
 from sqlalchemy import text
 
+from decision_analysis.cluster_kb import get_cluster_kb_snapshot
 from global_const.global_const import pgsql_engine
 from utils.loguru_setting import logger
 
@@ -42,6 +44,133 @@ class SkillContext:
     recent_setpoint_changes: List[Dict[str, Any]] = field(default_factory=list)
 
 
+# 环境触发条件字段（与 SkillContext 属性同名）
+_ENV_KEYS = ("temperature", "humidity", "co2")
+
+
+@dataclass(frozen=True)
+class _CompiledSkill:
+    """预解析后的 skill 触发条件（区间已转为数值，季节已小写化）。"""
+
+    order: int
+    priority: int
+    day_low: Optional[int]
+    day_high: Optional[int]
+    env_bounds: Tuple[Tuple[str, float, float], ...]
+    skill: Dict[str, Any]
+
+    def match_env(self, context: SkillContext) -> bool:
+        for key, low, high in self.env_bounds:
+            if not low <= float(getattr(context, key)) <= high:
+                return False
+        return True
+
+
+class _GrowthDayIndex:
+    """生长天区间索引：有界区间按下界排序，结合最大区间跨度二分定位候选。"""
+
+    def __init__(self, skills: List[_CompiledSkill]):
+        self.unbounded = [s for s in skills if s.day_low is None]
+        bounded = sorted(
+            (s for s in skills if s.day_low is not None), key=lambda s: s.day_low
+        )
+        self.bounded = bounded
+        self.lows = [s.day_low for s in bounded]
+        self.max_span = max((s.day_high - s.day_low for s in bounded), default=0)
+
+    def candidates(self, day: int) -> List[_CompiledSkill]:
+        start = bisect_left(self.lows, day - self.max_span)
+        end = bisect_right(self.lows, day)
+        return self.unbounded + [
+            s for s in self.bounded[start:end] if s.day_high >= day
+        ]
+
+
+class _SkillIndex:
+    """
+    skill 库索引：仅保留 active 状态，按季节分桶，桶内按生长天区间建索引。
+
+    匹配结果与逐条扫描一致：先按 priority 降序，同优先级保持库内顺序。
+    """
+
+    def __init__(self, skills: List[Dict[str, Any]]):
+        compiled = []
+        for order, skill in enumerate(skills):
+            if str(skill.get("status", "active")).lower() != "active":
+                continue
+            try:
+                compiled.append(self._compile(order, skill))
+            except (TypeError, ValueError) as exc:
+                logger.warning(
+                    f"[SKILL] 触发条件无法解析，跳过 skill_id={skill.get('skill_id')}: {exc}"
+                )
+        self.size = len(compiled)
+
+        any_season: List[_CompiledSkill] = []
+        by_season: Dict[str, List[_CompiledSkill]] = {}
+        for item in compiled:
+            seasons = self._seasons(item.skill)
+            if seasons is None:
+                any_season.append(item)
+            else:
+                for season in seasons:
+                    by_season.setdefault(season, []).append(item)
+        self.any_season = _GrowthDayIndex(any_season)
+        self.by_season = {
+            season: _GrowthDayIndex(items) for season, items in by_season.items()
+        }
+
+    @staticmethod
+    def _seasons(skill: Dict[str, Any]) -> Optional[set]:
+        """None 表示不限季节（缺省/空列表/包含 all）"""
+        seasons = (skill.get("applicable_conditions") or {}).get("season")
+        if not isinstance(seasons, list) or not seasons:
+            return None
+        lowered = {str(item).lower() for item in seasons}
+        return None if "all" in lowered else lowered
+
+    @staticmethod
+    def _compile(order: int, skill: Dict[str, Any]) -> _CompiledSkill:
+        conditions = skill.get("applicable_conditions", {}) or {}
+        day_range = conditions.get("growth_day_range")
+        day_low = day_high = None
+        if isinstance(day_range, list) and len(day_range) == 2:
+            day_low, day_high = int(day_range[0]), int(day_range[1])
+
+        env_rules = conditions.get("env", {}) or {}
+        env_bounds = []
+        for key in _ENV_KEYS:
+            bounds = env_rules.get(key)
+            if isinstance(bounds, list) and len(bounds) == 2:
+                env_bounds.append((key, float(bounds[0]), float(bounds[1])))
+
+        return _CompiledSkill(
+            order=order,
+            priority=CultivationSkillEngine._priority_score(skill.get("priority")),
+            day_low=day_low,
+            day_high=day_high,
+            env_bounds=tuple(env_bounds),
+            skill=skill,
+        )
+
+    def match(self, context: SkillContext) -> List[Dict[str, Any]]:
+        # 缺少生长天/季节/任一环境值时不匹配任何 skill（与逐条判断语义一致）
+        if context.growth_day is None or not context.season:
+            return []
+        if any(getattr(context, key) is None for key in _ENV_KEYS):
+            return []
+
+        day = int(context.growth_day)
+        candidates = self.any_season.candidates(day)
+        season_index = self.by_season.get(str(context.season).lower())
+        if season_index is not None:
+            candidates += season_index.candidates(day)
+
+        matched = [item for item in candidates if item.match_env(context)]
+        matched.sort(key=lambda item: (-item.priority, item.order))
+        return [item.skill for item in matched]
+
+
 class CultivationSkillEngine:
     """鹿茸菇环境调节 Skill 引擎。"""
 
@@ -50,6 +179,7 @@ class CultivationSkillEngine:
         self.enable_kb_prior = bool(enable_kb_prior)
         self.skill_library: Dict[str, Any] = {}
         self.skills: List[Dict[str, Any]] = []
+        self._skill_index = _SkillIndex([])
         self._load_skill_library()
 
     def io_contract(self) -> Dict[str, Any]:
@@ -89,7 +219,7 @@ class CultivationSkillEngine:
     def _load_cluster_kb_priors(
         self, context: SkillContext
     ) -> Dict[Tuple[str, str], Dict[str, Any]]:
-        """加载聚类知识库中与当前生长天接近的点位先验区间。"""
+        """加载聚类知识库中与当前生长天接近的点位先验区间（进程内快照，无逐库房SQL）。"""
         if not self.enable_kb_prior:
             return {}
 
@@ -97,66 +227,20 @@ class CultivationSkillEngine:
         priors: Dict[Tuple[str, str], Dict[str, Any]] = {}
 
         try:
-            with pgsql_engine.connect() as conn:
-                run_row = conn.execute(
-                    text(
-                        """
-                        SELECT id
-                        FROM control_strategy_kb_runs
-                        WHERE kb_type = 'cluster'
-                        ORDER BY is_active DESC, generated_at DESC
-                        LIMIT 1
-                        """
-                    )
-                ).fetchone()
-
-                if not run_row:
-                    return {}
-
-                run_id = run_row[0]
-                if target_day is None:
-                    rows = conn.execute(
-                        text(
-                            """
-                            SELECT device_type, point_key, value_median, value_p25, value_p75,
-                                   sample_days, growth_window, preferred_change_type, preferred_hour
-                            FROM control_strategy_kb_cluster_rules
-                            WHERE run_id = :run_id
-                            ORDER BY sample_days DESC NULLS LAST
-                            LIMIT 200
-                            """
-                        ),
-                        {"run_id": run_id},
-                    ).fetchall()
-                else:
-                    rows = conn.execute(
-                        text(
-                            """
-                            SELECT device_type, point_key, value_median, value_p25, value_p75,
-                                   sample_days, growth_window, preferred_change_type, preferred_hour,
-                                   ABS(COALESCE(growth_day_median, :target_day) - :target_day) AS day_gap
-                            FROM control_strategy_kb_cluster_rules
-                            WHERE run_id = :run_id
-                              AND COALESCE(growth_day_min, :target_day) <= :target_day
-                              AND COALESCE(growth_day_max, :target_day) >= :target_day
-                            ORDER BY day_gap ASC, sample_days DESC NULLS LAST
-                            LIMIT 200
-                            """
-                        ),
-                        {"run_id": run_id, "target_day": int(target_day)},
-                    ).fetchall()
-
-            for row in rows:
-                device_type = str(row[0]) if row[0] is not None else None
-                point_key = str(row[1]) if row[1] is not None else None
-                if not device_type or not point_key:
+            snapshot = get_cluster_kb_snapshot(pgsql_engine)
+            if snapshot is None:
+                return {}
+
+            rules = snapshot.nearest(target_day, limit=200, covering_only=True)
+            for rule in rules:
+                if not rule.device_type or not rule.point_key:
                     continue
 
                 key = (
-                    self._normalize_device_type(device_type),
-                    self._normalize_point_key(point_key),
+                    self._normalize_device_type(rule.device_type),
+                    self._normalize_point_key(rule.point_key),
                 )
-                sample_days = int(row[5]) if row[5] is not None else 0
+                sample_days = rule.sample_days or 0
 
                 # 若同点位有多条记录，保留样本天数更高的一条
                 if key in priors and sample_days <= int(
@@ -165,13 +249,13 @@ class CultivationSkillEngine:
                     continue
 
                 priors[key] = {
-                    "kb_value_median": self._to_float(row[2]),
-                    "kb_low": self._to_float(row[3]),
-                    "kb_high": self._to_float(row[4]),
+                    "kb_value_median": rule.value_median,
+                    "kb_low": rule.value_p25,
+                    "kb_high": rule.value_p75,
                     "sample_days": sample_days,
-                    "growth_window": row[6],
-                    "preferred_change_type": row[7],
-                    "preferred_hour": self._to_float(row[8]),
+                    "growth_window": rule.growth_window,
+                    "preferred_change_type": rule.preferred_change_type,
+                    "preferred_hour": rule.preferred_hour,
                 }
 
         except Exception as exc:
@@ -193,186 +277,257 @@ class CultivationSkillEngine:
             with open(self.config_path, "r", encoding="utf-8") as file:
                 self.skill_library = json.load(file)
             self.skills = self.skill_library.get("skills", []) or []
+            self._skill_index = _SkillIndex(self.skills)
             logger.info(
-                f"[SKILL] 已加载skill库: version={self.skill_library.get('skill_library_version')}, count={len(self.skills)}"
+                f"[SKILL] 已加载skill库: version={self.skill_library.get('skill_library_version')}, count={len(self.skills)}, active={self._skill_index.size}"
             )
         except Exception as exc:
             logger.error(f"[SKILL] skill库加载失败: {exc}")
             self.skill_library = {}
             self.skills = []
+            self._skill_index = _SkillIndex([])
 
     def build_context_from_db(
-        self, room_id: str, analysis_time: datetime
+        self,
+        room_id: str,
+        analysis_time: datetime,
+        device_changes: Any = None,
     ) -> SkillContext:
-        season = self._infer_season(analysis_time.month)
+        """
+        读取单库房上下文（单次查询）。
+
+        device_changes 为分析器已提取的设备变更记录（DataFrame）时，近6小时
+        设定点变更直接由其计算，查询中不再统计 device_setpoint_changes。
+        """
         context = SkillContext(
-            room_id=room_id, analysis_time=analysis_time, season=season
+            room_id=room_id,
+            analysis_time=analysis_time,
+            season=self._infer_season(analysis_time.month),
         )
-
         try:
-            with pgsql_engine.connect() as conn:
-                row = conn.execute(
-                    text(
-                        """
-                        SELECT in_day_num, temp_median, humidity_median, co2_median
-                        FROM mushroom_env_daily_stats
-                        WHERE room_id = :room_id
-                          AND stat_date <= :stat_date
-                        ORDER BY stat_date DESC
-                        LIMIT 1
-                        """
-                    ),
-                    {"room_id": str(room_id), "stat_date": analysis_time.date()},
-                ).fetchone()
+            context = self.build_contexts_from_db(
+                [room_id],
+                analysis_time,
+                include_changes=device_changes is None,
+            )[str(room_id)]
+        except Exception as exc:
+            logger.warning(f"[SKILL] 读取上下文失败 room_id={room_id}: {exc}")
+
+        if device_changes is not None:
+            self.apply_device_changes(context, device_changes)
+        return context
 
-                realtime_row = conn.execute(
-                    text(
-                        """
+    def build_contexts_from_db(
+        self,
+        room_ids: List[str],
+        analysis_time: datetime,
+        include_changes: bool = True,
+    ) -> Dict[str, SkillContext]:
+        """
+        一次查询读取多个库房的上下文，按 str(room_id) 索引。
+
+        - 日统计：stat_date <= 分析日期的最新一条（DISTINCT ON）
+        - 实时数据：collection_datetime <= 分析时间的最新 embedding（LATERAL）
+        - include_changes 为 True 时同一查询内统计近6小时设定点变更数并取最近8条
+
+        查询失败时抛出异常，由调用方决定降级方式。
+        """
+        season = self._infer_season(analysis_time.month)
+        contexts = {
+            str(room_id): SkillContext(
+                room_id=room_id, analysis_time=analysis_time, season=season
+            )
+            for room_id in room_ids
+        }
+        if not contexts:
+            return contexts
+
+        with pgsql_engine.connect() as conn:
+            rows = conn.execute(
+                text(
+                    """
+                    WITH rooms AS (
+                        SELECT unnest(CAST(:room_ids AS text[])) AS room_id
+                    ),
+                    daily AS (
+                        SELECT DISTINCT ON (s.room_id)
+                               s.room_id, s.in_day_num, s.temp_median,
+                               s.humidity_median, s.co2_median
+                        FROM mushroom_env_daily_stats s
+                        JOIN rooms r ON r.room_id = s.room_id
+                        WHERE s.stat_date <= :stat_date
+                        ORDER BY s.room_id, s.stat_date DESC
+                    )
+                    SELECT r.room_id,
+                           d.in_day_num, d.temp_median, d.humidity_median, d.co2_median,
+                           e.growth_day, e.env_sensor_status, e.light_config,
+                           e.collection_datetime,
+                           c.change_count, c.recent_changes
+                    FROM rooms r
+                    LEFT JOIN daily d ON d.room_id = r.room_id
+                    LEFT JOIN LATERAL (
                         SELECT growth_day, env_sensor_status, light_config, collection_datetime
                         FROM mushroom_embedding
-                        WHERE room_id = :room_id
+                        WHERE room_id = r.room_id
                           AND collection_datetime <= :analysis_time
                         ORDER BY collection_datetime DESC
                         LIMIT 1
-                        """
-                    ),
-                    {
-                        "room_id": str(room_id),
-                        "analysis_time": analysis_time,
-                    },
-                ).fetchone()
-
-                window_start = analysis_time - timedelta(hours=6)
-                recent_count_row = conn.execute(
-                    text(
-                        """
-                        SELECT COUNT(*)
-                        FROM device_setpoint_changes
-                        WHERE room_id = :room_id
-                          AND change_time >= :window_start
-                          AND change_time <= :analysis_time
-                        """
-                    ),
-                    {
-                        "room_id": str(room_id),
-                        "window_start": window_start,
-                        "analysis_time": analysis_time,
-                    },
-                ).fetchone()
-
-                recent_change_rows = conn.execute(
-                    text(
-                        """
-                        SELECT device_type, point_name, previous_value, current_value, change_time
-                        FROM device_setpoint_changes
-                        WHERE room_id = :room_id
-                          AND change_time >= :window_start
-                          AND change_time <= :analysis_time
-                        ORDER BY change_time DESC
-                        LIMIT 8
-                        """
-                    ),
-                    {
-                        "room_id": str(room_id),
-                        "window_start": window_start,
-                        "analysis_time": analysis_time,
-                    },
-                ).fetchall()
-
-            if row:
-                context.growth_day = int(row[0]) if row[0] is not None else None
-                context.temperature = float(row[1]) if row[1] is not None else None
-                context.humidity = float(row[2]) if row[2] is not None else None
-                context.co2 = float(row[3]) if row[3] is not None else None
-
-            if realtime_row:
-                realtime_growth_day = (
-                    int(realtime_row[0]) if realtime_row[0] is not None else None
-                )
-                if realtime_growth_day is not None:
-                    context.growth_day = realtime_growth_day
-
-                env_status = self._to_dict(realtime_row[1])
-                light_config = self._to_dict(realtime_row[2])
+                    ) e ON TRUE
+                    LEFT JOIN LATERAL (
+                        SELECT COUNT(*) AS change_count,
+                               json_agg(
+                                   json_build_object(
+                                       'device_type', device_type,
+                                       'point_name', point_name,
+                                       'previous_value', previous_value,
+                                       'current_value', current_value,
+                                       'change_time', change_time
+                                   )
+                                   ORDER BY change_time DESC
+                               ) FILTER (WHERE rn <= 8) AS recent_changes
+                        FROM (
+                            SELECT device_type, point_name, previous_value,
+                                   current_value, change_time,
+                                   ROW_NUMBER() OVER (ORDER BY change_time DESC) AS rn
+                            FROM device_setpoint_changes
+                            WHERE :include_changes
+                              AND room_id = r.room_id
+                              AND change_time >= :window_start
+                              AND change_time <= :analysis_time
+                        ) changes
+                    ) c ON TRUE
+                    """
+                ),
+                {
+                    "room_ids": list(contexts),
+                    "stat_date": analysis_time.date(),
+                    "analysis_time": analysis_time,
+                    "window_start": analysis_time - timedelta(hours=6),
+                    "include_changes": bool(include_changes),
+                },
+            ).fetchall()
 
-                context.realtime_data_time = realtime_row[3]
-                context.realtime_temperature = self._pick_numeric(
-                    env_status, ["temperature", "temp", "tem"]
-                )
-                context.realtime_humidity = self._pick_numeric(
-                    env_status, ["humidity", "hum"]
-                )
-                context.realtime_co2 = self._pick_numeric(env_status, ["co2"])
-                context.realtime_light_mode = self._pick_numeric(
-                    light_config, ["model", "mode"]
-                )
-                context.realtime_light_on_mset = self._pick_numeric(
-                    light_config, ["on_mset", "onmset"]
-                )
-                context.realtime_light_off_mset = self._pick_numeric(
-                    light_config, ["off_mset", "offmset"]
-                )
+        for row in rows:
+            context = contexts.get(str(row[0]))
+            if context is None:
+                continue
+            self._fill_daily_stats(context, row[1:5])
+            self._fill_realtime(context, row[5:9])
+            if include_changes:
+                context.recent_setpoint_change_count_6h = int(row[9] or 0)
+                context.recent_setpoint_changes = [
+                    self._change_record(
+                        item.get("device_type"),
+                        item.get("point_name"),
+                        item.get("previous_value"),
+                        item.get("current_value"),
+                        item.get("change_time"),
+                    )
+                    for item in self._to_list(row[10])
+                    if isinstance(item, dict)
+                ]
+        return contexts
+
+    def align_prefetched_context(
+        self, context: SkillContext, analysis_time: datetime
+    ) -> Optional[SkillContext]:
+        """
+        将批次预取的上下文对齐到库房实际分析时间（不访问数据库）。
+
+        日统计与生长天按分析日期取值，预取时间跨日或晚于分析时间时预取状态
+        不再适用，返回 None 由调用方单独查询；否则更新 analysis_time 并重算季节。
+        """
+        prefetch_time = context.analysis_time
+        if (
+            prefetch_time > analysis_time
+            or prefetch_time.date() != analysis_time.date()
+        ):
+            return None
+        return replace(
+            context,
+            analysis_time=analysis_time,
+            season=self._infer_season(analysis_time.month),
+        )
 
-                # 实时数据优先于日统计，保证触发条件贴近现场状态
-                if context.realtime_temperature is not None:
-                    context.temperature = context.realtime_temperature
-                if context.realtime_humidity is not None:
-                    context.humidity = context.realtime_humidity
-                if context.realtime_co2 is not None:
-                    context.co2 = context.realtime_co2
-
-            context.recent_setpoint_change_count_6h = (
-                int(recent_count_row[0])
-                if recent_count_row and recent_count_row[0]
-                else 0
+    def apply_device_changes(
+        self, context: SkillContext, device_changes: Any
+    ) -> SkillContext:
+        """
+        用分析器已提取的设备变更记录填充近6小时设定点变更（不访问数据库）。
+
+        device_changes 为 DataExtractor.extract_device_changes 返回的 DataFrame，
+        其时间范围需覆盖 [analysis_time - 6h, analysis_time]。
+        """
+        window_start = context.analysis_time - timedelta(hours=6)
+        rows: List[Tuple[Any, ...]] = []
+        if device_changes is not None and not device_changes.empty:
+            change_time = device_changes["change_time"]
+            recent = device_changes.loc[
+                (change_time >= window_start) & (change_time <= context.analysis_time)
+            ].sort_values("change_time", ascending=False, kind="mergesort")
+            rows = list(
+                recent[
+                    [
+                        "device_type",
+                        "point_name",
+                        "previous_value",
+                        "current_value",
+                        "change_time",
+                    ]
+                ].itertuples(index=False, name=None)
             )
-            context.recent_setpoint_changes = [
-                {
-                    "device_type": str(change_row[0])
-                    if change_row[0] is not None
-                    else None,
-                    "point_name": str(change_row[1])
-                    if change_row[1] is not None
-                    else None,
-                    "previous_value": self._to_float(change_row[2]),
-                    "current_value": self._to_float(change_row[3]),
-                    "change_time": (
-                        change_row[4].isoformat()
-                        if hasattr(change_row[4], "isoformat")
-                        else str(change_row[4])
-                    ),
-                }
-                for change_row in (recent_change_rows or [])
-            ]
-        except Exception as exc:
-            logger.warning(f"[SKILL] 读取上下文失败 room_id={room_id}: {exc}")
 
+        context.recent_setpoint_change_count_6h = len(rows)
+        context.recent_setpoint_changes = [
+            self._change_record(*row) for row in rows[:8]
+        ]
         return context
 
-    def match_skills(self, context: SkillContext) -> List[Dict[str, Any]]:
-        matched: List[Dict[str, Any]] = []
+    def _fill_daily_stats(self, context: SkillContext, row: Tuple[Any, ...]) -> None:
+        in_day_num, temp_median, humidity_median, co2_median = row
+        context.growth_day = int(in_day_num) if in_day_num is not None else None
+        context.temperature = float(temp_median) if temp_median is not None else None
+        context.humidity = (
+            float(humidity_median) if humidity_median is not None else None
+        )
+        context.co2 = float(co2_median) if co2_median is not None else None
 
-        for skill in self.skills:
-            status = str(skill.get("status", "active")).lower()
-            if status != "active":
-                continue
+    def _fill_realtime(self, context: SkillContext, row: Tuple[Any, ...]) -> None:
+        growth_day, env_sensor_status, light_config, collection_datetime = row
+        if collection_datetime is None:
+            return
 
-            conditions = skill.get("applicable_conditions", {}) or {}
-            if not self._match_growth_day(
-                context.growth_day, conditions.get("growth_day_range")
-            ):
-                continue
-            if not self._match_season(context.season, conditions.get("season")):
-                continue
-            if not self._match_env(context, conditions.get("env", {})):
-                continue
+        if growth_day is not None:
+            context.growth_day = int(growth_day)
 
-            matched.append(skill)
+        env_status = self._to_dict(env_sensor_status)
+        light = self._to_dict(light_config)
 
-        matched.sort(
-            key=lambda item: self._priority_score(item.get("priority")), reverse=True
+        context.realtime_data_time = collection_datetime
+        context.realtime_temperature = self._pick_numeric(
+            env_status, ["temperature", "temp", "tem"]
         )
-        return matched
+        context.realtime_humidity = self._pick_numeric(env_status, ["humidity", "hum"])
+        context.realtime_co2 = self._pick_numeric(env_status, ["co2"])
+        context.realtime_light_mode = self._pick_numeric(light, ["model", "mode"])
+        context.realtime_light_on_mset = self._pick_numeric(
+            light, ["on_mset", "onmset"]
+        )
+        context.realtime_light_off_mset = self._pick_numeric(
+            light, ["off_mset", "offmset"]
+        )
+
+        # 实时数据优先于日统计，保证触发条件贴近现场状态
+        if context.realtime_temperature is not None:
+            context.temperature = context.realtime_temperature
+        if context.realtime_humidity is not None:
+            context.humidity = context.realtime_humidity
+        if context.realtime_co2 is not None:
+            context.co2 = context.realtime_co2
+
+    def match_skills(self, context: SkillContext) -> List[Dict[str, Any]]:
+        """按加载时构建的索引匹配 skill，仅检查季节桶与生长天区间内的候选。"""
+        return self._skill_index.match(context)
 
     def apply(
         self,
@@ -571,38 +726,6 @@ class CultivationSkillEngine:
         }
         return mapping.get(key, key)
 
-    @staticmethod
-    def _match_growth_day(value: Optional[int], value_range: Any) -> bool:
-        if value is None:
-            return False
-        if not isinstance(value_range, list) or len(value_range) != 2:
-            return True
-        return int(value_range[0]) <= int(value) <= int(value_range[1])
-
-    @staticmethod
-    def _match_season(value: Optional[str], seasons: Any) -> bool:
-        if not value:
-            return False
-        if not isinstance(seasons, list) or not seasons:
-            return True
-        lowered = {str(item).lower() for item in seasons}
-        return "all" in lowered or str(value).lower() in lowered
-
-    @staticmethod
-    def _match_env(context: SkillContext, env_rules: Dict[str, Any]) -> bool:
-        def in_range(current: Optional[float], bounds: Any) -> bool:
-            if current is None:
-                return False
-            if not isinstance(bounds, list) or len(bounds) != 2:
-                return True
-            return float(bounds[0]) <= float(current) <= float(bounds[1])
-
-        return (
-            in_range(context.temperature, env_rules.get("temperature"))
-            and in_range(context.humidity, env_rules.get("humidity"))
-            and in_range(context.co2, env_rules.get("co2"))
-        )
-
     @staticmethod
     def _to_float(value: Any) -> Optional[float]:
         try:
@@ -625,6 +748,45 @@ class CultivationSkillEngine:
                 return {}
         return {}
 
+    @staticmethod
+    def _to_list(value: Any) -> List[Any]:
+        if isinstance(value, list):
+            return value
+        if isinstance(value, str):
+            try:
+                parsed = json.loads(value)
+                if isinstance(parsed, list):
+                    return parsed
+            except Exception:
+                return []
+        return []
+
+    @classmethod
+    def _change_record(
+        cls,
+        device_type: Any,
+        point_name: Any,
+        previous_value: Any,
+        current_value: Any,
+        change_time: Any,
+    ) -> Dict[str, Any]:
+        def _value(raw: Any) -> Optional[float]:
+            value = cls._to_float(raw)
+            # DataFrame 中的缺失值为 NaN
+            return None if value is None or value != value else value
+
+        return {
+            "device_type": str(device_type) if device_type is not None else None,
+            "point_name": str(point_name) if point_name is not None else None,
+            "previous_value": _value(previous_value),
+            "current_value": _value(current_value),
+            "change_time": (
+                change_time.isoformat()
+                if hasattr(change_time, "isoformat")
+                else str(change_time)
+            ),
+        }
+
     @classmethod
     def _pick_numeric(cls, data: Dict[str, Any], keys: List[str]) -> Optional[float]:
         if not isinstance(data, dict):
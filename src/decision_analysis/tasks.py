@@ -11,13 +11,16 @@
     - 自动存储到数据库（静态配置 + 动态结果）
 """
 
+import contextvars
 import time
 import traceback
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from typing import Any, Dict
+from typing import Any, Dict, Optional
 from uuid import uuid4
 
 from global_const.const_config import (
+    DECISION_ANALYSIS_BATCH_MAX_WORKERS,
     DECISION_ANALYSIS_EMBEDDING_SIM_WEIGHT,
     DECISION_ANALYSIS_ENABLE_SKILL_ENGINE,
     DECISION_ANALYSIS_ENABLE_SKILL_KB_PRIOR,
@@ -30,8 +33,11 @@ from global_const.const_config import (
     MUSHROOM_ROOM_IDS,
 )
 from global_const.global_const import ensure_src_path
+from decision_analysis.analysis_context import DecisionAnalysisContext
+from decision_analysis.skills.cultivation_skill import SkillContext
 from scripts.analysis.run_enhanced_decision_analysis import (
     execute_enhanced_decision_analysis,
+    load_decision_analysis_context,
 )
 from scripts.processing.build_control_knowledge_base import build_and_persist_cluster_kb
 from utils.create_table import store_decision_analysis_dynamic_results_only
@@ -80,6 +86,8 @@ def _build_decision_id(room_id: str) -> str:
 def safe_decision_analysis_for_room(
     room_id: str,
     batch_run_id: str | None = None,
+    analysis_context: Optional[DecisionAnalysisContext] = None,
+    skill_context: Optional[SkillContext] = None,
 ) -> Dict[str, Any]:
     """
     执行单个蘑菇房的决策分析任务（优化版：仅存储动态结果）
@@ -101,6 +109,9 @@ def safe_decision_analysis_for_room(
 
     Args:
         room_id: 蘑菇房编号（"607", "608", "611", "612"）
+        batch_run_id: 批次ID（用于日志关联）
+        analysis_context: 批次共享的分析上下文；为空时使用进程级上下文
+        skill_context: 批次预取的Skill库房状态；为空时由Skill引擎单独查询
     """
     max_retries = DECISION_ANALYSIS_MAX_RETRIES
     retry_delay = DECISION_ANALYSIS_RETRY_DELAY
@@ -155,6 +166,8 @@ def safe_decision_analysis_for_room(
                 enable_kb_human_prior=DECISION_ANALYSIS_ENABLE_KB_HUMAN_PRIOR,
                 multi_image_boost=DECISION_ANALYSIS_MULTI_IMAGE_BOOST,
                 enable_skill_engine=DECISION_ANALYSIS_ENABLE_SKILL_ENGINE,
+                context=analysis_context,
+                skill_context=skill_context,
             )
 
             duration = (datetime.now() - start_time).total_seconds()
@@ -177,6 +190,7 @@ def safe_decision_analysis_for_room(
                     success=result.success,
                     multi_image_count=result.metadata.get("multi_image_count", 0),
                     duration_sec=f"{duration:.2f}",
+                    setup_sec=f"{result.metadata.get('setup_time', 0.0):.3f}",
                 )
                 _log_event(
                     "DEBUG",
@@ -316,6 +330,7 @@ def safe_decision_analysis_for_room(
                     "warnings_count": len(result.warnings or []),
                     "dynamic_results_count": dynamic_results_count,
                     "change_count": change_count,
+                    "setup_time": float(result.metadata.get("setup_time", 0.0)),
                     "decision_id": decision_id,
                 }
 
@@ -484,13 +499,175 @@ def safe_decision_analysis_for_room(
                 }
 
 
+def _run_room_in_batch(
+    room_id: str,
+    batch_run_id: str,
+    analysis_context: Optional[DecisionAnalysisContext] = None,
+    skill_context: Optional[SkillContext] = None,
+) -> Dict[str, Any]:
+    """批量任务中执行单个库房并返回结果汇总（异常在库房内隔离，不影响其他库房）"""
+    room_start_time = datetime.now()
+    _log_event(
+        "INFO",
+        "ROOM_DISPATCH",
+        "开始处理库房",
+        batch_id=batch_run_id,
+        decision_id="N/A",
+        room_id=room_id,
+    )
+
+    try:
+        room_result = safe_decision_analysis_for_room(
+            room_id,
+            batch_run_id=batch_run_id,
+            analysis_context=analysis_context,
+            skill_context=skill_context,
+        )
+        room_summary = {
+            "status": "success" if room_result.get("success") else "failed",
+            "duration": (datetime.now() - room_start_time).total_seconds(),
+            "skill_enabled": bool(room_result.get("skill_enabled", False)),
+            "skill_matched_count": int(room_result.get("skill_matched_count", 0)),
+            "skill_constraint_corrections": int(
+                room_result.get("skill_constraint_corrections", 0)
+            ),
+            "skill_kb_prior_used": int(room_result.get("skill_kb_prior_used", 0)),
+            "warnings_count": int(room_result.get("warnings_count", 0)),
+            "dynamic_results_count": int(room_result.get("dynamic_results_count", 0)),
+            "change_count": int(room_result.get("change_count", 0)),
+            "setup_time": float(room_result.get("setup_time", 0.0)),
+            "error": room_result.get("error"),
+            "decision_id": room_result.get("decision_id"),
+        }
+
+        room_status = room_summary["status"]
+        log_level = "INFO" if room_status == "success" else "ERROR"
+        _log_event(
+            log_level,
+            "ROOM_FINISH",
+            "库房处理结束",
+            batch_id=batch_run_id,
+            room_id=room_id,
+            decision_id=room_summary.get("decision_id"),
+            status=room_status,
+            duration_sec=f"{room_summary['duration']:.2f}",
+            warnings_count=room_summary.get("warnings_count", 0),
+            dynamic_results_count=room_summary.get("dynamic_results_count", 0),
+            change_count=room_summary.get("change_count", 0),
+            error=room_summary.get("error"),
+        )
+    except Exception as e:
+        room_summary = {
+            "status": "failed",
+            "error": str(e),
+            "duration": (datetime.now() - room_start_time).total_seconds(),
+        }
+        _log_event(
+            "ERROR",
+            "ROOM_CRASH",
+            "库房处理出现未捕获异常",
+            batch_id=batch_run_id,
+            decision_id="N/A",
+            room_id=room_id,
+            error=str(e),
+            error_type=type(e).__name__,
+            error_stack=traceback.format_exc(),
+            duration_sec=f"{room_summary['duration']:.2f}",
+        )
+
+    return room_summary
+
+
+def _prepare_batch_context(batch_run_id: str) -> Optional[DecisionAnalysisContext]:
+    """
+    批次开始时获取一次共享分析上下文
+
+    配置版本未变化时直接复用上一批次构建的组件；获取失败时返回 None，
+    各库房退回到自行获取上下文，不影响批次执行。
+    """
+    start_time = time.time()
+    try:
+        analysis_context = load_decision_analysis_context()
+    except Exception as e:
+        _log_event(
+            "WARNING",
+            "BATCH_CONTEXT_ERROR",
+            "共享分析上下文构建失败，库房将各自构建",
+            batch_id=batch_run_id,
+            decision_id="N/A",
+            error=str(e),
+            error_type=type(e).__name__,
+        )
+        return None
+
+    _log_event(
+        "INFO",
+        "BATCH_CONTEXT_READY",
+        "共享分析上下文就绪",
+        batch_id=batch_run_id,
+        decision_id="N/A",
+        reused=analysis_context.built_at < start_time,
+        context_sec=f"{time.time() - start_time:.3f}",
+        build_sec=f"{analysis_context.build_seconds:.3f}",
+        prompt_source=analysis_context.prompt_meta.get("source"),
+    )
+    return analysis_context
+
+
+def _prefetch_skill_contexts(
+    batch_run_id: str,
+    analysis_context: Optional[DecisionAnalysisContext],
+) -> Dict[str, SkillContext]:
+    """
+    批次开始时一次查询预取所有库房的Skill状态（日统计 + 最新embedding）
+
+    近6小时设定点变更由各库房分析时已提取的设备变更记录计算，因此批次内
+    Skill引擎不再逐库房访问数据库；预取失败时返回空字典，库房各自查询。
+    库房分析时按实际分析时间对齐（align_prefetched_context），跨日或设备变更
+    提取失败时同样回退为单库房查询。
+    """
+    if not DECISION_ANALYSIS_ENABLE_SKILL_ENGINE or analysis_context is None:
+        return {}
+
+    start_time = time.time()
+    try:
+        skill_contexts = analysis_context.skill_engine.build_contexts_from_db(
+            MUSHROOM_ROOM_IDS, datetime.now(), include_changes=False
+        )
+    except Exception as e:
+        _log_event(
+            "WARNING",
+            "BATCH_SKILL_CONTEXT_ERROR",
+            "Skill上下文预取失败，库房将各自查询",
+            batch_id=batch_run_id,
+            decision_id="N/A",
+            error=str(e),
+            error_type=type(e).__name__,
+        )
+        return {}
+
+    _log_event(
+        "INFO",
+        "BATCH_SKILL_CONTEXT_READY",
+        "Skill上下文预取完成",
+        batch_id=batch_run_id,
+        decision_id="N/A",
+        room_count=len(skill_contexts),
+        prefetch_sec=f"{time.time() - start_time:.3f}",
+    )
+    return skill_contexts
+
+
 def safe_batch_decision_analysis(
-    schedule_hour: int = None, schedule_minute: int = None
+    schedule_hour: int = None,
+    schedule_minute: int = None,
+    max_workers: int = DECISION_ANALYSIS_BATCH_MAX_WORKERS,
 ) -> None:
     """
     批量执行所有蘑菇房的决策分析任务（优化版：仅存储动态结果）
 
-    此函数按顺序为所有蘑菇房执行决策分析，确保即使某个房间失败也不会影响其他房间。
+    此函数并行为所有蘑菇房执行决策分析（最多 max_workers 个库房同时执行），
+    确保即使某个房间失败也不会影响其他房间。
     每次分析完成后仅存储动态结果到数据库（静态配置相对固定，无需重复存储）。
 
     优化特性:
@@ -508,6 +685,7 @@ def safe_batch_decision_analysis(
     Args:
         schedule_hour: 计划执行的小时（可选，用于日志记录）
         schedule_minute: 计划执行的分钟（可选，用于日志记录）
+        max_workers: 同时执行的库房数（1 为串行）
     """
     from utils.task_common import check_database_connection
 
@@ -523,6 +701,7 @@ def safe_batch_decision_analysis(
         schedule_minute = current_time.minute
 
     batch_run_id = _build_batch_run_id(schedule_hour, schedule_minute)
+    max_workers = max(1, min(max_workers, len(MUSHROOM_ROOM_IDS)))
 
     _log_event(
         "INFO",
@@ -547,79 +726,42 @@ def safe_batch_decision_analysis(
         multi_image_boost=DECISION_ANALYSIS_MULTI_IMAGE_BOOST,
         enable_skill_engine=DECISION_ANALYSIS_ENABLE_SKILL_ENGINE,
         enable_skill_kb_prior=DECISION_ANALYSIS_ENABLE_SKILL_KB_PRIOR,
+        max_workers=max_workers,
     )
 
     batch_start_time = datetime.now()
-    results: Dict[str, Dict[str, Any]] = {}
+    analysis_context = _prepare_batch_context(batch_run_id)
+    skill_contexts = _prefetch_skill_contexts(batch_run_id, analysis_context)
 
-    for room_id in MUSHROOM_ROOM_IDS:
-        room_start_time = datetime.now()
-        _log_event(
-            "INFO",
-            "ROOM_DISPATCH",
-            "开始处理库房",
-            batch_id=batch_run_id,
-            decision_id="N/A",
-            room_id=room_id,
-        )
-
-        try:
-            room_result = safe_decision_analysis_for_room(
+    if max_workers == 1:
+        room_results = [
+            _run_room_in_batch(
                 room_id,
-                batch_run_id=batch_run_id,
-            )
-            results[room_id] = {
-                "status": "success" if room_result.get("success") else "failed",
-                "duration": (datetime.now() - room_start_time).total_seconds(),
-                "skill_enabled": bool(room_result.get("skill_enabled", False)),
-                "skill_matched_count": int(room_result.get("skill_matched_count", 0)),
-                "skill_constraint_corrections": int(
-                    room_result.get("skill_constraint_corrections", 0)
-                ),
-                "skill_kb_prior_used": int(room_result.get("skill_kb_prior_used", 0)),
-                "warnings_count": int(room_result.get("warnings_count", 0)),
-                "dynamic_results_count": int(
-                    room_result.get("dynamic_results_count", 0)
-                ),
-                "change_count": int(room_result.get("change_count", 0)),
-                "error": room_result.get("error"),
-                "decision_id": room_result.get("decision_id"),
-            }
-
-            room_status = results[room_id]["status"]
-            log_level = "INFO" if room_status == "success" else "ERROR"
-            _log_event(
-                log_level,
-                "ROOM_FINISH",
-                "库房处理结束",
-                batch_id=batch_run_id,
-                room_id=room_id,
-                decision_id=results[room_id].get("decision_id"),
-                status=room_status,
-                duration_sec=f"{results[room_id]['duration']:.2f}",
-                warnings_count=results[room_id].get("warnings_count", 0),
-                dynamic_results_count=results[room_id].get("dynamic_results_count", 0),
-                change_count=results[room_id].get("change_count", 0),
-                error=results[room_id].get("error"),
-            )
-        except Exception as e:
-            results[room_id] = {
-                "status": "failed",
-                "error": str(e),
-                "duration": (datetime.now() - room_start_time).total_seconds(),
-            }
-            _log_event(
-                "ERROR",
-                "ROOM_CRASH",
-                "库房处理出现未捕获异常",
-                batch_id=batch_run_id,
-                decision_id="N/A",
-                room_id=room_id,
-                error=str(e),
-                error_type=type(e).__name__,
-                error_stack=traceback.format_exc(),
-                duration_sec=f"{results[room_id]['duration']:.2f}",
+                batch_run_id,
+                analysis_context,
+                skill_contexts.get(str(room_id)),
             )
+            for room_id in MUSHROOM_ROOM_IDS
+        ]
+    else:
+        # 库房之间互不依赖，并行执行；LLM并发由 LLMClient 的进程级上限控制
+        with ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="decision-room"
+        ) as executor:
+            futures = [
+                executor.submit(
+                    contextvars.copy_context().run,
+                    _run_room_in_batch,
+                    room_id,
+                    batch_run_id,
+                    analysis_context,
+                    skill_contexts.get(str(room_id)),
+                )
+                for room_id in MUSHROOM_ROOM_IDS
+            ]
+            room_results = [future.result() for future in futures]
+    # 按库房配置顺序汇总，保持日志与统计输出顺序不变
+    results = dict(zip(MUSHROOM_ROOM_IDS, room_results))
 
     # 汇总报告
     batch_duration = (datetime.now() - batch_start_time).total_seconds()
@@ -648,6 +790,7 @@ def safe_batch_decision_analysis(
         int(r.get("dynamic_results_count", 0)) for r in results.values()
     )
     total_change_count = sum(int(r.get("change_count", 0)) for r in results.values())
+    total_setup_time = sum(float(r.get("setup_time", 0.0)) for r in results.values())
 
     summary_level = "INFO" if failed_count == 0 else "WARNING"
     _log_event(
@@ -660,6 +803,7 @@ def safe_batch_decision_analysis(
         failed_count=failed_count,
         total_rooms=len(MUSHROOM_ROOM_IDS),
         duration_sec=f"{batch_duration:.2f}",
+        room_setup_sec=f"{total_setup_time:.3f}",
     )
 
     for room_id, result in results.items():
@@ -672,6 +816,7 @@ def safe_batch_decision_analysis(
             decision_id=result.get("decision_id"),
             status=result.get("status"),
             duration_sec=f"{result.get('duration', 0.0):.2f}",
+            setup_sec=f"{result.get('setup_time', 0.0):.3f}",
             skill_hit=result.get("skill_matched_count", 0),
             skill_fix=result.get("skill_constraint_corrections", 0),
             kb_ref=result.get("skill_kb_prior_used", 0),
@@ -279,18 +279,10 @@ class EnvDataProcessor:
                         )
                         return env_data
 
-                # 查询数据
-                # Fix for FutureWarning: Replace groupby.apply with iteration
-                results = []
-                # 使用 as_index=False 确保分组键保留为列
-                for _, group in env_config.groupby("device_alias", as_index=False):
-                    res = query_data_by_batch_time(group, start_time, end_time)
-                    results.append(res)
-
-                if results:
-                    df = pd.concat(results).reset_index(drop=True)
-                else:
-                    df = pd.DataFrame()
+                # 查询数据（所有设备的测点×时间切片一次并发拉取）
+                df = query_data_by_batch_time(
+                    env_config.copy(), start_time, end_time
+                ).reset_index(drop=True)
 
                 if not df.empty:
                     # 数据透视
@@ -385,20 +377,7 @@ def process_daily_env_stats(room_id: str, stat_date: date) -> Dict[str, Any]:
             env_data,
             in_day_num=info_data.get("in_day_num"),
         )
-
-        # 从 mushroom_info 配置补齐批次字段
-        info_in_date = info_data.get("in_date")
-        if isinstance(info_in_date, datetime):
-            info_in_date = info_in_date.date()
-
-        if stats.get("in_day_num") is None and info_in_date:
-            delta = (stat_date - info_in_date).days
-            if delta >= 0:
-                stats["in_day_num"] = delta + 1
-                stats["is_growth_phase"] = bool(1 <= int(stats["in_day_num"]) <= 27)
-
-        # batch_date 与 mushroom_info.in_date 对齐
-        stats["batch_date"] = info_in_date
+        stats = _apply_batch_info(stats, info_data, stat_date)
 
         # 存储统计结果
         record_count = store_env_statistics(room_id, stat_date, stats)
@@ -414,6 +393,25 @@ def process_daily_env_stats(room_id: str, stat_date: date) -> Dict[str, Any]:
         return {"success": False, "error": str(e), "records_count": 0}
 
 
+def _apply_batch_info(
+    stats: Dict[str, Any], info_data: Dict[str, Any], stat_date: date
+) -> Dict[str, Any]:
+    """从 mushroom_info 配置补齐批次字段（in_day_num / is_growth_phase / batch_date）"""
+    info_in_date = info_data.get("in_date")
+    if isinstance(info_in_date, datetime):
+        info_in_date = info_in_date.date()
+
+    if stats.get("in_day_num") is None and info_in_date:
+        delta = (stat_date - info_in_date).days
+        if delta >= 0:
+            stats["in_day_num"] = delta + 1
+            stats["is_growth_phase"] = bool(1 <= int(stats["in_day_num"]) <= 27)
+
+    # batch_date 与 mushroom_info.in_date 对齐
+    stats["batch_date"] = info_in_date
+    return stats
+
+
 def get_room_env_data(room_id: str, stat_date: date) -> pd.DataFrame:
     """
     获取库房的环境数据
@@ -439,17 +437,14 @@ def get_room_env_data(room_id: str, stat_date: date) -> pd.DataFrame:
         start_time = datetime.combine(stat_date, datetime.min.time())
         end_time = start_time + timedelta(days=1)
 
-        # 3. 查询数据
-        # Fix for FutureWarning: Replace groupby.apply with iteration
-        results = []
-        for _, group in env_config.groupby("device_alias", as_index=False):
-            res = query_data_by_batch_time(group, start_time, end_time)
-            results.append(res)
-
-        if results:
-            df = pd.concat(results).reset_index(drop=True)
-        else:
-            df = pd.DataFrame()
+        # 3. 查询数据（所有设备的测点×时间切片一次并发拉取）
+        if (
+            "device_alias" not in env_config.columns
+            and env_config.index.name == "device_alias"
+        ):
+            env_config = env_config.reset_index()
+        df = query_data_by_batch_time(env_config.copy(), start_time, end_time)
+        df = df.reset_index(drop=True)
 
         if df.empty:
             logger.debug(
@@ -830,6 +825,313 @@ def store_env_statistics(room_id: str, stat_date: date, stats: Dict[str, Any]) -
         return 0
 
 
+# 参与每日统计的环境测点 -> 统计字段前缀
+ENV_STAT_POINT_PREFIXES = {"temperature": "temp", "humidity": "humidity", "co2": "co2"}
+
+ENV_CONFIG_TYPE = "mushroom_env_status"
+INFO_CONFIG_TYPE = "mushroom_info"
+
+
+def _resolve_rooms_point_configs(
+    room_ids: List[str], device_types: List[str]
+) -> pd.DataFrame:
+    """
+    一次解析多个库房的测点配置
+    Returns:
+        pd.DataFrame: 合并后的测点配置，附加 room_id、device_type 列
+    """
+    from utils.dataframe_utils import get_all_device_configs
+
+    frames = []
+    for room_id in room_ids:
+        device_configs = get_all_device_configs(room_id=room_id) or {}
+        for device_type in device_types:
+            config = device_configs.get(device_type)
+            if config is None or config.empty:
+                continue
+            if "device_alias" not in config.columns:
+                if config.index.name != "device_alias":
+                    continue
+                config = config.reset_index()
+            frames.append(config.assign(room_id=room_id, device_type=device_type))
+
+    if not frames:
+        return pd.DataFrame(columns=["room_id", "device_type"])
+    return pd.concat(frames, ignore_index=True)
+
+
+def _fetch_rooms_history(
+    configs: pd.DataFrame, start_time: datetime, end_time: datetime
+) -> pd.DataFrame:
+    """
+    多库房测点历史数据一个并发波次拉取
+    Returns:
+        pd.DataFrame: 长表 (time, value, device_name, point_name, room_id, device_type)
+    """
+    from utils.data_preprocessing import (
+        build_time_slice_requests,
+        fetch_history_concurrently,
+    )
+
+    columns = ["time", "value", "device_name", "point_name", "room_id", "device_type"]
+    if configs.empty:
+        return pd.DataFrame(columns=columns)
+
+    request_df = build_time_slice_requests(configs.copy(), start_time, end_time)
+    results = fetch_history_concurrently(request_df)
+
+    # fetch_history_concurrently 按请求行顺序返回，据此回填库房归属
+    frames = [
+        res.assign(room_id=room_id, device_type=device_type)
+        for res, room_id, device_type in zip(
+            results, request_df["room_id"], request_df["device_type"]
+        )
+        if res is not None and not res.empty
+    ]
+    if not frames:
+        return pd.DataFrame(columns=columns)
+
+    df = pd.concat(frames, ignore_index=True)
+    df["value"] = pd.to_numeric(df["value"], errors="coerce")
+    df["time"] = pd.to_datetime(df["time"], errors="coerce")
+    return df
+
+
+def calculate_env_statistics_by_room(env_df: pd.DataFrame) -> Dict[str, Dict[str, Any]]:
+    """
+    多库房环境统计的分组计算，结果与逐库房 pivot + calculate_env_statistics 一致
+    Args:
+        env_df: 长表，包含 room_id, time, point_name, value 列
+    Returns:
+        Dict[str, Dict[str, Any]]: 库房编号 -> 统计指标（仅包含有数据的库房，不含批次字段）
+    """
+    env_df = env_df.dropna(subset=["time", "value"])
+    stats: Dict[str, Dict[str, Any]] = {
+        room_id: {} for room_id in env_df["room_id"].unique()
+    }
+
+    df = env_df[env_df["point_name"].isin(list(ENV_STAT_POINT_PREFIXES))]
+    if df.empty:
+        return stats
+
+    # 同一分钟多个设备的读数先取均值，对应 pivot_table 的默认聚合
+    per_minute = df.groupby(["room_id", "point_name", "time"])["value"].mean()
+    grouped = per_minute.groupby(level=["room_id", "point_name"])
+    summary = grouped.agg(["median", "min", "max", "count"]).join(
+        grouped.quantile([0.25, 0.75]).unstack()
+    )
+
+    for (room_id, point_name), row in summary.iterrows():
+        prefix = ENV_STAT_POINT_PREFIXES[point_name]
+        stats[room_id].update(
+            {
+                f"{prefix}_median": float(row["median"]),
+                f"{prefix}_min": float(row["min"]),
+                f"{prefix}_max": float(row["max"]),
+                f"{prefix}_q25": float(row[0.25]),
+                f"{prefix}_q75": float(row[0.75]),
+                f"{prefix}_count": int(row["count"]),
+            }
+        )
+
+    return stats
+
+
+def _build_env_stats_upsert(columns: Tuple[str, ...], row_count: int) -> str:
+    """构造多行 INSERT ... ON CONFLICT 语句，参数名为 {列名}_{行号}"""
+    values_clause = ",\n".join(
+        "(" + ", ".join(f":{col}_{idx}" for col in columns) + ")"
+        for idx in range(row_count)
+    )
+    update_columns = [
+        col for col in columns if col not in {"room_id", "stat_date", "created_at"}
+    ]
+    if update_columns:
+        conflict_action = "DO UPDATE SET " + ", ".join(
+            f"{col} = EXCLUDED.{col}" for col in update_columns
+        )
+    else:
+        conflict_action = "DO NOTHING"
+
+    return f"""
+        INSERT INTO mushroom_env_daily_stats ({", ".join(columns)})
+        VALUES {values_clause}
+        ON CONFLICT (room_id, stat_date)
+        {conflict_action}
+        """
+
+
+def store_env_statistics_bulk(
+    stat_date: date, stats_by_room: Dict[str, Dict[str, Any]]
+) -> Dict[str, int]:
+    """
+    批量存储多个库房的环境统计结果（一条多行 upsert 语句）
+    Args:
+        stat_date: 统计日期
+        stats_by_room: 库房编号 -> 统计指标
+    Returns:
+        Dict[str, int]: 库房编号 -> 存储的记录数
+    """
+    if not stats_by_room:
+        return {}
+
+    try:
+        from sqlalchemy import inspect, text
+
+        inspector = inspect(pgsql_engine)
+        available_columns = {
+            col["name"] for col in inspector.get_columns("mushroom_env_daily_stats")
+        }
+
+        # 按列集合分组：ON CONFLICT 只更新各库房实际算出的字段，与逐条写入一致
+        groups: Dict[Tuple[str, ...], List[Dict[str, Any]]] = {}
+        for room_id, stats in stats_by_room.items():
+            row = {
+                k: v
+                for k, v in {
+                    "room_id": room_id,
+                    "stat_date": stat_date,
+                    **stats,
+                }.items()
+                if k in available_columns
+            }
+            groups.setdefault(tuple(sorted(row)), []).append(row)
+
+        with pgsql_engine.connect() as conn:
+            try:
+                for columns, rows in groups.items():
+                    params = {
+                        f"{col}_{idx}": row[col]
+                        for idx, row in enumerate(rows)
+                        for col in columns
+                    }
+                    conn.execute(
+                        text(_build_env_stats_upsert(columns, len(rows))), params
+                    )
+                conn.commit()
+            except Exception as upsert_error:
+                if (
+                    "no unique or exclusion constraint matching the ON CONFLICT specification"
+                    not in str(upsert_error)
+                ):
+                    raise
+                conn.rollback()
+                logger.warning(
+                    "[ENV_PROCESSOR] ON CONFLICT 不可用（缺少唯一约束），回退到逐库房写入"
+                )
+                return {
+                    room_id: store_env_statistics(room_id, stat_date, stats)
+                    for room_id, stats in stats_by_room.items()
+                }
+
+        logger.debug(
+            f"[ENV_PROCESSOR] 环境统计批量存储完成: {len(stats_by_room)} 个库房"
+        )
+        return {room_id: 1 for room_id in stats_by_room}
+
+    except Exception as e:
+        logger.error(f"[ENV_PROCESSOR] 批量存储环境统计失败: {e}")
+        return {room_id: 0 for room_id in stats_by_room}
+
+
+def _derive_rooms_info(info_df: pd.DataFrame, stat_date: date) -> Dict[str, Any]:
+    if info_df.empty:
+        return {}
+    return {
+        room_id: derive_in_day_num_from_info(group, stat_date)
+        for room_id, group in info_df.groupby("room_id")
+    }
+
+
+def process_daily_env_stats_multi(
+    room_ids: List[str], stat_date: date
+) -> Dict[str, Dict[str, Any]]:
+    """
+    多库房每日环境统计：配置一次解析、历史数据一个并发波次拉取、
+    统计一次分组计算、结果一条语句批量写入
+    Args:
+        room_ids: 库房编号列表
+        stat_date: 统计日期
+    Returns:
+        Dict[str, Dict[str, Any]]: 库房编号 -> 处理结果（格式同 process_daily_env_stats）
+    """
+    try:
+        logger.info(
+            f"[ENV_PROCESSOR] 批量处理 {len(room_ids)} 个库房的环境统计，日期: {stat_date}"
+        )
+        configs = _resolve_rooms_point_configs(
+            room_ids, [ENV_CONFIG_TYPE, INFO_CONFIG_TYPE]
+        )
+        day_start = datetime.combine(stat_date, datetime.min.time())
+        day_end = day_start + timedelta(days=1)
+
+        # 环境测点与当天 mushroom_info 测点同一波次拉取
+        history = _fetch_rooms_history(configs, day_start, day_end)
+        env_df = history[history["device_type"] == ENV_CONFIG_TYPE]
+        info_by_room = _derive_rooms_info(
+            history[history["device_type"] == INFO_CONFIG_TYPE], stat_date
+        )
+
+        # 当天缺采样的库房回退近7天，与 get_room_mushroom_info 一致
+        info_configs = configs[configs["device_type"] == INFO_CONFIG_TYPE]
+        missing_info_configs = info_configs[
+            ~info_configs["room_id"].isin(list(info_by_room))
+        ]
+        if not missing_info_configs.empty:
+            fallback_history = _fetch_rooms_history(
+                missing_info_configs, day_start - timedelta(days=7), day_end
+            )
+            info_by_room.update(_derive_rooms_info(fallback_history, stat_date))
+
+        room_stats = calculate_env_statistics_by_room(env_df)
+
+        results: Dict[str, Dict[str, Any]] = {}
+        stats_to_store: Dict[str, Dict[str, Any]] = {}
+        for room_id in room_ids:
+            if room_id not in room_stats:
+                logger.warning(
+                    f"[ENV_PROCESSOR] 库房 {room_id} 在 {stat_date} 无环境数据"
+                )
+                results[room_id] = {
+                    "success": True,
+                    "records_count": 0,
+                    "message": "No data available",
+                }
+                continue
+
+            info_data = info_by_room.get(
+                room_id, {"in_day_num": None, "in_date": None, "in_num": None}
+            )
+            in_day_num = info_data.get("in_day_num")
+            stats = {
+                **room_stats[room_id],
+                "in_day_num": in_day_num,
+                "is_growth_phase": (
+                    True if in_day_num is None else bool(1 <= int(in_day_num) <= 27)
+                ),
+            }
+            stats_to_store[room_id] = _apply_batch_info(stats, info_data, stat_date)
+
+        record_counts = store_env_statistics_bulk(stat_date, stats_to_store)
+        for room_id, stats in stats_to_store.items():
+            results[room_id] = {
+                "success": True,
+                "records_count": record_counts.get(room_id, 0),
+                "stats_summary": stats,
+            }
+
+        logger.info(
+            f"[ENV_PROCESSOR] 批量环境统计完成，生成 {sum(record_counts.values())} 条记录"
+        )
+        return results
+
+    except Exception as e:
+        logger.error(f"[ENV_PROCESSOR] 批量环境统计失败，回退逐库房处理: {e}")
+        return {
+            room_id: process_daily_env_stats(room_id, stat_date) for room_id in room_ids
+        }
+
+
 def get_env_trend_analysis(room_id: str, days: int = 7) -> Dict[str, Any]:
     """
     获取环境趋势分析
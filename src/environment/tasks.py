@@ -5,7 +5,7 @@
 from datetime import date, timedelta
 from global_const.const_config import MUSHROOM_ROOM_IDS
 from utils.loguru_setting import logger
-from .processor import process_daily_env_stats
+from .processor import process_daily_env_stats_multi
 
 
 def safe_daily_env_stats() -> None:
@@ -13,7 +13,7 @@ def safe_daily_env_stats() -> None:
     每日环境统计任务
 
     功能:
-    1. 遍历所有蘑菇房
+    1. 批量处理所有蘑菇房
     2. 计算前一天的环境统计数据
     3. 存储到数据库
     """
@@ -33,15 +33,16 @@ def safe_daily_env_stats() -> None:
         success_count = 0
         failed_count = 0
 
+        # 所有库房一次拉取、一次分组统计、一次批量写入
+        results = process_daily_env_stats_multi(list(MUSHROOM_ROOM_IDS), stat_date)
         for room_id in MUSHROOM_ROOM_IDS:
-            try:
-                result = process_daily_env_stats(room_id, stat_date)
-                if result.get("success", False):
-                    success_count += 1
-                else:
-                    failed_count += 1
-            except Exception as e:
-                logger.error(f"[ENV_TASK] 处理库房 {room_id} 失败: {e}")
+            if results.get(room_id, {}).get("success", False):
+                success_count += 1
+            else:
+                logger.error(
+                    f"[ENV_TASK] 处理库房 {room_id} 失败: "
+                    f"{results.get(room_id, {}).get('error')}"
+                )
                 failed_count += 1
 
         logger.info(
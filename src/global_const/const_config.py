@@ -40,6 +40,24 @@ ENV_STATS_RETRY_DELAY: int = 5
 MONITORING_MAX_RETRIES: int = 3
 MONITORING_RETRY_DELAY: int = 5
 
+# 历史数据并发拉取（query_data_by_batch_time）
+HISTORY_FETCH_MAX_WORKERS: int = 8  # 线程池大小（测点×时间切片请求并发数上限）
+HISTORY_FETCH_MAX_PER_HOST: int = 4  # 同一数据服务主机的最大在途请求数
+
+# HTTP 连接池（utils.send_request.SendRequest 共享会话）
+HTTP_POOL_CONNECTIONS: int = 4  # 缓存的主机连接池数量
+# 单主机保持的 keep-alive 连接数（不小于 HISTORY_FETCH_MAX_WORKERS）
+HTTP_POOL_MAXSIZE: int = 16
+HTTP_CONNECT_TIMEOUT: float = 5.0  # 建连超时（秒）
+HTTP_GET_READ_TIMEOUT: float = 5.0  # GET 读超时（秒）
+HTTP_POST_READ_TIMEOUT: float = 650.0  # POST 读超时（秒），历史数据接口耗时较长
+HTTP_PUT_READ_TIMEOUT: float = 60.0  # PUT 读超时（秒）
+
+# 静态设备配置进程内缓存（dataframe_utils，一级；Redis 为二级）
+STATIC_CONFIG_LOCAL_CACHE_MAXSIZE: int = 256  # LRU 条目上限（设备类型 × 库房）
+# 软过期时间：超时后先返回旧值，再后台从 Redis/静态配置刷新（stale-while-revalidate）
+STATIC_CONFIG_LOCAL_CACHE_TTL_SECONDS: int = 300
+
 # 决策分析执行时间点 (小时, 分钟)
 DECISION_ANALYSIS_SCHEDULE_TIMES: List[Tuple[int, int]] = [
     (9, 50),  # 上午09:50
@@ -57,6 +75,10 @@ DECISION_OUTPUT_FILENAME_PATTERN: str = "decision_analysis_{room_id}_{timestamp}
 # 定时任务相关常量
 DECISION_ANALYSIS_MAX_RETRIES: int = 3
 DECISION_ANALYSIS_RETRY_DELAY: int = 5  # 秒
+# 批量决策分析并行执行的库房数（1 为逐库房串行）
+DECISION_ANALYSIS_BATCH_MAX_WORKERS: int = 4
+# 进程内同时进行的决策LLM请求上限（多库房并行时保护LLM服务）
+DECISION_ANALYSIS_MAX_CONCURRENT_LLM: int = 2
 
 # 决策分析优化配置（目标：更贴近人工调控）
 # 由于历史相似图像编码缺失较多，默认降低相似案例参考强度
@@ -67,18 +89,64 @@ DECISION_ANALYSIS_MULTI_IMAGE_BOOST: bool = False
 DECISION_ANALYSIS_ENABLE_KB_HUMAN_PRIOR: bool = True
 DECISION_ANALYSIS_ENABLE_SKILL_ENGINE: bool = True
 DECISION_ANALYSIS_ENABLE_SKILL_KB_PRIOR: bool = True
+# 相似案例检索模式: "pgvector"(数据库内 <=> 余弦排序) / "pandas"(拉取全部候选后本地计算)
+DECISION_ANALYSIS_SIMILARITY_SEARCH_MODE: str = "pgvector"
+
+# 历史向量内存索引（CLIPMatcher 相似案例检索 / 图像一致性评分，替代逐库房SQL）
+DECISION_ANALYSIS_USE_EMBEDDING_INDEX: bool = False
+EMBEDDING_INDEX_REFRESH_INTERVAL_SECONDS: int = 300  # 增量刷新间隔（id > last_seen_id）
+EMBEDDING_INDEX_FULL_REBUILD_INTERVAL_SECONDS: int = 86400  # 全量重建间隔（同步更新/删除）
+EMBEDDING_INDEX_PERSIST_PATH: str = ""  # 持久化前缀，如 "cache/embedding_index"；为空不持久化
 
 # 聚类控制知识库刷新任务配置
 CONTROL_KB_REFRESH_INTERVAL_DAYS: int = 27
 CONTROL_KB_REFRESH_CHECK_HOUR: int = 3
 CONTROL_KB_REFRESH_CHECK_MINUTE: int = 30
 CONTROL_KB_MIN_SAMPLES_PER_POINT: int = 12
+# 聚类知识库进程内快照：超过该间隔才重新查询当前生效 run_id（其他进程落库的新批次）
+CLUSTER_KB_SNAPSHOT_CHECK_SECONDS: int = 600
 
 # CLIP推理任务相关常量
 CLIP_INFERENCE_MAX_RETRIES: int = 3
 CLIP_INFERENCE_RETRY_DELAY: int = 5  # 秒
 CLIP_INFERENCE_BATCH_SIZE: int = 20  # 每批处理的图像数量
 CLIP_INFERENCE_HOUR_LOOKBACK: int = 3  # 处理最近N小时的图像
+CLIP_ENCODE_MICRO_BATCH_SIZE: int = 16  # 单次CLIP前向的图像数量（CPU节点建议8-32）
+# 调度进程常驻编码器：空闲超过该时长且无任务使用时卸载 CLIP（<=0 不卸载）
+ENCODER_IDLE_UNLOAD_SECONDS: int = 3 * 3600
+ENCODER_IDLE_CHECK_INTERVAL_SECONDS: int = 60  # 空闲卸载检查间隔
+# CLIP 特征内容寻址缓存：图像按内容哈希、文本按规范化描述缓存塔输出（相对项目根目录；为空禁用）
+EMBEDDING_CACHE_DIR: str = "cache/embeddings"
+EMBEDDING_CACHE_MAX_BYTES: int = 512 * 1024 * 1024  # 落盘总大小上限，超出按 LRU 淘汰
+IMAGE_CONTENT_HASH_INFO_KEY: str = "content_sha256"  # 图像加载时记录字节哈希的 image.info 键
+# 已处理检查：单次 image_path = ANY(:paths) 查询的路径数
+PROCESSED_PATH_QUERY_CHUNK_SIZE: int = 1000
+# 已处理路径本地缓存有效期（清理脚本可能删除向量，需定期失效）
+PROCESSED_PATH_CACHE_TTL_SECONDS: int = 3600
+# MinIO 图像预取：并发下载线程数 / 解码线程数 / 已就绪图像队列上限
+IMAGE_PREFETCH_DOWNLOAD_WORKERS: int = 8
+IMAGE_PREFETCH_DECODE_WORKERS: int = 4
+IMAGE_PREFETCH_QUEUE_SIZE: int = 32
+# MinIO urllib3 连接池大小（需不小于预取下载线程数）
+MINIO_HTTP_POOL_SIZE: int = 16
+# MinIO 多前缀并行列举线程数（库房×日期前缀，1 为串行）
+MINIO_LIST_MAX_WORKERS: int = 8
+# MinIO 列举缓存：已结束日期的落盘目录（相对项目根目录；为空仅进程内缓存）
+MINIO_LISTING_CACHE_DIR: str = "cache/minio_listing"
+MINIO_LISTING_CACHE_MAX_PREFIXES: int = 4096  # 进程内缓存的前缀数上限（LRU）
+# 当天前缀全量重新列举间隔（发现新摄像头），期间按摄像头 start_after 增量刷新
+MINIO_LISTING_FULL_REFRESH_SECONDS: int = 900
+# 日期结束后超过该宽限期视为不可变（容忍延迟上传）
+MINIO_LISTING_CLOSED_DAY_GRACE_HOURS: int = 2
+# LLaMA-VL 描述请求并发数（settings.llama_vl.max_in_flight 可覆盖）
+LLAMA_MAX_IN_FLIGHT: int = 4
+# LLaMA-VL 请求令牌桶：每秒发起数（<=0 不限速）与突发上限
+LLAMA_RATE_LIMIT_PER_SECOND: float = 4.0
+LLAMA_RATE_LIMIT_BURST: int = 4
+# LLaMA 上传图像 JPEG 自适应压缩：SSIM 计算所用亮度图的最大边长
+LLAMA_JPEG_SSIM_MAX_SIDE: int = 256
+# 按摄像头（collection_ip）缓存的已选 JPEG 质量条目上限
+LLAMA_JPEG_QUALITY_CACHE_SIZE: int = 512
 
 # 决策分析配置
 DECISION_ANALYSIS_CONFIG = {
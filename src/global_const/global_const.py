@@ -8,6 +8,7 @@
 """
 
 import os
+import threading
 from pathlib import Path
 from urllib.parse import quote_plus
 import sys
@@ -125,13 +126,29 @@ except Exception as e:
 
 
 # 数据查询服务接口 - 延迟初始化，避免循环导入
-def create_get_data():
-    """创建GetData实例，避免循环导入"""
-    from utils.get_data import GetData
+_GET_DATA_INSTANCE = None
+_GET_DATA_LOCK = threading.Lock()
 
-    return GetData(
-        urls=settings.data_source_url, host=settings.host.host, port=settings.host.port
-    )
+
+def create_get_data():
+    """
+    获取进程级共享的GetData实例（延迟初始化，避免循环导入）
+
+    GetData 无按请求变化的状态，底层 HTTP 请求复用 SendRequest 的共享连接池会话，
+    因此所有调用方（包括并发拉取线程）共用同一实例。
+    """
+    global _GET_DATA_INSTANCE
+    if _GET_DATA_INSTANCE is None:
+        with _GET_DATA_LOCK:
+            if _GET_DATA_INSTANCE is None:
+                from utils.get_data import GetData
+
+                _GET_DATA_INSTANCE = GetData(
+                    urls=settings.data_source_url,
+                    host=settings.host.host,
+                    port=settings.host.port,
+                )
+    return _GET_DATA_INSTANCE
 
 
 table_name = dict(ep_history_agg="ep_history_agg")
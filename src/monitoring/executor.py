@@ -19,6 +19,7 @@ from utils.create_table import (
     query_decision_analysis_static_configs,
 )
 from utils.loguru_setting import logger
+from utils.setpoint_change_engine import detect_setpoint_changes_frame
 
 
 class SetpointMonitoringTask(BaseTask):
@@ -510,73 +511,29 @@ class SetpointMonitoringTask(BaseTask):
         Returns:
             List[Dict[str, Any]]: 变更记录列表
         """
-        changes = []
-
         try:
-            change_type = config["change_type"]
-            threshold = config.get("threshold")
-            enum_mapping = config.get("enum_mapping", {})
-
-            for i in range(1, len(group)):
-                current_row = group.iloc[i]
-                previous_row = group.iloc[i - 1]
-
-                current_value = current_row["value"]
-                previous_value = previous_row["value"]
-
-                # 跳过无效值
-                if pd.isna(current_value) or pd.isna(previous_value):
-                    continue
-
-                change_detected = False
-                change_info = {}
-
-                # 根据变更类型检测变化
-                if change_type == "digital_on_off":
-                    # 数字量开关变化检测
-                    if int(current_value) != int(previous_value):
-                        change_detected = True
-                        change_info = f"{int(previous_value)} -> {int(current_value)}"
-
-                elif change_type == "analog_value":
-                    # 模拟量变化检测
-                    if threshold and abs(current_value - previous_value) >= threshold:
-                        change_detected = True
-                        change_info = f"{previous_value:.2f} -> {current_value:.2f}"
-
-                elif change_type == "enum_state":
-                    # 枚举状态变化检测
-                    if int(current_value) != int(previous_value):
-                        change_detected = True
-                        # 使用枚举映射获取状态描述
-                        prev_desc = enum_mapping.get(
-                            str(int(previous_value)), str(int(previous_value))
-                        )
-                        curr_desc = enum_mapping.get(
-                            str(int(current_value)), str(int(current_value))
-                        )
-                        change_info = f"{prev_desc} -> {curr_desc}"
-
-                if change_detected:
-                    change_record = {
-                        "room_id": config["room_id"],
-                        "device_type": config["device_type"],
-                        "device_name": config["device_name"],
-                        "point_name": config["point_name"],
-                        "point_description": config.get("remark", ""),
-                        "change_time": current_row["time"],
-                        "previous_value": float(previous_value),
-                        "current_value": float(current_value),
-                        "change_type": change_type,
-                        "detection_time": datetime.now(),
-                    }
-                    changes.append(change_record)
-
-                    logger.debug(
-                        f"[{self.task_name}] {config['device_name']}.{config['point_name']}: {change_info}"
+            point_df = group[["time", "value"]].assign(
+                **{
+                    key: config.get(key)
+                    for key in (
+                        "room_id",
+                        "device_type",
+                        "device_name",
+                        "point_name",
+                        "change_type",
+                        "threshold",
                     )
-
-            return changes
+                },
+                remark=config.get("remark", ""),
+            )
+            # 模拟量阈值缺失时不检测数值变化（与原逐行实现一致）
+            changes_df = detect_setpoint_changes_frame(
+                point_df,
+                group_keys=("device_name", "point_name"),
+                field_map={"point_description": "remark"},
+                truncate_states=True,
+            )
+            return changes_df.to_dict("records")
 
         except Exception as e:
             logger.error(f"[{self.task_name}] 测点变更检测失败: {e}")
@@ -12,7 +12,7 @@
 
 import time
 from datetime import datetime, timedelta
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Union
 
 import pandas as pd
 from sqlalchemy import bindparam, text
@@ -25,9 +25,17 @@ from utils.create_table import (
     query_decision_analysis_static_configs,
 )
 from utils.loguru_setting import logger
+from utils.setpoint_change_engine import detect_setpoint_changes_frame
 
 _DEVICE_CONFIGS_CACHE: Dict[str, Dict[str, pd.DataFrame]] = {}
 
+# 静态配置检测的输出列映射：设备/测点名取配置中的系统标识符，描述取 remark
+STATIC_CONFIG_FIELD_MAP = {
+    "device_name": "device_name_cfg",
+    "point_name": "point_name_cfg",
+    "point_description": "remark",
+}
+
 
 def _enrich_changes_with_batch_info(
     changes: List[Dict[str, Any]],
@@ -508,19 +516,9 @@ def get_realtime_setpoint_data(
             logger.warning(f"[REALTIME_DATA] 库房 {room_id} 无匹配的设定点数据")
             return pd.DataFrame()
 
-        # 查询历史数据
+        # 查询历史数据（整个库房的测点×时间切片一次并发拉取）
         df = (
-            setpoint_df.groupby(
-                "device_alias", group_keys=False, sort=False, observed=True
-            )
-            .apply(
-                lambda group: query_data_by_batch_time(
-                    group.assign(device_alias=group.name),
-                    start_time,
-                    end_time,
-                ),
-                include_groups=False,
-            )
+            query_data_by_batch_time(setpoint_df, start_time, end_time)
             .reset_index(drop=True)
             .sort_values("time")
         )
@@ -580,69 +578,16 @@ def detect_changes_with_static_configs(
             logger.error("[CHANGE_DETECT] 数据结构不匹配，无法进行分组")
             return []
 
-        merged = realtime_df.merge(
-            config_df,
-            on=["device_alias", "point_alias"],
-            how="inner",
-            suffixes=("", "_cfg"),
+        result_df = detect_setpoint_changes_frame(
+            realtime_df,
+            group_keys=("device_alias", "point_alias"),
+            config=config_df,
+            field_map=STATIC_CONFIG_FIELD_MAP,
+            default_threshold=0.0,
         )
-
-        if merged.empty:
-            logger.debug("[CHANGE_DETECT] 无匹配配置数据")
+        if result_df.empty:
             return []
 
-        merged = merged.sort_values("time")
-        group_keys = ["device_alias", "point_alias"]
-        merged["previous_value"] = merged.groupby(group_keys)["value"].shift(1)
-
-        valid_mask = merged["value"].notna() & merged["previous_value"].notna()
-        if not valid_mask.any():
-            return []
-
-        value_num = pd.to_numeric(merged["value"], errors="coerce")
-        prev_num = pd.to_numeric(merged["previous_value"], errors="coerce")
-        value_int = value_num.round().astype("Int64")
-        prev_int = prev_num.round().astype("Int64")
-        delta = (value_num - prev_num).abs()
-        threshold = merged["threshold"].fillna(0.0)
-
-        digital_mask = (merged["change_type"] == "digital_on_off") & (
-            value_int != prev_int
-        )
-        analog_mask = (merged["change_type"] == "analog_value") & (delta >= threshold)
-        enum_mask = (merged["change_type"] == "enum_state") & (value_int != prev_int)
-
-        change_mask = valid_mask & (digital_mask | analog_mask | enum_mask)
-        if not change_mask.any():
-            return []
-
-        changes_df = merged.loc[change_mask].copy()
-
-        changes_df["detection_time"] = datetime.now()
-
-        result_df = changes_df[
-            [
-                "room_id",
-                "device_type",
-                "device_name_cfg",
-                "point_name_cfg",
-                "remark",
-                "time",
-                "previous_value",
-                "value",
-                "change_type",
-                "detection_time",
-            ]
-        ].rename(
-            columns={
-                "device_name_cfg": "device_name",
-                "point_name_cfg": "point_name",
-                "remark": "point_description",
-                "time": "change_time",
-                "value": "current_value",
-            }
-        )
-
         # 保护性去重：同一库房同一设备测点同一时刻的重复变化仅保留一条
         dedupe_keys = ["room_id", "device_name", "point_name", "change_time"]
         before_dedupe = len(result_df)
@@ -677,91 +622,51 @@ def detect_point_changes(
     Returns:
         List[Dict[str, Any]]: 变更记录列表
     """
-    changes = []
-
     try:
-        change_type = config["change_type"]
-        threshold = config.get("threshold")
-        enum_mapping = config.get("enum_mapping", {})
-
-        for i in range(1, len(group)):
-            current_row = group.iloc[i]
-            previous_row = group.iloc[i - 1]
-
-            current_value = current_row["value"]
-            previous_value = previous_row["value"]
-
-            # 跳过无效值
-            if pd.isna(current_value) or pd.isna(previous_value):
-                continue
-
-            change_detected = False
-            change_info = {}
-
-            # 根据变更类型检测变化
-            if change_type == "digital_on_off":
-                # 数字量开关变化检测
-                if int(current_value) != int(previous_value):
-                    change_detected = True
-                    change_info = f"{int(previous_value)} -> {int(current_value)}"
-
-            elif change_type == "analog_value":
-                # 模拟量变化检测（无阈值时默认记录任意变化）
-                effective_threshold = 0.0 if threshold is None else threshold
-                if abs(current_value - previous_value) >= effective_threshold:
-                    change_detected = True
-                    change_info = f"{previous_value:.2f} -> {current_value:.2f}"
-
-            elif change_type == "enum_state":
-                # 枚举状态变化检测
-                if int(current_value) != int(previous_value):
-                    change_detected = True
-                    # 使用枚举映射获取状态描述
-                    prev_desc = enum_mapping.get(
-                        str(int(previous_value)), str(int(previous_value))
-                    )
-                    curr_desc = enum_mapping.get(
-                        str(int(current_value)), str(int(current_value))
-                    )
-                    change_info = f"{prev_desc} -> {curr_desc}"
-
-            if change_detected:
-                change_record = {
-                    "room_id": config["room_id"],
-                    "device_type": config["device_type"],
-                    "device_name": config["device_name"],
-                    "point_name": config["point_name"],
-                    "point_description": config.get("remark", ""),
-                    "change_time": current_row["time"],
-                    "previous_value": float(previous_value),
-                    "current_value": float(current_value),
-                    "change_type": change_type,
-                    "detection_time": datetime.now(),
-                }
-                changes.append(change_record)
-
-                logger.debug(
-                    f"[POINT_CHANGE] {config['device_name']}.{config['point_name']}: {change_info}"
+        point_df = group[["time", "value"]].assign(
+            **{
+                key: config.get(key)
+                for key in (
+                    "room_id",
+                    "device_type",
+                    "device_name",
+                    "point_name",
+                    "change_type",
+                    "threshold",
                 )
-
-        return changes
+            },
+            remark=config.get("remark", ""),
+        )
+        changes_df = detect_setpoint_changes_frame(
+            point_df,
+            group_keys=("device_name", "point_name"),
+            field_map={"point_description": "remark"},
+            default_threshold=0.0,
+            truncate_states=True,
+        )
+        return changes_df.to_dict("records")
 
     except Exception as e:
         logger.error(f"[POINT_CHANGE] 测点变更检测失败: {e}")
         return []
 
 
-def store_setpoint_changes_to_database(changes: List[Dict[str, Any]]) -> int:
+def store_setpoint_changes_to_database(
+    changes: Union[List[Dict[str, Any]], pd.DataFrame],
+) -> int:
     """
     存储设定点变更记录到数据库
 
     Args:
-        changes: 变更记录列表
+        changes: 变更记录列表，或 detect_setpoint_changes_frame 输出的变更 DataFrame
 
     Returns:
         int: 成功存储的记录数
     """
-    if not changes:
+    if isinstance(changes, pd.DataFrame):
+        if changes.empty:
+            return 0
+    elif not changes:
         return 0
 
     try:
@@ -10,6 +10,7 @@ from __future__ import annotations
 
 import json
 import re
+import time
 from dataclasses import asdict, dataclass, field
 from datetime import datetime
 from pathlib import Path
@@ -32,9 +33,11 @@ from utils.time_utils import format_datetime
 
 ensure_src_path()
 
-from decision_analysis.decision_analyzer import DecisionAnalyzer
-from decision_analysis.prompt_manager import resolve_decision_prompt_template
-from decision_analysis.skills.cultivation_skill import CultivationSkillEngine
+from decision_analysis.analysis_context import (
+    DecisionAnalysisContext,
+    get_decision_analysis_context,
+)
+from decision_analysis.skills.cultivation_skill import SkillContext
 
 
 @dataclass
@@ -82,14 +85,30 @@ def _load_json(path: Path) -> Dict[str, Any]:
         return json.load(f)
 
 
+def load_decision_analysis_context() -> DecisionAnalysisContext:
+    """获取进程级决策分析上下文（配置版本未变化时复用已构建的组件）"""
+    return get_decision_analysis_context(
+        db_engine=pgsql_engine,
+        settings=settings,
+        static_settings=static_settings,
+        config_dir=BASE_DIR / "configs",
+        enable_skill_kb_prior=DECISION_ANALYSIS_ENABLE_SKILL_KB_PRIOR,
+    )
+
+
 def _build_monitoring_points_output(
-    enhanced_output, room_id: str, analysis_time: datetime
+    enhanced_output,
+    room_id: str,
+    analysis_time: datetime,
+    monitoring_config: Optional[Dict[str, Any]] = None,
+    static_config: Optional[Dict[str, Any]] = None,
 ) -> Dict[str, Any]:
-    monitoring_config_path = BASE_DIR / "configs" / "monitoring_points_config.json"
-    static_config_path = BASE_DIR / "configs" / "static_config.json"
-
-    monitoring_config = _load_json(monitoring_config_path)
-    static_config = _load_json(static_config_path)
+    if monitoring_config is None:
+        monitoring_config = _load_json(
+            BASE_DIR / "configs" / "monitoring_points_config.json"
+        )
+    if static_config is None:
+        static_config = _load_json(BASE_DIR / "configs" / "static_config.json")
 
     monitoring_devices = monitoring_config.get("devices", {})
     static_datapoint = static_config.get("mushroom", {}).get("datapoint", {})
@@ -213,6 +232,8 @@ def execute_enhanced_decision_analysis(
     multi_image_boost: bool = True,
     enable_skill_engine: bool = True,
     persist_output_file: bool = True,
+    context: Optional[DecisionAnalysisContext] = None,
+    skill_context: Optional[SkillContext] = None,
 ) -> EnhancedDecisionAnalysisResult:
     """
     Execute enhanced decision analysis
@@ -230,6 +251,9 @@ def execute_enhanced_decision_analysis(
         multi_image_boost: 是否启用多图像相似度增强
         enable_skill_engine: 是否启用Skill能力模块约束修正
         persist_output_file: 是否写入输出JSON文件（调度任务可关闭以减少I/O）
+        context: 批次共享的分析上下文；为空时获取进程级上下文
+        skill_context: 批次预取的Skill库房状态（日统计/最新embedding）；
+            近6小时设定点变更由分析器已提取的设备变更记录计算
     """
 
     start_time = datetime.now()
@@ -247,21 +271,14 @@ def execute_enhanced_decision_analysis(
         if verbose:
             logger.enable(__name__)
 
-        template_path = BASE_DIR / "configs" / "decision_prompt.jinja"
-        template_content, prompt_meta = resolve_decision_prompt_template(
-            settings=settings,
-            urls=settings.data_source_url,
-            fallback_template_path=template_path,
-        )
-
-        analyzer = DecisionAnalyzer(
-            db_engine=pgsql_engine,
-            settings=settings,
-            static_config=static_settings,
-            template_path=str(template_path),
-            template_content=template_content,
-        )
+        setup_start = time.perf_counter()
+        if context is None:
+            context = load_decision_analysis_context()
+        setup_time = time.perf_counter() - setup_start
+        analyzer = context.analyzer
+        prompt_meta = context.prompt_meta
 
+        extracted_frames: Dict[str, Any] = {}
         enhanced_output = analyzer.analyze_enhanced(
             room_id=room_id,
             analysis_datetime=analysis_datetime,
@@ -270,11 +287,16 @@ def execute_enhanced_decision_analysis(
             env_similarity_weight=float(env_similarity_weight),
             enable_kb_human_prior=bool(enable_kb_human_prior),
             multi_image_boost=bool(multi_image_boost),
+            extracted_frames=extracted_frames,
         )
 
         enhanced_dict = _serialize(asdict(enhanced_output))
         monitoring_dict = _build_monitoring_points_output(
-            enhanced_output, room_id, analysis_datetime
+            enhanced_output,
+            room_id,
+            analysis_datetime,
+            monitoring_config=context.monitoring_config,
+            static_config=context.static_config,
         )
         skill_feedback: Dict[str, Any] = {
             "enabled": bool(enable_skill_engine),
@@ -284,17 +306,24 @@ def execute_enhanced_decision_analysis(
 
         if enable_skill_engine and output_format in {"monitoring", "both"}:
             try:
-                skill_library_path = (
-                    BASE_DIR / "configs" / "cultivation_skill_library.json"
-                )
-                skill_engine = CultivationSkillEngine(
-                    config_path=skill_library_path,
-                    enable_kb_prior=DECISION_ANALYSIS_ENABLE_SKILL_KB_PRIOR,
-                )
-                skill_context = skill_engine.build_context_from_db(
-                    room_id=room_id,
-                    analysis_time=analysis_datetime,
-                )
+                skill_engine = context.skill_engine
+                # 复用分析器已提取的设备变更记录；有批次预取状态时不再访问数据库
+                # （设备变更提取失败为 None，预取状态与分析时间跨日时同样回退单库房查询）
+                device_changes = extracted_frames.get("device_changes")
+                if skill_context is not None and device_changes is not None:
+                    skill_context = skill_engine.align_prefetched_context(
+                        skill_context, analysis_datetime
+                    )
+                if skill_context is not None and device_changes is not None:
+                    skill_context = skill_engine.apply_device_changes(
+                        skill_context, device_changes
+                    )
+                else:
+                    skill_context = skill_engine.build_context_from_db(
+                        room_id=room_id,
+                        analysis_time=analysis_datetime,
+                        device_changes=device_changes,
+                    )
                 monitoring_dict, skill_feedback = skill_engine.apply(
                     decision_data=monitoring_dict,
                     context=skill_context,
@@ -360,6 +389,7 @@ def execute_enhanced_decision_analysis(
             "image_aggregation_method": enhanced_output.metadata.image_aggregation_method,
             "llm_model": enhanced_output.metadata.llm_model,
             "llm_response_time": enhanced_output.metadata.llm_response_time,
+            "setup_time": setup_time,
             "prompt_source": prompt_meta.get("source"),
             "prompt_uri": prompt_meta.get("prompt_uri"),
             "registered_prompt_uri": prompt_meta.get("registered_prompt_uri"),
@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""Rebuild the mushroom_batch_summary projection read by the dashboard.
+
+Run after backfills or in_date fixes (fix_embedding_in_date.py,
+fix_text_quality_in_date.py), which rewrite rows without going through the
+CLIP / text-quality tasks that refresh the summary incrementally.
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+src_dir = Path(__file__).resolve().parents[2]
+if str(src_dir) not in sys.path:
+    sys.path.insert(0, str(src_dir))
+
+from global_const.global_const import ensure_src_path, pgsql_engine
+from utils.batch_summary import rebuild_batch_summary
+from utils.create_table import MushroomBatchSummary
+from utils.loguru_setting import logger
+
+ensure_src_path()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Rebuild mushroom_batch_summary from mushroom_embedding and image_text_quality."
+    )
+    parser.add_argument(
+        "--room-id",
+        action="append",
+        dest="room_ids",
+        help="Only rebuild this room (repeatable).",
+    )
+    args = parser.parse_args()
+
+    MushroomBatchSummary.__table__.create(bind=pgsql_engine, checkfirst=True)
+    start = time.perf_counter()
+    rows = rebuild_batch_summary(room_ids=args.room_ids)
+    logger.info(
+        f"[BATCH_SUMMARY] Rebuild finished: rows={rows}, "
+        f"elapsed={time.perf_counter() - start:.2f}s"
+    )
+
+
+if __name__ == "__main__":
+    main()
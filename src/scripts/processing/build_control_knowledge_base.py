@@ -11,6 +11,7 @@ from sklearn.metrics import silhouette_score
 from sklearn.preprocessing import StandardScaler
 from sqlalchemy.orm import sessionmaker
 
+from decision_analysis.cluster_kb import invalidate_cluster_kb_snapshot
 from global_const.global_const import pgsql_engine
 from utils.create_table import (
     ControlStrategyKnowledgeBaseRun,
@@ -560,6 +561,8 @@ def build_and_persist_cluster_kb(
             source_file=None,
             mark_previous_inactive=True,
         )
+        # 新批次已生效，丢弃进程内旧快照
+        invalidate_cluster_kb_snapshot()
 
     summary_path = None
     records_path = None
@@ -0,0 +1,245 @@
+"""
+批次汇总投影（mushroom_batch_summary）
+
+Streamlit 看板的批次列表 / 库房列表原先在每次缓存失效时对整张 mushroom_embedding
+做 GROUP BY，并关联 image_text_quality 全表的 "每张图最新质量" 子查询。本模块维护
+按 (room_id, in_date, in_num) 聚合的批次汇总表，看板直接读取：
+
+1. 增量刷新：CLIP 编码任务与文本/质量任务结束后，按 updated_at 找出本次写入涉及的
+   (room_id, in_date) 批次，仅重算这些批次（删除后重新插入，NULL in_num 也能正确处理）
+2. 每张图的质量分取最新一条 image_text_quality（LATERAL + (image_path, created_at) 索引），
+   与看板原查询的 "最新质量" 语义一致
+3. 全量重建：scripts/maintenance/rebuild_batch_summary.py，用于历史回填或修正 in_date 之后
+4. 刷新与重建在同一事务内持有表级 advisory lock，并发任务不会产生重复行
+"""
+
+from datetime import date, datetime, timedelta
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+import pandas as pd
+from sqlalchemy import Engine, text
+
+from utils.loguru_setting import logger
+
+# 看板读取的汇总列（与原 load_batch_data 输出列一致，另加 image_count）
+BATCH_SUMMARY_COLUMNS = [
+    "room_id",
+    "in_date",
+    "in_num",
+    "min_growth_day",
+    "max_growth_day",
+    "start_time",
+    "end_time",
+    "avg_quality",
+    "image_count",
+]
+
+# updated_at 由数据库时钟写入，按任务开始时间回溯时预留的时钟偏差
+_CLOCK_SKEW_MARGIN = timedelta(minutes=5)
+
+# 刷新/重建互斥用的 advisory lock 键
+_SUMMARY_LOCK_KEY = "mushroom_batch_summary"
+
+# 按批次聚合 embedding 与每张图最新质量分；{where} 限定参与聚合的 embedding
+_AGGREGATE_SQL = """
+    INSERT INTO mushroom_batch_summary (
+        room_id, in_date, in_num, min_growth_day, max_growth_day,
+        start_time, end_time, image_count, quality_count, avg_quality, updated_at
+    )
+    SELECT e.room_id, e.in_date, e.in_num,
+           MIN(e.growth_day), MAX(e.growth_day),
+           MIN(e.collection_datetime), MAX(e.collection_datetime),
+           COUNT(*), COUNT(q.image_quality_score), AVG(q.image_quality_score),
+           NOW()
+    FROM mushroom_embedding e
+    LEFT JOIN LATERAL (
+        SELECT image_quality_score
+        FROM image_text_quality
+        WHERE image_path = e.image_path
+          AND created_at IS NOT NULL
+        ORDER BY created_at DESC
+        LIMIT 1
+    ) q ON TRUE
+    {where}
+    GROUP BY e.room_id, e.in_date, e.in_num
+"""
+
+_BATCH_FILTER = """
+    WHERE (e.room_id, e.in_date) IN (
+        SELECT unnest(CAST(:room_ids AS text[])), unnest(CAST(:in_dates AS date[]))
+    )
+"""
+
+
+def _default_engine(db_engine: Optional[Engine]) -> Engine:
+    if db_engine is not None:
+        return db_engine
+    from global_const.global_const import pgsql_engine
+
+    return pgsql_engine
+
+
+def _lock(conn) -> None:
+    conn.execute(
+        text("SELECT pg_advisory_xact_lock(hashtext(:key))"),
+        {"key": _SUMMARY_LOCK_KEY},
+    )
+
+
+def refresh_batch_summary(
+    batches: Iterable[Tuple[str, date]],
+    db_engine: Optional[Engine] = None,
+) -> int:
+    """
+    重算指定批次的汇总行
+
+    Args:
+        batches: (room_id, in_date) 列表
+        db_engine: 数据库引擎（默认 pgsql_engine）
+
+    Returns:
+        写入的汇总行数
+    """
+    unique = sorted({(str(room_id), in_date) for room_id, in_date in batches})
+    if not unique:
+        return 0
+
+    params = {
+        "room_ids": [room_id for room_id, _ in unique],
+        "in_dates": [in_date for _, in_date in unique],
+    }
+    with _default_engine(db_engine).begin() as conn:
+        _lock(conn)
+        conn.execute(
+            text(
+                """
+                DELETE FROM mushroom_batch_summary
+                WHERE (room_id, in_date) IN (
+                    SELECT unnest(CAST(:room_ids AS text[])),
+                           unnest(CAST(:in_dates AS date[]))
+                )
+                """
+            ),
+            params,
+        )
+        written = conn.execute(
+            text(_AGGREGATE_SQL.format(where=_BATCH_FILTER)), params
+        ).rowcount
+
+    logger.info(f"[BATCH_SUMMARY] 已刷新 {len(unique)} 个批次，写入 {written} 行")
+    return written
+
+
+def find_touched_batches(
+    since: datetime, db_engine: Optional[Engine] = None
+) -> List[Tuple[str, date]]:
+    """since 之后写入/更新过 embedding 或质量记录的 (room_id, in_date) 批次"""
+    with _default_engine(db_engine).connect() as conn:
+        rows = conn.execute(
+            text(
+                """
+                SELECT room_id, in_date
+                FROM mushroom_embedding
+                WHERE updated_at >= :since
+                UNION
+                SELECT e.room_id, e.in_date
+                FROM image_text_quality q
+                JOIN mushroom_embedding e ON e.image_path = q.image_path
+                WHERE q.updated_at >= :since
+                """
+            ),
+            {"since": since},
+        ).fetchall()
+    return [(str(row[0]), row[1]) for row in rows]
+
+
+def refresh_batch_summary_since(
+    since: datetime, db_engine: Optional[Engine] = None
+) -> int:
+    """重算 since（任务开始时间）之后有写入的批次（CLIP / 文本质量任务结束时调用）"""
+    db_engine = _default_engine(db_engine)
+    batches = find_touched_batches(since - _CLOCK_SKEW_MARGIN, db_engine)
+    return refresh_batch_summary(batches, db_engine)
+
+
+def rebuild_batch_summary(
+    room_ids: Optional[Sequence[str]] = None,
+    db_engine: Optional[Engine] = None,
+) -> int:
+    """
+    全量重建汇总表（可限定库房）
+
+    Args:
+        room_ids: 仅重建这些库房；为空时重建全部
+        db_engine: 数据库引擎（默认 pgsql_engine）
+
+    Returns:
+        写入的汇总行数
+    """
+    params = {}
+    delete_sql = "DELETE FROM mushroom_batch_summary"
+    where = ""
+    if room_ids:
+        params["room_ids"] = [str(room_id) for room_id in room_ids]
+        delete_sql += " WHERE room_id = ANY(:room_ids)"
+        where = "WHERE e.room_id = ANY(:room_ids)"
+
+    with _default_engine(db_engine).begin() as conn:
+        _lock(conn)
+        conn.execute(text(delete_sql), params)
+        written = conn.execute(
+            text(_AGGREGATE_SQL.format(where=where)), params
+        ).rowcount
+
+    logger.info(
+        f"[BATCH_SUMMARY] 汇总表重建完成: rooms={list(room_ids) if room_ids else 'all'}, "
+        f"rows={written}"
+    )
+    return written
+
+
+def load_batch_summary(
+    room_ids: Optional[Sequence[str]] = None,
+    date_range: Optional[Sequence[date]] = None,
+    db_engine: Optional[Engine] = None,
+) -> pd.DataFrame:
+    """
+    读取批次汇总（列见 BATCH_SUMMARY_COLUMNS）
+
+    Args:
+        room_ids: 库房过滤
+        date_range: (起始进库日期, 结束进库日期)
+        db_engine: 数据库引擎（默认 pgsql_engine）
+    """
+    clauses = []
+    params = {}
+    if room_ids:
+        clauses.append("room_id = ANY(:room_ids)")
+        params["room_ids"] = [str(room_id) for room_id in room_ids]
+    if date_range:
+        clauses.append("in_date >= :start_date AND in_date <= :end_date")
+        params["start_date"] = date_range[0]
+        params["end_date"] = date_range[1]
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+
+    with _default_engine(db_engine).connect() as conn:
+        rows = conn.execute(
+            text(
+                f"""
+                SELECT {", ".join(BATCH_SUMMARY_COLUMNS)}
+                FROM mushroom_batch_summary
+                {where}
+                """
+            ),
+            params,
+        ).fetchall()
+    return pd.DataFrame(rows, columns=BATCH_SUMMARY_COLUMNS)
+
+
+def load_batch_summary_rooms(db_engine: Optional[Engine] = None) -> List[str]:
+    """汇总表中出现过的库房编号"""
+    with _default_engine(db_engine).connect() as conn:
+        rows = conn.execute(
+            text("SELECT DISTINCT room_id FROM mushroom_batch_summary")
+        ).fetchall()
+    return [row[0] for row in rows]
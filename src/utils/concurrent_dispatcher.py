@@ -0,0 +1,113 @@
+"""
+并发请求调度器
+限制同时在途请求数，并用令牌桶控制请求发起速率；结果按输入顺序返回
+"""
+
+import contextvars
+import threading
+import time
+from collections.abc import Callable, Iterable
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+
+
+class TokenBucket:
+    """
+    线程安全的令牌桶
+
+    以 rate 个/秒的速度补充令牌，最多累积 capacity 个；rate <= 0 时不限速。
+    """
+
+    def __init__(self, rate: float, capacity: float | None = None):
+        self.rate = float(rate)
+        self.capacity = max(1.0, float(capacity if capacity is not None else rate))
+        self._tokens = self.capacity
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> float:
+        """取走一个令牌，令牌不足时阻塞等待；返回等待秒数"""
+        if self.rate <= 0:
+            return 0.0
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(
+                    self.capacity, self._tokens + (now - self._updated_at) * self.rate
+                )
+                self._updated_at = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return waited
+                delay = (1 - self._tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+
+class ConcurrentDispatcher:
+    """
+    并发调度器
+
+    - max_in_flight: 同时执行的请求上限（同一实例的多次 map 调用共享该上限）
+    - rate_per_second / burst: 令牌桶限速，每个请求发起前取一个令牌
+    - 每个任务在调用方 contextvars 上下文的副本中执行（保留 trace/日志上下文）
+    """
+
+    def __init__(
+        self,
+        max_in_flight: int,
+        rate_per_second: float = 0.0,
+        burst: float | None = None,
+        thread_name_prefix: str = "dispatch",
+    ):
+        self.max_in_flight = max(1, int(max_in_flight))
+        self.bucket = TokenBucket(rate_per_second, burst)
+        self.thread_name_prefix = thread_name_prefix
+        self._slots = threading.BoundedSemaphore(self.max_in_flight)
+        self._stats_lock = threading.Lock()
+        self._stats = {"requests": 0, "rate_limited_seconds": 0.0, "max_in_flight": 0}
+        self._in_flight = 0
+
+    def _run(self, fn: Callable[[Any], Any], item: Any) -> Any:
+        with self._slots:
+            waited = self.bucket.acquire()
+            with self._stats_lock:
+                self._in_flight += 1
+                self._stats["requests"] += 1
+                self._stats["rate_limited_seconds"] += waited
+                self._stats["max_in_flight"] = max(
+                    self._stats["max_in_flight"], self._in_flight
+                )
+            try:
+                return fn(item)
+            finally:
+                with self._stats_lock:
+                    self._in_flight -= 1
+
+    def map(self, fn: Callable[[Any], Any], items: Iterable[Any]) -> list[Any]:
+        """
+        并发执行 fn(item)，按输入顺序返回结果
+
+        任一任务抛出异常时，在其余任务结束后按顺序抛出第一个异常。
+        """
+        items = list(items)
+        if not items:
+            return []
+        if self.max_in_flight == 1 or len(items) == 1:
+            return [self._run(fn, item) for item in items]
+
+        with ThreadPoolExecutor(
+            max_workers=min(self.max_in_flight, len(items)),
+            thread_name_prefix=self.thread_name_prefix,
+        ) as executor:
+            futures = [
+                executor.submit(contextvars.copy_context().run, self._run, fn, item)
+                for item in items
+            ]
+            return [future.result() for future in futures]
+
+    def get_stats(self) -> dict[str, Any]:
+        """获取调度统计（请求数、限速等待总时长、观测到的最大在途数）"""
+        with self._stats_lock:
+            return dict(self._stats)
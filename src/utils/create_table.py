@@ -44,6 +44,7 @@ class MushroomImageEmbedding(Base):
         Index(
             "idx_room_collection_ip", "room_id", "collection_ip"
         ),  # 复合索引：库房+采集IP
+        Index("idx_embedding_updated_at", "updated_at"),  # 批次汇总增量刷新
         # --- 表级参数字典（必须放在最后） ---
         {"comment": "蘑菇图片多模态向量存储表（含结构化控制参数）"},
     )
@@ -144,8 +145,11 @@ class ImageTextQuality(Base):
     __table_args__ = (
         Index("idx_text_quality_room_date", "room_id", "in_date"),
         Index("idx_text_quality_score", "image_quality_score"),
-        Index("idx_text_quality_image_path", "image_path"),
+        # 每张图最新一条记录（image_path 定位后按 created_at 倒序取第一条）；
+        # 前缀列同时覆盖按 image_path 的等值查询，不再单独建 image_path 索引
+        Index("idx_text_quality_path_created", "image_path", "created_at"),
         Index("idx_text_quality_embedding_id", "mushroom_embedding_id"),
+        Index("idx_text_quality_updated_at", "updated_at"),  # 批次汇总增量刷新
         {"comment": "文本描述与图像质量评分表（不保留历史时可避免重复）"},
     )
 
@@ -209,6 +213,33 @@ class MushroomBatchYield(Base):
     )
 
 
+class MushroomBatchSummary(Base):
+    """批次汇总投影（看板批次列表读取，由 utils.batch_summary 维护）"""
+
+    __tablename__ = "mushroom_batch_summary"
+
+    __table_args__ = (
+        Index("idx_batch_summary_room_date", "room_id", "in_date"),
+        Index("idx_batch_summary_in_date", "in_date"),
+        {"comment": "按库房/进库日期/进库包数聚合的图像批次汇总"},
+    )
+
+    id = Column(BigInteger, primary_key=True, autoincrement=True, comment="自增主键")
+    room_id = Column(String(10), nullable=False, comment="库房编号")
+    in_date = Column(Date, nullable=False, comment="进库日期 (YYYY-MM-DD)")
+    in_num = Column(Integer, nullable=True, comment="进库包数")
+    min_growth_day = Column(Integer, nullable=True, comment="最小生长天数")
+    max_growth_day = Column(Integer, nullable=True, comment="最大生长天数")
+    start_time = Column(DateTime, nullable=True, comment="最早采集时间")
+    end_time = Column(DateTime, nullable=True, comment="最晚采集时间")
+    image_count = Column(Integer, nullable=False, default=0, comment="图像数")
+    quality_count = Column(
+        Integer, nullable=False, default=0, comment="有质量评分的图像数"
+    )
+    avg_quality = Column(Float, nullable=True, comment="平均图像质量评分（最新记录）")
+    updated_at = Column(DateTime, server_default=func.now(), comment="刷新时间")
+
+
 class MushroomBatchYieldAudit(Base):
     """批次产量变更审计日志"""
 
@@ -1063,6 +1094,65 @@ def add_image_text_quality_fields():
         raise
 
 
+def ensure_text_quality_latest_index() -> None:
+    """
+    为已有的 image_text_quality 表补充 (image_path, created_at) 复合索引
+
+    "每张图最新质量记录" 的 LATERAL 查询依赖该索引，避免全表 GROUP BY image_path；
+    复合索引建好后删除被其前缀覆盖的单列索引 idx_text_quality_image_path
+    """
+    try:
+        with pgsql_engine.connect() as conn:
+            conn.execute(
+                text(
+                    """
+                    CREATE INDEX IF NOT EXISTS idx_text_quality_path_created
+                    ON image_text_quality (image_path, created_at)
+                    """
+                )
+            )
+            conn.execute(text("DROP INDEX IF EXISTS idx_text_quality_image_path"))
+            conn.commit()
+            logger.info(
+                "[Migration] idx_text_quality_path_created ensured on image_text_quality, "
+                "redundant idx_text_quality_image_path dropped"
+            )
+    except Exception as e:
+        logger.error(f"[Migration] Failed to create text quality latest index: {e}")
+        raise
+
+
+def ensure_batch_summary_indexes() -> None:
+    """
+    为已有的 mushroom_embedding / image_text_quality 表补充 updated_at 索引
+
+    批次汇总增量刷新按 updated_at 查找本次任务写入涉及的批次
+    """
+    try:
+        with pgsql_engine.connect() as conn:
+            conn.execute(
+                text(
+                    """
+                    CREATE INDEX IF NOT EXISTS idx_embedding_updated_at
+                    ON mushroom_embedding (updated_at)
+                    """
+                )
+            )
+            conn.execute(
+                text(
+                    """
+                    CREATE INDEX IF NOT EXISTS idx_text_quality_updated_at
+                    ON image_text_quality (updated_at)
+                    """
+                )
+            )
+            conn.commit()
+            logger.info("[Migration] updated_at indexes ensured for batch summary")
+    except Exception as e:
+        logger.error(f"[Migration] Failed to create batch summary indexes: {e}")
+        raise
+
+
 def clean_image_text_quality_dirty_links() -> dict:
     """
     清理 image_text_quality 脏关联：
@@ -1625,6 +1715,18 @@ def create_tables():
     except Exception as e:
         logger.error(f"[0.1.3] Failed to add image_text_quality fields: {str(e)}")
 
+    # 4.1.1 image_text_quality 最新记录查询索引
+    try:
+        ensure_text_quality_latest_index()
+    except Exception as e:
+        logger.error(f"[0.1.3] Failed to ensure text quality latest index: {str(e)}")
+
+    # 4.1.2 批次汇总增量刷新索引
+    try:
+        ensure_batch_summary_indexes()
+    except Exception as e:
+        logger.error(f"[0.1.3] Failed to ensure batch summary indexes: {str(e)}")
+
     # 4.2 更新 device_setpoint_changes 表结构
     try:
         update_device_setpoint_change_schema()
@@ -1,10 +1,33 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 
 import pandas as pd
 from loguru import logger
 
+from global_const.const_config import (
+    HISTORY_FETCH_MAX_PER_HOST,
+    HISTORY_FETCH_MAX_WORKERS,
+)
 from global_const.global_const import create_get_data
 
+# 每个数据服务主机的在途请求信号量（跨线程、跨调用共享），按 (主机, 上限) 区分，
+# 避免后续调用的 max_per_host 被首个调用的上限静默覆盖
+_HOST_SEMAPHORES = {}
+_HOST_SEMAPHORES_LOCK = threading.Lock()
+
+# 历史数据拉取累计指标
+_FETCH_METRICS_LOCK = threading.Lock()
+_FETCH_METRICS = {
+    "calls": 0,
+    "requests": 0,
+    "failed_requests": 0,
+    "rows": 0,
+    "request_seconds": 0.0,
+    "wall_seconds": 0.0,
+}
+
 
 def query_realtime_data(query_df, **kwargs):
     """
@@ -43,14 +66,124 @@ def query_realtime_data(query_df, **kwargs):
     return real_time_df
 
 
-def query_data_by_batch_time(query_df, start_date, end_date, days=5):
+def _get_host_semaphore(host, limit):
+    with _HOST_SEMAPHORES_LOCK:
+        key = (host, max(1, limit))
+        semaphore = _HOST_SEMAPHORES.get(key)
+        if semaphore is None:
+            semaphore = threading.BoundedSemaphore(key[1])
+            _HOST_SEMAPHORES[key] = semaphore
+        return semaphore
+
+
+def get_history_fetch_metrics():
     """
-    边缘侧查询给定条件时间的所有历史数据
-    :param query_df:
+    历史数据拉取累计指标
+    :return: dict，包含请求数、失败数、行数、平均请求延迟(秒)与吞吐(请求/秒、行/秒)
+    """
+    with _FETCH_METRICS_LOCK:
+        metrics = dict(_FETCH_METRICS)
+    requests_done = metrics["requests"]
+    wall = metrics["wall_seconds"]
+    metrics["avg_request_latency"] = (
+        metrics["request_seconds"] / requests_done if requests_done else 0.0
+    )
+    metrics["requests_per_second"] = requests_done / wall if wall > 0 else 0.0
+    metrics["rows_per_second"] = metrics["rows"] / wall if wall > 0 else 0.0
+    return metrics
+
+
+def reset_history_fetch_metrics():
+    with _FETCH_METRICS_LOCK:
+        for key in _FETCH_METRICS:
+            _FETCH_METRICS[key] = 0.0 if isinstance(_FETCH_METRICS[key], float) else 0
+
+
+def fetch_history_concurrently(
+    request_df, device_alias=None, max_workers=None, max_per_host=None, get_data=None
+):
+    """
+    并发拉取历史数据：每行（测点×时间切片）一次 get_device_history_cal 请求
+    - 线程池并发，且同一主机的在途请求数不超过 max_per_host
+    - 单请求重试沿用 SendRequest.send_post_request 的 tenacity 配置
+    - 结果按 request_df 行顺序返回，由调用方一次性 concat
+    :param request_df: 包含 device_name、point_name、start_time、end_time 等列的请求表
+    :param device_alias: 透传给 get_device_history_cal
+    :param max_workers: 线程池大小，默认 HISTORY_FETCH_MAX_WORKERS；1 表示串行
+    :param max_per_host: 单主机并发上限，默认 HISTORY_FETCH_MAX_PER_HOST
+    :param get_data: GetData 实例，默认 create_get_data()
+    :return: list[pd.DataFrame]
+    """
+    if request_df is None or request_df.empty:
+        return [pd.DataFrame()]
+
+    get_data = get_data or create_get_data()
+    max_workers = max_workers or HISTORY_FETCH_MAX_WORKERS
+    max_per_host = max_per_host or HISTORY_FETCH_MAX_PER_HOST
+    semaphore = _get_host_semaphore(get_data.host, max_per_host)
+    rows = [row for _, row in request_df.iterrows()]
+    results = [None] * len(rows)
+    latencies = [None] * len(rows)
+
+    def _fetch(idx):
+        with semaphore:
+            start = time.perf_counter()
+            try:
+                results[idx] = get_data.get_device_history_cal(
+                    rows[idx], device_alias=device_alias, query_batch=True
+                )
+            finally:
+                latencies[idx] = time.perf_counter() - start
+
+    wall_start = time.perf_counter()
+    failed = 0
+    try:
+        workers = min(max_workers, len(rows))
+        if workers <= 1:
+            for idx in range(len(rows)):
+                _fetch(idx)
+        else:
+            with ThreadPoolExecutor(
+                max_workers=workers, thread_name_prefix="history_fetch"
+            ) as executor:
+                futures = [executor.submit(_fetch, idx) for idx in range(len(rows))]
+                errors = [f.exception() for f in futures]
+                failed = sum(err is not None for err in errors)
+                first_error = next((err for err in errors if err is not None), None)
+                if first_error is not None:
+                    raise first_error
+    except Exception:
+        failed = max(failed, 1)
+        raise
+    finally:
+        wall = time.perf_counter() - wall_start
+        done = [lat for lat in latencies if lat is not None]
+        row_count = sum(len(r) for r in results if r is not None)
+        with _FETCH_METRICS_LOCK:
+            _FETCH_METRICS["calls"] += 1
+            _FETCH_METRICS["requests"] += len(done)
+            _FETCH_METRICS["failed_requests"] += failed
+            _FETCH_METRICS["rows"] += row_count
+            _FETCH_METRICS["request_seconds"] += sum(done)
+            _FETCH_METRICS["wall_seconds"] += wall
+        logger.debug(
+            f"[0.0.6] 历史数据拉取: requests={len(done)}/{len(rows)}, rows={row_count}, "
+            f"wall={wall:.2f}s, avg_latency={sum(done) / len(done) if done else 0.0:.2f}s, "
+            f"throughput={len(done) / wall if wall > 0 else 0.0:.1f} req/s"
+        )
+    return results
+
+
+def build_time_slice_requests(query_df, start_date, end_date, days=5):
+    """
+    将查询条件按时间切片展开为请求表（每行：测点×时间切片）
+    :param query_df: 包含 device_name、point_name 等列的查询条件
     :param start_date:
     :param end_date:
-    :return:
+    :param days: 切片天数，时间范围不超过 days 天时按天切片
+    :return: 带 start_time、end_time 列的请求表（不修改传入的 query_df）
     """
+    query_df = query_df.copy()
     query_slice_df = pd.DataFrame()
     # end_date = min(end_date, datetime.now())
     time_interval = days if (end_date - start_date).days / days > 1 else 1
@@ -65,6 +198,21 @@ def query_data_by_batch_time(query_df, start_date, end_date, days=5):
             drop=True
         )
         start_date = end_date_
+    return query_slice_df
+
+
+def query_data_by_batch_time(query_df, start_date, end_date, days=5, max_workers=None):
+    """
+    边缘侧查询给定条件时间的所有历史数据
+    测点×时间切片请求经 fetch_history_concurrently 并发发出，结果最后一次性合并；
+    query_df 可包含多个设备（按行的 device_alias 归属），一次调用即可覆盖整个库房
+    :param query_df:
+    :param start_date:
+    :param end_date:
+    :param max_workers: 并发请求数，默认 HISTORY_FETCH_MAX_WORKERS；1 表示串行
+    :return:
+    """
+    query_slice_df = build_time_slice_requests(query_df, start_date, end_date, days)
 
     # 修复：检查query_df是否有name属性，如果没有则使用device_alias列的第一个值
     device_alias = getattr(query_df, "name", None)
@@ -72,12 +220,11 @@ def query_data_by_batch_time(query_df, start_date, end_date, days=5):
         device_alias = query_df["device_alias"].iloc[0]
 
     res = pd.concat(
-        query_slice_df.apply(
-            create_get_data().get_device_history_cal,
+        fetch_history_concurrently(
+            query_slice_df,
             device_alias=device_alias,
-            query_batch=True,
-            axis=1,
-        ).tolist(),
+            max_workers=max_workers,
+        ),
         axis=0,
     )
     
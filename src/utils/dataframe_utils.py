@@ -4,13 +4,20 @@
 
 import json
 import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Dict, Optional
+from typing import Callable, Dict, Optional, Tuple
 import time
 
 import pandas as pd
 from loguru import logger
 
+from global_const.const_config import (
+    STATIC_CONFIG_LOCAL_CACHE_MAXSIZE,
+    STATIC_CONFIG_LOCAL_CACHE_TTL_SECONDS,
+)
 from global_const.global_const import (
     static_settings,
     conn,
@@ -22,6 +29,33 @@ REDIS_CACHE_TTL = 3600 * 24
 STATIC_CONFIG_FILE_PATH = BASE_DIR / "configs" / "static_config.json"
 
 
+@dataclass
+class _LocalConfigEntry:
+    """进程内缓存条目：就绪的 DataFrame + 加载时的配置文件 mtime"""
+
+    df: pd.DataFrame
+    file_mtime: Optional[float]
+    loaded_at: float
+
+
+# 一级缓存：(device_type, room_id) -> _LocalConfigEntry，LRU 淘汰
+_LOCAL_CONFIG_CACHE: "OrderedDict[Tuple[str, Optional[str]], _LocalConfigEntry]" = (
+    OrderedDict()
+)
+_LOCAL_CONFIG_LOCK = threading.Lock()
+_REVALIDATING_KEYS: set = set()
+_CONFIG_CACHE_STATS = {
+    "local_hits": 0,
+    "stale_hits": 0,
+    "local_misses": 0,
+    "redis_hits": 0,
+    "redis_misses": 0,
+    "revalidations": 0,
+    "revalidation_errors": 0,
+    "evictions": 0,
+}
+
+
 def _get_redis_key_timestamp(redis_key: str) -> Optional[float]:
     """
     获取Redis键的设置时间戳
@@ -154,9 +188,105 @@ def _set_cache_with_metadata(
         return False
 
 
+def _bump_stat(name: str, count: int = 1) -> None:
+    with _LOCAL_CONFIG_LOCK:
+        _CONFIG_CACHE_STATS[name] += count
+
+
+def _revalidate_local_entry(
+    key: Tuple[str, Optional[str]], loader: Callable[[], pd.DataFrame]
+) -> None:
+    """后台刷新单个缓存条目（同一键同时只有一个刷新线程）"""
+    try:
+        file_mtime = _get_file_modification_time(STATIC_CONFIG_FILE_PATH)
+        df = loader()
+        _local_cache_put(key, df, file_mtime)
+        _bump_stat("revalidations")
+    except Exception as e:
+        _bump_stat("revalidation_errors")
+        logger.warning(f"后台刷新设备配置缓存失败 | 键: {key}, 错误: {e}")
+    finally:
+        with _LOCAL_CONFIG_LOCK:
+            _REVALIDATING_KEYS.discard(key)
+
+
+def _local_cache_put(
+    key: Tuple[str, Optional[str]], df: pd.DataFrame, file_mtime: Optional[float]
+) -> None:
+    with _LOCAL_CONFIG_LOCK:
+        _LOCAL_CONFIG_CACHE[key] = _LocalConfigEntry(
+            df=df, file_mtime=file_mtime, loaded_at=time.monotonic()
+        )
+        _LOCAL_CONFIG_CACHE.move_to_end(key)
+        while len(_LOCAL_CONFIG_CACHE) > STATIC_CONFIG_LOCAL_CACHE_MAXSIZE:
+            _LOCAL_CONFIG_CACHE.popitem(last=False)
+            _CONFIG_CACHE_STATS["evictions"] += 1
+
+
+def _get_local_cached_config(
+    key: Tuple[str, Optional[str]], loader: Callable[[], pd.DataFrame]
+) -> pd.DataFrame:
+    """
+    一级缓存读取（返回副本，调用方可自由修改）
+
+    - 配置文件 mtime 变化：条目失效，同步重新加载
+    - 超过软过期时间：先返回旧值，同时后台线程经 loader 刷新（stale-while-revalidate）
+    - 未命中：同步经 loader（Redis 二级缓存 → 静态配置）加载
+    """
+    file_mtime = _get_file_modification_time(STATIC_CONFIG_FILE_PATH)
+
+    with _LOCAL_CONFIG_LOCK:
+        entry = _LOCAL_CONFIG_CACHE.get(key)
+        if entry is not None and entry.file_mtime == file_mtime:
+            _LOCAL_CONFIG_CACHE.move_to_end(key)
+            age = time.monotonic() - entry.loaded_at
+            if age < STATIC_CONFIG_LOCAL_CACHE_TTL_SECONDS:
+                _CONFIG_CACHE_STATS["local_hits"] += 1
+                return entry.df.copy()
+
+            _CONFIG_CACHE_STATS["stale_hits"] += 1
+            start_revalidation = key not in _REVALIDATING_KEYS
+            if start_revalidation:
+                _REVALIDATING_KEYS.add(key)
+            stale_df = entry.df
+        else:
+            _CONFIG_CACHE_STATS["local_misses"] += 1
+            stale_df = None
+
+    if stale_df is not None:
+        if start_revalidation:
+            threading.Thread(
+                target=_revalidate_local_entry,
+                args=(key, loader),
+                name=f"config-revalidate-{key[0]}",
+                daemon=True,
+            ).start()
+        return stale_df.copy()
+
+    df = loader()
+    _local_cache_put(key, df, file_mtime)
+    return df.copy()
+
+
+def clear_local_config_cache() -> None:
+    """清空进程内一级缓存（不影响 Redis）"""
+    with _LOCAL_CONFIG_LOCK:
+        _LOCAL_CONFIG_CACHE.clear()
+
+
+def get_config_cache_stats() -> Dict[str, int]:
+    """获取设备配置缓存命中统计（一级 LRU 与 Redis 二级）"""
+    with _LOCAL_CONFIG_LOCK:
+        stats = dict(_CONFIG_CACHE_STATS)
+        stats["local_entries"] = len(_LOCAL_CONFIG_CACHE)
+    return stats
+
+
 def get_static_config_by_device_type(device_type: str) -> pd.DataFrame:
     """
-    根据设备类型获取静态配置，优先从Redis获取，若不存在或配置文件已更新则重新生成并存入Redis。
+    根据设备类型获取静态配置。
+
+    两级缓存：进程内 LRU（按配置文件 mtime 校验，软过期后后台刷新）→ Redis → 静态配置重新生成。
 
     假设：同一设备类型的所有设备共享相同的 point_list（即点位定义在类型级别，非设备实例级别）。
 
@@ -167,6 +297,15 @@ def get_static_config_by_device_type(device_type: str) -> pd.DataFrame:
     if not hasattr(static_settings.mushroom.datapoint, device_type):
         raise ValueError(f"设备类型 '{device_type}' 未在静态配置中定义")
 
+    return _get_local_cached_config(
+        (device_type, None), lambda: _load_static_config(device_type)
+    )
+
+
+def _load_static_config(device_type: str) -> pd.DataFrame:
+    """
+    二级缓存读取：优先从Redis获取，若不存在或配置文件已更新则重新生成并存入Redis。
+    """
     device_key = mushroom_redis_key["static_config"].format(device_type=device_type)
 
     # 检查缓存是否有效
@@ -178,6 +317,7 @@ def get_static_config_by_device_type(device_type: str) -> pd.DataFrame:
             df_json = conn.get(device_key)
             if df_json:
                 df_data = json.loads(df_json)
+                _bump_stat("redis_hits")
                 return pd.DataFrame(df_data)
         except (json.JSONDecodeError, TypeError) as e:
             logger.warning(f"缓存数据损坏，重新生成: {device_type}")
@@ -185,6 +325,7 @@ def get_static_config_by_device_type(device_type: str) -> pd.DataFrame:
             logger.error(f"读取缓存失败: {device_type}, 错误: {e}")
 
     # 缓存无效或读取失败，从静态配置重新生成
+    _bump_stat("redis_misses")
     try:
         logger.debug(f"重新生成缓存: {device_type}")
 
@@ -220,6 +361,15 @@ def get_static_config_by_device_type(device_type: str) -> pd.DataFrame:
         raise ValueError(f"无法加载设备类型 '{device_type}' 的配置: {str(e)}")
 
 
+def _filter_room_config(df: pd.DataFrame, room_id: str, room_devices) -> pd.DataFrame:
+    """使用向量化操作进行库房过滤"""
+    # 优先使用预先获取的库房设备列表
+    if room_devices:
+        return df[df["device_alias"].isin(room_devices)].copy()
+    # 回退方案：使用设备名称后缀过滤
+    return df[df["device_name"].str.endswith(f"_{room_id}", na=False)].copy()
+
+
 def get_all_device_configs(room_id: str = None) -> Dict[str, pd.DataFrame]:
     """
     获取所有设备类型的配置（触发缓存预热）
@@ -267,26 +417,22 @@ def get_all_device_configs(room_id: str = None) -> Dict[str, pd.DataFrame]:
 
         for device_type in device_types:
             try:
-                # 获取设备类型配置
-                df = get_static_config_by_device_type(device_type)
-
-                # 使用向量化操作进行库房过滤
+                # 按库房过滤后的配置同样进入一级缓存（键：设备类型 × 库房）
                 if room_id is not None:
-                    # 优先使用预先获取的库房设备列表
-                    if room_devices:
-                        filtered_df = df[df["device_alias"].isin(room_devices)].copy()
-                        if not filtered_df.empty:
-                            all_configs[device_type] = filtered_df
-                            success_count += 1
-                    else:
-                        # 回退方案：使用设备名称后缀过滤
-                        filtered_df = df[
-                            df["device_name"].str.endswith(f"_{room_id}", na=False)
-                        ].copy()
-                        if not filtered_df.empty:
-                            all_configs[device_type] = filtered_df
-                            success_count += 1
+                    filtered_df = _get_local_cached_config(
+                        (device_type, str(room_id)),
+                        lambda dt=device_type: _filter_room_config(
+                            get_static_config_by_device_type(dt),
+                            room_id,
+                            room_devices,
+                        ),
+                    )
+                    if not filtered_df.empty:
+                        all_configs[device_type] = filtered_df
+                        success_count += 1
                 else:
+                    # 获取设备类型配置
+                    df = get_static_config_by_device_type(device_type)
                     # 不过滤，返回所有设备
                     all_configs[device_type] = df
                     success_count += 1
@@ -324,6 +470,12 @@ def clear_device_config_cache(device_type: str = None) -> bool:
         True表示清除成功，False表示清除失败
     """
     try:
+        # 同步清除进程内一级缓存（含按库房过滤的条目）
+        with _LOCAL_CONFIG_LOCK:
+            for key in list(_LOCAL_CONFIG_CACHE):
+                if device_type is None or key[0] == device_type:
+                    del _LOCAL_CONFIG_CACHE[key]
+
         if device_type:
             # 清除指定设备类型的缓存
             device_key = mushroom_redis_key["static_config"].format(
@@ -449,6 +601,7 @@ def get_cache_info(device_type: str = None) -> Dict[str, any]:
                     ),
                     "config_file_path": str(STATIC_CONFIG_FILE_PATH),
                     "config_file_exists": STATIC_CONFIG_FILE_PATH.exists(),
+                    "local_cache": get_config_cache_stats(),
                 }
 
                 return all_info
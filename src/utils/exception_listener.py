@@ -14,7 +14,7 @@ import os
 import threading
 from dataclasses import dataclass
 from datetime import UTC, datetime, timezone
-from typing import Any, Final
+from typing import Any, Callable, Final
 
 # ===================== 第三方库导入（按字母序） =====================
 from apscheduler.triggers.cron import CronTrigger
@@ -69,6 +69,10 @@ _JOB_STATUS_LOCK: threading.Lock = threading.Lock()
 _SCHEDULER_INSTANCE: Any | None = None
 _SCHEDULER_LOCK: threading.Lock = threading.Lock()
 
+# 组件健康信息提供者（如常驻模型），名称 -> 无参函数
+_HEALTH_PROVIDERS: dict[str, Callable[[], dict[str, Any]]] = {}
+_HEALTH_PROVIDERS_LOCK: threading.Lock = threading.Lock()
+
 
 # ===================== 配置数据类（中心化管理） =====================
 @dataclass(frozen=True)
@@ -108,6 +112,40 @@ def get_scheduler_instance() -> Any | None:
         return _SCHEDULER_INSTANCE
 
 
+# ===================== 组件健康信息（线程安全） =====================
+def register_health_provider(
+    name: str, provider: Callable[[], dict[str, Any]]
+) -> None:
+    """注册组件健康信息提供者（同名覆盖）
+
+    Args:
+        name: 组件名称（健康检查响应 components 中的键）
+        provider: 返回组件状态字典的无参函数
+    """
+    with _HEALTH_PROVIDERS_LOCK:
+        _HEALTH_PROVIDERS[name] = provider
+        logger.debug(f"[HEALTH-026] 组件健康信息已注册 | 组件: {name}")
+
+
+def get_component_health() -> dict[str, Any]:
+    """汇总已注册组件的健康信息（单个组件异常不影响其他组件）
+
+    Returns:
+        Dict[str, Any]: 组件名称 -> 状态字典
+    """
+    with _HEALTH_PROVIDERS_LOCK:
+        providers = dict(_HEALTH_PROVIDERS)
+
+    components: dict[str, Any] = {}
+    for name, provider in providers.items():
+        try:
+            components[name] = provider()
+        except Exception as e:
+            logger.warning(f"[HEALTH-027] 组件健康信息获取失败 | 组件: {name} | {e}")
+            components[name] = {"status": ERROR_STATUS, "message": str(e)}
+    return components
+
+
 # ===================== 超时阈值计算（职责单一） =====================
 def _is_field_static(field: Any) -> bool:
     """判断 Cron 字段是否为静态值（单个数字）"""
@@ -514,6 +552,7 @@ async def get_root_health_status() -> dict[str, Any]:
             - status: 整体状态（healthy/unhealthy/error）
             - jobs: 任务状态详情
             - unhealthy_jobs: 不健康任务列表
+            - components: 组件状态（如常驻模型的加载耗时/内存/冷热调用）
             - timestamp: 检查时间（UTC ISO格式）
             - message: 错误信息（仅异常时返回）
     """
@@ -525,6 +564,7 @@ async def get_root_health_status() -> dict[str, Any]:
             else UNHEALTHY_STATUS,
             "jobs": health_details["job_status"],
             "unhealthy_jobs": health_details["unhealthy_jobs"],
+            "components": get_component_health(),
             "timestamp": health_details["timestamp"],
         }
     except Exception as e:
@@ -550,6 +590,7 @@ async def get_detailed_health_status() -> dict[str, Any]:
             - status: 整体状态（healthy/unhealthy/error）
             - jobs: 任务状态详情
             - unhealthy_jobs: 不健康任务列表
+            - components: 组件状态（如常驻模型的加载耗时/内存/冷热调用）
             - timestamp: 检查时间（UTC ISO格式）
             - message: 错误信息（仅异常时返回）
     """
@@ -561,6 +602,7 @@ async def get_detailed_health_status() -> dict[str, Any]:
             else UNHEALTHY_STATUS,
             "jobs": health_details["job_status"],
             "unhealthy_jobs": health_details["unhealthy_jobs"],
+            "components": get_component_health(),
             "timestamp": health_details["timestamp"],
         }
     except Exception as e:
@@ -573,6 +615,25 @@ async def get_detailed_health_status() -> dict[str, Any]:
         }
 
 
+@router.get(
+    "/components",
+    summary="获取组件状态",
+    description="返回已注册组件（如常驻CLIP编码器）的加载耗时、内存占用与调用统计",
+)
+async def get_components_status() -> dict[str, Any]:
+    """获取组件状态接口
+
+    Returns:
+        Dict[str, Any]: 组件状态响应
+            - components: 组件名称 -> 状态字典
+            - timestamp: 检查时间（ISO格式）
+    """
+    return {
+        "components": get_component_health(),
+        "timestamp": datetime.now(HEALTH_CHECK_CONFIG.timezone).isoformat(),
+    }
+
+
 @router.get(
     "/status",
     summary="获取简化健康状态",
@@ -15,9 +15,12 @@ import re
 import ssl
 import mimetypes
 import urllib3
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
 from urllib3.exceptions import InsecureRequestWarning
 from datetime import datetime, timedelta, timezone
-from typing import Optional, List, Dict, Any, Tuple, Union, Set
+from typing import Optional, List, Dict, Any, Iterator, Tuple, Union, Set
 from dataclasses import dataclass
 from functools import lru_cache, wraps
 from urllib3 import PoolManager
@@ -28,7 +31,17 @@ from loguru import logger
 from minio import Minio
 from minio.error import S3Error
 
-from global_const.global_const import settings
+from global_const.const_config import (
+    MINIO_HTTP_POOL_SIZE,
+    MINIO_LIST_MAX_WORKERS,
+    MINIO_LISTING_CACHE_DIR,
+    MINIO_LISTING_CACHE_MAX_PREFIXES,
+    MINIO_LISTING_CLOSED_DAY_GRACE_HOURS,
+    MINIO_LISTING_FULL_REFRESH_SECONDS,
+)
+from global_const.global_const import BASE_DIR, settings
+from utils.minio_listing_cache import MinIOListingCache, parse_image_object_name
+from vision.embedding_cache import tag_content_hash
 
 # 修复SSL连接问题
 urllib3.disable_warnings(InsecureRequestWarning)
@@ -37,9 +50,9 @@ urllib3.disable_warnings(InsecureRequestWarning)
 IMAGE_EXTENSIONS: Set[str] = {".jpg", ".jpeg", ".png", ".gif", ".bmp", ".tiff", ".webp"}
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class ImageRecord:
-    """图像记录内部数据结构"""
+    """图像记录内部数据结构（__slots__，流式列举时内存紧凑）"""
 
     object_name: str
     room_id: str
@@ -119,6 +132,7 @@ class MinIOClient:
         self.config = self._load_config()
         self.client = self._create_client(http_client)
         self._bucket_checked: Set[str] = set()  # 进程内缓存，避免重复检查
+        self.listing_cache = _create_listing_cache()
 
     def _load_config(self) -> Dict[str, Any]:
         """从全局settings加载配置"""
@@ -184,6 +198,12 @@ class MinIOClient:
                 )
                 logger.warning("使用不验证SSL证书的HTTP客户端（仅适用于内网环境）")
 
+            # HTTP 时使用可并发复用的连接池，供图像预取的多个下载线程共享
+            if not secure and not http_client:
+                http_client = create_http_client_with_pool(
+                    pool_connections=MINIO_HTTP_POOL_SIZE
+                )
+
             # 当使用 HTTP 时，不设置 SSL 相关参数
             if http_client:
                 client_kwargs["http_client"] = http_client
@@ -390,16 +410,118 @@ class MinIOClient:
 
         return prefixes
 
-    def list_images_by_time_and_room(
+    def _list_prefix_records(
+        self, bucket_name: str, prefix: str, start_after: Optional[str] = None
+    ) -> List[ImageRecord]:
+        """列举单个前缀下的图像对象（start_after 之后），预编译正则解析库房号和时间"""
+        records = []
+        objects = self.client.list_objects(
+            bucket_name, prefix=prefix, recursive=True, start_after=start_after
+        )
+        for obj in objects:
+            parsed = parse_image_object_name(obj.object_name)
+            if parsed is None:
+                continue
+            records.append(
+                ImageRecord(
+                    object_name=obj.object_name,
+                    room_id=parsed[0],
+                    capture_time=parsed[1],
+                    last_modified=obj.last_modified,
+                    size=obj.size,
+                )
+            )
+        return records
+
+    def _list_prefix_cached(self, bucket_name: str, prefix: str) -> List[ImageRecord]:
+        """经列举缓存获取单个前缀的图像记录，列举失败返回空列表"""
+        try:
+            return self.listing_cache.list_prefix(
+                bucket_name,
+                prefix,
+                lambda p, start_after: self._list_prefix_records(
+                    bucket_name, p, start_after
+                ),
+            )
+        except S3Error as e:
+            logger.warning(f"查询前缀 {prefix} 失败: {e.message}")
+            return []
+
+    def _iter_prefix_listings(
+        self, bucket_name: str, prefixes: List[str]
+    ) -> Iterator[Tuple[str, List[ImageRecord]]]:
+        """
+        线程池并行列举多个前缀，按前缀顺序逐个产出
+
+        最多提前列举 MINIO_LIST_MAX_WORKERS 个前缀，消费方处理当前前缀时后续前缀已在列举，
+        内存占用与前缀总数无关
+        """
+        workers = min(MINIO_LIST_MAX_WORKERS, len(prefixes))
+        if workers <= 1:
+            for prefix in prefixes:
+                yield prefix, self._list_prefix_cached(bucket_name, prefix)
+            return
+
+        with ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="minio_list"
+        ) as executor:
+            pending = deque()
+            remaining = iter(prefixes)
+            for prefix in islice(remaining, workers):
+                pending.append(
+                    (prefix, executor.submit(self._list_prefix_cached, bucket_name, prefix))
+                )
+            try:
+                while pending:
+                    prefix, future = pending.popleft()
+                    next_prefix = next(remaining, None)
+                    if next_prefix is not None:
+                        pending.append(
+                            (
+                                next_prefix,
+                                executor.submit(
+                                    self._list_prefix_cached, bucket_name, next_prefix
+                                ),
+                            )
+                        )
+                    yield prefix, future.result()
+            finally:
+                # 消费方提前停止时不再等待未开始的列举
+                for _, future in pending:
+                    future.cancel()
+
+    def _resolve_time_prefixes(
+        self,
+        room_id: Optional[str],
+        start_time: Optional[datetime],
+        end_time: Optional[datetime],
+        bucket_name: str,
+    ) -> List[str]:
+        """根据时间范围和库房号生成日期前缀列表"""
+        if start_time and end_time:
+            ymds = self._date_range_days(start_time, end_time)
+        elif start_time:
+            # 只有开始时间：从开始时间到今天
+            ymds = self._date_range_days(start_time, datetime.now())
+        else:
+            # 只有结束时间：从结束时间当天
+            ymds = [end_time.strftime("%Y%m%d")]
+
+        return self._build_prefixes_by_room_and_days(room_id, ymds, bucket_name)
+
+    def iter_images_by_time_and_room(
         self,
         room_id: Optional[str] = None,
         start_time: Optional[datetime] = None,
         end_time: Optional[datetime] = None,
         bucket_name: Optional[str] = None,
         validate_folder_date: bool = False,
-    ) -> List[Dict[str, Any]]:
+    ) -> Iterator[ImageRecord]:
         """
-        根据时间范围和库房号查询图片 - 使用精准前缀扫描
+        根据时间范围和库房号流式产出图片记录 - 使用精准前缀扫描
+
+        按"库房/日期"前缀依次产出，每个前缀内按采集时间排序；
+        不做全局排序，消费方可在列举完成前开始处理
 
         Args:
             room_id: 库房号，如果为None则查询所有库房
@@ -408,8 +530,8 @@ class MinIOClient:
             bucket_name: 存储桶名称
             validate_folder_date: 是否校验文件夹日期与时间戳一致性
 
-        Returns:
-            符合条件的图片信息列表（字典格式，向下兼容）
+        Yields:
+            ImageRecord
         """
         bucket_name = bucket_name or self.config["bucket"]
 
@@ -421,104 +543,115 @@ class MinIOClient:
         # 避免全库扫描：完全无时间条件时返回空并警告
         if not start_time and not end_time:
             logger.warning("未提供时间条件，避免全库扫描，返回空结果")
-            return []
+            return
 
         try:
-            # 生成日期范围
-            if start_time and end_time:
-                ymds = self._date_range_days(start_time, end_time)
-            elif start_time:
-                # 只有开始时间：从开始时间到今天
-                ymds = self._date_range_days(start_time, datetime.now())
-            else:
-                # 只有结束时间：从结束时间当天
-                ymds = [end_time.strftime("%Y%m%d")]
-
-            # 构建前缀列表
-            prefixes = self._build_prefixes_by_room_and_days(room_id, ymds, bucket_name)
+            prefixes = self._resolve_time_prefixes(
+                room_id, start_time, end_time, bucket_name
+            )
 
             logger.info(
                 f"查询图片 - 库房: {room_id or '全部'}, 时间范围: {start_time} ~ {end_time}, "
                 f"前缀数量: {len(prefixes)}"
             )
 
-            filtered_images = []
-
-            # 遍历每个前缀
-            for prefix in prefixes:
-                try:
-                    objects = self.client.list_objects(
-                        bucket_name, prefix=prefix, recursive=True
-                    )
-
-                    for obj in objects:
-                        # 检查文件扩展名
-                        file_ext = os.path.splitext(obj.object_name)[1].lower()
-                        if file_ext not in IMAGE_EXTENSIONS:
-                            continue
-
-                        # 解析库房号和时间
-                        parsed_room_id = self._parse_room_id_from_path(obj.object_name)
-                        capture_time = self._parse_image_time_from_path(obj.object_name)
-
-                        if not capture_time:
-                            continue
-
-                        # 库房过滤
-                        if room_id and parsed_room_id != room_id:
-                            continue
-
-                        # 时间范围过滤
-                        if start_time and capture_time < start_time:
-                            continue
-                        if end_time and capture_time > end_time:
-                            continue
-
-                        # 可选的一致性校验
-                        if (
-                            validate_folder_date
-                            and not self._folder_date_matches_timestamp(
-                                obj.object_name, capture_time
-                            )
-                        ):
-                            logger.warning(
-                                f"文件夹日期与时间戳不一致，跳过: {obj.object_name}"
-                            )
-                            continue
-
-                        # 创建记录
-                        record = ImageRecord(
-                            object_name=obj.object_name,
-                            room_id=parsed_room_id,
-                            capture_time=capture_time,
-                            last_modified=obj.last_modified,
-                            size=obj.size,
+            # 各前缀并行列举（命中缓存的已结束日期不再访问MinIO）
+            for _, records in self._iter_prefix_listings(bucket_name, prefixes):
+                for record in records:
+                    capture_time = record.capture_time
+
+                    # 库房过滤
+                    if room_id and record.room_id != room_id:
+                        continue
+
+                    # 时间范围过滤
+                    if start_time and capture_time < start_time:
+                        continue
+                    if end_time and capture_time > end_time:
+                        continue
+
+                    # 可选的一致性校验
+                    if validate_folder_date and not self._folder_date_matches_timestamp(
+                        record.object_name, capture_time
+                    ):
+                        logger.warning(
+                            f"文件夹日期与时间戳不一致，跳过: {record.object_name}"
                         )
-                        filtered_images.append(record.to_dict())
-
-                except S3Error as e:
-                    logger.warning(f"查询前缀 {prefix} 失败: {e.message}")
-                    continue
-
-            # 按采集时间排序
-            filtered_images.sort(key=lambda x: x["capture_time"])
+                        continue
 
-            logger.info(f"查询完成，找到 {len(filtered_images)} 张图片")
-            return filtered_images
+                    yield record
 
         except S3Error as e:
             self._handle_error(
-                "list_images_by_time_and_room",
+                "iter_images_by_time_and_room",
                 e,
                 raise_on_error=False,
                 room_id=room_id,
                 start_time=start_time,
                 end_time=end_time,
             )
-            return []
         except Exception as e:
-            self._handle_error("list_images_by_time_and_room", e, raise_on_error=False)
-            return []
+            self._handle_error("iter_images_by_time_and_room", e, raise_on_error=False)
+
+    def list_images_by_time_and_room(
+        self,
+        room_id: Optional[str] = None,
+        start_time: Optional[datetime] = None,
+        end_time: Optional[datetime] = None,
+        bucket_name: Optional[str] = None,
+        validate_folder_date: bool = False,
+    ) -> List[Dict[str, Any]]:
+        """
+        根据时间范围和库房号查询图片 - 使用精准前缀扫描
+
+        Args:
+            room_id: 库房号，如果为None则查询所有库房
+            start_time: 开始时间，如果为None则不限制开始时间
+            end_time: 结束时间，如果为None则不限制结束时间
+            bucket_name: 存储桶名称
+            validate_folder_date: 是否校验文件夹日期与时间戳一致性
+
+        Returns:
+            符合条件的图片信息列表（字典格式，向下兼容）
+        """
+        filtered_images = [
+            record.to_dict()
+            for record in self.iter_images_by_time_and_room(
+                room_id=room_id,
+                start_time=start_time,
+                end_time=end_time,
+                bucket_name=bucket_name,
+                validate_folder_date=validate_folder_date,
+            )
+        ]
+
+        # 按采集时间排序
+        filtered_images.sort(key=lambda x: x["capture_time"])
+
+        logger.info(f"查询完成，找到 {len(filtered_images)} 张图片")
+        return filtered_images
+
+    def _recent_time_range(
+        self, hours: int, tz: Optional[timezone]
+    ) -> Tuple[datetime, datetime]:
+        end_time = datetime.now(tz) if tz else datetime.now()
+        return end_time - timedelta(hours=hours), end_time
+
+    def iter_recent_images(
+        self,
+        room_id: Optional[str] = None,
+        hours: int = 1,
+        bucket_name: Optional[str] = None,
+        tz: Optional[timezone] = None,
+    ) -> Iterator[ImageRecord]:
+        """流式产出最近指定小时内的图片记录（参数同 list_recent_images）"""
+        start_time, end_time = self._recent_time_range(hours, tz)
+        return self.iter_images_by_time_and_room(
+            room_id=room_id,
+            start_time=start_time,
+            end_time=end_time,
+            bucket_name=bucket_name,
+        )
 
     def list_recent_images(
         self,
@@ -539,12 +672,7 @@ class MinIOClient:
         Returns:
             符合条件的图片信息列表
         """
-        if tz:
-            end_time = datetime.now(tz)
-        else:
-            end_time = datetime.now()
-
-        start_time = end_time - timedelta(hours=hours)
+        start_time, end_time = self._recent_time_range(hours, tz)
 
         logger.info(
             f"查询最近 {hours} 小时的图片 - 库房: {room_id or '全部'}, "
@@ -558,6 +686,44 @@ class MinIOClient:
             bucket_name=bucket_name,
         )
 
+    def _date_strings_to_range(
+        self, date_start: Optional[str], date_end: Optional[str]
+    ) -> Tuple[Optional[datetime], Optional[datetime]]:
+        start_time = None
+        end_time = None
+
+        if date_start:
+            start_time = datetime.strptime(date_start, "%Y%m%d")
+
+        if date_end:
+            end_time = datetime.strptime(date_end + "235959", "%Y%m%d%H%M%S")
+        elif date_start:
+            # date_start单独存在时默认当天23:59:59
+            end_time = datetime.strptime(date_start + "235959", "%Y%m%d%H%M%S")
+
+        return start_time, end_time
+
+    def iter_images_by_date_range(
+        self,
+        room_id: Optional[str] = None,
+        date_start: Optional[str] = None,
+        date_end: Optional[str] = None,
+        bucket_name: Optional[str] = None,
+    ) -> Iterator[ImageRecord]:
+        """流式产出日期范围内的图片记录（参数同 get_images_by_date_range）"""
+        try:
+            start_time, end_time = self._date_strings_to_range(date_start, date_end)
+        except Exception as e:
+            logger.error(f"按日期范围查询图片失败: {e}")
+            return iter(())
+
+        return self.iter_images_by_time_and_room(
+            room_id=room_id,
+            start_time=start_time,
+            end_time=end_time,
+            bucket_name=bucket_name,
+        )
+
     def get_images_by_date_range(
         self,
         room_id: Optional[str] = None,
@@ -578,17 +744,7 @@ class MinIOClient:
             符合条件的图片信息列表
         """
         try:
-            start_time = None
-            end_time = None
-
-            if date_start:
-                start_time = datetime.strptime(date_start, "%Y%m%d")
-
-            if date_end:
-                end_time = datetime.strptime(date_end + "235959", "%Y%m%d%H%M%S")
-            elif date_start:
-                # date_start单独存在时默认当天23:59:59
-                end_time = datetime.strptime(date_start + "235959", "%Y%m%d%H%M%S")
+            start_time, end_time = self._date_strings_to_range(date_start, date_end)
 
             return self.list_images_by_time_and_room(
                 room_id=room_id,
@@ -621,8 +777,8 @@ class MinIOClient:
             response = self.client.get_object(bucket_name, object_name)
             image_data = response.read()
 
-            # 使用PIL打开图片
-            image = Image.open(io.BytesIO(image_data))
+            # 使用PIL打开图片，记录字节哈希供CLIP特征缓存按内容寻址
+            image = tag_content_hash(Image.open(io.BytesIO(image_data)), image_data)
             logger.info(f"成功获取图片: {object_name}, 尺寸: {image.size}")
             return image
 
@@ -727,6 +883,7 @@ class MinIOClient:
             self.client.fput_object(
                 bucket_name, object_name, file_path, content_type=content_type
             )
+            self.listing_cache.invalidate(bucket_name, object_name)
             logger.info(
                 f"成功上传图片: {file_path} -> {bucket_name}/{object_name} ({content_type})"
             )
@@ -786,6 +943,7 @@ class MinIOClient:
                 length=len(data),
                 content_type=content_type,
             )
+            self.listing_cache.invalidate(bucket_name, object_name)
             logger.info(
                 f"成功上传字节数据: {bucket_name}/{object_name}, 大小: {len(data)} bytes ({content_type})"
             )
@@ -820,6 +978,7 @@ class MinIOClient:
 
         try:
             self.client.remove_object(bucket_name, object_name)
+            self.listing_cache.invalidate(bucket_name, object_name)
             logger.info(f"成功删除图片: {bucket_name}/{object_name}")
             return True
 
@@ -942,19 +1101,18 @@ class MinIOClient:
             self._handle_error("get_image_info", e, raise_on_error=False)
             return None
 
-    # 兼容性接口 - 保持原有方法名和行为
-    def list_images(
+    def iter_images(
         self, bucket_name: Optional[str] = None, prefix: str = ""
-    ) -> List[str]:
+    ) -> Iterator[str]:
         """
-        列出存储桶中的图片文件 - 兼容性接口
+        流式产出存储桶中的图片文件名（不排序，随 list_objects 分页返回）
 
         Args:
             bucket_name: 存储桶名称
             prefix: 文件前缀过滤
 
-        Returns:
-            图片文件名列表
+        Yields:
+            图片文件名
         """
         bucket_name = bucket_name or self.config["bucket"]
 
@@ -962,31 +1120,60 @@ class MinIOClient:
             objects = self.client.list_objects(
                 bucket_name, prefix=prefix, recursive=True
             )
-            image_files = []
-
             for obj in objects:
                 file_ext = os.path.splitext(obj.object_name)[1].lower()
                 if file_ext in IMAGE_EXTENSIONS:
-                    image_files.append(obj.object_name)
-
-            logger.info(f"找到 {len(image_files)} 个图片文件")
-            return image_files
+                    yield obj.object_name
 
         except S3Error as e:
             self._handle_error(
-                "list_images",
+                "iter_images",
                 e,
                 raise_on_error=False,
                 bucket=bucket_name,
                 prefix=prefix,
             )
-            return []
         except Exception as e:
-            self._handle_error("list_images", e, raise_on_error=False)
-            return []
+            self._handle_error("iter_images", e, raise_on_error=False)
+
+    # 兼容性接口 - 保持原有方法名和行为
+    def list_images(
+        self, bucket_name: Optional[str] = None, prefix: str = ""
+    ) -> List[str]:
+        """
+        列出存储桶中的图片文件 - 兼容性接口
+
+        Args:
+            bucket_name: 存储桶名称
+            prefix: 文件前缀过滤
+
+        Returns:
+            图片文件名列表
+        """
+        image_files = list(self.iter_images(bucket_name=bucket_name, prefix=prefix))
+        logger.info(f"找到 {len(image_files)} 个图片文件")
+        return image_files
 
 
 _MINIO_CLIENT_INSTANCE: Optional["MinIOClient"] = None
+_LISTING_CACHE_INSTANCE: Optional[MinIOListingCache] = None
+
+
+def _create_listing_cache() -> MinIOListingCache:
+    """进程内共享的MinIO列举缓存"""
+    global _LISTING_CACHE_INSTANCE
+
+    if _LISTING_CACHE_INSTANCE is None:
+        persist_dir = None
+        if MINIO_LISTING_CACHE_DIR:
+            persist_dir = BASE_DIR.parent / MINIO_LISTING_CACHE_DIR
+        _LISTING_CACHE_INSTANCE = MinIOListingCache(
+            persist_dir=persist_dir,
+            max_prefixes=MINIO_LISTING_CACHE_MAX_PREFIXES,
+            full_refresh_seconds=MINIO_LISTING_FULL_REFRESH_SECONDS,
+            closed_day_grace_hours=MINIO_LISTING_CLOSED_DAY_GRACE_HOURS,
+        )
+    return _LISTING_CACHE_INSTANCE
 
 
 def create_minio_client(http_client: Optional[PoolManager] = None) -> "MinIOClient":
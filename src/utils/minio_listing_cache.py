@@ -0,0 +1,273 @@
+"""
+MinIO 图像列举缓存
+
+按"库房/日期/"前缀缓存 list_objects 结果：
+- 已结束的日期（超过宽限期）视为不可变，列举一次后落盘，之后不再重新列举
+- 当天前缀按摄像头（文件名去掉14位时间戳后的前缀）用 start_after 增量刷新，
+  同一摄像头的对象名按时间戳单调递增，因此增量列举不会漏图；
+  新上线的摄像头由周期性的全量列举发现
+"""
+
+import json
+import re
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional, Tuple
+
+from loguru import logger
+
+if TYPE_CHECKING:
+    from utils.minio_client import ImageRecord
+
+# 库房/.../<任意前缀><14位时间戳>.<图片扩展名>
+_IMAGE_OBJECT_RE = re.compile(
+    r"^(?P<room>[^/]+)/(?:.*/)?(?P<stem>[^/]*?)(?P<ts>\d{14})"
+    r"\.(?:jpg|jpeg|png|gif|bmp|tiff|webp)$",
+    re.IGNORECASE,
+)
+_PREFIX_DAY_RE = re.compile(r"(?:^|/)(\d{8})/$")
+
+# (object_name, start_after) -> 该前缀下的图像记录
+ListFn = Callable[[str, Optional[str]], List["ImageRecord"]]
+
+
+def parse_image_object_name(object_name: str) -> Optional[Tuple[str, datetime, int]]:
+    """
+    解析图像对象名
+
+    Returns:
+        (库房号, 采集时间, 时间戳在对象名中的起始位置)；非图像或无时间戳返回 None
+    """
+    match = _IMAGE_OBJECT_RE.match(object_name)
+    if match is None:
+        return None
+    ts = match.group("ts")
+    try:
+        capture_time = datetime(
+            int(ts[0:4]),
+            int(ts[4:6]),
+            int(ts[6:8]),
+            int(ts[8:10]),
+            int(ts[10:12]),
+            int(ts[12:14]),
+        )
+    except ValueError:
+        return None
+    return match.group("room"), capture_time, match.start("ts")
+
+
+def _prefix_day(prefix: str) -> Optional[date]:
+    match = _PREFIX_DAY_RE.search(prefix)
+    if match is None:
+        return None
+    try:
+        return datetime.strptime(match.group(1), "%Y%m%d").date()
+    except ValueError:
+        return None
+
+
+@dataclass
+class _PrefixListing:
+    records: List["ImageRecord"]
+    closed: bool
+    full_listed_at: float
+
+
+class MinIOListingCache:
+    """按日期前缀缓存 MinIO 图像列举结果（线程安全）"""
+
+    def __init__(
+        self,
+        persist_dir: Optional[str] = None,
+        max_prefixes: int = 4096,
+        full_refresh_seconds: float = 900,
+        closed_day_grace_hours: float = 2,
+    ):
+        """
+        Args:
+            persist_dir: 已结束日期的落盘目录（None 为仅进程内缓存）
+            max_prefixes: 进程内缓存的前缀数上限（LRU）
+            full_refresh_seconds: 当天前缀全量重新列举的间隔，期间只做增量刷新
+            closed_day_grace_hours: 日期结束后多久视为不再有新图上传
+        """
+        self.persist_dir = Path(persist_dir) if persist_dir else None
+        self.max_prefixes = max_prefixes
+        self.full_refresh_seconds = full_refresh_seconds
+        self.closed_day_grace = timedelta(hours=closed_day_grace_hours)
+        self._entries: "OrderedDict[Tuple[str, str], _PrefixListing]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "disk_hits": 0, "full_lists": 0, "incremental": 0}
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {**self._stats, "prefixes": len(self._entries)}
+
+    def is_closed(self, prefix: str, now: Optional[datetime] = None) -> bool:
+        """前缀对应日期是否已结束（结束后超过宽限期）"""
+        day = _prefix_day(prefix)
+        if day is None:
+            return False
+        now = now or datetime.now()
+        return now >= datetime.combine(day + timedelta(days=1), datetime.min.time()) + (
+            self.closed_day_grace
+        )
+
+    def list_prefix(
+        self,
+        bucket_name: str,
+        prefix: str,
+        list_fn: ListFn,
+        now: Optional[datetime] = None,
+    ) -> List["ImageRecord"]:
+        """
+        获取前缀下的图像记录，按 (采集时间, 对象名) 排序
+
+        Args:
+            bucket_name: 存储桶名称
+            prefix: 形如 "611/20260105/" 的日期前缀；无法识别日期的前缀不缓存
+            list_fn: 实际列举函数 (prefix, start_after) -> 图像记录
+            now: 当前时间（测试用）
+        """
+        if _prefix_day(prefix) is None:
+            return _sorted(list_fn(prefix, None))
+
+        key = (bucket_name, prefix)
+        closed = self.is_closed(prefix, now)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                if entry.closed:
+                    self._stats["hits"] += 1
+                    return entry.records
+
+        if entry is None and closed:
+            entry = self._load(bucket_name, prefix)
+            if entry is not None:
+                with self._lock:
+                    self._stats["disk_hits"] += 1
+                self._put(key, entry)
+                return entry.records
+
+        if (
+            entry is None
+            or closed
+            or time.monotonic() - entry.full_listed_at >= self.full_refresh_seconds
+        ):
+            # 首次列举、日期刚结束（最终封存）或到达全量刷新间隔
+            records = _sorted(list_fn(prefix, None))
+            entry = _PrefixListing(records, closed, time.monotonic())
+            with self._lock:
+                self._stats["full_lists"] += 1
+            if closed:
+                self._save(bucket_name, prefix, records)
+        else:
+            entry = _PrefixListing(
+                self._refresh_incrementally(entry.records, list_fn),
+                False,
+                entry.full_listed_at,
+            )
+            with self._lock:
+                self._stats["incremental"] += 1
+
+        self._put(key, entry)
+        return entry.records
+
+    def invalidate(self, bucket_name: str, object_name: str) -> None:
+        """对象新增或删除后，使其所在日期前缀的缓存失效（含落盘文件）"""
+        prefix = object_name.rsplit("/", 1)[0] + "/" if "/" in object_name else ""
+        with self._lock:
+            self._entries.pop((bucket_name, prefix), None)
+        path = self._path(bucket_name, prefix)
+        if path is not None:
+            path.unlink(missing_ok=True)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def _refresh_incrementally(
+        self, records: List["ImageRecord"], list_fn: ListFn
+    ) -> List["ImageRecord"]:
+        # 每个摄像头只列举其最后一个已知对象之后的新对象
+        last_by_camera: Dict[str, str] = {}
+        for record in records:
+            parsed = parse_image_object_name(record.object_name)
+            if parsed is None:
+                continue
+            camera_prefix = record.object_name[: parsed[2]]
+            if record.object_name > last_by_camera.get(camera_prefix, ""):
+                last_by_camera[camera_prefix] = record.object_name
+
+        merged = {record.object_name: record for record in records}
+        for camera_prefix, last_object in last_by_camera.items():
+            for record in list_fn(camera_prefix, last_object):
+                merged[record.object_name] = record
+        return _sorted(merged.values())
+
+    def _put(self, key: Tuple[str, str], entry: _PrefixListing) -> None:
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_prefixes:
+                self._entries.popitem(last=False)
+
+    def _path(self, bucket_name: str, prefix: str) -> Optional[Path]:
+        if self.persist_dir is None or not prefix:
+            return None
+        return self.persist_dir / bucket_name / f"{prefix.rstrip('/')}.json"
+
+    def _save(
+        self, bucket_name: str, prefix: str, records: List["ImageRecord"]
+    ) -> None:
+        path = self._path(bucket_name, prefix)
+        if path is None:
+            return
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_suffix(".json.tmp")
+            tmp.write_text(
+                json.dumps(
+                    [
+                        [r.object_name, r.last_modified.isoformat(), r.size]
+                        for r in records
+                    ]
+                )
+            )
+            tmp.replace(path)
+        except Exception as e:
+            logger.warning(f"[MinIOListingCache] 列举缓存落盘失败 {prefix}: {e}")
+
+    def _load(self, bucket_name: str, prefix: str) -> Optional[_PrefixListing]:
+        from utils.minio_client import ImageRecord
+
+        path = self._path(bucket_name, prefix)
+        if path is None or not path.exists():
+            return None
+        try:
+            records = []
+            for object_name, last_modified, size in json.loads(path.read_text()):
+                parsed = parse_image_object_name(object_name)
+                if parsed is None:
+                    continue
+                records.append(
+                    ImageRecord(
+                        object_name=object_name,
+                        room_id=parsed[0],
+                        capture_time=parsed[1],
+                        last_modified=datetime.fromisoformat(last_modified),
+                        size=size,
+                    )
+                )
+            return _PrefixListing(_sorted(records), True, time.monotonic())
+        except Exception as e:
+            logger.warning(f"[MinIOListingCache] 读取列举缓存失败 {path}: {e}")
+            return None
+
+
+def _sorted(records) -> List["ImageRecord"]:
+    return sorted(records, key=lambda r: (r.capture_time, r.object_name))
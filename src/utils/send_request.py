@@ -1,5 +1,8 @@
+import threading
+
+import requests
 from loguru import logger
-from requests import request
+from requests.adapters import HTTPAdapter
 from tenacity import (
     retry,
     stop_after_attempt,
@@ -9,10 +12,70 @@ from tenacity import (
     wait_random,
 )
 
+from global_const.const_config import (
+    HTTP_CONNECT_TIMEOUT,
+    HTTP_GET_READ_TIMEOUT,
+    HTTP_POOL_CONNECTIONS,
+    HTTP_POOL_MAXSIZE,
+    HTTP_POST_READ_TIMEOUT,
+    HTTP_PUT_READ_TIMEOUT,
+)
+
+# 进程级共享会话：复用 keep-alive 连接，避免每次请求重新建立 TCP 连接
+_SESSION = None
+_SESSION_LOCK = threading.Lock()
+
+
+def create_http_session(
+    pool_connections: int = HTTP_POOL_CONNECTIONS,
+    pool_maxsize: int = HTTP_POOL_MAXSIZE,
+) -> requests.Session:
+    """
+    创建带连接池的 HTTP 会话
+    - 每个主机最多保持 pool_maxsize 条 keep-alive 连接，并发线程共享
+    - 重试由 SendRequest 上的 tenacity 负责，连接池层不再重试
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=pool_connections,
+        pool_maxsize=pool_maxsize,
+        max_retries=0,
+    )
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers.update(
+        {"Connection": "keep-alive", "Accept-Encoding": "gzip, deflate"}
+    )
+    return session
+
+
+def get_http_session() -> requests.Session:
+    """获取进程级共享 HTTP 会话（线程安全的懒加载）"""
+    global _SESSION
+    if _SESSION is None:
+        with _SESSION_LOCK:
+            if _SESSION is None:
+                _SESSION = create_http_session()
+    return _SESSION
+
+
+def close_http_session() -> None:
+    """关闭共享会话并释放连接池（下次请求时重新创建）"""
+    global _SESSION
+    with _SESSION_LOCK:
+        if _SESSION is not None:
+            _SESSION.close()
+            _SESSION = None
+
 
 class SendRequest:
-    def __init__(self):
-        pass
+    def __init__(self, session: requests.Session = None):
+        # 未显式传入时使用进程级共享会话
+        self._session = session
+
+    @property
+    def session(self) -> requests.Session:
+        return self._session or get_http_session()
 
     @retry(
         stop=(stop_after_delay(10) | stop_after_attempt(3)),
@@ -21,7 +84,13 @@ class SendRequest:
         reraise=True,
     )
     def send_get_request(self, url, headers, payload):
-        response = request("GET", url, headers=headers, data=payload, timeout=5)
+        response = self.session.request(
+            "GET",
+            url,
+            headers=headers,
+            data=payload,
+            timeout=(HTTP_CONNECT_TIMEOUT, HTTP_GET_READ_TIMEOUT),
+        )
         response.raise_for_status()  # 检查响应状态码
         if response.ok:
             return response
@@ -50,7 +119,13 @@ class SendRequest:
         reraise=True,
     )
     def send_post_request(self, url, headers, payload):
-        response = request("POST", url, headers=headers, data=payload, timeout=650)
+        response = self.session.request(
+            "POST",
+            url,
+            headers=headers,
+            data=payload,
+            timeout=(HTTP_CONNECT_TIMEOUT, HTTP_POST_READ_TIMEOUT),
+        )
         response.raise_for_status()  # 检查响应状态码
         if response.ok:
             return response
@@ -72,7 +147,13 @@ class SendRequest:
         reraise=True,
     )
     def send_put_request(self, url, headers, payload):
-        response = request("PUT", url, headers=headers, data=payload)
+        response = self.session.request(
+            "PUT",
+            url,
+            headers=headers,
+            data=payload,
+            timeout=(HTTP_CONNECT_TIMEOUT, HTTP_PUT_READ_TIMEOUT),
+        )
         if response.status_code == 200:
             return response
         else:
@@ -0,0 +1,150 @@
+"""
+设定点变更检测引擎（向量化）
+
+utils.setpoint_change_monitor 与 monitoring.tasks / monitoring.executor 共用的变更检测实现：
+1. 一次排序（分组键 + 时间，稳定排序），通过相邻行分组键比较得到组内前值（等价于 groupby.shift）
+2. 数字量 / 模拟量 / 枚举量变更以布尔掩码批量计算
+3. 阈值等测点配置通过 merge 关联，而非逐组查字典
+4. 输出为变更记录 DataFrame，列与 device_setpoint_changes 表一致，
+   可直接交给 monitoring.tasks.store_setpoint_changes_to_database
+
+判定规则与原逐行循环保持一致：
+- 前值或当前值缺失的行跳过
+- 数字量、枚举量默认四舍五入后比较（原静态配置检测）；truncate_states=True 时按 int() 截断
+  （原 utils 监控与单测点逐行循环）
+- 模拟量 |当前值 - 前值| >= 阈值；阈值缺失时由 default_threshold 决定
+"""
+
+from datetime import datetime
+from typing import Dict, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from utils.setpoint_config import ChangeType
+
+# 变更记录输出列（与 DeviceSetpointChange 表字段一致）
+CHANGE_RECORD_COLUMNS = [
+    "room_id",
+    "device_type",
+    "device_name",
+    "point_name",
+    "point_description",
+    "change_time",
+    "previous_value",
+    "current_value",
+    "change_type",
+    "detection_time",
+]
+
+# 输出列 -> 输入列的默认映射（未列出的列按同名读取）
+DEFAULT_FIELD_MAP: Dict[str, str] = {
+    "point_description": "description",
+    "change_time": "time",
+    "current_value": "value",
+}
+
+
+def empty_change_frame() -> pd.DataFrame:
+    """返回空的变更记录 DataFrame（保留列结构）"""
+    return pd.DataFrame(columns=CHANGE_RECORD_COLUMNS)
+
+
+def detect_setpoint_changes_frame(
+    data: pd.DataFrame,
+    group_keys: Sequence[str] = ("device_name", "point_name"),
+    config: Optional[pd.DataFrame] = None,
+    field_map: Optional[Dict[str, str]] = None,
+    default_threshold: Optional[float] = None,
+    detection_time: Optional[datetime] = None,
+    truncate_states: bool = False,
+) -> pd.DataFrame:
+    """
+    向量化检测设定点变更
+
+    Args:
+        data: 测点时间序列，至少包含 group_keys、time、value 列；
+            未传 config 时还需包含 change_type、threshold 等配置列
+        group_keys: 测点分组键（同时作为与 config 关联的键）
+        config: 测点配置表，按 group_keys 与 data 内连接；重名列加 "_cfg" 后缀
+        field_map: 输出列 -> 输入列映射，覆盖 DEFAULT_FIELD_MAP
+        default_threshold: 模拟量阈值缺失时的取值；None 表示阈值缺失或为 0 时不检测模拟量变化
+        detection_time: 检测时间，默认 datetime.now()
+        truncate_states: 数字量/枚举量按 int() 截断比较；默认四舍五入，0.9999 与 1.0 视为同一状态
+
+    Returns:
+        pd.DataFrame: 变更记录，列为 CHANGE_RECORD_COLUMNS，按分组键和时间排序
+    """
+    if data is None or data.empty:
+        return empty_change_frame()
+
+    group_keys = list(group_keys)
+    df = data
+    if config is not None:
+        if config.empty:
+            return empty_change_frame()
+        df = df.merge(config, on=group_keys, how="inner", suffixes=("", "_cfg"))
+        if df.empty:
+            return empty_change_frame()
+
+    # 一次稳定排序：同一时刻的记录保持原始顺序
+    df = df.sort_values(group_keys + ["time"], kind="mergesort").reset_index(drop=True)
+
+    # 相邻两行分组键全部相同 => 同一测点；分组键缺失的行与 groupby 一样不参与检测
+    same_group = np.ones(len(df), dtype=bool)
+    same_group[0] = False
+    for key in group_keys:
+        col = df[key]
+        same_group &= (col.eq(col.shift(1)) & col.notna()).to_numpy()
+
+    value = pd.to_numeric(df["value"], errors="coerce").to_numpy(dtype=float)
+    previous = np.empty_like(value)
+    previous[0] = np.nan
+    previous[1:] = value[:-1]
+    previous[~same_group] = np.nan
+
+    valid = ~np.isnan(value) & ~np.isnan(previous)
+    if not valid.any():
+        return empty_change_frame()
+
+    change_type = df["change_type"].astype(str).to_numpy()
+    with np.errstate(invalid="ignore"):
+        to_state = np.trunc if truncate_states else np.round
+        state_changed = to_state(value) != to_state(previous)
+        delta = np.abs(value - previous)
+
+        if "threshold" in df.columns:
+            threshold = pd.to_numeric(df["threshold"], errors="coerce").to_numpy(
+                dtype=float
+            )
+        else:
+            threshold = np.full(len(df), np.nan)
+        if default_threshold is None:
+            analog_changed = (threshold != 0) & (delta >= threshold)
+        else:
+            threshold = np.where(np.isnan(threshold), default_threshold, threshold)
+            analog_changed = delta >= threshold
+
+    change_mask = valid & (
+        ((change_type == ChangeType.DIGITAL_ON_OFF.value) & state_changed)
+        | ((change_type == ChangeType.ANALOG_VALUE.value) & analog_changed)
+        | ((change_type == ChangeType.ENUM_STATE.value) & state_changed)
+    )
+    if not change_mask.any():
+        return empty_change_frame()
+
+    mapping = {**DEFAULT_FIELD_MAP, **(field_map or {})}
+    changed = df.loc[change_mask]
+    result = pd.DataFrame(index=changed.index)
+    for column in CHANGE_RECORD_COLUMNS:
+        if column == "previous_value":
+            result[column] = previous[change_mask]
+        elif column == "current_value":
+            result[column] = value[change_mask]
+        elif column == "detection_time":
+            result[column] = detection_time or datetime.now()
+        else:
+            source = mapping.get(column, column)
+            result[column] = changed[source] if source in changed.columns else ""
+
+    return result.reset_index(drop=True)
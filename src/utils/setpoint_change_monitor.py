@@ -36,6 +36,7 @@ from sqlalchemy.orm import sessionmaker
 from utils.data_preprocessing import query_data_by_batch_time
 from utils.dataframe_utils import get_all_device_configs
 from utils.batch_yield_service import resolve_setpoint_batch_info
+from utils.setpoint_change_engine import detect_setpoint_changes_frame
 from utils.create_table import DeviceSetpointChange, create_tables
 from utils.setpoint_config import (
     SetpointConfigManager,
@@ -289,10 +290,9 @@ class DeviceSetpointChangeMonitor:
             )
             logger.debug(f"Found {len(setpoint_df)} setpoint configurations")
 
-            # 查询历史数据
+            # 查询历史数据（整个库房的测点×时间切片一次并发拉取）
             df = (
-                setpoint_df.groupby("device_alias", group_keys=False)
-                .apply(query_data_by_batch_time, start_time, end_time)
+                query_data_by_batch_time(setpoint_df, start_time, end_time)
                 .reset_index(drop=True)
                 .sort_values("time")
             )
@@ -410,115 +410,39 @@ class DeviceSetpointChangeMonitor:
             logger.debug("No setpoint data provided for change detection")
             return []
 
-        changes = []
-        processed_groups = 0
-
         try:
-            # 按设备和测点分组检测变更
-            grouped_data = setpoint_data.groupby(["device_name", "point_name"])
-            logger.debug(
-                f"Processing {len(grouped_data)} device-point combinations for change detection"
-            )
-
-            for (device_name, point_name), group in grouped_data:
-                processed_groups += 1
-
-                if len(group) < 2:
-                    logger.debug(
-                        f"Skipping {device_name}.{point_name}: insufficient data points ({len(group)})"
-                    )
-                    continue  # 至少需要2个数据点才能检测变更
-
-                # 按时间排序
-                group = group.sort_values("time").reset_index(drop=True)
-
-                # 获取配置信息
-                try:
-                    change_type = group.iloc[0]["change_type"]
-                    threshold = group.iloc[0]["threshold"]
-                    description = group.iloc[0]["description"]
-                    room_id = group.iloc[0]["room_id"]
-                    device_type = group.iloc[0]["device_type"]
-                except KeyError as e:
-                    logger.warning(
-                        f"Missing configuration field for {device_name}.{point_name}: {e}"
-                    )
-                    continue
-
-                # 检测变更
-                group_changes = 0
-                for i in range(1, len(group)):
-                    current_row = group.iloc[i]
-                    previous_row = group.iloc[i - 1]
-
-                    current_value = current_row["value"]
-                    previous_value = previous_row["value"]
+            changes_df = self.detect_setpoint_changes_frame(setpoint_data)
+            return changes_df.to_dict("records")
 
-                    # 跳过无效值
-                    if pd.isna(current_value) or pd.isna(previous_value):
-                        continue
-
-                    change_detected = False
-                    change_info = {}
-
-                    if change_type == ChangeType.DIGITAL_ON_OFF.value:
-                        # 数字量开关变化检测
-                        if int(current_value) != int(previous_value):
-                            change_detected = True
-                            change_info = (
-                                f"{int(previous_value)} -> {int(current_value)}"
-                            )
-
-                    elif change_type == ChangeType.ANALOG_VALUE.value:
-                        # 模拟量变化检测
-                        if (
-                            threshold
-                            and abs(current_value - previous_value) >= threshold
-                        ):
-                            change_detected = True
-                            change_info = f"{previous_value:.2f} -> {current_value:.2f}"
-
-                    elif change_type == ChangeType.ENUM_STATE.value:
-                        # 枚举状态变化检测
-                        if int(current_value) != int(previous_value):
-                            change_detected = True
-                            change_info = (
-                                f"{int(previous_value)} -> {int(current_value)}"
-                            )
-
-                    if change_detected:
-                        group_changes += 1
-                        change_record = {
-                            "room_id": room_id,
-                            "device_type": device_type,
-                            "device_name": device_name,
-                            "point_name": point_name,
-                            "point_description": description,
-                            "change_time": current_row["time"],
-                            "previous_value": float(previous_value),
-                            "current_value": float(current_value),
-                            "change_type": change_type,
-                            "detection_time": datetime.now(),
-                        }
-                        changes.append(change_record)
+        except Exception as e:
+            logger.error(f"Failed to detect setpoint changes: {e}")
+            return []
 
-                        logger.debug(
-                            f"Change detected: {device_name}.{point_name} - {change_info}"
-                        )
+    def detect_setpoint_changes_frame(
+        self, setpoint_data: pd.DataFrame
+    ) -> pd.DataFrame:
+        """
+        向量化检测设定点变更，返回变更记录 DataFrame
 
-                if group_changes > 0:
-                    logger.debug(
-                        f"Found {group_changes} changes for {device_name}.{point_name}"
-                    )
+        使用 utils.setpoint_change_engine 一次性完成分组前值计算与变更判定，
+        模拟量阈值缺失（或为 0）时不检测该测点的数值变化。
 
-            logger.info(
-                f"Processed {processed_groups} device-point combinations, detected {len(changes)} setpoint changes"
-            )
-            return changes
+        Args:
+            setpoint_data: 设定点历史数据（包含配置信息）
 
-        except Exception as e:
-            logger.error(f"Failed to detect setpoint changes: {e}")
-            return []
+        Returns:
+            变更记录 DataFrame，列与 device_setpoint_changes 表一致
+        """
+        changes_df = detect_setpoint_changes_frame(
+            setpoint_data,
+            group_keys=("device_name", "point_name"),
+            truncate_states=True,
+        )
+        point_count = setpoint_data.groupby(["device_name", "point_name"]).ngroups
+        logger.info(
+            f"Processed {point_count} device-point combinations, detected {len(changes_df)} setpoint changes"
+        )
+        return changes_df
 
     def monitor_room_setpoint_changes(
         self, room_id: str, hours_back: Optional[int] = None
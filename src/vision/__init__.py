@@ -5,6 +5,7 @@ CLIP图像处理模块
 
 模块组件：
 - clip_inference: CLIP模型推理核心
+- clip_runtime / clip_backend / clip_onnx: CLIP推理后端配置、torch CPU优化后端、ONNX Runtime后端
 - clip_inference_scheduler: CLIP推理调度器
 - clip_app: CLIP应用接口
 - get_env_status: 环境状态获取
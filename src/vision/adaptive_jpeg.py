@@ -0,0 +1,316 @@
+"""
+LLaMA上传图像的自适应JPEG压缩
+在体积上限与SSIM门限内选取最高JPEG质量：用"对数体积-质量"线性模型预测质量，
+按摄像头缓存上次选中的质量作为起点，SSIM 只对体积达标的候选、在缩小的 float32 亮度图上计算
+"""
+
+import io
+import math
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+
+import numpy as np
+from PIL import Image
+
+from global_const.const_config import (
+    LLAMA_JPEG_QUALITY_CACHE_SIZE,
+    LLAMA_JPEG_SSIM_MAX_SIDE,
+)
+
+# 默认 ln(体积) 对质量的斜率（JPEG 在 50-90 质量区间约为 0.02-0.04）
+DEFAULT_LOG_SIZE_SLOPE = 0.03
+
+
+def encode_jpeg(image: Image.Image, quality: int) -> bytes:
+    """将图像按指定质量编码为JPEG字节流。"""
+    buffer = io.BytesIO()
+    image.save(buffer, format="JPEG", quality=quality, optimize=True)
+    return buffer.getvalue()
+
+
+def luma_plane(
+    image: Image.Image, max_side: int = LLAMA_JPEG_SSIM_MAX_SIDE
+) -> np.ndarray:
+    """灰度化并整数倍缩小到最大边不超过 max_side 的 float32 亮度图"""
+    gray = image.convert("L")
+    factor = max(1, math.ceil(max(gray.size) / max_side))
+    if factor > 1:
+        gray = gray.reduce(factor)
+    return np.asarray(gray, dtype=np.float32)
+
+
+def decoded_luma(data: bytes, shape: tuple[int, int]) -> np.ndarray:
+    """解码JPEG为指定尺寸的 float32 亮度图（DCT 阶段直接按比例缩小解码）"""
+    height, width = shape
+    image = Image.open(io.BytesIO(data))
+    image.draft("L", (width, height))
+    image = image.convert("L")
+    if image.size != (width, height):
+        image = image.resize((width, height), Image.Resampling.BILINEAR)
+    return np.asarray(image, dtype=np.float32)
+
+
+def global_ssim(source: np.ndarray, target: np.ndarray) -> float:
+    """两张同尺寸亮度图的全局SSIM"""
+    c1 = (0.01 * 255) ** 2
+    c2 = (0.03 * 255) ** 2
+
+    mu_src = float(source.mean())
+    mu_tgt = float(target.mean())
+    var_src = float(source.var())
+    var_tgt = float(target.var())
+    cov = float(((source - mu_src) * (target - mu_tgt)).mean())
+
+    numerator = (2 * mu_src * mu_tgt + c1) * (2 * cov + c2)
+    denominator = (mu_src**2 + mu_tgt**2 + c1) * (var_src + var_tgt + c2)
+
+    if denominator <= 0:
+        return 0.0
+    return float(max(0.0, min(1.0, numerator / denominator)))
+
+
+@dataclass
+class JpegEncodeResult:
+    """自适应压缩结果"""
+
+    data: bytes
+    quality: int
+    ssim: float
+    size: tuple[int, int]
+    attempts: int
+    encodes: int
+
+
+class AdaptiveJpegEncoder:
+    """
+    自适应JPEG压缩引擎（线程安全，进程内共享）
+
+    目标与原二分搜索一致：在 [min_quality, max_quality] 内选取满足体积上限与SSIM门限的最高质量，
+    没有质量满足体积上限时按比例缩小图像后重试。
+    """
+
+    def __init__(self, cache_size: int = LLAMA_JPEG_QUALITY_CACHE_SIZE):
+        self.cache_size = max(1, cache_size)
+        self._quality_cache: OrderedDict[str, int] = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"images": 0, "encodes": 0, "cache_hits": 0}
+
+    def _quality_hint(self, camera_key: str | None) -> int | None:
+        if not camera_key:
+            return None
+        with self._lock:
+            quality = self._quality_cache.get(camera_key)
+            if quality is not None:
+                self._quality_cache.move_to_end(camera_key)
+                self._stats["cache_hits"] += 1
+            return quality
+
+    def _remember_quality(self, camera_key: str | None, quality: int) -> None:
+        if not camera_key:
+            return
+        with self._lock:
+            self._quality_cache[camera_key] = quality
+            self._quality_cache.move_to_end(camera_key)
+            while len(self._quality_cache) > self.cache_size:
+                self._quality_cache.popitem(last=False)
+
+    @staticmethod
+    def _predict_quality(samples: list[tuple[int, float]], log_budget: float) -> int:
+        """按最近两次采样拟合 ln(体积) = a + k·质量，预测恰好不超预算的质量"""
+        quality, log_size = samples[-1]
+        slope = DEFAULT_LOG_SIZE_SLOPE
+        if len(samples) >= 2:
+            prev_quality, prev_log_size = samples[-2]
+            if quality != prev_quality:
+                fitted = (log_size - prev_log_size) / (quality - prev_quality)
+                if fitted > 0:
+                    slope = fitted
+        return math.floor(quality + (log_budget - log_size) / slope)
+
+    @staticmethod
+    def _ssim(reference: np.ndarray | None, data: bytes) -> float:
+        if reference is None:
+            return 0.0
+        return global_ssim(reference, decoded_luma(data, reference.shape))
+
+    def search_quality(
+        self,
+        image: Image.Image,
+        max_bytes: int,
+        min_quality: int,
+        max_quality: int,
+        max_steps: int,
+        start_quality: int | None = None,
+        reference: np.ndarray | None = None,
+        ssim_threshold: float = 0.0,
+    ) -> tuple[bytes | None, int | None, float, int]:
+        """
+        搜索同时满足体积上限与SSIM门限的最高质量
+
+        判定与原二分搜索一致：体积 <= max_bytes 且 SSIM >= ssim_threshold 才接受，任一不满足
+        都视为该质量过高。维护 (已接受的最高质量, 被拒绝的最低质量) 区间，每步按体积模型预测
+        下一个质量并夹在区间内，区间闭合或达到步数上限即停止。没有质量命中SSIM门限时，
+        退回满足体积上限的最高质量版本。
+
+        Args:
+            reference: 原图亮度图（luma_plane），None 时不做SSIM约束
+            ssim_threshold: SSIM门限
+
+        Returns:
+            (编码字节, 质量, SSIM, 编码次数)；没有任何质量满足体积上限时前两项为 None
+        """
+        fit: tuple[int, bytes, float] | None = None
+        fail_quality = max_quality + 1
+        samples: list[tuple[int, float]] = []
+        log_budget = math.log(max_bytes)
+        quality = max_quality if start_quality is None else start_quality
+        quality = max(min_quality, min(max_quality, quality))
+        size_fit_quality = None
+        encodes = 0
+
+        def accept(quality: int) -> bool:
+            nonlocal fit, size_fit_quality, encodes
+            data = encode_jpeg(image, quality)
+            encodes += 1
+            samples.append((quality, math.log(len(data))))
+            if len(data) > max_bytes:
+                return False
+            size_fit_quality = max(quality, size_fit_quality or quality)
+            ssim = self._ssim(reference, data)
+            if ssim < ssim_threshold:
+                return False
+            fit = (quality, data, ssim)
+            return True
+
+        for _ in range(max(1, max_steps)):
+            if not accept(quality):
+                fail_quality = quality
+
+            lower = min_quality if fit is None else fit[0] + 1
+            upper = fail_quality - 1
+            if lower > upper:
+                break
+            quality = max(lower, min(upper, self._predict_quality(samples, log_budget)))
+
+        if fit is None and all(q != min_quality for q, _ in samples):
+            accept(min_quality)
+
+        if fit is not None:
+            quality, data, ssim = fit
+            return data, quality, ssim, encodes
+        if size_fit_quality is None:
+            return None, None, 0.0, encodes
+
+        # 没有质量命中SSIM门限：与原实现一致，退回满足体积上限的最高质量版本
+        data, quality, _, extra = self.search_quality(
+            image,
+            max_bytes,
+            min_quality,
+            max_quality,
+            max_steps,
+            start_quality=size_fit_quality,
+        )
+        return data, quality, self._ssim(reference, data), encodes + extra
+
+    def encode(
+        self,
+        image: Image.Image,
+        max_image_bytes: int,
+        min_jpeg_quality: int,
+        jpeg_quality: int,
+        quality_search_steps: int,
+        downscale_step_percent: int,
+        max_downscale_attempts: int,
+        camera_key: str | None = None,
+        ssim_threshold: float = 0.0,
+    ) -> JpegEncodeResult:
+        """
+        自适应压缩
+
+        Args:
+            image: 已缩放到LLaMA输入尺寸的RGB图像
+            max_image_bytes: 体积上限
+            min_jpeg_quality / jpeg_quality: 质量搜索区间
+            quality_search_steps: 每次尝试的最多编码次数
+            downscale_step_percent: 超限时每次缩小的百分比
+            max_downscale_attempts: 最多尝试次数（含原尺寸）
+            camera_key: 摄像头标识（collection_ip），用于缓存质量起点
+            ssim_threshold: SSIM门限（候选质量需同时满足体积上限与该门限）
+        """
+        reference = luma_plane(image)
+        hint = self._quality_hint(camera_key)
+        current_image = image
+        max_quality = jpeg_quality
+        total_encodes = 0
+        data, quality, ssim = None, None, 0.0
+        attempt = 0
+
+        for attempt in range(1, max_downscale_attempts + 1):
+            data, quality, ssim, encodes = self.search_quality(
+                current_image,
+                max_image_bytes,
+                min_jpeg_quality,
+                max_quality,
+                quality_search_steps,
+                start_quality=hint if attempt == 1 else None,
+                reference=reference,
+                ssim_threshold=ssim_threshold,
+            )
+            total_encodes += encodes
+            if data is not None:
+                if attempt == 1:
+                    self._remember_quality(camera_key, quality)
+                break
+
+            width, height = current_image.size
+            scale = (100 - downscale_step_percent) / 100
+            next_size = (max(64, int(width * scale)), max(64, int(height * scale)))
+            # 防止无法继续缩放导致死循环
+            if next_size == current_image.size:
+                break
+            current_image = current_image.resize(next_size, Image.Resampling.LANCZOS)
+            max_quality = max(min_jpeg_quality, max_quality - 5)
+
+        if data is None:
+            # 兜底返回最小质量编码结果
+            quality = min_jpeg_quality
+            data = encode_jpeg(current_image, quality)
+            total_encodes += 1
+            ssim = self._ssim(reference, data)
+
+        with self._lock:
+            self._stats["images"] += 1
+            self._stats["encodes"] += total_encodes
+
+        return JpegEncodeResult(
+            data=data,
+            quality=quality,
+            ssim=ssim,
+            size=current_image.size,
+            attempts=attempt,
+            encodes=total_encodes,
+        )
+
+    def clear_cache(self) -> None:
+        with self._lock:
+            self._quality_cache.clear()
+
+    def get_stats(self) -> dict[str, int]:
+        """获取统计（图像数、编码次数、摄像头质量缓存命中数）"""
+        with self._lock:
+            return {**self._stats, "cached_cameras": len(self._quality_cache)}
+
+
+_ADAPTIVE_JPEG_ENCODER: AdaptiveJpegEncoder | None = None
+_ADAPTIVE_JPEG_ENCODER_LOCK = threading.Lock()
+
+
+def get_adaptive_jpeg_encoder() -> AdaptiveJpegEncoder:
+    """获取进程级共享的自适应压缩引擎（摄像头质量缓存跨编码器实例共享）"""
+    global _ADAPTIVE_JPEG_ENCODER
+    if _ADAPTIVE_JPEG_ENCODER is None:
+        with _ADAPTIVE_JPEG_ENCODER_LOCK:
+            if _ADAPTIVE_JPEG_ENCODER is None:
+                _ADAPTIVE_JPEG_ENCODER = AdaptiveJpegEncoder()
+    return _ADAPTIVE_JPEG_ENCODER
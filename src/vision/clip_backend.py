@@ -0,0 +1,262 @@
+"""
+CLIP 推理后端（CPU 优化）
+
+生产节点无 GPU，CLIP 默认以 fp32 在 CPU 上运行。本模块按 settings.toml 中
+``[default.clip_inference]`` 的配置（默认关闭）为编码器准备推理后端：
+- backend = "int8_dynamic"：对 CLIP 的 nn.Linear 做动态 INT8 量化（仅 CPU）
+- num_threads / interop_threads：torch 算子内/算子间线程数
+- graph_mode = "torchscript" | "torch_compile"：图像塔 trace / 编译路径
+- accuracy_guard：在样本集上对比 fp32 向量的余弦相似度，低于 min_cosine 时回退 fp32
+"""
+
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+import torch
+from loguru import logger
+from PIL import Image
+
+from .clip_runtime import (
+    BACKEND_FP32,
+    BACKEND_INT8_DYNAMIC,
+    GRAPH_MODE_NONE,
+    GRAPH_MODE_TORCH_COMPILE,
+    GRAPH_MODE_TORCHSCRIPT,
+    ClipInferenceConfig,
+    load_clip_inference_config,
+    to_feature_tensor,
+)
+
+# 精度校验使用的文本样本（与入库向量的环境描述格式一致）
+GUARD_TEXTS = (
+    "Mushroom Room 611, fruiting stage, Day 12. Temperature 16.5C, humidity 92%, CO2 1200ppm.",
+    "Mushroom Room 607, primordia stage, Day 5. Temperature 18.0C, humidity 95%, CO2 2500ppm.",
+    "Mushroom Room 608, harvest stage, Day 24. Temperature 15.2C, humidity 88%, CO2 900ppm.",
+    "Mushroom Room 612, mycelium stage, Day 2. Temperature 20.1C, humidity 90%, CO2 3000ppm.",
+)
+
+
+def configure_torch_threads(num_threads: int = 0, interop_threads: int = 0) -> None:
+    """设置 torch 算子内/算子间线程数（<=0 保持默认）"""
+    if num_threads > 0:
+        torch.set_num_threads(num_threads)
+    if interop_threads > 0 and torch.get_num_interop_threads() != interop_threads:
+        try:
+            torch.set_num_interop_threads(interop_threads)
+        except RuntimeError as e:
+            # 算子间线程池一经使用便不可再修改
+            logger.warning(
+                f"[ClipInference] interop_threads 设置失败（保持 {torch.get_num_interop_threads()}）: {e}"
+            )
+
+
+def quantize_clip_dynamic(model: torch.nn.Module) -> torch.nn.Module:
+    """对 CLIP 的全部 nn.Linear 做动态 INT8 量化（返回新模型，原模型不变）"""
+    return torch.ao.quantization.quantize_dynamic(
+        model, {torch.nn.Linear}, dtype=torch.qint8
+    ).eval()
+
+
+class _ImageTower(torch.nn.Module):
+    """get_image_features 的 trace 包装（输出固定为 [N, D] tensor）"""
+
+    def __init__(self, model: torch.nn.Module):
+        super().__init__()
+        self.model = model
+
+    def forward(self, pixel_values: torch.Tensor) -> torch.Tensor:
+        return to_feature_tensor(
+            self.model.get_image_features(pixel_values=pixel_values)
+        )
+
+
+def trace_image_tower(model: torch.nn.Module, example_pixels: torch.Tensor):
+    """TorchScript trace 图像塔并冻结，返回 (pixel_values) -> features 可调用对象"""
+    with torch.no_grad():
+        traced = torch.jit.trace(
+            _ImageTower(model).eval(), example_pixels, check_trace=False
+        )
+    traced = torch.jit.freeze(traced)
+
+    def image_forward(pixel_values: torch.Tensor) -> torch.Tensor:
+        return traced(pixel_values)
+
+    return image_forward
+
+
+def build_guard_inputs(
+    processor, config: ClipInferenceConfig, device: str = "cpu"
+) -> Dict[str, torch.Tensor]:
+    """精度校验样本：优先读取 guard_image_dir 中的图片，否则生成确定性的合成图像"""
+    images: List[Image.Image] = []
+    if config.guard_image_dir:
+        image_dir = Path(config.guard_image_dir)
+        for path in sorted(image_dir.glob("*.jpg"))[: config.guard_samples]:
+            with Image.open(path) as img:
+                images.append(img.convert("RGB"))
+        if not images:
+            logger.warning(
+                f"[ClipInference] 校验图片目录为空: {image_dir}，使用合成样本"
+            )
+
+    if not images:
+        rng = np.random.default_rng(0)
+        gradient = np.linspace(0, 255, 224, dtype=np.float32)
+        for i in range(config.guard_samples):
+            base = np.stack(
+                [np.add.outer(gradient, gradient * (i % 3)) % 256] * 3, axis=-1
+            )
+            noise = rng.normal(0, 25, base.shape)
+            images.append(
+                Image.fromarray(np.clip(base + noise, 0, 255).astype(np.uint8))
+            )
+
+    texts = [GUARD_TEXTS[i % len(GUARD_TEXTS)] for i in range(len(images))]
+    return processor(
+        text=texts, images=images, return_tensors="pt", padding=True, truncation=True
+    ).to(device)
+
+
+def rowwise_cosine(reference: torch.Tensor, candidate: torch.Tensor) -> torch.Tensor:
+    """逐行余弦相似度"""
+    return torch.nn.functional.cosine_similarity(
+        reference.float(), candidate.float(), dim=-1
+    )
+
+
+@dataclass
+class ClipInferenceBackend:
+    """已准备好的 CLIP 推理后端：模型及图像/文本特征前向函数"""
+
+    model: torch.nn.Module
+    image_forward: Callable[[torch.Tensor], Any]
+    text_forward: Callable[..., Any]
+    config: ClipInferenceConfig = field(default_factory=ClipInferenceConfig)
+    report: Dict[str, Any] = field(default_factory=dict)
+
+    @classmethod
+    def eager(
+        cls,
+        model: torch.nn.Module,
+        config: Optional[ClipInferenceConfig] = None,
+        **report,
+    ) -> "ClipInferenceBackend":
+        config = config or ClipInferenceConfig()
+        return cls(
+            model=model,
+            image_forward=lambda pixel_values: model.get_image_features(
+                pixel_values=pixel_values
+            ),
+            text_forward=model.get_text_features,
+            config=config,
+            report={"backend": BACKEND_FP32, "graph_mode": GRAPH_MODE_NONE, **report},
+        )
+
+    def image_features(self, pixel_values: torch.Tensor) -> torch.Tensor:
+        return to_feature_tensor(self.image_forward(pixel_values))
+
+    def text_features(
+        self, input_ids: torch.Tensor, attention_mask: torch.Tensor
+    ) -> torch.Tensor:
+        return to_feature_tensor(
+            self.text_forward(input_ids=input_ids, attention_mask=attention_mask)
+        )
+
+
+def _check_accuracy(
+    reference: ClipInferenceBackend,
+    candidate: ClipInferenceBackend,
+    inputs: Dict[str, torch.Tensor],
+) -> Dict[str, float]:
+    with torch.no_grad():
+        image_cos = rowwise_cosine(
+            reference.image_features(inputs["pixel_values"]),
+            candidate.image_features(inputs["pixel_values"]),
+        )
+        text_cos = rowwise_cosine(
+            reference.text_features(inputs["input_ids"], inputs["attention_mask"]),
+            candidate.text_features(inputs["input_ids"], inputs["attention_mask"]),
+        )
+    return {
+        "image_cosine_min": round(float(image_cos.min()), 6),
+        "image_cosine_mean": round(float(image_cos.mean()), 6),
+        "text_cosine_min": round(float(text_cos.min()), 6),
+        "text_cosine_mean": round(float(text_cos.mean()), 6),
+    }
+
+
+def prepare_clip_inference(
+    model: torch.nn.Module,
+    processor,
+    device: str = "cpu",
+    config: Optional[ClipInferenceConfig] = None,
+) -> ClipInferenceBackend:
+    """
+    按配置准备 CLIP 推理后端
+
+    Args:
+        model: 已加载并 eval() 的 fp32 CLIPModel
+        processor: CLIPProcessor（生成精度校验样本）
+        device: 模型所在设备；INT8 动态量化与图模式仅在 CPU 上启用
+        config: 后端配置，默认读取 settings.toml
+
+    Returns:
+        ClipInferenceBackend；校验失败或任何步骤出错时为 fp32 eager 后端
+    """
+    config = config or load_clip_inference_config()
+    configure_torch_threads(config.num_threads, config.interop_threads)
+    fp32 = ClipInferenceBackend.eager(model, config)
+    if config.is_default:
+        return fp32
+    if not config.uses_torch:
+        logger.warning(
+            f"[ClipInference] backend={config.backend} 不是 torch 后端，使用 fp32"
+        )
+        return fp32
+    if device != "cpu":
+        logger.info(f"[ClipInference] 设备为 {device}，CPU 推理后端配置不生效")
+        return fp32
+
+    try:
+        inputs = build_guard_inputs(processor, config, device)
+        candidate_model = (
+            quantize_clip_dynamic(model)
+            if config.backend == BACKEND_INT8_DYNAMIC
+            else model
+        )
+        candidate = ClipInferenceBackend.eager(candidate_model, config)
+        if config.graph_mode == GRAPH_MODE_TORCHSCRIPT:
+            candidate.image_forward = trace_image_tower(
+                candidate_model, inputs["pixel_values"][:1]
+            )
+        elif config.graph_mode == GRAPH_MODE_TORCH_COMPILE:
+            candidate.image_forward = torch.compile(candidate.image_forward)
+            candidate.text_forward = torch.compile(candidate.text_forward, dynamic=True)
+        candidate.report.update(backend=config.backend, graph_mode=config.graph_mode)
+
+        if config.accuracy_guard:
+            metrics = _check_accuracy(fp32, candidate, inputs)
+            passed = (
+                min(metrics["image_cosine_min"], metrics["text_cosine_min"])
+                >= config.min_cosine
+            )
+            candidate.report.update(metrics, guard_passed=passed)
+            if not passed:
+                logger.warning(
+                    f"[ClipInference] 精度校验未通过（min_cosine={config.min_cosine}）: {metrics}，回退 fp32"
+                )
+                return ClipInferenceBackend.eager(
+                    model, config, **metrics, guard_passed=False
+                )
+    except Exception as e:
+        logger.warning(
+            f"[ClipInference] 准备 {config.backend}/{config.graph_mode} 后端失败，回退 fp32: {e}"
+        )
+        return fp32
+
+    logger.info(
+        f"[ClipInference] 使用推理后端: {candidate.report}, threads={torch.get_num_threads()}"
+    )
+    return candidate
@@ -0,0 +1,233 @@
+"""
+CLIP ONNX Runtime 推理后端（不依赖 torch/transformers）
+
+加载 vision/fine_tuning/convert.py 导出的图像塔/文本塔 ONNX 模型，使用
+onnxruntime CPUExecutionProvider 推理；预处理与分词分别基于导出目录中的
+preprocessor_config.json 与 tokenizer.json（tokenizers 库），与 CLIPProcessor 对齐。
+"""
+
+import json
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+from loguru import logger
+from PIL import Image
+
+from .clip_runtime import BACKEND_ONNX, CLIP_ONNX_DIRNAME, resolve_local_model_dir
+
+IMAGE_MODEL_FILE = "image_encoder.onnx"
+TEXT_MODEL_FILE = "text_encoder.onnx"
+ONNX_MANIFEST_FILE = "onnx_manifest.json"
+
+# CLIPImageProcessor 默认值（preprocessor_config.json 缺省字段时使用）
+_DEFAULT_IMAGE_MEAN = (0.48145466, 0.4578275, 0.40821073)
+_DEFAULT_IMAGE_STD = (0.26862954, 0.26130258, 0.27577711)
+
+
+def resolve_onnx_model_dir(onnx_dir: str = "") -> Path:
+    """解析 ONNX 模型目录：显式配置优先，其次 models/clip-vit-base-patch32-onnx"""
+    model_dir = (
+        Path(onnx_dir) if onnx_dir else resolve_local_model_dir(CLIP_ONNX_DIRNAME)
+    )
+    if model_dir is None or not (model_dir / IMAGE_MODEL_FILE).exists():
+        raise FileNotFoundError(
+            f"未找到 CLIP ONNX 模型 ({onnx_dir or CLIP_ONNX_DIRNAME})，请先执行 "
+            "python -m vision.fine_tuning.cli convert --onnx 导出"
+        )
+    return model_dir
+
+
+class OnnxBatch(dict):
+    """numpy 预处理结果，提供与 BatchEncoding 一致的 .to() 接口"""
+
+    def to(self, device: Any) -> "OnnxBatch":
+        return self
+
+
+def _size_pair(value: Any, default: int) -> tuple[int, int]:
+    """解析 size/crop_size 配置为 (height, width)"""
+    if value is None:
+        return default, default
+    if isinstance(value, dict):
+        if "shortest_edge" in value:
+            return value["shortest_edge"], value["shortest_edge"]
+        return value.get("height", default), value.get("width", default)
+    return int(value), int(value)
+
+
+class ClipOnnxPreprocessor:
+    """CLIP 图像预处理与分词（numpy 实现，调用方式与 CLIPProcessor 一致）"""
+
+    def __init__(self, model_dir: Path):
+        config_path = model_dir / "preprocessor_config.json"
+        config = (
+            json.loads(config_path.read_text(encoding="utf-8"))
+            if config_path.exists()
+            else {}
+        )
+        image_config = config.get("image_processor", config)
+        self.shortest_edge = _size_pair(image_config.get("size"), 224)[0]
+        self.crop_height, self.crop_width = _size_pair(
+            image_config.get("crop_size"), 224
+        )
+        self.resample = int(image_config.get("resample", Image.Resampling.BICUBIC))
+        self.rescale_factor = float(image_config.get("rescale_factor", 1 / 255))
+        self.image_mean = np.asarray(
+            image_config.get("image_mean", _DEFAULT_IMAGE_MEAN), dtype=np.float32
+        ).reshape(3, 1, 1)
+        self.image_std = np.asarray(
+            image_config.get("image_std", _DEFAULT_IMAGE_STD), dtype=np.float32
+        ).reshape(3, 1, 1)
+        self.tokenizer = self._load_tokenizer(model_dir)
+
+    @staticmethod
+    def _load_tokenizer(model_dir: Path):
+        from tokenizers import Tokenizer
+
+        tokenizer_path = model_dir / "tokenizer.json"
+        if not tokenizer_path.exists():
+            raise FileNotFoundError(f"缺少分词器文件: {tokenizer_path}")
+        tokenizer = Tokenizer.from_file(str(tokenizer_path))
+
+        config_path = model_dir / "tokenizer_config.json"
+        config = (
+            json.loads(config_path.read_text(encoding="utf-8"))
+            if config_path.exists()
+            else {}
+        )
+        max_length = min(int(config.get("model_max_length", 77)), 77)
+        pad_token = config.get("pad_token") or "<|endoftext|>"
+        if isinstance(pad_token, dict):
+            pad_token = pad_token.get("content", "<|endoftext|>")
+        pad_id = tokenizer.token_to_id(pad_token)
+        tokenizer.enable_truncation(max_length=max_length)
+        tokenizer.enable_padding(
+            pad_id=pad_id if pad_id is not None else 0, pad_token=pad_token
+        )
+        return tokenizer
+
+    def __call__(
+        self,
+        text: Optional[Iterable[str] | str] = None,
+        images: Optional[List[Image.Image]] = None,
+        return_tensors: str = "np",
+        padding: bool = True,
+        truncation: bool = True,
+    ) -> OnnxBatch:
+        """
+        预处理图像/文本
+
+        文本始终按批内最长序列补齐并截断到 77 token（与编码器调用方式一致）。
+        """
+        batch = OnnxBatch()
+        if images is not None:
+            batch["pixel_values"] = self.preprocess_images(images)
+        if text is not None:
+            texts = [text] if isinstance(text, str) else list(text)
+            input_ids, attention_mask = self.tokenize(texts)
+            batch["input_ids"] = input_ids
+            batch["attention_mask"] = attention_mask
+        return batch
+
+    def preprocess_images(self, images: List[Image.Image]) -> np.ndarray:
+        """resize 短边 → 中心裁剪 → rescale → normalize，输出 [N, 3, H, W] float32"""
+        return np.stack([self._preprocess_image(img) for img in images]).astype(
+            np.float32
+        )
+
+    def _preprocess_image(self, image: Image.Image) -> np.ndarray:
+        if image.mode != "RGB":
+            image = image.convert("RGB")
+        width, height = image.size
+        short, long = (width, height) if width <= height else (height, width)
+        new_short, new_long = self.shortest_edge, int(self.shortest_edge * long / short)
+        new_width, new_height = (
+            (new_short, new_long) if width <= height else (new_long, new_short)
+        )
+        if (new_width, new_height) != (width, height):
+            image = image.resize((new_width, new_height), resample=self.resample)
+
+        array = np.asarray(image, dtype=np.float32)
+        top = max(0, (new_height - self.crop_height) // 2)
+        left = max(0, (new_width - self.crop_width) // 2)
+        array = array[top : top + self.crop_height, left : left + self.crop_width]
+        array = array.transpose(2, 0, 1) * self.rescale_factor
+        return (array - self.image_mean) / self.image_std
+
+    def tokenize(self, texts: List[str]) -> tuple[np.ndarray, np.ndarray]:
+        encodings = self.tokenizer.encode_batch(texts)
+        input_ids = np.asarray([e.ids for e in encodings], dtype=np.int64)
+        attention_mask = np.asarray(
+            [e.attention_mask for e in encodings], dtype=np.int64
+        )
+        return input_ids, attention_mask
+
+
+class OnnxClipModel:
+    """onnxruntime CPU 推理的 CLIP 图像/文本塔（接口与 clip_backend.ClipInferenceBackend 一致）"""
+
+    uses_torch = False
+
+    def __init__(self, model_dir: Path, num_threads: int = 0, interop_threads: int = 0):
+        import onnxruntime as ort
+
+        self.model_dir = Path(model_dir)
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if num_threads > 0:
+            options.intra_op_num_threads = num_threads
+        if interop_threads > 0:
+            options.inter_op_num_threads = interop_threads
+        providers = ["CPUExecutionProvider"]
+        self.image_session = ort.InferenceSession(
+            str(self.model_dir / IMAGE_MODEL_FILE),
+            sess_options=options,
+            providers=providers,
+        )
+        self.text_session = ort.InferenceSession(
+            str(self.model_dir / TEXT_MODEL_FILE),
+            sess_options=options,
+            providers=providers,
+        )
+        self.preprocessor = ClipOnnxPreprocessor(self.model_dir)
+
+        manifest_path = self.model_dir / ONNX_MANIFEST_FILE
+        self.manifest: Dict[str, Any] = (
+            json.loads(manifest_path.read_text(encoding="utf-8"))
+            if manifest_path.exists()
+            else {}
+        )
+        self.report: Dict[str, Any] = {
+            "backend": BACKEND_ONNX,
+            "model_dir": str(self.model_dir),
+            "providers": self.image_session.get_providers(),
+            "opset": self.manifest.get("opset"),
+        }
+        logger.info(f"[ClipInference] 使用 ONNX Runtime 推理后端: {self.report}")
+
+    def image_features(self, pixel_values) -> np.ndarray:
+        """[N, 3, H, W] → [N, D] 未归一化图像特征"""
+        return self.image_session.run(
+            None, {"pixel_values": np.asarray(pixel_values, dtype=np.float32)}
+        )[0]
+
+    def text_features(self, input_ids, attention_mask) -> np.ndarray:
+        """[N, L] → [N, D] 未归一化文本特征"""
+        return self.text_session.run(
+            None,
+            {
+                "input_ids": np.asarray(input_ids, dtype=np.int64),
+                "attention_mask": np.asarray(attention_mask, dtype=np.int64),
+            },
+        )[0]
+
+    def memory_bytes(self) -> int:
+        """模型权重文件大小（含外部数据文件）"""
+        return int(
+            sum(
+                path.stat().st_size
+                for path in self.model_dir.iterdir()
+                if path.suffix in (".onnx", ".data")
+            )
+        )
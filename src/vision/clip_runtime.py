@@ -0,0 +1,126 @@
+"""
+CLIP 推理运行时配置（不依赖 torch/transformers）
+
+读取 settings.toml 中 ``[default.clip_inference]`` 的后端配置，供编码器在加载模型前
+决定使用 torch（fp32 / int8_dynamic，见 clip_backend）还是 onnxruntime（见 clip_onnx）。
+选择 onnx 后端时调度进程无需导入 torch/transformers。
+"""
+
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+from loguru import logger
+
+BACKEND_FP32 = "fp32"
+BACKEND_INT8_DYNAMIC = "int8_dynamic"
+BACKEND_ONNX = "onnx"
+GRAPH_MODE_NONE = "none"
+GRAPH_MODE_TORCHSCRIPT = "torchscript"
+GRAPH_MODE_TORCH_COMPILE = "torch_compile"
+
+TORCH_BACKENDS = (BACKEND_FP32, BACKEND_INT8_DYNAMIC)
+SUPPORTED_BACKENDS = (*TORCH_BACKENDS, BACKEND_ONNX)
+SUPPORTED_GRAPH_MODES = (
+    GRAPH_MODE_NONE,
+    GRAPH_MODE_TORCHSCRIPT,
+    GRAPH_MODE_TORCH_COMPILE,
+)
+
+CLIP_MODEL_DIRNAME = "clip-vit-base-patch32"
+CLIP_ONNX_DIRNAME = "clip-vit-base-patch32-onnx"
+
+
+@dataclass(frozen=True)
+class ClipInferenceConfig:
+    """CLIP 推理后端配置"""
+
+    backend: str = BACKEND_FP32
+    num_threads: int = 0  # 0 表示保持默认
+    interop_threads: int = 0
+    graph_mode: str = GRAPH_MODE_NONE
+    accuracy_guard: bool = True
+    min_cosine: float = 0.99
+    guard_samples: int = 8
+    guard_image_dir: str = ""
+    onnx_dir: str = ""  # 为空时使用 models/clip-vit-base-patch32-onnx
+
+    @classmethod
+    def from_mapping(cls, section: Any) -> "ClipInferenceConfig":
+        """从 dict / Dynaconf Box 构建配置，非法取值回退默认值"""
+        if not section:
+            return cls()
+        values = {
+            name: section.get(name, default.default)
+            for name, default in cls.__dataclass_fields__.items()
+        }
+        backend = str(values["backend"]).lower()
+        graph_mode = str(values["graph_mode"]).lower()
+        if backend not in SUPPORTED_BACKENDS:
+            logger.warning(f"[ClipInference] 未知 backend={backend}，使用 fp32")
+            backend = BACKEND_FP32
+        if graph_mode not in SUPPORTED_GRAPH_MODES:
+            logger.warning(
+                f"[ClipInference] 未知 graph_mode={graph_mode}，不启用图模式"
+            )
+            graph_mode = GRAPH_MODE_NONE
+        return cls(
+            backend=backend,
+            num_threads=int(values["num_threads"]),
+            interop_threads=int(values["interop_threads"]),
+            graph_mode=graph_mode,
+            accuracy_guard=bool(values["accuracy_guard"]),
+            min_cosine=float(values["min_cosine"]),
+            guard_samples=max(1, int(values["guard_samples"])),
+            guard_image_dir=str(values["guard_image_dir"] or ""),
+            onnx_dir=str(values["onnx_dir"] or ""),
+        )
+
+    @property
+    def is_default(self) -> bool:
+        return self.backend == BACKEND_FP32 and self.graph_mode == GRAPH_MODE_NONE
+
+    @property
+    def uses_torch(self) -> bool:
+        return self.backend in TORCH_BACKENDS
+
+
+def load_clip_inference_config() -> ClipInferenceConfig:
+    """读取 settings.toml 中的 clip_inference 配置（缺失时为 fp32 默认行为）"""
+    try:
+        from global_const.global_const import settings
+
+        return ClipInferenceConfig.from_mapping(
+            getattr(settings, "clip_inference", None)
+        )
+    except Exception as e:
+        logger.warning(f"[ClipInference] 读取配置失败，使用 fp32: {e}")
+        return ClipInferenceConfig()
+
+
+def resolve_local_model_dir(dirname: str) -> Path | None:
+    """
+    按容器 (/app/models) → 开发环境 (<repo>/models) 顺序查找本地模型目录
+
+    Returns:
+        存在的目录；均不存在时返回 None
+    """
+    container_path = Path("/app/models") / dirname
+    local_path = Path(__file__).parent.parent.parent / "models" / dirname
+    for path in (container_path, local_path):
+        if path.exists():
+            return path
+    return None
+
+
+def to_feature_tensor(features):
+    """统一CLIP特征输出为 [N, D] tensor（兼容BaseModelOutputWithPooling对象）"""
+    if hasattr(features, "last_hidden_state"):
+        pooled = getattr(features, "pooler_output", None)
+        if pooled is not None:
+            return pooled
+        return features.last_hidden_state[:, 0, :]  # Take the CLS token
+    pooled = getattr(features, "pooler_output", None)
+    if pooled is not None:
+        return pooled
+    return features
@@ -0,0 +1,294 @@
+"""
+CLIP 特征内容寻址缓存
+
+同一张 MinIO 图像会被多条路径重复编码（每日高质量向量、重处理脚本、系统验证），
+环境描述文本也大量重复（相同生长天数/环境参数）。本模块缓存 CLIP 图像塔/文本塔的
+原始特征，融合前命中即跳过模型前向：
+- 图像特征键：图像字节 SHA-256（加载时写入 ``image.info``，缺失时退化为像素哈希）
+  + 尺寸/模式 + 模型版本
+- 文本特征键：规范化描述（合并空白）+ 模型版本
+- 落盘为 SQLite 单文件，按最近访问时间 LRU 淘汰，总大小不超过 max_bytes
+"""
+
+import hashlib
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+from loguru import logger
+from PIL import Image
+
+from global_const.const_config import (
+    EMBEDDING_CACHE_DIR,
+    EMBEDDING_CACHE_MAX_BYTES,
+    IMAGE_CONTENT_HASH_INFO_KEY,
+)
+
+# 图像加载时写入的字节哈希（image.info 会随 convert/copy 传递）
+CONTENT_HASH_INFO_KEY = IMAGE_CONTENT_HASH_INFO_KEY
+KIND_IMAGE = "image"
+KIND_TEXT = "text"
+# 淘汰后保留的比例，避免每次写入都触发淘汰
+EVICT_LOW_WATERMARK = 0.9
+# 模型指纹涉及的权重文件
+_WEIGHT_SUFFIXES = (".safetensors", ".bin", ".onnx", ".data", ".pt")
+
+
+def tag_content_hash(image: Image.Image, data: bytes) -> Image.Image:
+    """记录图像原始字节的 SHA-256，供特征缓存按内容寻址"""
+    image.info[CONTENT_HASH_INFO_KEY] = hashlib.sha256(data).hexdigest()
+    return image
+
+
+def image_content_key(image: Image.Image) -> str:
+    """
+    图像内容标识：字节哈希 + 尺寸 + 模式
+
+    尺寸参与计算，JPEG draft 缩减解码或缩放后的图像不会与原图共用特征；
+    未记录字节哈希的图像退化为像素数据哈希。
+    """
+    content = image.info.get(CONTENT_HASH_INFO_KEY)
+    if content is None:
+        content = "px:" + hashlib.sha256(image.tobytes()).hexdigest()
+    return f"{content}:{image.size[0]}x{image.size[1]}:{image.mode}"
+
+
+def normalize_text(text: str) -> str:
+    """规范化描述文本：合并连续空白并去除首尾空白"""
+    return " ".join(text.split())
+
+
+def feature_key(kind: str, model_version: str, content: str) -> str:
+    return hashlib.sha256(f"{kind}\0{model_version}\0{content}".encode()).hexdigest()
+
+
+def model_fingerprint(source: str | Path) -> str:
+    """
+    模型指纹：本地目录取权重文件名/大小/修改时间的哈希，否则为模型名本身
+
+    微调后重新导出的权重会得到新指纹，旧特征自然失效。
+    """
+    path = Path(source)
+    if not path.is_dir():
+        return str(source)
+    entries = sorted(
+        f"{p.name}:{p.stat().st_size}:{int(p.stat().st_mtime)}"
+        for p in path.iterdir()
+        if p.suffix in _WEIGHT_SUFFIXES
+    )
+    digest = hashlib.sha256("|".join(entries).encode()).hexdigest()[:16]
+    return f"{path.name}@{digest}"
+
+
+class EmbeddingCache:
+    """落盘 LRU 特征缓存（线程安全，多进程共享同一 SQLite 文件）"""
+
+    def __init__(self, path: Path, max_bytes: int = EMBEDDING_CACHE_MAX_BYTES):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            str(self.path), timeout=30, check_same_thread=False
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            "key TEXT PRIMARY KEY, kind TEXT NOT NULL, dim INTEGER NOT NULL, "
+            "vector BLOB NOT NULL, nbytes INTEGER NOT NULL, accessed REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_embeddings_accessed ON embeddings (accessed)"
+        )
+        self._conn.commit()
+        self._total_bytes = self._sum_bytes()
+        self._stats = {"hits": 0, "misses": 0, "writes": 0, "evictions": 0}
+
+    def _sum_bytes(self) -> int:
+        row = self._conn.execute(
+            "SELECT COALESCE(SUM(nbytes), 0) FROM embeddings"
+        ).fetchone()
+        return int(row[0])
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, np.ndarray]:
+        """批量读取，返回命中的 {key: float32 向量}，并刷新访问时间"""
+        keys = list(dict.fromkeys(keys))
+        if not keys:
+            return {}
+        found: Dict[str, np.ndarray] = {}
+        with self._lock:
+            for start in range(0, len(keys), 500):
+                chunk = keys[start : start + 500]
+                placeholders = ",".join("?" * len(chunk))
+                rows = self._conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})",
+                    chunk,
+                ).fetchall()
+                for key, blob in rows:
+                    found[key] = np.frombuffer(blob, dtype=np.float32)
+            if found:
+                now = time.time()
+                self._conn.executemany(
+                    "UPDATE embeddings SET accessed = ? WHERE key = ?",
+                    [(now, key) for key in found],
+                )
+                self._conn.commit()
+            self._stats["hits"] += len(found)
+            self._stats["misses"] += len(keys) - len(found)
+        return found
+
+    def put_many(self, kind: str, items: Dict[str, np.ndarray]) -> None:
+        """批量写入特征，超出容量时按访问时间淘汰"""
+        if not items:
+            return
+        now = time.time()
+        rows = []
+        for key, vector in items.items():
+            blob = np.ascontiguousarray(vector, dtype=np.float32).tobytes()
+            rows.append((key, kind, len(blob) // 4, blob, len(blob), now))
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings "
+                "(key, kind, dim, vector, nbytes, accessed) VALUES (?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+            self._conn.commit()
+            self._stats["writes"] += len(rows)
+            self._total_bytes += sum(row[4] for row in rows)
+            if self._total_bytes > self.max_bytes:
+                self._evict_locked()
+
+    def _evict_locked(self) -> None:
+        # 其他进程可能同时写入，淘汰前重新统计真实大小
+        self._total_bytes = self._sum_bytes()
+        target = int(self.max_bytes * EVICT_LOW_WATERMARK)
+        evicted = 0
+        while self._total_bytes > target:
+            rows = self._conn.execute(
+                "SELECT key, nbytes FROM embeddings ORDER BY accessed LIMIT 1000"
+            ).fetchall()
+            if not rows:
+                break
+            batch, freed = [], 0
+            for key, nbytes in rows:
+                if self._total_bytes - freed <= target:
+                    break
+                batch.append((key,))
+                freed += nbytes
+            self._conn.executemany("DELETE FROM embeddings WHERE key = ?", batch)
+            self._conn.commit()
+            self._total_bytes -= freed
+            evicted += len(batch)
+        self._stats["evictions"] += evicted
+        logger.debug(
+            f"[EmbeddingCache] 淘汰 {evicted} 条特征，当前 {self._total_bytes} bytes"
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self._stats["hits"] + self._stats["misses"]
+            return {
+                **self._stats,
+                "hit_rate": round(self._stats["hits"] / total, 4) if total else None,
+                "bytes": self._total_bytes,
+                "max_bytes": self.max_bytes,
+                "path": str(self.path),
+            }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM embeddings")
+            self._conn.commit()
+            self._total_bytes = 0
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def lookup_features(
+    cache: Optional[EmbeddingCache],
+    kind: str,
+    model_version: str,
+    contents: List[str],
+    compute,
+) -> np.ndarray:
+    """
+    按内容取特征：命中缓存的直接返回，未命中的一次性调用 compute 计算并写回
+
+    Args:
+        cache: 特征缓存；为 None 时直接计算
+        kind: KIND_IMAGE / KIND_TEXT
+        model_version: 模型版本（指纹 + 推理后端）
+        contents: 每个输入的内容标识（image_content_key / normalize_text 结果）
+        compute: (未命中下标列表) -> [M, D] float32 ndarray
+
+    Returns:
+        [N, D] float32 特征矩阵，顺序与 contents 一致
+    """
+    if cache is None:
+        return compute(list(range(len(contents))))
+
+    keys = [feature_key(kind, model_version, content) for content in contents]
+    try:
+        cached = cache.get_many(keys)
+    except Exception as e:
+        logger.warning(f"[EmbeddingCache] 读取失败，跳过缓存: {e}")
+        return compute(list(range(len(contents))))
+
+    missing: List[int] = []
+    first_index: Dict[str, int] = {}
+    for i, key in enumerate(keys):
+        if key not in cached and key not in first_index:
+            first_index[key] = i
+            missing.append(i)
+
+    computed: Dict[str, np.ndarray] = {}
+    if missing:
+        features = compute(missing)
+        computed = {keys[i]: features[j] for j, i in enumerate(missing)}
+        try:
+            cache.put_many(kind, computed)
+        except Exception as e:
+            logger.warning(f"[EmbeddingCache] 写入失败: {e}")
+
+    return np.stack(
+        [cached[key] if key in cached else computed[key] for key in keys]
+    ).astype(np.float32, copy=False)
+
+
+_CACHE_INSTANCE: Optional[EmbeddingCache] = None
+_CACHE_LOCK = threading.Lock()
+_CACHE_DISABLED = False
+
+
+def get_embedding_cache() -> Optional[EmbeddingCache]:
+    """进程内共享的特征缓存；未配置目录或打开失败时返回 None（不影响编码）"""
+    global _CACHE_INSTANCE, _CACHE_DISABLED
+
+    with _CACHE_LOCK:
+        if _CACHE_INSTANCE is None and not _CACHE_DISABLED:
+            if not EMBEDDING_CACHE_DIR:
+                _CACHE_DISABLED = True
+                return None
+            try:
+                from global_const.global_const import BASE_DIR
+
+                _CACHE_INSTANCE = EmbeddingCache(
+                    BASE_DIR.parent / EMBEDDING_CACHE_DIR / "clip_features.sqlite3"
+                )
+            except Exception as e:
+                logger.warning(f"[EmbeddingCache] 初始化失败，禁用特征缓存: {e}")
+                _CACHE_DISABLED = True
+                return None
+            try:
+                from utils.exception_listener import register_health_provider
+
+                register_health_provider("embedding_cache", _CACHE_INSTANCE.stats)
+            except Exception as e:
+                logger.debug(f"[EmbeddingCache] 健康检查注册跳过: {e}")
+        return _CACHE_INSTANCE
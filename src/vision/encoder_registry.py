@@ -0,0 +1,230 @@
+"""
+调度进程内常驻的蘑菇图像编码器
+
+定时任务不再每次运行都新建 MushroomImageEncoder（CLIP 在 CPU 上加载需数秒）：
+- 进程内单例，首次使用时惰性构建，CLIP 按需加载（文本/质量任务不加载）
+- 空闲超过 ENCODER_IDLE_UNLOAD_SECONDS 且无任务使用时卸载 CLIP 权重释放内存，
+  下次需要时重新加载
+- 编码器构建与 CLIP 重新加载互斥；重新加载会等到其他任务释放编码器后再进行，
+  不会在其他任务使用编码器期间改动其模型属性
+- 记录加载耗时、模型内存占用、冷/热调用次数，经健康检查接口暴露
+"""
+
+import gc
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional
+
+from global_const.const_config import (
+    ENCODER_IDLE_CHECK_INTERVAL_SECONDS,
+    ENCODER_IDLE_UNLOAD_SECONDS,
+)
+from utils.loguru_setting import logger
+
+
+def _module_memory_bytes(model: Any) -> int:
+    """模型参数与缓冲区占用的字节数（ONNX 后端为权重文件大小）"""
+    if model is None:
+        return 0
+    if hasattr(model, "memory_bytes"):
+        return int(model.memory_bytes())
+    tensors = list(model.parameters()) + list(model.buffers())
+    return int(sum(t.numel() * t.element_size() for t in tensors))
+
+
+def _process_rss_bytes() -> Optional[int]:
+    try:
+        import psutil
+
+        return int(psutil.Process().memory_info().rss)
+    except Exception:
+        return None
+
+
+class EncoderRegistry:
+    """常驻编码器注册表（线程安全）"""
+
+    def __init__(
+        self,
+        idle_unload_seconds: float = ENCODER_IDLE_UNLOAD_SECONDS,
+        check_interval_seconds: float = ENCODER_IDLE_CHECK_INTERVAL_SECONDS,
+        factory=None,
+    ):
+        """
+        Args:
+            idle_unload_seconds: 空闲多久后卸载 CLIP（<=0 不卸载）
+            check_interval_seconds: 空闲检查间隔
+            factory: 编码器构建函数 (load_clip) -> encoder，默认 create_mushroom_encoder
+        """
+        self.idle_unload_seconds = idle_unload_seconds
+        self.check_interval_seconds = check_interval_seconds
+        self._factory = factory
+        self._encoder = None
+        self._lock = threading.RLock()
+        # 编码器构建 / CLIP 重新加载串行执行，等待期间新的获取者排队
+        self._load_lock = threading.Lock()
+        self._released = threading.Condition(self._lock)
+        self._in_use = 0
+        self._last_used: Optional[float] = None
+        self._watcher: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._stats: Dict[str, Any] = {
+            "warm_calls": 0,
+            "cold_calls": 0,
+            "unloads": 0,
+            "encoder_init_seconds": None,
+            "clip_load_seconds": None,
+        }
+
+    @contextmanager
+    def acquire(self, load_clip: bool = True) -> Iterator[Any]:
+        """
+        获取常驻编码器（使用期间不会被空闲卸载）
+
+        需要重新加载 CLIP 时会等待其他使用者释放编码器，
+        因此持有编码器时不要在同一线程内嵌套 acquire(load_clip=True)。
+
+        Args:
+            load_clip: 是否需要 CLIP 模型；文本/质量任务传 False
+        """
+        with self._load_lock, self._lock:
+            encoder = self._ensure_loaded(load_clip)
+            self._in_use += 1
+        try:
+            yield encoder
+        finally:
+            with self._lock:
+                self._in_use -= 1
+                self._last_used = time.monotonic()
+                self._released.notify_all()
+
+    def _ensure_loaded(self, load_clip: bool):
+        cold = False
+        if self._encoder is None:
+            factory = self._factory
+            if factory is None:
+                from vision.mushroom_image_encoder import create_mushroom_encoder
+
+                factory = create_mushroom_encoder
+            start = time.perf_counter()
+            self._encoder = factory(load_clip=load_clip)
+            elapsed = time.perf_counter() - start
+            self._stats["encoder_init_seconds"] = round(elapsed, 3)
+            if load_clip:
+                self._stats["clip_load_seconds"] = round(elapsed, 3)
+            cold = True
+            logger.info(
+                f"[EncoderRegistry] 编码器冷启动完成: load_clip={load_clip}, 耗时={elapsed:.2f}s"
+            )
+        elif load_clip and self._encoder.clip_model is None:
+            # 其他任务（如文本/质量任务）仍在使用编码器时不改动其模型属性
+            self._released.wait_for(lambda: self._in_use == 0)
+            start = time.perf_counter()
+            self._encoder._init_clip_model()
+            elapsed = time.perf_counter() - start
+            self._stats["clip_load_seconds"] = round(elapsed, 3)
+            cold = True
+            logger.info(f"[EncoderRegistry] CLIP 重新加载完成，耗时={elapsed:.2f}s")
+
+        self._stats["cold_calls" if cold else "warm_calls"] += 1
+        self._start_watcher()
+        return self._encoder
+
+    def unload_if_idle(self, now: Optional[float] = None) -> bool:
+        """空闲超时且无使用者时卸载 CLIP 权重；返回是否发生卸载"""
+        if self.idle_unload_seconds <= 0:
+            return False
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            encoder = self._encoder
+            if (
+                encoder is None
+                or encoder.clip_model is None
+                or self._in_use > 0
+                or self._last_used is None
+                or now - self._last_used < self.idle_unload_seconds
+            ):
+                return False
+            encoder.clip_model = None
+            encoder.clip_processor = None
+            encoder.clip_inference = None
+            self._stats["unloads"] += 1
+        gc.collect()
+        logger.info(
+            f"[EncoderRegistry] 编码器空闲超过 {self.idle_unload_seconds}s，已卸载 CLIP 模型"
+        )
+        return True
+
+    def _start_watcher(self) -> None:
+        if self.idle_unload_seconds <= 0 or (
+            self._watcher is not None and self._watcher.is_alive()
+        ):
+            return
+        self._stop.clear()
+        self._watcher = threading.Thread(
+            target=self._watch, name="encoder_idle_watcher", daemon=True
+        )
+        self._watcher.start()
+
+    def _watch(self) -> None:
+        while not self._stop.wait(self.check_interval_seconds):
+            try:
+                self.unload_if_idle()
+            except Exception as e:
+                logger.warning(f"[EncoderRegistry] 空闲卸载检查失败: {e}")
+
+    def shutdown(self) -> None:
+        """停止空闲检查并释放编码器"""
+        self._stop.set()
+        with self._lock:
+            self._encoder = None
+        gc.collect()
+
+    def stats(self) -> Dict[str, Any]:
+        """加载耗时、内存占用与冷/热调用统计（供健康检查接口使用）"""
+        with self._lock:
+            encoder = self._encoder
+            clip_model = getattr(encoder, "clip_model", None)
+            clip_backend = getattr(encoder, "clip_inference", None)
+            idle_seconds = (
+                None
+                if self._last_used is None or self._in_use > 0
+                else round(time.monotonic() - self._last_used, 1)
+            )
+            return {
+                **self._stats,
+                "loaded": encoder is not None,
+                "clip_loaded": clip_model is not None,
+                "in_use": self._in_use,
+                "idle_seconds": idle_seconds,
+                "idle_unload_seconds": self.idle_unload_seconds,
+                "clip_memory_bytes": _module_memory_bytes(clip_model),
+                "clip_backend": getattr(clip_backend, "report", None),
+                "process_rss_bytes": _process_rss_bytes(),
+            }
+
+
+_REGISTRY: Optional[EncoderRegistry] = None
+_REGISTRY_LOCK = threading.Lock()
+
+
+def get_encoder_registry() -> EncoderRegistry:
+    """进程内共享的编码器注册表（首次调用时注册健康检查信息）"""
+    global _REGISTRY
+
+    with _REGISTRY_LOCK:
+        if _REGISTRY is None:
+            _REGISTRY = EncoderRegistry()
+            try:
+                from utils.exception_listener import register_health_provider
+
+                register_health_provider("mushroom_encoder", _REGISTRY.stats)
+            except Exception as e:
+                logger.debug(f"[EncoderRegistry] 健康检查注册跳过: {e}")
+        return _REGISTRY
+
+
+def acquire_mushroom_encoder(load_clip: bool = True):
+    """获取常驻蘑菇图像编码器：``with acquire_mushroom_encoder() as encoder: ...``"""
+    return get_encoder_registry().acquire(load_clip=load_clip)
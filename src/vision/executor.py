@@ -89,6 +89,13 @@ class CLIPInferenceTask(BaseTask):
                 room_stats[room_id] = {'total': 0, 'success': 0, 'failed': 1, 'skipped': 0}
                 total_stats['failed'] += 1
         
+        # 刷新本次写入涉及批次的看板汇总
+        try:
+            from utils.batch_summary import refresh_batch_summary_since
+            refresh_batch_summary_since(end_time)
+        except Exception as e:
+            logger.warning(f"[{self.task_name}] 批次汇总刷新失败: {e}")
+        
         # 计算成功率
         success_rate = (total_stats['success'] / total_stats['total']) * 100 if total_stats['total'] > 0 else 0
         
@@ -35,9 +35,11 @@ def main() -> None:
 
     convert_parser = subparsers.add_parser("convert", help="导出微调模型")
     convert_parser.add_argument("--config", required=True, help="YAML 配置路径")
-    convert_parser.add_argument("--checkpoint", required=True, help="模型 checkpoint 路径")
+    convert_parser.add_argument("--checkpoint", default=None, help="模型 checkpoint 路径（为空时导出基础权重）")
     convert_parser.add_argument("--output-dir", required=True, help="导出目录")
     convert_parser.add_argument("--no-merge", action="store_true", help="不合并 LoRA 权重")
+    convert_parser.add_argument("--onnx", action="store_true", help="同时导出 ONNX 图像/文本塔")
+    convert_parser.add_argument("--opset", type=int, default=17, help="ONNX opset 版本")
 
     args = parser.parse_args()
 
@@ -52,7 +54,14 @@ def main() -> None:
         print(json.dumps(result, ensure_ascii=False, indent=2))
         return
     if args.command == "convert":
-        convert_checkpoint(args.config, args.checkpoint, args.output_dir, merge=not args.no_merge)
+        convert_checkpoint(
+            args.config,
+            args.checkpoint,
+            args.output_dir,
+            merge=not args.no_merge,
+            onnx=args.onnx,
+            opset=args.opset,
+        )
         return
 
 
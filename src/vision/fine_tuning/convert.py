@@ -1,23 +1,54 @@
 """
 模型转换工具
 
-支持将微调权重合并并导出到 HuggingFace 格式。
+支持将微调权重合并并导出到 HuggingFace 格式，以及导出图像/文本塔为 ONNX。
 """
 
 from __future__ import annotations
 
 import argparse
+import json
 from pathlib import Path
+from typing import Any, Dict, Optional
 
+import numpy as np
 import torch
+from loguru import logger
+from torch import nn
 
+from vision.clip_onnx import IMAGE_MODEL_FILE, ONNX_MANIFEST_FILE, TEXT_MODEL_FILE
+from vision.clip_runtime import to_feature_tensor
 from .config import load_experiment_config
-from .lora import merge_lora
+from .lora import merge_lora, unwrap_lora
 from .model import CLIPFineTuner
 
 
-def convert_checkpoint(config_path: str, checkpoint_path: str, output_dir: str, merge: bool = True) -> str:
-    """将微调权重导出为 HuggingFace 兼容格式。"""
+class _ImageTower(nn.Module):
+    """图像塔导出包装，输出未归一化特征（与 get_image_features 一致）。"""
+
+    def __init__(self, clip: nn.Module) -> None:
+        super().__init__()
+        self.clip = clip
+
+    def forward(self, pixel_values: torch.Tensor) -> torch.Tensor:
+        return to_feature_tensor(self.clip.get_image_features(pixel_values=pixel_values))
+
+
+class _TextTower(nn.Module):
+    """文本塔导出包装，输出未归一化特征（与 get_text_features 一致）。"""
+
+    def __init__(self, clip: nn.Module) -> None:
+        super().__init__()
+        self.clip = clip
+
+    def forward(self, input_ids: torch.Tensor, attention_mask: torch.Tensor) -> torch.Tensor:
+        return to_feature_tensor(
+            self.clip.get_text_features(input_ids=input_ids, attention_mask=attention_mask)
+        )
+
+
+def load_finetuner(config_path: str, checkpoint_path: Optional[str], merge: bool = True) -> CLIPFineTuner:
+    """按实验配置构建模型并加载微调权重（checkpoint 为空时使用基础权重）。"""
     config = load_experiment_config(config_path)
     model = CLIPFineTuner(
         model_name_or_path=config.model.model_name_or_path,
@@ -32,27 +63,149 @@ def convert_checkpoint(config_path: str, checkpoint_path: str, output_dir: str,
         freeze_projection=config.model.freeze_projection,
         logit_scale_init=config.model.logit_scale_init,
     )
-    state = torch.load(checkpoint_path, map_location="cpu")
-    model.load_state_dict(state["model_state_dict"], strict=False)
+    if checkpoint_path:
+        state = torch.load(checkpoint_path, map_location="cpu")
+        model.load_state_dict(state["model_state_dict"], strict=False)
     if merge:
         merge_lora(model)
+        unwrap_lora(model)
+    return model.eval()
+
+
+def convert_checkpoint(
+    config_path: str,
+    checkpoint_path: Optional[str],
+    output_dir: str,
+    merge: bool = True,
+    onnx: bool = False,
+    opset: int = 17,
+) -> str:
+    """将微调权重导出为 HuggingFace 兼容格式，可选同时导出 ONNX。"""
+    model = load_finetuner(config_path, checkpoint_path, merge=merge)
     output_path = Path(output_dir)
     output_path.mkdir(parents=True, exist_ok=True)
     model.clip.save_pretrained(output_path)
     model.processor.save_pretrained(output_path)
+    if onnx:
+        export_onnx(model, output_path, opset=opset)
     return str(output_path)
 
 
+def export_onnx(model: CLIPFineTuner, output_dir: str | Path, opset: int = 17, verify: bool = True) -> Dict[str, Any]:
+    """
+    导出图像塔与文本塔为 ONNX，并保存预处理配置与 manifest。
+
+    输出目录可直接作为 ``[clip_inference] backend = "onnx"`` 的 onnx_dir。
+    """
+    output_path = Path(output_dir)
+    output_path.mkdir(parents=True, exist_ok=True)
+    clip = model.clip.eval()
+    image_size = clip.config.vision_config.image_size
+    dummy_pixels = torch.randn(2, 3, image_size, image_size)
+    dummy_text = model.processor.tokenizer(
+        ["a photo of mushrooms", "Mushroom Room 611, fruiting stage, Day 12."],
+        padding=True,
+        return_tensors="pt",
+    )
+
+    with torch.no_grad():
+        torch.onnx.export(
+            _ImageTower(clip).eval(),
+            (dummy_pixels,),
+            str(output_path / IMAGE_MODEL_FILE),
+            input_names=["pixel_values"],
+            output_names=["image_embeds"],
+            dynamic_axes={"pixel_values": {0: "batch"}, "image_embeds": {0: "batch"}},
+            opset_version=opset,
+            do_constant_folding=True,
+            dynamo=False,
+        )
+        torch.onnx.export(
+            _TextTower(clip).eval(),
+            (dummy_text["input_ids"], dummy_text["attention_mask"]),
+            str(output_path / TEXT_MODEL_FILE),
+            input_names=["input_ids", "attention_mask"],
+            output_names=["text_embeds"],
+            dynamic_axes={
+                "input_ids": {0: "batch", 1: "sequence"},
+                "attention_mask": {0: "batch", 1: "sequence"},
+                "text_embeds": {0: "batch"},
+            },
+            opset_version=opset,
+            do_constant_folding=True,
+            dynamo=False,
+        )
+    model.processor.save_pretrained(output_path)
+
+    manifest: Dict[str, Any] = {
+        "image_model": IMAGE_MODEL_FILE,
+        "text_model": TEXT_MODEL_FILE,
+        "opset": opset,
+        "image_size": image_size,
+        "projection_dim": clip.config.projection_dim,
+        "source": str(getattr(clip.config, "_name_or_path", "")),
+    }
+    if verify:
+        manifest["parity"] = verify_onnx_export(clip, output_path, dummy_pixels, dummy_text)
+    (output_path / ONNX_MANIFEST_FILE).write_text(json.dumps(manifest, ensure_ascii=False, indent=2), encoding="utf-8")
+    logger.info(f"ONNX 导出完成: {output_path} | {manifest}")
+    return manifest
+
+
+def verify_onnx_export(clip: nn.Module, output_dir: Path, pixel_values: torch.Tensor, text_inputs) -> Dict[str, float]:
+    """对比 ONNX Runtime 与 torch 的特征输出（未安装 onnxruntime 时跳过）。"""
+    try:
+        import onnxruntime as ort
+    except ImportError:
+        logger.warning("未安装 onnxruntime，跳过 ONNX 一致性校验")
+        return {}
+
+    def _cosine(a: np.ndarray, b: np.ndarray) -> float:
+        a = a / np.linalg.norm(a, axis=-1, keepdims=True)
+        b = b / np.linalg.norm(b, axis=-1, keepdims=True)
+        return float(np.min(np.sum(a * b, axis=-1)))
+
+    providers = ["CPUExecutionProvider"]
+    image_session = ort.InferenceSession(str(output_dir / IMAGE_MODEL_FILE), providers=providers)
+    text_session = ort.InferenceSession(str(output_dir / TEXT_MODEL_FILE), providers=providers)
+    with torch.no_grad():
+        torch_image = _ImageTower(clip)(pixel_values).numpy()
+        torch_text = _TextTower(clip)(text_inputs["input_ids"], text_inputs["attention_mask"]).numpy()
+    ort_image = image_session.run(None, {"pixel_values": pixel_values.numpy()})[0]
+    ort_text = text_session.run(
+        None,
+        {
+            "input_ids": text_inputs["input_ids"].numpy().astype(np.int64),
+            "attention_mask": text_inputs["attention_mask"].numpy().astype(np.int64),
+        },
+    )[0]
+    return {
+        "image_max_abs_diff": float(np.max(np.abs(torch_image - ort_image))),
+        "image_cosine_min": _cosine(torch_image, ort_image),
+        "text_max_abs_diff": float(np.max(np.abs(torch_text - ort_text))),
+        "text_cosine_min": _cosine(torch_text, ort_text),
+    }
+
+
 def main() -> None:
     """转换脚本 CLI 入口。"""
     parser = argparse.ArgumentParser(description="CLIP 微调权重转换")
     parser.add_argument("--config", required=True, help="YAML 配置路径")
-    parser.add_argument("--checkpoint", required=True, help="微调 checkpoint 路径")
+    parser.add_argument("--checkpoint", default=None, help="微调 checkpoint 路径（为空时导出基础权重）")
     parser.add_argument("--output-dir", required=True, help="导出目录")
     parser.add_argument("--no-merge", action="store_true", help="不合并 LoRA 权重")
+    parser.add_argument("--onnx", action="store_true", help="同时导出 ONNX 图像/文本塔")
+    parser.add_argument("--opset", type=int, default=17, help="ONNX opset 版本")
     args = parser.parse_args()
 
-    convert_checkpoint(args.config, args.checkpoint, args.output_dir, merge=not args.no_merge)
+    convert_checkpoint(
+        args.config,
+        args.checkpoint,
+        args.output_dir,
+        merge=not args.no_merge,
+        onnx=args.onnx,
+        opset=args.opset,
+    )
 
 
 if __name__ == "__main__":
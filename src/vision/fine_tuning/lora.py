@@ -83,6 +83,18 @@ def merge_lora(module: nn.Module) -> None:
             child.merge()
 
 
+def unwrap_lora(module: nn.Module) -> nn.Module:
+    """将已合并的 LoRA 层替换回原始线性层（用于导出）。"""
+    for name, child in list(module.named_modules()):
+        if not isinstance(child, LoRALinear):
+            continue
+        parent, attr_name = _locate_parent(module, name)
+        if parent is None:
+            continue
+        setattr(parent, attr_name, child.base_layer)
+    return module
+
+
 def lora_parameters(module: nn.Module) -> Iterable[nn.Parameter]:
     """返回模块内 LoRA 参数迭代器。"""
     for child in module.modules():
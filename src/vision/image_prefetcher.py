@@ -0,0 +1,175 @@
+"""
+MinIO图像预取器
+并发下载对象字节、在线程池中按目标尺寸缩减解码，并通过有界队列把就绪图像交给编码器，
+使 MinIO I/O 与模型推理重叠执行
+"""
+
+import io
+import queue
+import threading
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any
+
+from loguru import logger
+from PIL import Image
+
+from global_const.const_config import (
+    IMAGE_PREFETCH_DECODE_WORKERS,
+    IMAGE_PREFETCH_DOWNLOAD_WORKERS,
+    IMAGE_PREFETCH_QUEUE_SIZE,
+)
+
+from .embedding_cache import tag_content_hash
+
+# 队列结束标记
+_DONE = object()
+
+
+def fit_within(size: tuple[int, int], target_size: tuple[int, int]) -> tuple[int, int]:
+    """按"框内缩放"计算不超过 target_size 的尺寸（不放大）"""
+    width, height = size
+    scale = min(target_size[0] / width, target_size[1] / height, 1.0)
+    return max(1, int(width * scale)), max(1, int(height * scale))
+
+
+def decode_image(
+    data: bytes, target_size: tuple[int, int] | None = None
+) -> Image.Image:
+    """
+    解码图像字节
+
+    JPEG 使用 ``Image.draft`` 在 DCT 阶段按 1/2、1/4、1/8 缩减，
+    结果尺寸不小于框内缩放后的目标尺寸，下游的 LLaMA 缩放与 CLIP 预处理结果不变。
+
+    Args:
+        data: 图像字节
+        target_size: 下游需要的最大宽高；为 None 时按原尺寸解码
+
+    Returns:
+        已完成解码的 PIL 图像
+    """
+    image = tag_content_hash(Image.open(io.BytesIO(data)), data)
+    if target_size and image.format == "JPEG":
+        image.draft(image.mode, fit_within(image.size, target_size))
+    image.load()
+    return image
+
+
+class ImagePrefetcher:
+    """
+    并发预取 MinIO 图像
+
+    下载与解码分别在两个线程池中执行；后台线程按输入顺序把任务放入有界队列，
+    队列满时暂停提交，避免一次性把整个库房的图像读入内存。
+    """
+
+    def __init__(
+        self,
+        minio_client,
+        target_size: tuple[int, int] | None = None,
+        download_workers: int = IMAGE_PREFETCH_DOWNLOAD_WORKERS,
+        decode_workers: int = IMAGE_PREFETCH_DECODE_WORKERS,
+        queue_size: int = IMAGE_PREFETCH_QUEUE_SIZE,
+    ):
+        """
+        Args:
+            minio_client: MinIOClient 实例（使用其 urllib3 连接池下载）
+            target_size: 下游需要的最大宽高，用于缩减解码
+            download_workers: 并发下载线程数
+            decode_workers: 解码线程数
+            queue_size: 已提交但尚未被消费的图像数上限
+        """
+        self.minio_client = minio_client
+        self.target_size = target_size
+        self.download_workers = max(1, download_workers)
+        self.decode_workers = max(1, decode_workers)
+        self.queue_size = max(1, queue_size)
+
+    def _load(
+        self, object_name: str, decode_pool: ThreadPoolExecutor
+    ) -> Image.Image | None:
+        data = self.minio_client.get_image_bytes(object_name)
+        if data is None:
+            return None
+        try:
+            return decode_pool.submit(decode_image, data, self.target_size).result()
+        except Exception as e:
+            logger.error(
+                f"[IMG-PREFETCH] 图像解码失败 | 文件: {object_name}, 错误: {e}"
+            )
+            return None
+
+    def iter_images(
+        self,
+        items: Iterable[Any],
+        key: Callable[[Any], str] = lambda item: item,
+    ) -> Iterator[tuple[Any, Image.Image | None]]:
+        """
+        按输入顺序产出 (item, image)
+
+        Args:
+            items: 待加载的条目
+            key: 从条目取 MinIO 对象名的函数
+
+        Yields:
+            (item, image)，下载或解码失败时 image 为 None
+        """
+        pending: queue.Queue = queue.Queue(maxsize=self.queue_size)
+        stop = threading.Event()
+        download_pool = ThreadPoolExecutor(
+            max_workers=self.download_workers, thread_name_prefix="img-download"
+        )
+        decode_pool = ThreadPoolExecutor(
+            max_workers=self.decode_workers, thread_name_prefix="img-decode"
+        )
+
+        def produce():
+            try:
+                for item in items:
+                    if stop.is_set():
+                        break
+                    future = download_pool.submit(self._load, key(item), decode_pool)
+                    while not stop.is_set():
+                        try:
+                            pending.put((item, future), timeout=0.1)
+                            break
+                        except queue.Full:
+                            continue
+            except Exception as e:
+                logger.error(f"[IMG-PREFETCH] 预取任务提交失败: {e}")
+            finally:
+                pending.put(_DONE)
+
+        producer = threading.Thread(target=produce, name="img-prefetch", daemon=True)
+        producer.start()
+        try:
+            while (entry := pending.get()) is not _DONE:
+                item, future = entry
+                yield item, self._result(item, future, key)
+        finally:
+            stop.set()
+            # 消费方提前退出时清空队列，让生产线程能够写入结束标记
+            while producer.is_alive():
+                try:
+                    pending.get(timeout=0.1)
+                except queue.Empty:
+                    pass
+            download_pool.shutdown(wait=True, cancel_futures=True)
+            decode_pool.shutdown(wait=True, cancel_futures=True)
+
+    @staticmethod
+    def _result(item, future: Future, key) -> Image.Image | None:
+        try:
+            return future.result()
+        except Exception as e:
+            logger.error(f"[IMG-PREFETCH] 图像获取异常 | 文件: {key(item)}, 错误: {e}")
+            return None
+
+    def load_images(
+        self,
+        items: Iterable[Any],
+        key: Callable[[Any], str] = lambda item: item,
+    ) -> list[tuple[Any, Image.Image | None]]:
+        """并发加载全部条目（按输入顺序返回）"""
+        return list(self.iter_images(items, key))
@@ -4,49 +4,94 @@
 集成LLaMA模型获取蘑菇生长情况描述
 """
 
+from __future__ import annotations
+
 import base64
-import io
+import heapq
 import json
 import re
+import threading
 import time
 import uuid
+from contextlib import nullcontext
 from datetime import datetime, timedelta
+from itertools import islice
 from pathlib import Path
-from typing import Any
+from typing import TYPE_CHECKING, Any
 
 import numpy as np
 import requests
-import torch
 from loguru import logger
 from PIL import Image
-from sqlalchemy import func
+from sqlalchemy import Text, any_, bindparam, func, select
+from sqlalchemy.dialects.postgresql import ARRAY
 from sqlalchemy.orm import sessionmaker
-from transformers import CLIPModel, CLIPProcessor
 
 from environment.processor import create_env_data_processor
-from global_const.const_config import ROOM_ID_MAPPING
-from global_const.global_const import env, pgsql_engine, settings
+from global_const.const_config import (
+    CLIP_ENCODE_MICRO_BATCH_SIZE,
+    LLAMA_MAX_IN_FLIGHT,
+    LLAMA_RATE_LIMIT_BURST,
+    LLAMA_RATE_LIMIT_PER_SECOND,
+    PROCESSED_PATH_CACHE_TTL_SECONDS,
+    PROCESSED_PATH_QUERY_CHUNK_SIZE,
+    ROOM_ID_MAPPING,
+)
+from global_const.global_const import create_get_data, env, pgsql_engine, settings
 from utils.create_table import (
     ImageTextQuality,
     MushroomImageEmbedding,
 )
-from utils.get_data import GetData
+from utils.concurrent_dispatcher import ConcurrentDispatcher
 from utils.minio_client import create_minio_client
 
+from .adaptive_jpeg import encode_jpeg, get_adaptive_jpeg_encoder
+from .clip_runtime import (
+    BACKEND_ONNX,
+    ClipInferenceConfig,
+    load_clip_inference_config,
+    to_feature_tensor,
+)
+from .embedding_cache import (
+    KIND_IMAGE,
+    KIND_TEXT,
+    get_embedding_cache,
+    image_content_key,
+    lookup_features,
+    model_fingerprint,
+    normalize_text,
+)
 from .mushroom_image_processor import MushroomImageInfo, create_mushroom_processor
 
+if TYPE_CHECKING:
+    import torch
+
+# 保护各编码器实例懒加载 LLaMA 调度器
+_LLAMA_DISPATCHER_LOCK = threading.Lock()
+
 
 class MushroomImageEncoder:
     """蘑菇图像编码器类"""
 
+    # 多模态融合权重：图像特征0.7，文本特征0.3（可根据实际效果调整）
+    IMAGE_FEATURE_WEIGHT = 0.7
+    TEXT_FEATURE_WEIGHT = 0.3
+
     def __init__(self, load_clip: bool = True):
         """初始化编码器"""
-        self.device = "cuda" if torch.cuda.is_available() else "cpu"
+        # onnx 后端不加载 torch/transformers
+        self.clip_config = load_clip_inference_config()
+        self.device = self._resolve_device(self.clip_config)
         logger.debug(f"设备: {self.device}")
 
         # 初始化CLIP模型
         self.clip_model = None
         self.clip_processor = None
+        self.clip_inference = None
+        self.clip_model_version = None
+        self.clip_batch_size = CLIP_ENCODE_MICRO_BATCH_SIZE
+        # 图像/文本塔特征内容寻址缓存（重复编码同一图像或相同环境描述时跳过前向）
+        self.embedding_cache = get_embedding_cache()
         if load_clip:
             self._init_clip_model()
         else:
@@ -58,16 +103,15 @@ class MushroomImageEncoder:
 
         # 初始化数据库会话
         self.Session = sessionmaker(bind=pgsql_engine)
+        # 已确认处理过的图像路径缓存（见 get_processed_paths）
+        self._processed_path_cache: set[str] = set()
+        self._processed_path_cache_at = time.monotonic()
 
         # 初始化环境数据处理器
         self._init_env_processor()
 
-        # 初始化GetData实例用于获取提示词
-        self.get_data = GetData(
-            urls=settings.data_source_url,
-            host=settings.host.host,
-            port=settings.host.port,
-        )
+        # 获取共享GetData实例用于获取提示词
+        self.get_data = create_get_data()
 
         # 初始化LLaMA客户端
         self._init_llama_client()
@@ -185,8 +229,53 @@ class MushroomImageEncoder:
         finally:
             session.close()
 
+    @staticmethod
+    def _resolve_device(config: ClipInferenceConfig) -> str:
+        """推理设备：onnx 后端固定 CPU，torch 后端优先 CUDA"""
+        if not config.uses_torch:
+            return "cpu"
+        import torch
+
+        return "cuda" if torch.cuda.is_available() else "cpu"
+
+    def _init_onnx_clip_model(self, config: ClipInferenceConfig) -> bool:
+        """加载 ONNX Runtime CLIP 后端；失败时返回 False 由调用方回退 torch"""
+        try:
+            from .clip_onnx import OnnxClipModel, resolve_onnx_model_dir
+
+            self.clip_model = OnnxClipModel(
+                resolve_onnx_model_dir(config.onnx_dir),
+                num_threads=config.num_threads,
+                interop_threads=config.interop_threads,
+            )
+        except ImportError as e:
+            logger.warning(
+                f"[ImageEncoder] 已配置 backend=onnx 但无法导入 onnxruntime/tokenizers"
+                f"（需安装 onnx 可选依赖: uv sync --extra onnx），回退 torch fp32: {e}"
+            )
+            return False
+        except Exception as e:
+            logger.warning(
+                f"[ImageEncoder] ONNX CLIP 后端加载失败，回退 torch fp32: {e}"
+            )
+            return False
+        self.clip_processor = self.clip_model.preprocessor
+        self.clip_inference = self.clip_model
+        self.clip_model_version = (
+            f"{model_fingerprint(self.clip_model.model_dir)}|{BACKEND_ONNX}"
+        )
+        logger.debug("CLIP ONNX 模型加载完成")
+        return True
+
     def _init_clip_model(self):
         """初始化CLIP模型"""
+        config = getattr(self, "clip_config", None) or load_clip_inference_config()
+        if config.backend == BACKEND_ONNX:
+            if self._init_onnx_clip_model(config):
+                return
+            config = ClipInferenceConfig()
+            self.device = self._resolve_device(config)
+
         # 检查本地模型路径
         # 在容器中，源码直接复制到/app，models挂载到/app/models
         # 在开发环境中，保持原有的相对路径计算
@@ -209,8 +298,11 @@ class MushroomImageEncoder:
         logger.debug(f"加载CLIP模型: {model_name}")
         import warnings
 
+        from transformers import CLIPModel, CLIPProcessor
         from transformers import logging as trans_log
 
+        from .clip_backend import prepare_clip_inference
+
         # 临时抑制transformers库的模型加载警告
         trans_log.set_verbosity_error()
         warnings.filterwarnings("ignore", category=UserWarning, module="transformers")
@@ -219,6 +311,13 @@ class MushroomImageEncoder:
             self.clip_processor = CLIPProcessor.from_pretrained(model_name)
             self.clip_model = CLIPModel.from_pretrained(model_name).to(self.device)
             self.clip_model.eval()
+            # 按 settings.toml [clip_inference] 准备推理后端（默认 fp32）
+            self.clip_inference = prepare_clip_inference(
+                self.clip_model, self.clip_processor, self.device, config
+            )
+            self.clip_model = self.clip_inference.model
+            backend = self.clip_inference.report["backend"]
+            self.clip_model_version = f"{model_fingerprint(model_name)}|{backend}"
         except Exception as e:
             logger.error(f"无法加载CLIP模型 '{model_name}': {e}")
             if model_name == "openai/clip-vit-base-patch32":
@@ -872,107 +971,22 @@ class MushroomImageEncoder:
             logger.warning(f"Failed to resize image for LLaMA, using original: {e}")
             return image
 
-    def _compute_ssim(
-        self, source_image: Image.Image, target_image: Image.Image
-    ) -> float:
-        """计算两张图像的全局SSIM（灰度）。"""
-        src_gray = np.asarray(source_image.convert("L"), dtype=np.float64)
-        tgt_gray = np.asarray(target_image.convert("L"), dtype=np.float64)
-
-        if src_gray.shape != tgt_gray.shape:
-            tgt_gray = np.asarray(
-                target_image.convert("L").resize(
-                    (src_gray.shape[1], src_gray.shape[0]),
-                    Image.Resampling.BILINEAR,
-                ),
-                dtype=np.float64,
-            )
-
-        c1 = (0.01 * 255) ** 2
-        c2 = (0.03 * 255) ** 2
-
-        mu_src = src_gray.mean()
-        mu_tgt = tgt_gray.mean()
-        var_src = src_gray.var()
-        var_tgt = tgt_gray.var()
-        cov = ((src_gray - mu_src) * (tgt_gray - mu_tgt)).mean()
-
-        numerator = (2 * mu_src * mu_tgt + c1) * (2 * cov + c2)
-        denominator = (mu_src**2 + mu_tgt**2 + c1) * (var_src + var_tgt + c2)
-
-        if denominator <= 0:
-            return 0.0
-        return float(max(0.0, min(1.0, numerator / denominator)))
-
     def _encode_jpeg_bytes(self, image: Image.Image, quality: int) -> bytes:
         """将图像按指定质量编码为JPEG字节流。"""
-        buffer = io.BytesIO()
-        image.save(
-            buffer,
-            format="JPEG",
-            quality=quality,
-            optimize=True,
-        )
-        return buffer.getvalue()
-
-    def _binary_search_quality(
-        self,
-        source_image: Image.Image,
-        max_image_bytes: int,
-        min_jpeg_quality: int,
-        max_jpeg_quality: int,
-        ssim_threshold: float,
-        quality_search_steps: int,
-    ) -> tuple[bytes, int, float]:
-        """在体积和SSIM约束下二分搜索最优JPEG质量。"""
-        low = min_jpeg_quality
-        high = max_jpeg_quality
-
-        best_bytes = self._encode_jpeg_bytes(source_image, min_jpeg_quality)
-        best_quality = min_jpeg_quality
-        best_ssim = 0.0
-
-        for _ in range(quality_search_steps):
-            if low > high:
-                break
-
-            mid = (low + high) // 2
-            encoded = self._encode_jpeg_bytes(source_image, mid)
-
-            decoded = Image.open(io.BytesIO(encoded)).convert("RGB")
-            current_ssim = self._compute_ssim(source_image, decoded)
-            size_ok = len(encoded) <= max_image_bytes
-            ssim_ok = current_ssim >= ssim_threshold
-
-            if size_ok and ssim_ok:
-                if mid >= best_quality:
-                    best_bytes = encoded
-                    best_quality = mid
-                    best_ssim = current_ssim
-                low = mid + 1
-            else:
-                high = mid - 1
-
-        # 如果没有命中SSIM门限，至少返回满足体积约束的最高质量版本
-        if best_ssim <= 0.0:
-            fallback_quality = min_jpeg_quality
-            for q in range(max_jpeg_quality, min_jpeg_quality - 1, -5):
-                encoded = self._encode_jpeg_bytes(source_image, q)
-                if len(encoded) <= max_image_bytes:
-                    decoded = Image.open(io.BytesIO(encoded)).convert("RGB")
-                    best_ssim = self._compute_ssim(source_image, decoded)
-                    best_bytes = encoded
-                    fallback_quality = q
-                    break
-            best_quality = fallback_quality
-
-        return best_bytes, best_quality, best_ssim
+        return encode_jpeg(image, quality)
 
     def _encode_image_for_llama_with_meta(
         self,
         image: Image.Image,
+        camera_key: str | None = None,
     ) -> tuple[str, bytes, Image.Image]:
-        """将图像编码为适合LLaMA-VL的base64，含体积/质量双约束。"""
+        """
+        将图像编码为适合LLaMA-VL的base64，含体积/质量双约束。
+
+        Args:
+            image: 原始PIL图像
+            camera_key: 摄像头标识（collection_ip），同一摄像头复用上次选中的JPEG质量作为搜索起点
+        """
         resized_image = self._resize_image_for_llama(image)
 
         if resized_image.mode != "RGB":
@@ -1000,54 +1014,28 @@ class MushroomImageEncoder:
         quality_search_steps = max(3, min(10, quality_search_steps))
         max_downscale_attempts = max(1, min(8, max_downscale_attempts))
 
-        current_image = resized_image
-
-        for attempt in range(1, max_downscale_attempts + 1):
-            image_bytes, selected_quality, current_ssim = self._binary_search_quality(
-                source_image=current_image,
-                max_image_bytes=max_image_bytes,
-                min_jpeg_quality=min_jpeg_quality,
-                max_jpeg_quality=jpeg_quality,
-                ssim_threshold=ssim_threshold,
-                quality_search_steps=quality_search_steps,
-            )
-
-            if len(image_bytes) <= max_image_bytes:
-                if attempt > 1 or current_ssim < ssim_threshold:
-                    logger.warning(
-                        "[LLAMA-IMG] 自适应压缩完成 | "
-                        f"attempt={attempt}, size={current_image.size}, quality={selected_quality}, "
-                        f"bytes={len(image_bytes)}, ssim={current_ssim:.4f}, target_ssim={ssim_threshold:.4f}"
-                    )
-                return (
-                    base64.b64encode(image_bytes).decode("utf-8"),
-                    image_bytes,
-                    resized_image,
-                )
-
-            width, height = current_image.size
-            scale = (100 - downscale_step_percent) / 100
-            next_width = max(64, int(width * scale))
-            next_height = max(64, int(height * scale))
-
-            # 防止无法继续缩放导致死循环
-            if (next_width, next_height) == (width, height):
-                return (
-                    base64.b64encode(image_bytes).decode("utf-8"),
-                    image_bytes,
-                    resized_image,
-                )
+        result = get_adaptive_jpeg_encoder().encode(
+            resized_image,
+            max_image_bytes=max_image_bytes,
+            min_jpeg_quality=min_jpeg_quality,
+            jpeg_quality=jpeg_quality,
+            quality_search_steps=quality_search_steps,
+            downscale_step_percent=downscale_step_percent,
+            max_downscale_attempts=max_downscale_attempts,
+            camera_key=camera_key,
+            ssim_threshold=ssim_threshold,
+        )
 
-            current_image = current_image.resize(
-                (next_width, next_height), Image.Resampling.LANCZOS
+        if result.attempts > 1 or result.ssim < ssim_threshold:
+            logger.warning(
+                "[LLAMA-IMG] 自适应压缩完成 | "
+                f"attempt={result.attempts}, size={result.size}, quality={result.quality}, "
+                f"bytes={len(result.data)}, ssim={result.ssim:.4f}, target_ssim={ssim_threshold:.4f}"
             )
-            jpeg_quality = max(min_jpeg_quality, jpeg_quality - 5)
 
-        # 兜底返回最后一次编码结果
-        final_bytes = self._encode_jpeg_bytes(current_image, min_jpeg_quality)
         return (
-            base64.b64encode(final_bytes).decode("utf-8"),
-            final_bytes,
+            base64.b64encode(result.data).decode("utf-8"),
+            result.data,
             resized_image,
         )
 
@@ -1056,12 +1044,15 @@ class MushroomImageEncoder:
         image_data, _, _ = self._encode_image_for_llama_with_meta(image)
         return image_data
 
-    def _get_llama_description(self, image: Image.Image) -> dict[str, Any]:
+    def _get_llama_description(
+        self, image: Image.Image, camera_key: str | None = None
+    ) -> dict[str, Any]:
         """
         使用LLaMA模型获取蘑菇生长情况描述和图像质量评分
 
         Args:
             image: PIL图像对象
+            camera_key: 摄像头标识（collection_ip），用于复用JPEG压缩质量
 
         Returns:
             包含growth_stage_description、image_quality_score、chinese_description的字典
@@ -1080,20 +1071,23 @@ class MushroomImageEncoder:
         try:
             # 图像预处理 + 自适应压缩编码（减少视觉token和请求体积）
             image_data, compressed_bytes, resized_image = (
-                self._encode_image_for_llama_with_meta(image)
+                self._encode_image_for_llama_with_meta(image, camera_key=camera_key)
             )
 
             # 记录压缩前后图像到MLflow（在safe_hourly_text_quality_inference中有active run）
-            pre_quality = int(
-                getattr(self.llama_config, "mlflow_pre_image_quality", 95)
-            )
-            pre_quality = max(20, min(100, pre_quality))
-            pre_compression_bytes = self._encode_jpeg_bytes(resized_image, pre_quality)
-
-            mlflow_images = {
-                "pre_compression": pre_compression_bytes,
-                "compressed": compressed_bytes,
-            }
+            # 生产环境不写图像artifact，省去压缩前高质量编码
+            mlflow_images = None
+            if env != "production":
+                pre_quality = int(
+                    getattr(self.llama_config, "mlflow_pre_image_quality", 95)
+                )
+                pre_quality = max(20, min(100, pre_quality))
+                mlflow_images = {
+                    "pre_compression": self._encode_jpeg_bytes(
+                        resized_image, pre_quality
+                    ),
+                    "compressed": compressed_bytes,
+                }
 
             # 调用LLaMA API
             result = self._call_llama_api(
@@ -1113,111 +1107,218 @@ class MushroomImageEncoder:
                 "chinese_description": None,
             }
 
-    def get_multimodal_embedding(
-        self, image: Image.Image, text_description: str
-    ) -> list[float] | None:
+    _to_feature_tensor = staticmethod(to_feature_tensor)
+
+    def _clip_image_features(self, pixel_values: torch.Tensor) -> torch.Tensor:
+        """图像塔前向（经由配置的推理后端；未准备后端时直接调用模型）"""
+        backend = getattr(self, "clip_inference", None)
+        if backend is not None:
+            return backend.image_features(pixel_values)
+        return self._to_feature_tensor(
+            self.clip_model.get_image_features(pixel_values=pixel_values)
+        )
+
+    def _clip_text_features(
+        self, input_ids: torch.Tensor, attention_mask: torch.Tensor
+    ) -> torch.Tensor:
+        """文本塔前向（经由配置的推理后端；未准备后端时直接调用模型）"""
+        backend = getattr(self, "clip_inference", None)
+        if backend is not None:
+            return backend.text_features(input_ids, attention_mask)
+        return self._to_feature_tensor(
+            self.clip_model.get_text_features(
+                input_ids=input_ids, attention_mask=attention_mask
+            )
+        )
+
+    @staticmethod
+    def _l2_normalize(features: torch.Tensor | np.ndarray) -> torch.Tensor | np.ndarray:
+        """按行L2归一化（torch 后端为tensor，onnx 后端为ndarray）"""
+        if isinstance(features, np.ndarray):
+            return features / np.linalg.norm(features, axis=-1, keepdims=True)
+        return features / features.norm(dim=-1, keepdim=True)
+
+    @staticmethod
+    def _to_numpy(features: torch.Tensor | np.ndarray) -> np.ndarray:
+        """特征转为 float32 ndarray"""
+        if isinstance(features, np.ndarray):
+            return features.astype(np.float32, copy=False)
+        return features.float().cpu().numpy()
+
+    def _inference_context(self):
+        """torch 后端关闭梯度；onnx 后端无需 torch"""
+        if not getattr(getattr(self, "clip_inference", None), "uses_torch", True):
+            return nullcontext()
+        import torch
+
+        return torch.no_grad()
+
+    def _fuse_multimodal_features(
+        self, image_features: torch.Tensor, text_features: torch.Tensor
+    ) -> np.ndarray:
         """
-        获取图像和文本的多模态CLIP向量编码
+        向量化多模态特征融合：各自归一化 → 加权平均 → 整体归一化
+
+        单张与批量路径共用此函数，保证两条路径的后处理完全一致。
 
         Args:
-            image: PIL图像对象
-            text_description: 环境数据的语义描述文本
+            image_features: [N, D] 图像特征
+            text_features: [N, D] 文本特征
 
         Returns:
-            512维联合向量列表，失败返回None
+            [N, D] float32 融合向量
         """
-        try:
-            # 确保图像为RGB格式
-            if image.mode != "RGB":
-                image = image.convert("RGB")
+        fused = self.IMAGE_FEATURE_WEIGHT * self._l2_normalize(
+            image_features
+        ) + self.TEXT_FEATURE_WEIGHT * self._l2_normalize(text_features)
+        return self._to_numpy(self._l2_normalize(fused))
+
+    def _encode_clip_micro_batch(
+        self, images: list[Image.Image], texts: list[str] | None = None
+    ) -> np.ndarray:
+        """
+        单个micro-batch的CLIP前向：一次预处理 + 一次 get_image_features
+        （以及一次 get_text_features），融合与归一化在tensor上整体完成
+
+        图像/文本塔特征先查内容寻址缓存，仅未命中的输入参与前向。
+
+        Args:
+            images: PIL图像列表
+            texts: 与图像一一对应的文本描述；为None时仅做纯图像编码
+
+        Returns:
+            [N, D] float32 向量矩阵
+        """
+        images = [img if img.mode == "RGB" else img.convert("RGB") for img in images]
+
+        with self._inference_context():
+            image_features = self._cached_image_features(images)
+            if texts is None:
+                return self._to_numpy(self._l2_normalize(image_features))
+            text_features = self._cached_text_features(texts)
 
-            # 同时预处理图像和文本
+        return self._fuse_multimodal_features(image_features, text_features)
+
+    def _feature_cache(self):
+        """当前可用的特征缓存（未初始化缓存或模型版本未知时不缓存）"""
+        cache = getattr(self, "embedding_cache", None)
+        if cache is None or not getattr(self, "clip_model_version", None):
+            return None
+        return cache
+
+    def _cached_image_features(self, images: list[Image.Image]):
+        """图像塔特征：按图像内容哈希查缓存，仅对未命中的图像做一次前向"""
+
+        def compute(indices: list[int]):
+            inputs = self.clip_processor(
+                images=[images[i] for i in indices], return_tensors="pt"
+            ).to(self.device)
+            return self._clip_image_features(inputs["pixel_values"])
+
+        cache = self._feature_cache()
+        if cache is None:
+            return compute(list(range(len(images))))
+        return lookup_features(
+            cache,
+            KIND_IMAGE,
+            self.clip_model_version,
+            [image_content_key(img) for img in images],
+            lambda indices: self._to_numpy(compute(indices)),
+        )
+
+    def _cached_text_features(self, texts: list[str]):
+        """文本塔特征：按规范化描述查缓存，仅对未命中的文本做一次前向"""
+        texts = [normalize_text(text) for text in texts]
+
+        def compute(indices: list[int]):
             inputs = self.clip_processor(
-                text=text_description,
-                images=image,
+                text=[texts[i] for i in indices],
                 return_tensors="pt",
                 padding=True,
                 truncation=True,
             ).to(self.device)
+            return self._clip_text_features(
+                inputs["input_ids"], inputs["attention_mask"]
+            )
 
-            # 获取图像和文本特征
-            with torch.no_grad():
-                image_features = self.clip_model.get_image_features(
-                    pixel_values=inputs["pixel_values"]
-                )
-                text_features = self.clip_model.get_text_features(
-                    input_ids=inputs["input_ids"],
-                    attention_mask=inputs["attention_mask"],
-                )
+        cache = self._feature_cache()
+        if cache is None:
+            return compute(list(range(len(texts))))
+        return lookup_features(
+            cache,
+            KIND_TEXT,
+            self.clip_model_version,
+            texts,
+            lambda indices: self._to_numpy(compute(indices)),
+        )
+
+    def encode_clip_batch(
+        self,
+        images: list[Image.Image],
+        texts: list[str] | None = None,
+        batch_size: int | None = None,
+    ) -> list[list[float] | None]:
+        """
+        批量CLIP编码引擎：按micro-batch堆叠图像与文本，每批仅一次模型前向
 
-            # 多模态特征融合 - 使用加权平均
-            # 图像特征权重0.7，文本特征权重0.3（可根据实际效果调整）
-            image_weight = 0.7
-            text_weight = 0.3
+        某个micro-batch失败时，仅对该批回退到单张编码，失败项返回None。
 
-            # 确保特征是tensor格式，处理可能的BaseModelOutputWithPooling对象
-            if hasattr(image_features, "last_hidden_state"):
-                # Take the pooled output if available, otherwise take the CLS token
-                if (
-                    hasattr(image_features, "pooler_output")
-                    and image_features.pooler_output is not None
-                ):
-                    image_features = image_features.pooler_output
-                else:
-                    image_features = image_features.last_hidden_state[
-                        :, 0, :
-                    ]  # Take the CLS token
-            elif (
-                hasattr(image_features, "pooler_output")
-                and image_features.pooler_output is not None
-            ):
-                image_features = image_features.pooler_output
-            elif torch.is_tensor(image_features):
-                # Already a tensor, use as-is
-                pass
-            else:
-                # Fallback: assume it's a tensor-like object
-                image_features = image_features
+        Args:
+            images: PIL图像列表
+            texts: 与图像一一对应的环境文本；为None时仅做纯图像编码
+            batch_size: micro-batch大小，默认使用 self.clip_batch_size
 
-            if hasattr(text_features, "last_hidden_state"):
-                # Take the pooled output if available, otherwise take the CLS token
-                if (
-                    hasattr(text_features, "pooler_output")
-                    and text_features.pooler_output is not None
-                ):
-                    text_features = text_features.pooler_output
-                else:
-                    text_features = text_features.last_hidden_state[
-                        :, 0, :
-                    ]  # Take the CLS token
-            elif (
-                hasattr(text_features, "pooler_output")
-                and text_features.pooler_output is not None
-            ):
-                text_features = text_features.pooler_output
-            elif torch.is_tensor(text_features):
-                # Already a tensor, use as-is
-                pass
-            else:
-                # Fallback: assume it's a tensor-like object
-                text_features = text_features
+        Returns:
+            与输入顺序一致的512维向量列表
+        """
+        if not images:
+            return []
+        if texts is not None and len(texts) != len(images):
+            raise ValueError(f"images/texts 数量不一致: {len(images)} != {len(texts)}")
 
-            # 归一化各自的特征
-            image_features_norm = image_features / image_features.norm(
-                dim=-1, keepdim=True
-            )
-            text_features_norm = text_features / text_features.norm(
-                dim=-1, keepdim=True
-            )
+        batch_size = max(1, int(batch_size or self.clip_batch_size))
+        embeddings: list[list[float] | None] = []
 
-            # 加权融合
-            multimodal_features = (
-                image_weight * image_features_norm + text_weight * text_features_norm
+        for start in range(0, len(images), batch_size):
+            chunk_images = images[start : start + batch_size]
+            chunk_texts = (
+                texts[start : start + batch_size] if texts is not None else None
             )
+            try:
+                embeddings.extend(
+                    self._encode_clip_micro_batch(chunk_images, chunk_texts).tolist()
+                )
+            except Exception as e:
+                logger.warning(
+                    f"[IMG-BATCH] micro-batch编码失败，回退单张编码 | "
+                    f"offset={start}, size={len(chunk_images)}, 错误: {e}"
+                )
+                for k, image in enumerate(chunk_images):
+                    if chunk_texts is None:
+                        embeddings.append(self.get_image_embedding(image))
+                    else:
+                        embeddings.append(
+                            self.get_multimodal_embedding(image, chunk_texts[k])
+                        )
+
+        return embeddings
+
+    def get_multimodal_embedding(
+        self, image: Image.Image, text_description: str
+    ) -> list[float] | None:
+        """
+        获取图像和文本的多模态CLIP向量编码
+
+        Args:
+            image: PIL图像对象
+            text_description: 环境数据的语义描述文本
 
-            # 最终归一化
-            embedding = multimodal_features.cpu().numpy()[0]
-            embedding = embedding / np.linalg.norm(embedding)
+        Returns:
+            512维联合向量列表，失败返回None
+        """
+        try:
+            # 图像特征权重0.7，文本特征权重0.3，与批量路径共用同一融合逻辑
+            embedding = self._encode_clip_micro_batch([image], [text_description])[0]
 
             logger.trace(
                 f"Generated multimodal embedding for text: '{text_description[:50]}...'"
@@ -1239,48 +1340,7 @@ class MushroomImageEncoder:
             512维向量列表，失败返回None
         """
         try:
-            # 确保图像为RGB格式
-            if image.mode != "RGB":
-                image = image.convert("RGB")
-
-            # 预处理图像
-            inputs = self.clip_processor(
-                images=image, return_tensors="pt", padding=True
-            ).to(self.device)
-
-            # 获取图像特征
-            with torch.no_grad():
-                image_features = self.clip_model.get_image_features(**inputs)
-
-            # 确保特征是tensor格式，处理可能的BaseModelOutputWithPooling对象
-            if hasattr(image_features, "last_hidden_state"):
-                # Take the pooled output if available, otherwise take the CLS token
-                if (
-                    hasattr(image_features, "pooler_output")
-                    and image_features.pooler_output is not None
-                ):
-                    image_features = image_features.pooler_output
-                else:
-                    image_features = image_features.last_hidden_state[
-                        :, 0, :
-                    ]  # Take the CLS token
-            elif (
-                hasattr(image_features, "pooler_output")
-                and image_features.pooler_output is not None
-            ):
-                image_features = image_features.pooler_output
-            elif torch.is_tensor(image_features):
-                # Already a tensor, use as-is
-                pass
-            else:
-                # Fallback: assume it's a tensor-like object
-                image_features = image_features
-
-            # 归一化向量（对余弦相似度很重要）
-            embedding = image_features.cpu().numpy()[0]
-            embedding = embedding / np.linalg.norm(embedding)
-
-            return embedding.tolist()
+            return self._encode_clip_micro_batch([image])[0].tolist()
 
         except Exception as e:
             logger.error(f"Failed to get image embedding: {e}")
@@ -1366,17 +1426,20 @@ class MushroomImageEncoder:
             logger.error(f"Failed to get environment data for room {mushroom_id}: {e}")
             return None
 
-    def get_growth_stage_analysis(self, image: Image.Image) -> dict[str, Any]:
+    def get_growth_stage_analysis(
+        self, image: Image.Image, camera_key: str | None = None
+    ) -> dict[str, Any]:
         """
         获取图像的生长阶段分析（公开接口）
 
         Args:
             image: PIL图像对象
+            camera_key: 摄像头标识（collection_ip），可选
 
         Returns:
             包含growth_stage_description和image_quality_score的字典
         """
-        return self._get_llama_description(image)
+        return self._get_llama_description(image, camera_key=camera_key)
 
     def process_single_image(
         self,
@@ -1446,7 +1509,9 @@ class MushroomImageEncoder:
                     f"使用预计算的分析结果: score={llama_result.get('image_quality_score')}"
                 )
             else:
-                llama_result = self._get_llama_description(image)
+                llama_result = self._get_llama_description(
+                    image, camera_key=image_info.collection_ip
+                )
 
             # 提取growth_stage_description、image_quality_score、chinese_description
             growth_stage_description = llama_result.get("growth_stage_description", "")
@@ -1683,6 +1748,7 @@ class MushroomImageEncoder:
             # 1. 批量获取LLaMA描述 (混合 Precomputed 和 Computed)
             llama_results = [None] * len(batch_data)
             need_compute_images = []
+            need_compute_cameras = []
             need_compute_indices = []
 
             for i, item in enumerate(batch_data):
@@ -1690,12 +1756,13 @@ class MushroomImageEncoder:
                     llama_results[i] = item["precomputed_analysis"]
                 else:
                     need_compute_images.append(item["image"])
+                    need_compute_cameras.append(item["image_info"].collection_ip)
                     need_compute_indices.append(i)
 
             # 对缺失的进行计算
             if need_compute_images:
                 computed_results = self._get_llama_descriptions_batch(
-                    need_compute_images
+                    need_compute_images, camera_keys=need_compute_cameras
                 )
                 for idx, res in zip(need_compute_indices, computed_results):
                     llama_results[idx] = res
@@ -1705,7 +1772,8 @@ class MushroomImageEncoder:
             valid_items = []  # (original_index, item, llama_result)
 
             for i, item in enumerate(batch_data):
-                llama_result = llama_results[i] if i < len(llama_results) else {}
+                # LLaMA 请求异常的图像为 None，按空描述跳过
+                llama_result = llama_results[i] or {}
                 growth_stage_description = llama_result.get(
                     "growth_stage_description", ""
                 )
@@ -1905,105 +1973,11 @@ class MushroomImageEncoder:
             if not clip_inputs:
                 return []
 
-            # 准备批量输入
-            images = [item["image"] for item in clip_inputs]
-            texts = [item["text"] for item in clip_inputs]
-
-            # 确保所有图像为RGB格式
-            processed_images = []
-            for image in images:
-                if image.mode != "RGB":
-                    image = image.convert("RGB")
-                processed_images.append(image)
-
-            # 批量预处理
-            inputs = self.clip_processor(
-                text=texts,
-                images=processed_images,
-                return_tensors="pt",
-                padding=True,
-                truncation=True,
-            ).to(self.device)
-
-            # 批量获取特征
-            with torch.no_grad():
-                image_features = self.clip_model.get_image_features(
-                    pixel_values=inputs["pixel_values"]
-                )
-                text_features = self.clip_model.get_text_features(
-                    input_ids=inputs["input_ids"],
-                    attention_mask=inputs["attention_mask"],
-                )
-
-            # 批量融合特征
-            image_weight = 0.7
-            text_weight = 0.3
-
-            # 确保特征是tensor格式，处理可能的BaseModelOutputWithPooling对象
-            if hasattr(image_features, "last_hidden_state"):
-                # Take the pooled output if available, otherwise take the CLS token
-                if (
-                    hasattr(image_features, "pooler_output")
-                    and image_features.pooler_output is not None
-                ):
-                    image_features = image_features.pooler_output
-                else:
-                    image_features = image_features.last_hidden_state[
-                        :, 0, :
-                    ]  # Take the CLS token
-            elif (
-                hasattr(image_features, "pooler_output")
-                and image_features.pooler_output is not None
-            ):
-                image_features = image_features.pooler_output
-            elif torch.is_tensor(image_features):
-                # Already a tensor, use as-is
-                pass
-            else:
-                # Fallback: assume it's a tensor-like object
-                image_features = image_features
-
-            if hasattr(text_features, "last_hidden_state"):
-                # Take the pooled output if available, otherwise take the CLS token
-                if (
-                    hasattr(text_features, "pooler_output")
-                    and text_features.pooler_output is not None
-                ):
-                    text_features = text_features.pooler_output
-                else:
-                    text_features = text_features.last_hidden_state[
-                        :, 0, :
-                    ]  # Take the CLS token
-            elif (
-                hasattr(text_features, "pooler_output")
-                and text_features.pooler_output is not None
-            ):
-                text_features = text_features.pooler_output
-            elif torch.is_tensor(text_features):
-                # Already a tensor, use as-is
-                pass
-            else:
-                # Fallback: assume it's a tensor-like object
-                text_features = text_features
-
-            image_features_norm = image_features / image_features.norm(
-                dim=-1, keepdim=True
-            )
-            text_features_norm = text_features / text_features.norm(
-                dim=-1, keepdim=True
+            embeddings = self.encode_clip_batch(
+                [item["image"] for item in clip_inputs],
+                [item["text"] for item in clip_inputs],
             )
 
-            multimodal_features = (
-                image_weight * image_features_norm + text_weight * text_features_norm
-            )
-
-            # 最终归一化并转换为列表
-            embeddings = []
-            for i in range(multimodal_features.shape[0]):
-                embedding = multimodal_features[i].cpu().numpy()
-                embedding = embedding / np.linalg.norm(embedding)
-                embeddings.append(embedding.tolist())
-
             logger.debug(f"[IMG-BATCH] 批量多模态编码完成: {len(embeddings)}个")
             return embeddings
 
@@ -2019,52 +1993,7 @@ class MushroomImageEncoder:
             if not images:
                 return []
 
-            # 确保所有图像为RGB格式
-            processed_images = []
-            for image in images:
-                if image.mode != "RGB":
-                    image = image.convert("RGB")
-                processed_images.append(image)
-
-            # 批量预处理
-            inputs = self.clip_processor(
-                images=processed_images, return_tensors="pt"
-            ).to(self.device)
-
-            # 批量获取图像特征
-            with torch.no_grad():
-                image_features = self.clip_model.get_image_features(**inputs)
-
-            # 确保特征是tensor格式，处理可能的BaseModelOutputWithPooling对象
-            if hasattr(image_features, "last_hidden_state"):
-                # Take the pooled output if available, otherwise take the CLS token
-                if (
-                    hasattr(image_features, "pooler_output")
-                    and image_features.pooler_output is not None
-                ):
-                    image_features = image_features.pooler_output
-                else:
-                    image_features = image_features.last_hidden_state[
-                        :, 0, :
-                    ]  # Take the CLS token
-            elif (
-                hasattr(image_features, "pooler_output")
-                and image_features.pooler_output is not None
-            ):
-                image_features = image_features.pooler_output
-            elif torch.is_tensor(image_features):
-                # Already a tensor, use as-is
-                pass
-            else:
-                # Fallback: assume it's a tensor-like object
-                image_features = image_features
-
-            # 归一化并转换为列表
-            embeddings = []
-            for i in range(image_features.shape[0]):
-                embedding = image_features[i].cpu().numpy()
-                embedding = embedding / np.linalg.norm(embedding)
-                embeddings.append(embedding.tolist())
+            embeddings = self.encode_clip_batch(images)
 
             logger.debug(f"[IMG-BATCH] 批量图像编码完成: {len(embeddings)}个")
             return embeddings
@@ -2073,40 +2002,75 @@ class MushroomImageEncoder:
             logger.error(f"[IMG-BATCH] 批量图像编码失败: {e}")
             return [None] * len(images)
 
-    def _get_llama_descriptions_batch(self, images: list[Image.Image]) -> list[dict]:
-        """批量获取LLaMA描述"""
+    def _get_llama_description_safe(
+        self, image: Image.Image, camera_key: str | None = None
+    ) -> dict[str, Any] | None:
+        """获取单张图像的LLaMA描述，请求异常时返回 None（与逐张调用时的异常处理一致）"""
+        try:
+            return self._get_llama_description(image, camera_key=camera_key)
+        except Exception as e:
+            logger.warning(f"[IMG-BATCH] LLaMA描述失败: {e}")
+            return None
+
+    def _get_llama_dispatcher(self) -> ConcurrentDispatcher:
+        """
+        获取LLaMA请求调度器（每个编码器实例共享一个，在途数与限速跨批次生效）
+
+        settings.llama_vl 中的 max_in_flight / rate_limit_per_second / rate_limit_burst
+        可覆盖 const_config 中的默认值；单个请求的超时与重试仍由 _call_llama_api 负责。
+        """
+        dispatcher = getattr(self, "_llama_dispatcher", None)
+        if dispatcher is None:
+            with _LLAMA_DISPATCHER_LOCK:
+                dispatcher = getattr(self, "_llama_dispatcher", None)
+                if dispatcher is None:
+                    llama_config = getattr(self, "llama_config", None)
+                    dispatcher = ConcurrentDispatcher(
+                        max_in_flight=int(
+                            getattr(llama_config, "max_in_flight", LLAMA_MAX_IN_FLIGHT)
+                        ),
+                        rate_per_second=float(
+                            getattr(
+                                llama_config,
+                                "rate_limit_per_second",
+                                LLAMA_RATE_LIMIT_PER_SECOND,
+                            )
+                        ),
+                        burst=float(
+                            getattr(
+                                llama_config, "rate_limit_burst", LLAMA_RATE_LIMIT_BURST
+                            )
+                        ),
+                        thread_name_prefix="llama",
+                    )
+                    self._llama_dispatcher = dispatcher
+        return dispatcher
+
+    def _get_llama_descriptions_batch(
+        self,
+        images: list[Image.Image],
+        camera_keys: list[str | None] | None = None,
+    ) -> list[dict | None]:
+        """批量获取LLaMA描述（camera_keys 与 images 一一对应，可选；请求异常的图像为 None）"""
         try:
             if not images:
                 return []
 
-            # 当前LLaMA API可能不支持批量处理，逐个处理但优化调用
-            results = []
-            for image in images:
-                try:
-                    result = self._get_llama_description(image)
-                    results.append(result)
-                except Exception as e:
-                    logger.warning(f"[IMG-BATCH] LLaMA描述失败: {e}")
-                    results.append(
-                        {
-                            "growth_stage_description": "",
-                            "image_quality_score": None,
-                            "chinese_description": None,
-                        }
-                    )
+            if camera_keys is None:
+                camera_keys = [None] * len(images)
+
+            # LLaMA API 不支持批量输入：单图请求并发发送（限制在途数并限速），结果保持输入顺序
+            results = self._get_llama_dispatcher().map(
+                lambda args: self._get_llama_description_safe(*args),
+                list(zip(images, camera_keys)),
+            )
 
             logger.debug(f"[IMG-BATCH] 批量LLaMA描述完成: {len(results)}个")
             return results
 
         except Exception as e:
             logger.error(f"[IMG-BATCH] 批量LLaMA描述失败: {e}")
-            return [
-                {
-                    "growth_stage_description": "",
-                    "image_quality_score": None,
-                    "chinese_description": None,
-                }
-            ] * len(images)
+            return [None] * len(images)
 
     def _insert_text_quality_record(
         self,
@@ -2377,33 +2341,32 @@ class MushroomImageEncoder:
         time_msg = f"[{start_time} ~ {end_time}]" if start_time or end_time else ""
         logger.info(f"🚀 开始批量处理图像 {time_msg}")
 
-        # 获取所有蘑菇图像
-        all_images = self.processor.get_mushroom_images(
+        # 流式获取蘑菇图像：列举未完成时即可开始编码
+        image_stream = self.processor.iter_mushroom_images(
             mushroom_id=mushroom_id,
             date_filter=date_filter,
             start_time=start_time,
             end_time=end_time,
         )
 
-        if not all_images:
-            logger.warning(f"⚠️ 未找到符合条件的图像 {time_msg}")
-            return {"total": 0, "success": 0, "failed": 0, "skipped": 0}
-
-        logger.info(f"📊 找到 {len(all_images)} 张图像待处理")
-
-        stats = {"total": len(all_images), "success": 0, "failed": 0, "skipped": 0}
+        stats = {"total": 0, "success": 0, "failed": 0, "skipped": 0}
 
         # 分批处理
-        for i in range(0, len(all_images), batch_size):
-            batch = all_images[i : i + batch_size]
-            logger.info(
-                f"🔄 处理批次 {i // batch_size + 1}/{(len(all_images) - 1) // batch_size + 1}"
+        batch_index = 0
+        while batch := list(islice(image_stream, batch_size)):
+            batch_index += 1
+            stats["total"] += len(batch)
+            logger.info(f"🔄 处理批次 {batch_index}（累计 {stats['total']} 张）")
+
+            # 整批一次查询已处理路径
+            processed_paths = self.get_processed_paths(
+                image_info.file_path for image_info in batch
             )
 
             for image_info in batch:
                 try:
                     # 检查是否已处理过
-                    if self._is_already_processed(image_info.file_path):
+                    if image_info.file_path in processed_paths:
                         logger.info(f"⏭️ 跳过已处理图像: {image_info.file_name}")
                         stats["skipped"] += 1
                         continue
@@ -2420,6 +2383,10 @@ class MushroomImageEncoder:
                     logger.error(f"❌ 批处理中处理图像失败 {image_info.file_name}: {e}")
                     stats["failed"] += 1
 
+        if stats["total"] == 0:
+            logger.warning(f"⚠️ 未找到符合条件的图像 {time_msg}")
+            return stats
+
         logger.info(
             f"✅ 批量处理完成 - 总计: {stats['total']}, "
             f"成功: {stats['success']}, 失败: {stats['failed']}, 跳过: {stats['skipped']}"
@@ -2441,28 +2408,28 @@ class MushroomImageEncoder:
         time_msg = f"[{start_time} ~ {end_time}]" if start_time or end_time else ""
         logger.info(f"📝 开始批量文本/质量分析 {time_msg}")
 
-        all_images = self.processor.get_mushroom_images(
+        image_stream = self.processor.iter_mushroom_images(
             mushroom_id=mushroom_id,
             date_filter=None,
             start_time=start_time,
             end_time=end_time,
         )
 
-        if not all_images:
-            logger.warning(f"⚠️ 未找到符合条件的图像 {time_msg}")
-            return {"total": 0, "success": 0, "failed": 0, "skipped": 0}
-
-        # 与最近图片脚本对齐：优先处理最新图片，可选限制数量
+        # 与最近图片脚本对齐：优先处理最新图片，可选限制数量（只保留 max_images 张）
         if max_images is not None and max_images > 0:
-            all_images.sort(key=lambda img: img.collection_datetime, reverse=True)
-            all_images = all_images[:max_images]
+            image_stream = iter(
+                heapq.nlargest(
+                    max_images, image_stream, key=lambda img: img.collection_datetime
+                )
+            )
 
-        stats = {"total": len(all_images), "success": 0, "failed": 0, "skipped": 0}
+        stats = {"total": 0, "success": 0, "failed": 0, "skipped": 0}
 
         session = self.Session()
         try:
-            for i in range(0, len(all_images), batch_size):
-                batch = all_images[i : i + batch_size]
+            while batch := list(islice(image_stream, batch_size)):
+                stats["total"] += len(batch)
+                pending = []
                 for image_info in batch:
                     try:
                         existing = None
@@ -2508,7 +2475,28 @@ class MushroomImageEncoder:
                             stats["failed"] += 1
                             continue
 
-                        llama_result = self._get_llama_description(image)
+                        pending.append(
+                            (image_info, existing, time_info, in_date, room_id, image)
+                        )
+                    except Exception as e:
+                        logger.error(
+                            f"❌ 文本/质量处理失败 {image_info.file_name}: {e}"
+                        )
+                        stats["failed"] += 1
+
+                # 本批需要描述的图像并发请求LLaMA，结果与 pending 顺序一致
+                llama_results = self._get_llama_descriptions_batch(
+                    [entry[-1] for entry in pending],
+                    camera_keys=[entry[0].collection_ip for entry in pending],
+                )
+
+                for entry, llama_result in zip(pending, llama_results):
+                    image_info, existing, time_info, in_date, room_id, _ = entry
+                    if llama_result is None:
+                        # 请求异常计为失败且不写入（与逐张调用 _get_llama_description 时一致）
+                        stats["failed"] += 1
+                        continue
+                    try:
                         growth_stage_description = llama_result.get(
                             "growth_stage_description", ""
                         )
@@ -2573,6 +2561,10 @@ class MushroomImageEncoder:
         finally:
             session.close()
 
+        if stats["total"] == 0:
+            logger.warning(f"⚠️ 未找到符合条件的图像 {time_msg}")
+            return stats
+
         logger.info(
             f"✅ 文本/质量分析完成 - 总计: {stats['total']}, 成功: {stats['success']}, "
             f"失败: {stats['failed']}, 跳过: {stats['skipped']}"
@@ -2698,19 +2690,19 @@ class MushroomImageEncoder:
 
                     selected += 1
 
-                    if self._is_already_processed(image_info.file_path):
-                        if linked_embedding := (
-                            session.query(MushroomImageEmbedding)
-                            .filter_by(image_path=image_info.file_path)
-                            .first()
-                        ):
-                            if row.mushroom_embedding_id != linked_embedding.id:
-                                row.mushroom_embedding_id = linked_embedding.id
-                                row.updated_at = func.now()
-                                logger.debug(
-                                    "[TOP_QUALITY] 图像已编码，已回填关联: "
-                                    f"quality_id={row.id}, embedding_id={linked_embedding.id}"
-                                )
+                    linked_embedding = (
+                        session.query(MushroomImageEmbedding)
+                        .filter_by(image_path=image_info.file_path)
+                        .first()
+                    )
+                    if linked_embedding is not None:
+                        if row.mushroom_embedding_id != linked_embedding.id:
+                            row.mushroom_embedding_id = linked_embedding.id
+                            row.updated_at = func.now()
+                            logger.debug(
+                                "[TOP_QUALITY] 图像已编码，已回填关联: "
+                                f"quality_id={row.id}, embedding_id={linked_embedding.id}"
+                            )
                         stats["skipped"] += 1
                         continue
 
@@ -2743,19 +2735,55 @@ class MushroomImageEncoder:
 
     def _is_already_processed(self, image_path: str) -> bool:
         """检查图像是否已经处理过"""
+        return image_path in self.get_processed_paths([image_path])
+
+    def get_processed_paths(self, image_paths) -> set[str]:
+        """
+        批量检查图像是否已处理（已写入 mushroom_embedding）
+
+        每 PROCESSED_PATH_QUERY_CHUNK_SIZE 个路径执行一次
+        ``image_path = ANY(:paths)`` 查询；已确认的路径缓存在本地，
+        缓存每 PROCESSED_PATH_CACHE_TTL_SECONDS 秒整体失效。
+        查询失败时与逐条检查一致，视为未处理。
+
+        Args:
+            image_paths: 图像路径（MinIO 对象名）列表
+
+        Returns:
+            已处理的路径集合
+        """
+        cache = self._get_processed_path_cache()
+        paths = list(dict.fromkeys(p for p in image_paths if p))
+        processed = {p for p in paths if p in cache}
+        pending = [p for p in paths if p not in processed]
+        if not pending:
+            return processed
+
         session = self.Session()
         try:
-            existing = (
-                session.query(MushroomImageEmbedding)
-                .filter_by(image_path=image_path)
-                .first()
-            )
-            return existing is not None
+            for start in range(0, len(pending), PROCESSED_PATH_QUERY_CHUNK_SIZE):
+                chunk = pending[start : start + PROCESSED_PATH_QUERY_CHUNK_SIZE]
+                rows = session.execute(
+                    select(MushroomImageEmbedding.image_path).where(
+                        MushroomImageEmbedding.image_path
+                        == any_(bindparam("paths", chunk, type_=ARRAY(Text)))
+                    )
+                )
+                found = {row[0] for row in rows}
+                cache.update(found)
+                processed.update(found)
         except Exception as e:
-            logger.error(f"❌ 检查处理状态失败: {e}")
-            return False
+            logger.error(f"❌ 批量检查处理状态失败: {e}")
         finally:
             session.close()
+        return processed
+
+    def _get_processed_path_cache(self) -> set[str]:
+        now = time.monotonic()
+        if now - self._processed_path_cache_at > PROCESSED_PATH_CACHE_TTL_SECONDS:
+            self._processed_path_cache = set()
+            self._processed_path_cache_at = now
+        return self._processed_path_cache
 
     def get_processing_statistics(self) -> dict:
         """获取处理统计信息"""
@@ -2888,13 +2916,14 @@ class MushroomImageEncoder:
             no_env_data_count = 0
 
             # 找到未处理的图像
+            processed_paths = self.get_processed_paths(img.file_path for img in images)
             for img in images:
                 if processed_count >= max_per_mushroom:
                     break
 
                 try:
                     # 检查是否已处理
-                    if self._is_already_processed(img.file_path):
+                    if img.file_path in processed_paths:
                         skipped_count += 1
                         logger.info(
                             f"Skipping already processed image: {img.file_name}"
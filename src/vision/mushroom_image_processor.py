@@ -8,7 +8,7 @@ import re
 from dataclasses import dataclass
 from datetime import datetime, timedelta
 from pathlib import Path
-from typing import Any
+from typing import Any, Iterator
 
 from loguru import logger
 from sqlalchemy.orm import sessionmaker
@@ -339,24 +339,18 @@ class MushroomImageProcessor:
         if hasattr(self, "session"):
             self.session.close()
 
-    def get_mushroom_images(
+    def iter_mushroom_images(
         self,
         mushroom_id: str = None,
         date_filter: str = None,
         start_time: datetime = None,
         end_time: datetime = None,
-    ) -> list[MushroomImageInfo]:
+    ) -> Iterator[MushroomImageInfo]:
         """
-        获取蘑菇图像列表
-
-        Args:
-            mushroom_id: 蘑菇库号过滤
-            date_filter: 日期过滤 (YYYYMMDD)
-            start_time: 开始时间过滤 (含)
-            end_time: 结束时间过滤 (不含)
+        流式产出蘑菇图像（参数同 get_mushroom_images）
 
-        Returns:
-            蘑菇图像信息列表
+        带时间条件时按"库房/日期"前缀依次产出、前缀内按时间排序，不做全局排序；
+        下游可在列举完成前开始处理，内存占用与图像总数无关
         """
         # 构建前缀过滤 - 图片路径直接以蘑菇库号开头
         prefix = ""
@@ -367,16 +361,17 @@ class MushroomImageProcessor:
 
         # 从MinIO获取图像列表
         if start_time or end_time:
-            image_records = self.minio_client.list_images_by_time_and_room(
-                room_id=mushroom_id,
-                start_time=start_time,
-                end_time=end_time,
+            image_files = (
+                record.object_name
+                for record in self.minio_client.iter_images_by_time_and_room(
+                    room_id=mushroom_id,
+                    start_time=start_time,
+                    end_time=end_time,
+                )
             )
-            image_files = [record["object_name"] for record in image_records]
         else:
-            image_files = self.minio_client.list_images(prefix=prefix)
+            image_files = self.minio_client.iter_images(prefix=prefix)
 
-        mushroom_images = []
         for image_path in image_files:
             image_info = self.parser.parse_path(image_path)
             if image_info:
@@ -392,7 +387,35 @@ class MushroomImageProcessor:
                 if end_time and image_info.collection_datetime >= end_time:
                     continue
 
-                mushroom_images.append(image_info)
+                yield image_info
+
+    def get_mushroom_images(
+        self,
+        mushroom_id: str = None,
+        date_filter: str = None,
+        start_time: datetime = None,
+        end_time: datetime = None,
+    ) -> list[MushroomImageInfo]:
+        """
+        获取蘑菇图像列表
+
+        Args:
+            mushroom_id: 蘑菇库号过滤
+            date_filter: 日期过滤 (YYYYMMDD)
+            start_time: 开始时间过滤 (含)
+            end_time: 结束时间过滤 (不含)
+
+        Returns:
+            蘑菇图像信息列表
+        """
+        mushroom_images = list(
+            self.iter_mushroom_images(
+                mushroom_id=mushroom_id,
+                date_filter=date_filter,
+                start_time=start_time,
+                end_time=end_time,
+            )
+        )
 
         # 按时间排序
         mushroom_images.sort(key=lambda x: x.collection_datetime)
@@ -400,9 +423,7 @@ class MushroomImageProcessor:
         time_range_msg = (
             f"[{start_time} ~ {end_time}]" if start_time or end_time else "[全部时间]"
         )
-        logger.info(
-            f"找到 {len(mushroom_images)} 个蘑菇图像文件 {time_range_msg} (原始总数: {len(image_files)})"
-        )
+        logger.info(f"找到 {len(mushroom_images)} 个蘑菇图像文件 {time_range_msg}")
         return mushroom_images
 
     def process_single_image(
@@ -4,6 +4,7 @@
 """
 
 from datetime import date, datetime, timedelta
+from itertools import islice
 from typing import Any
 
 from loguru import logger
@@ -13,10 +14,15 @@ from global_const.global_const import pgsql_engine
 from utils.create_table import MushroomImageEmbedding
 from utils.minio_client import create_minio_client
 
+from .image_prefetcher import ImagePrefetcher
 from .mushroom_image_encoder import create_mushroom_encoder
 from .mushroom_image_processor import MushroomImagePathParser
 
 
+# CLIP 预处理的输入边长，缩减解码不低于该尺寸
+CLIP_INPUT_SIZE = 224
+
+
 class RecentImageProcessor:
     """最近图片处理器"""
 
@@ -42,6 +48,19 @@ class RecentImageProcessor:
 
         logger.debug("图片处理器初始化完成")
 
+    def _create_prefetcher(self) -> ImagePrefetcher:
+        """创建图像预取器，按 LLaMA 输入尺寸（不小于 CLIP 输入尺寸）缩减解码"""
+        llama_config = getattr(self.encoder, "llama_config", None)
+        target_width = int(getattr(llama_config, "image_width", 960))
+        target_height = int(getattr(llama_config, "image_height", 960))
+        return ImagePrefetcher(
+            self.minio_client,
+            target_size=(
+                max(CLIP_INPUT_SIZE, target_width),
+                max(CLIP_INPUT_SIZE, target_height),
+            ),
+        )
+
     def _get_latest_in_date(self, room_id: str) -> datetime | None:
         """获取库房最近入库日期（缓存）"""
         if room_id in self._latest_in_date_cache:
@@ -158,22 +177,27 @@ class RecentImageProcessor:
         scored_candidates = []
         skipped_count = 0
 
-        # 1. 预过滤和评分
+        # 解析路径
+        candidates = []
         for img_dict in images:
-            try:
-                # 解析路径
-                image_info = self.parser.parse_path(img_dict["object_name"])
-                if not image_info:
-                    continue
+            image_info = self.parser.parse_path(img_dict["object_name"])
+            if image_info:
+                candidates.append((img_dict, image_info))
 
-                # 获取图像
-                image = self.minio_client.get_image(image_info.file_path)
+        # 1. 预过滤和评分（图像并发预取，下载解码与 LLaMA 分析重叠）
+        prefetched = self._create_prefetcher().iter_images(
+            candidates, key=lambda candidate: candidate[1].file_path
+        )
+        for (img_dict, image_info), image in prefetched:
+            try:
                 if image is None:
                     continue
 
                 # 获取分析结果 (LLaMA)
                 # 使用新添加的公开方法
-                analysis = self.encoder.get_growth_stage_analysis(image)
+                analysis = self.encoder.get_growth_stage_analysis(
+                    image, camera_key=image_info.collection_ip
+                )
                 score = analysis.get("image_quality_score")
                 description = analysis.get("growth_stage_description", "")
 
@@ -498,6 +522,8 @@ class RecentImageProcessor:
             "skipped": 0,
         }
 
+        processed_paths = self._get_processed_object_names(images, save_to_db)
+
         for img in images:
             try:
                 # 解析图片路径
@@ -509,9 +535,7 @@ class RecentImageProcessor:
                     continue
 
                 # 检查是否已处理
-                if save_to_db and self.encoder._is_already_processed(
-                    image_info.file_path
-                ):
+                if image_info.file_path in processed_paths:
                     room_stats["skipped"] += 1
                     continue
 
@@ -558,6 +582,14 @@ class RecentImageProcessor:
 
         return room_stats
 
+    def _get_processed_object_names(
+        self, images: list[dict], save_to_db: bool
+    ) -> set[str]:
+        """批量去重：一次查询返回列表中已处理（已入库）的对象名，不入库时不检查"""
+        if not save_to_db or not images:
+            return set()
+        return self.encoder.get_processed_paths(img["object_name"] for img in images)
+
     def _process_room_images_batch(
         self, room_id: str, images: list[dict], save_to_db: bool, batch_size: int
     ) -> tuple:
@@ -574,18 +606,11 @@ class RecentImageProcessor:
 
         batch_stats = {"batches": 0, "processing_times": []}
 
-        # 将图片分批处理
+        # 将图片分批，预处理每个批次：检查哪些图片需要处理（整批一次查询已处理路径）
+        batches = []
         for i in range(0, len(images), batch_size):
-            batch_start_time = time.time()
             batch = images[i : i + batch_size]
-            batch_num = (i // batch_size) + 1
-
-            logger.info(
-                f"[IMG-BATCH-{batch_num}] 处理批次 | 库房: {room_id}, 批大小: {len(batch)}, "
-                f"进度: {i + len(batch)}/{len(images)}"
-            )
-
-            # 预处理批次：检查哪些图片需要处理
+            processed_paths = self._get_processed_object_names(batch, save_to_db)
             batch_to_process = []
             for img in batch:
                 try:
@@ -598,9 +623,7 @@ class RecentImageProcessor:
                         continue
 
                     # 检查是否已处理
-                    if save_to_db and self.encoder._is_already_processed(
-                        image_info.file_path
-                    ):
+                    if image_info.file_path in processed_paths:
                         room_stats["skipped"] += 1
                         continue
 
@@ -610,27 +633,49 @@ class RecentImageProcessor:
                     logger.error(f"预处理图片异常 {img['object_name']}: {e}")
                     room_stats["failed"] += 1
 
-            # 如果批次中有需要处理的图片，进行批处理
-            if batch_to_process:
-                batch_results = self._process_image_batch(batch_to_process, save_to_db)
+            batches.append((i, batch, batch_to_process))
 
-                # 更新统计
-                for result in batch_results:
-                    room_stats["processed"] += 1
-                    if result["success"]:
-                        room_stats["success"] += 1
-                    else:
-                        room_stats["failed"] += 1
+        # 整个库房共用一个预取流：编码当前批次时，后续批次的图像已在下载和解码
+        prefetched = self._create_prefetcher().iter_images(
+            (entry for _, _, batch_to_process in batches for entry in batch_to_process),
+            key=lambda entry: entry[1].file_path,
+        )
+        try:
+            for i, batch, batch_to_process in batches:
+                batch_start_time = time.time()
+                batch_num = (i // batch_size) + 1
 
-            batch_end_time = time.time()
-            batch_processing_time = batch_end_time - batch_start_time
-            batch_stats["processing_times"].append(batch_processing_time)
-            batch_stats["batches"] += 1
+                logger.info(
+                    f"[IMG-BATCH-{batch_num}] 处理批次 | 库房: {room_id}, 批大小: {len(batch)}, "
+                    f"进度: {i + len(batch)}/{len(images)}"
+                )
 
-            logger.info(
-                f"[IMG-BATCH-{batch_num}] 批次完成 | 耗时: {batch_processing_time:.2f}s, "
-                f"处理: {len(batch_to_process)}张"
-            )
+                # 如果批次中有需要处理的图片，进行批处理
+                if batch_to_process:
+                    loaded = list(islice(prefetched, len(batch_to_process)))
+                    batch_results = self._process_image_batch(
+                        batch_to_process, save_to_db, loaded=loaded
+                    )
+
+                    # 更新统计
+                    for result in batch_results:
+                        room_stats["processed"] += 1
+                        if result["success"]:
+                            room_stats["success"] += 1
+                        else:
+                            room_stats["failed"] += 1
+
+                batch_end_time = time.time()
+                batch_processing_time = batch_end_time - batch_start_time
+                batch_stats["processing_times"].append(batch_processing_time)
+                batch_stats["batches"] += 1
+
+                logger.info(
+                    f"[IMG-BATCH-{batch_num}] 批次完成 | 耗时: {batch_processing_time:.2f}s, "
+                    f"处理: {len(batch_to_process)}张"
+                )
+        finally:
+            prefetched.close()
 
         logger.info(
             f"[IMG-009-BATCH] 库房批处理完成 | "
@@ -645,33 +690,39 @@ class RecentImageProcessor:
         return room_stats, batch_stats
 
     def _process_image_batch(
-        self, batch_to_process: list[tuple], save_to_db: bool
+        self,
+        batch_to_process: list[tuple],
+        save_to_db: bool,
+        loaded: list[tuple] | None = None,
     ) -> list[dict]:
-        """处理一批图片"""
-        batch_results = []
+        """
+        处理一批图片
 
-        # 批量获取图片数据
-        images_data = []
-        for img, image_info in batch_to_process:
-            try:
-                # 从MinIO获取图像
-                image = self.minio_client.get_image(image_info.file_path)
-                if image is None:
-                    logger.warning(
-                        f"[IMG-BATCH] 获取图像失败 | 文件: {image_info.file_name}"
-                    )
-                    batch_results.append({"success": False, "image_info": image_info})
-                    continue
+        Args:
+            batch_to_process: (img, image_info) 列表
+            save_to_db: 是否保存到数据库
+            loaded: 已预取的 ((img, image_info), image) 列表；为 None 时本批次并发获取
+        """
+        batch_results = []
 
-                images_data.append(
-                    {"image": image, "image_info": image_info, "img_meta": img}
-                )
+        # 从MinIO并发获取图像
+        if loaded is None:
+            loaded = self._create_prefetcher().load_images(
+                batch_to_process, key=lambda entry: entry[1].file_path
+            )
 
-            except Exception as e:
-                logger.error(
-                    f"[IMG-BATCH] 获取图像异常 | 文件: {image_info.file_name}, 错误: {e}"
+        images_data = []
+        for (img, image_info), image in loaded:
+            if image is None:
+                logger.warning(
+                    f"[IMG-BATCH] 获取图像失败 | 文件: {image_info.file_name}"
                 )
                 batch_results.append({"success": False, "image_info": image_info})
+                continue
+
+            images_data.append(
+                {"image": image, "image_info": image_info, "img_meta": img}
+            )
 
         # 如果有成功获取的图片，进行批量处理
         if images_data:
@@ -856,6 +907,8 @@ class RecentImageProcessor:
             "skipped": 0,
         }
 
+        processed_paths = self._get_processed_object_names(recent_images, save_to_db)
+
         for img in recent_images:
             try:
                 # 解析图片路径
@@ -867,9 +920,7 @@ class RecentImageProcessor:
                     continue
 
                 # 检查是否已处理
-                if save_to_db and self.encoder._is_already_processed(
-                    image_info.file_path
-                ):
+                if image_info.file_path in processed_paths:
                     logger.info(f"跳过已处理图片: {image_info.file_name}")
                     stats["skipped"] += 1
                     continue
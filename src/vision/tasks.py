@@ -32,6 +32,16 @@ def _is_connection_error(error_msg: str) -> bool:
     )
 
 
+def _refresh_batch_summary(tag: str, since: datetime) -> None:
+    """刷新本次任务写入涉及批次的看板汇总（失败不影响任务结果）"""
+    try:
+        from utils.batch_summary import refresh_batch_summary_since
+
+        refresh_batch_summary_since(since)
+    except Exception as e:
+        logger.warning(f"[{tag}] 批次汇总刷新失败: {e}")
+
+
 def safe_hourly_clip_inference() -> None:
     """兼容入口：保留旧函数名（不再用于调度）"""
     from vision.executor import safe_hourly_clip_inference as _safe_hourly
@@ -112,39 +122,42 @@ def safe_hourly_text_quality_inference(reprocess: bool = False) -> None:
                     f"[TEXT_QUALITY_TASK] MLflow 初始化失败，将继续无 Traces 运行: {e}"
                 )
 
-            from vision.mushroom_image_encoder import create_mushroom_encoder
+            from vision.encoder_registry import acquire_mushroom_encoder
 
-            encoder = create_mushroom_encoder(load_clip=False)
-            minio_rooms = set(encoder.minio_client.list_rooms())
-            env_to_minio: dict[str, list[str]] = {}
-            for minio_id, env_id in encoder.room_id_mapping.items():
-                env_to_minio.setdefault(env_id, []).append(minio_id)
+            # 常驻编码器：跨调度运行复用，不重复初始化
+            with acquire_mushroom_encoder(load_clip=False) as encoder:
+                minio_rooms = set(encoder.minio_client.list_rooms())
+                env_to_minio: dict[str, list[str]] = {}
+                for minio_id, env_id in encoder.room_id_mapping.items():
+                    env_to_minio.setdefault(env_id, []).append(minio_id)
 
-            total_stats = {"total": 0, "success": 0, "failed": 0, "skipped": 0}
+                total_stats = {"total": 0, "success": 0, "failed": 0, "skipped": 0}
 
-            for room_id in MUSHROOM_ROOM_IDS:
-                try:
-                    candidate_ids = env_to_minio.get(room_id, [room_id])
-                    minio_room_id = next(
-                        (cid for cid in candidate_ids if cid in minio_rooms), room_id
-                    )
-                    if minio_room_id != room_id:
-                        logger.info(
-                            f"[TEXT_QUALITY_TASK] 映射库房号: {room_id} -> {minio_room_id}"
+                for room_id in MUSHROOM_ROOM_IDS:
+                    try:
+                        candidate_ids = env_to_minio.get(room_id, [room_id])
+                        minio_room_id = next(
+                            (cid for cid in candidate_ids if cid in minio_rooms), room_id
                         )
-                    stats = encoder.batch_process_text_quality(
-                        mushroom_id=minio_room_id,
-                        start_time=start_time_filter,
-                        end_time=end_time,
-                        batch_size=CLIP_INFERENCE_BATCH_SIZE,
-                        reprocess=reprocess,
-                        link_mushroom_embedding=False,
-                    )
-                    for key in total_stats:
-                        total_stats[key] += stats.get(key, 0)
-                except Exception as e:
-                    logger.error(f"[TEXT_QUALITY_TASK] 库房 {room_id} 处理失败: {e}")
-                    total_stats["failed"] += 1
+                        if minio_room_id != room_id:
+                            logger.info(
+                                f"[TEXT_QUALITY_TASK] 映射库房号: {room_id} -> {minio_room_id}"
+                            )
+                        stats = encoder.batch_process_text_quality(
+                            mushroom_id=minio_room_id,
+                            start_time=start_time_filter,
+                            end_time=end_time,
+                            batch_size=CLIP_INFERENCE_BATCH_SIZE,
+                            reprocess=reprocess,
+                            link_mushroom_embedding=False,
+                        )
+                        for key in total_stats:
+                            total_stats[key] += stats.get(key, 0)
+                    except Exception as e:
+                        logger.error(f"[TEXT_QUALITY_TASK] 库房 {room_id} 处理失败: {e}")
+                        total_stats["failed"] += 1
+
+            _refresh_batch_summary("TEXT_QUALITY_TASK", end_time)
 
             logger.info(
                 f"[TEXT_QUALITY_TASK] 任务完成: 总计={total_stats['total']}, 成功={total_stats['success']}, "
@@ -200,20 +213,22 @@ def safe_daily_top_quality_clip_inference() -> None:
 
     for attempt in range(1, max_retries + 1):
         try:
-            target_date = (datetime.now() - timedelta(days=1)).date()
+            task_start = datetime.now()
+            target_date = (task_start - timedelta(days=1)).date()
             logger.info(
                 f"[TOP_QUALITY_TASK] 开始执行Top质量图像任务 (日期 {target_date}, 尝试 {attempt}/{max_retries})"
             )
 
-            from vision.mushroom_image_encoder import create_mushroom_encoder
-
-            encoder = create_mushroom_encoder()
+            from vision.encoder_registry import acquire_mushroom_encoder
 
-            stats = encoder.process_top_quality_embeddings_for_date(
-                target_date=target_date,
-                top_k=5,
-                batch_size=CLIP_INFERENCE_BATCH_SIZE,
-            )
+            # 常驻编码器：CLIP 保持加载，空闲超时后才卸载
+            with acquire_mushroom_encoder() as encoder:
+                stats = encoder.process_top_quality_embeddings_for_date(
+                    target_date=target_date,
+                    top_k=5,
+                    batch_size=CLIP_INFERENCE_BATCH_SIZE,
+                )
+            _refresh_batch_summary("TOP_QUALITY_TASK", task_start)
 
             total = stats.get("total", 0)
             success = stats.get("success", 0)
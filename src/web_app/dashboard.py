@@ -8,7 +8,7 @@ import plotly.express as px
 import plotly.graph_objects as go
 import streamlit as st
 from plotly.subplots import make_subplots
-from sqlalchemy import desc, func
+from sqlalchemy import desc, func, select, text, true
 from sqlalchemy.orm import sessionmaker
 
 from global_const.global_const import pgsql_engine, static_settings
@@ -21,31 +21,70 @@ from utils.create_table import (
     MushroomEnvDailyStats,
     MushroomImageEmbedding,
 )
+from utils.batch_summary import load_batch_summary, load_batch_summary_rooms
 
 # --- Database Connection & Caching ---
 Session = sessionmaker(bind=pgsql_engine)
 
 
+def _distinct_room_ids(session, table_name: str) -> set:
+    """
+    Distinct room_id via a recursive loose index scan
+
+    Each step jumps to the next room_id on an index led by room_id, so the cost
+    grows with the number of rooms rather than the number of rows.
+    """
+    rows = session.execute(
+        text(
+            f"""
+            WITH RECURSIVE rooms AS (
+                (SELECT room_id FROM {table_name} ORDER BY room_id LIMIT 1)
+                UNION ALL
+                SELECT (
+                    SELECT t.room_id FROM {table_name} t
+                    WHERE t.room_id > rooms.room_id
+                    ORDER BY t.room_id
+                    LIMIT 1
+                )
+                FROM rooms
+                WHERE rooms.room_id IS NOT NULL
+            )
+            SELECT room_id FROM rooms WHERE room_id IS NOT NULL
+            """
+        )
+    ).fetchall()
+    return {r[0] for r in rows}
+
+
 @st.cache_data(ttl=300)  # Cache for 5 minutes
 def load_room_list():
     """Load distinct room IDs from available data"""
     with Session() as session:
         # Combine room IDs from all sources
-        rooms_emb = session.query(MushroomImageEmbedding.room_id).distinct().all()
-        rooms_env = session.query(MushroomEnvDailyStats.room_id).distinct().all()
-        rooms_dev = session.query(DeviceSetpointChange.room_id).distinct().all()
-
-        all_rooms = (
-            set(r[0] for r in rooms_emb)
-            | set(r[0] for r in rooms_env)
-            | set(r[0] for r in rooms_dev)
-        )
+        rooms_emb = set(load_batch_summary_rooms(session.bind))
+        if not rooms_emb:
+            rooms_emb = _distinct_room_ids(
+                session, MushroomImageEmbedding.__tablename__
+            )
+        rooms_env = _distinct_room_ids(session, MushroomEnvDailyStats.__tablename__)
+        rooms_dev = _distinct_room_ids(session, DeviceSetpointChange.__tablename__)
+
+        all_rooms = rooms_emb | rooms_env | rooms_dev
         return sorted(list(all_rooms))
 
 
 @st.cache_data(ttl=300)
 def load_batch_data(room_ids=None, date_range=None):
-    """Load batch data from MushroomImageEmbedding"""
+    """Load batch data from the mushroom_batch_summary projection"""
+    df = load_batch_summary(room_ids, date_range, db_engine=pgsql_engine)
+    if not df.empty:
+        return df.drop(columns=["image_count"])
+    # 汇总表尚未构建（需执行 rebuild_batch_summary.py）时退回实时聚合
+    return _aggregate_batch_data(room_ids, date_range)
+
+
+def _aggregate_batch_data(room_ids=None, date_range=None):
+    """Aggregate batch data directly from MushroomImageEmbedding"""
     with Session() as session:
         latest_quality = (
             session.query(
@@ -137,42 +176,47 @@ def load_batch_ranges_from_yield(room_ids=None, in_date_range=None) -> pd.DataFr
 def load_image_quality_data(room_ids=None):
     """Load raw image quality data for scatter plot"""
     with Session() as session:
+        recent = select(
+            MushroomImageEmbedding.room_id,
+            MushroomImageEmbedding.growth_day,
+            MushroomImageEmbedding.collection_datetime,
+            MushroomImageEmbedding.image_path,
+        )
+
+        if room_ids:
+            recent = recent.where(MushroomImageEmbedding.room_id.in_(room_ids))
+
+        # Limit to recent 2000 records to avoid performance issues in scatter
+        recent = (
+            recent.order_by(desc(MushroomImageEmbedding.collection_datetime))
+            .limit(2000)
+            .subquery("recent")
+        )
+
+        # 仅对这 2000 张图逐张取最新质量记录，而非对 image_text_quality 全表 GROUP BY
         latest_quality = (
-            session.query(
-                ImageTextQuality.image_path,
-                func.max(ImageTextQuality.created_at).label("max_created_at"),
+            select(ImageTextQuality.image_quality_score)
+            .where(
+                ImageTextQuality.image_path == recent.c.image_path,
+                ImageTextQuality.created_at.isnot(None),
             )
-            .group_by(ImageTextQuality.image_path)
-            .subquery()
+            .order_by(ImageTextQuality.created_at.desc())
+            .limit(1)
+            .lateral("latest_quality")
         )
 
         query = (
-            session.query(
-                MushroomImageEmbedding.room_id,
-                MushroomImageEmbedding.growth_day,
-                ImageTextQuality.image_quality_score,
-                MushroomImageEmbedding.collection_datetime,
-            )
-            .outerjoin(
-                latest_quality,
-                latest_quality.c.image_path == MushroomImageEmbedding.image_path,
-            )
-            .outerjoin(
-                ImageTextQuality,
-                (ImageTextQuality.image_path == latest_quality.c.image_path)
-                & (ImageTextQuality.created_at == latest_quality.c.max_created_at),
+            select(
+                recent.c.room_id,
+                recent.c.growth_day,
+                latest_quality.c.image_quality_score,
+                recent.c.collection_datetime,
             )
+            .outerjoin(latest_quality, true())
+            .order_by(desc(recent.c.collection_datetime))
         )
 
-        if room_ids:
-            query = query.filter(MushroomImageEmbedding.room_id.in_(room_ids))
-
-        # Limit to recent 2000 records to avoid performance issues in scatter
-        query = query.order_by(desc(MushroomImageEmbedding.collection_datetime)).limit(
-            2000
-        )
-
-        df = pd.read_sql(query.statement, session.bind)
+        df = pd.read_sql(query, session.bind)
         return df
 
 
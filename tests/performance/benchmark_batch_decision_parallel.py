@@ -0,0 +1,112 @@
+"""
+Benchmark: serial vs parallel rooms in safe_batch_decision_analysis
+
+Replaces the per-room analysis with a stub that sleeps for a fixed per-room
+latency (standing in for DB extraction + LLM calls) and measures batch wall
+time at several max_workers levels (1 = the previous serial behaviour).
+The real batch orchestration is used, including the shared context, the
+skill-context prefetch and the ordered BATCH_ROOM_RESULT logging.
+
+Usage:
+    python tests/performance/benchmark_batch_decision_parallel.py --latency 0.3 0.1 0.2 0.15
+"""
+
+import argparse
+import sys
+import threading
+import time
+from pathlib import Path
+from types import SimpleNamespace
+from unittest.mock import patch
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
+
+from loguru import logger
+
+from decision_analysis import tasks
+
+
+class StubSkillEngine:
+    def build_contexts_from_db(self, room_ids, analysis_time, include_changes=True):
+        return {str(room_id): None for room_id in room_ids}
+
+
+class SleepingRoomAnalysis:
+    """按库房固定延时返回成功结果，记录最大并发"""
+
+    def __init__(self, latency: dict[str, float]):
+        self.latency = latency
+        self.lock = threading.Lock()
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    def __call__(
+        self, room_id, batch_run_id=None, analysis_context=None, skill_context=None
+    ):
+        with self.lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            time.sleep(self.latency[room_id])
+            return {"success": True, "decision_id": f"DEC-{room_id}"}
+        finally:
+            with self.lock:
+                self.in_flight -= 1
+
+
+def run_batch(latency: dict[str, float], max_workers: int) -> tuple[float, int]:
+    fake = SleepingRoomAnalysis(latency)
+    shared_context = SimpleNamespace(
+        built_at=0.0,
+        build_seconds=0.0,
+        prompt_meta={},
+        skill_engine=StubSkillEngine(),
+    )
+    with (
+        patch.object(tasks, "MUSHROOM_ROOM_IDS", list(latency)),
+        patch.object(tasks, "safe_decision_analysis_for_room", fake),
+        patch.object(tasks, "_log_event"),
+        patch.object(
+            tasks, "load_decision_analysis_context", return_value=shared_context
+        ),
+        patch("utils.task_common.check_database_connection", return_value=True),
+    ):
+        start = time.perf_counter()
+        tasks.safe_batch_decision_analysis(10, 0, max_workers=max_workers)
+        elapsed = time.perf_counter() - start
+    return elapsed, fake.max_in_flight
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--latency",
+        type=float,
+        nargs="+",
+        default=[0.30, 0.10, 0.20, 0.15],
+        help="每个库房的模拟耗时（秒）",
+    )
+    parser.add_argument("--levels", type=int, nargs="+", default=[1, 2, 4])
+    args = parser.parse_args()
+
+    logger.remove()
+    logger.add(sys.stderr, level="INFO", filter=lambda r: "[BENCH]" in r["message"])
+
+    latency = {str(600 + i): value for i, value in enumerate(args.latency)}
+
+    baseline = None
+    for level in args.levels:
+        elapsed, max_in_flight = run_batch(latency, level)
+        baseline = baseline or elapsed
+        logger.info(
+            f"[BENCH] max_workers={level} | rooms={len(latency)}, "
+            f"elapsed={elapsed:.2f}s, max_in_flight={max_in_flight}, "
+            f"speedup={baseline / elapsed:.2f}x"
+        )
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
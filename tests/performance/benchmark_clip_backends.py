@@ -0,0 +1,116 @@
+"""
+Benchmark: CLIP CPU inference backends
+
+Measures per-image latency of MushroomImageEncoder multimodal encoding for
+each inference backend (fp32 / int8_dynamic, with optional TorchScript or
+torch.compile graph mode) and reports cosine similarity against fp32.
+
+Usage:
+    python tests/performance/benchmark_clip_backends.py --images 32 --runs 5 --threads 4
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
+
+from loguru import logger
+
+import vision.mushroom_image_encoder as encoder_module
+from vision.clip_backend import (
+    ClipInferenceBackend,
+    ClipInferenceConfig,
+    prepare_clip_inference,
+)
+from vision.mushroom_image_encoder import MushroomImageEncoder
+
+BACKENDS = [
+    ("fp32", "none"),
+    ("fp32", "torchscript"),
+    ("int8_dynamic", "none"),
+    ("int8_dynamic", "torchscript"),
+    ("int8_dynamic", "torch_compile"),
+]
+
+
+def build_encoder() -> MushroomImageEncoder:
+    """仅加载fp32 CLIP模型（跳过MinIO/数据库/LLaMA初始化及settings后端配置），强制 CPU"""
+    encoder_module.prepare_clip_inference = (
+        lambda model, processor, device: ClipInferenceBackend.eager(model)
+    )
+    encoder = MushroomImageEncoder.__new__(MushroomImageEncoder)
+    encoder.device = "cpu"
+    encoder.clip_batch_size = 16
+    encoder._init_clip_model()
+    return encoder
+
+
+def build_samples(n: int) -> tuple[list[Image.Image], list[str]]:
+    rng = np.random.default_rng(0)
+    images = [
+        Image.fromarray(rng.integers(0, 255, (480, 640, 3), dtype=np.uint8))
+        for _ in range(n)
+    ]
+    texts = [
+        f"Mushroom Room 611, fruiting stage, Day {i % 30}. "
+        "Temperature 16.5C, humidity 92%, CO2 1200ppm."
+        for i in range(n)
+    ]
+    return images, texts
+
+
+def measure_latency(encoder, images, texts, runs: int) -> tuple[float, np.ndarray]:
+    """测量单张图像平均编码延迟（ms），返回 (延迟, 向量)"""
+    for _ in range(3):
+        encoder.encode_clip_batch(images[:4], texts[:4])
+    start = time.time()
+    for _ in range(runs):
+        embeddings = encoder.encode_clip_batch(images, texts)
+    elapsed = time.time() - start
+    return elapsed * 1000.0 / (runs * len(images)), np.asarray(embeddings)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--images", type=int, default=32)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--threads", type=int, default=0)
+    args = parser.parse_args()
+
+    encoder = build_encoder()
+    fp32_model = encoder.clip_model
+    images, texts = build_samples(args.images)
+
+    reference = None
+    for backend, graph_mode in BACKENDS:
+        config = ClipInferenceConfig(
+            backend=backend,
+            graph_mode=graph_mode,
+            num_threads=args.threads,
+            accuracy_guard=False,
+        )
+        encoder.clip_inference = prepare_clip_inference(
+            fp32_model, encoder.clip_processor, "cpu", config
+        )
+        encoder.clip_model = encoder.clip_inference.model
+        latency, embeddings = measure_latency(encoder, images, texts, args.runs)
+        if reference is None:
+            reference = embeddings
+        cosine = np.sum(embeddings * reference, axis=1)
+        logger.info(
+            f"[BENCH] backend={backend}, graph={graph_mode} | "
+            f"latency={latency:.2f} ms/img, "
+            f"cosine_vs_fp32 min={cosine.min():.4f} mean={cosine.mean():.4f}"
+        )
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
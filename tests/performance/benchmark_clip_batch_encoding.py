@@ -0,0 +1,90 @@
+"""
+Benchmark: single-image vs batched CLIP encoding
+
+Measures images/sec of MushroomImageEncoder.get_multimodal_embedding (one
+forward pass per image) against encode_clip_batch (one forward pass per
+micro-batch) on synthetic images, and checks that both paths agree.
+
+Usage:
+    python tests/performance/benchmark_clip_batch_encoding.py --images 64 --batch-sizes 8 16 32
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
+
+from loguru import logger
+
+from vision.mushroom_image_encoder import MushroomImageEncoder
+
+
+def build_encoder() -> MushroomImageEncoder:
+    """仅加载CLIP模型（跳过MinIO/数据库/LLaMA初始化）"""
+    import torch
+
+    encoder = MushroomImageEncoder.__new__(MushroomImageEncoder)
+    encoder.device = "cuda" if torch.cuda.is_available() else "cpu"
+    encoder.clip_batch_size = 16
+    encoder._init_clip_model()
+    return encoder
+
+
+def build_samples(n: int) -> tuple[list[Image.Image], list[str]]:
+    rng = np.random.default_rng(0)
+    images = [
+        Image.fromarray(rng.integers(0, 255, (480, 640, 3), dtype=np.uint8))
+        for _ in range(n)
+    ]
+    texts = [
+        f"Mushroom Room 611, fruiting stage, Day {i % 30}. "
+        "Temperature 16.5C, humidity 92%, CO2 1200ppm."
+        for i in range(n)
+    ]
+    return images, texts
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--images", type=int, default=64)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[8, 16, 32])
+    args = parser.parse_args()
+
+    encoder = build_encoder()
+    images, texts = build_samples(args.images)
+
+    # 预热
+    encoder.get_multimodal_embedding(images[0], texts[0])
+
+    start = time.perf_counter()
+    single = [encoder.get_multimodal_embedding(i, t) for i, t in zip(images, texts)]
+    single_elapsed = time.perf_counter() - start
+    single_ips = len(images) / single_elapsed
+    logger.info(
+        f"[BENCH] single | images={len(images)}, elapsed={single_elapsed:.2f}s, "
+        f"throughput={single_ips:.2f} img/s"
+    )
+
+    single_arr = np.asarray(single)
+    for batch_size in args.batch_sizes:
+        start = time.perf_counter()
+        batched = encoder.encode_clip_batch(images, texts, batch_size=batch_size)
+        elapsed = time.perf_counter() - start
+        max_diff = float(np.max(np.abs(np.asarray(batched) - single_arr)))
+        logger.info(
+            f"[BENCH] batch={batch_size} | elapsed={elapsed:.2f}s, "
+            f"throughput={len(images) / elapsed:.2f} img/s, "
+            f"speedup={single_elapsed / elapsed:.2f}x, max_abs_diff={max_diff:.2e}"
+        )
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
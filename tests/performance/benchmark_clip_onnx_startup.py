@@ -0,0 +1,126 @@
+"""
+Benchmark: torch vs ONNX Runtime CLIP backend startup and latency
+
+Each backend runs in a fresh subprocess so import costs are measured cold:
+module import + CLIP load time, process RSS after load, whether torch was
+imported, and per-image multimodal encoding latency.
+
+Export the ONNX towers first:
+    python -m vision.fine_tuning.cli convert --config <yaml> --output-dir models/clip-vit-base-patch32-onnx --onnx
+
+Usage:
+    python tests/performance/benchmark_clip_onnx_startup.py --onnx-dir models/clip-vit-base-patch32-onnx --images 32
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+SRC_DIR = Path(__file__).parent.parent.parent / "src"
+
+
+def run_backend(backend: str, onnx_dir: str, n_images: int, threads: int) -> dict:
+    """子进程内：导入 + 加载 CLIP → 编码，返回各项耗时"""
+    start = time.perf_counter()
+    import numpy as np
+    import psutil
+    from PIL import Image
+
+    from vision.clip_runtime import ClipInferenceConfig
+    from vision.mushroom_image_encoder import MushroomImageEncoder
+
+    import_seconds = time.perf_counter() - start
+
+    encoder = MushroomImageEncoder.__new__(MushroomImageEncoder)
+    encoder.clip_config = ClipInferenceConfig(
+        backend=backend, onnx_dir=onnx_dir, num_threads=threads
+    )
+    encoder.device = "cpu"
+    encoder.clip_batch_size = 16
+    encoder.clip_inference = None
+    load_start = time.perf_counter()
+    encoder._init_clip_model()
+    load_seconds = time.perf_counter() - load_start
+
+    rng = np.random.default_rng(0)
+    images = [
+        Image.fromarray(rng.integers(0, 255, (480, 640, 3), dtype=np.uint8))
+        for _ in range(n_images)
+    ]
+    texts = [
+        f"Mushroom Room 611, fruiting stage, Day {i % 30}. "
+        "Temperature 16.5C, humidity 92%, CO2 1200ppm."
+        for i in range(n_images)
+    ]
+    encoder.encode_clip_batch(images[:2], texts[:2])  # 预热
+    encode_start = time.perf_counter()
+    embeddings = encoder.encode_clip_batch(images, texts)
+    encode_seconds = time.perf_counter() - encode_start
+
+    return {
+        "backend": backend,
+        "import_seconds": round(import_seconds, 3),
+        "load_seconds": round(load_seconds, 3),
+        "startup_seconds": round(import_seconds + load_seconds, 3),
+        "rss_mb": round(psutil.Process().memory_info().rss / 2**20, 1),
+        "torch_imported": "torch" in sys.modules,
+        "latency_ms_per_image": round(encode_seconds * 1000.0 / n_images, 2),
+        "embeddings": np.asarray(embeddings).tolist(),
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--onnx-dir", default="")
+    parser.add_argument("--images", type=int, default=32)
+    parser.add_argument("--threads", type=int, default=0)
+    parser.add_argument("--child", default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        sys.path.insert(0, str(SRC_DIR))
+        result = run_backend(args.child, args.onnx_dir, args.images, args.threads)
+        print(json.dumps(result))
+        return 0
+
+    results = {}
+    for backend in ("fp32", "onnx"):
+        output = subprocess.run(
+            [
+                sys.executable,
+                __file__,
+                "--child",
+                backend,
+                "--onnx-dir",
+                args.onnx_dir,
+                "--images",
+                str(args.images),
+                "--threads",
+                str(args.threads),
+            ],
+            check=True,
+            capture_output=True,
+            text=True,
+        ).stdout
+        results[backend] = json.loads(output.strip().splitlines()[-1])
+
+    import numpy as np
+
+    reference = np.asarray(results["fp32"]["embeddings"])
+    for backend, result in results.items():
+        cosine = np.sum(np.asarray(result.pop("embeddings")) * reference, axis=1)
+        print(
+            f"[BENCH] {backend:>5} | startup={result['startup_seconds']:.2f}s "
+            f"(import={result['import_seconds']:.2f}s, load={result['load_seconds']:.2f}s), "
+            f"rss={result['rss_mb']:.0f}MB, torch_imported={result['torch_imported']}, "
+            f"latency={result['latency_ms_per_image']:.2f} ms/img, "
+            f"cosine_vs_fp32 min={cosine.min():.5f}"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
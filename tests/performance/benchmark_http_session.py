@@ -0,0 +1,127 @@
+"""
+Benchmark: per-call requests.request vs pooled keep-alive SendRequest session
+
+Starts a local HTTP/1.1 stub that answers history_cal-style POSTs and
+measures requests/sec for
+- before: module-level ``requests.request`` (new TCP connection per call)
+- after: ``SendRequest.send_post_request`` on the shared pooled session
+both serially and from a thread pool, and reports how many TCP connections
+the stub server accepted.
+
+Usage:
+    python tests/performance/benchmark_http_session.py --requests 500 --threads 8
+"""
+
+import argparse
+import json
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import requests
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
+
+from loguru import logger
+
+from utils.send_request import SendRequest, create_http_session
+
+PAYLOAD = json.dumps(
+    {
+        "deviceCode": "env_611_1",
+        "pointCode": "temperature",
+        "start": "2026-01-01 00:00:00",
+        "end": "2026-01-02 00:00:00",
+    }
+)
+HEADERS = {"Content-Type": "application/json"}
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # 头与正文分两次写出，关闭 Nagle 避免 keep-alive 下的 delayed-ACK 40ms 停顿
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        super().setup()
+        with self.server.lock:
+            self.server.connections += 1
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        body = json.dumps(
+            {"data": {"abscissa": ["2026-01-01 00:00:00"] * 60, "ordinate": [1] * 60}}
+        ).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def start_stub() -> ThreadingHTTPServer:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    server.daemon_threads = True
+    server.lock = threading.Lock()
+    server.connections = 0
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def per_call_post(url: str) -> None:
+    """改造前：每次调用模块级 requests.request"""
+    response = requests.request("POST", url, headers=HEADERS, data=PAYLOAD, timeout=650)
+    response.raise_for_status()
+    response.json()
+
+
+def run(label, fn, url, total, threads, server) -> float:
+    server.connections = 0
+    start = time.perf_counter()
+    if threads <= 1:
+        for _ in range(total):
+            fn(url)
+    else:
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            list(executor.map(fn, [url] * total))
+    elapsed = time.perf_counter() - start
+    rps = total / elapsed
+    logger.info(
+        f"[BENCH] {label} | threads={threads}, requests={total}, "
+        f"elapsed={elapsed:.2f}s, throughput={rps:.1f} req/s, "
+        f"tcp_connections={server.connections}"
+    )
+    return rps
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--threads", type=int, default=8)
+    args = parser.parse_args()
+
+    server = start_stub()
+    url = f"http://127.0.0.1:{server.server_address[1]}/history_cal"
+    sender = SendRequest(session=create_http_session())
+
+    def pooled_post(target: str) -> None:
+        sender.send_post_request(target, HEADERS, PAYLOAD).json()
+
+    for threads in (1, args.threads):
+        before = run("per_call", per_call_post, url, args.requests, threads, server)
+        after = run("pooled", pooled_post, url, args.requests, threads, server)
+        logger.info(f"[BENCH] threads={threads} speedup={after / before:.2f}x")
+
+    server.shutdown()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,149 @@
+"""
+Benchmark: serial vs concurrent LLaMA-VL description requests
+
+Starts a local OpenAI-compatible ``/v1/chat/completions`` stub with a fixed
+per-request latency and measures images/sec of
+``MushroomImageEncoder._get_llama_descriptions_batch`` at several
+max-in-flight levels (1 = the previous serial behaviour). The real
+``_call_llama_api`` path is used, including image compression and response
+parsing.
+
+Usage:
+    python tests/performance/benchmark_llama_dispatch.py --images 32 --latency 0.3
+"""
+
+import argparse
+import json
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from types import SimpleNamespace
+
+import numpy as np
+from PIL import Image
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
+
+from loguru import logger
+
+from vision.mushroom_image_encoder import MushroomImageEncoder
+
+CONTENT = json.dumps(
+    {
+        "growth_stage_description": "Fruiting Stage, thick caps, dense radial cluster",
+        "chinese_description": "子实体阶段，厚菌盖，密集放射状菌簇",
+        "image_quality_score": 88,
+    }
+)
+
+
+class FakeCompletionsHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        server = self.server
+        with server.lock:
+            server.in_flight += 1
+            server.max_in_flight = max(server.max_in_flight, server.in_flight)
+        try:
+            self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            time.sleep(server.latency)
+            body = json.dumps(
+                {"choices": [{"message": {"role": "assistant", "content": CONTENT}}]}
+            ).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        finally:
+            with server.lock:
+                server.in_flight -= 1
+
+    def log_message(self, *args):
+        pass
+
+
+def start_stub(latency: float) -> ThreadingHTTPServer:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeCompletionsHandler)
+    server.daemon_threads = True
+    server.lock = threading.Lock()
+    server.latency = latency
+    server.in_flight = 0
+    server.max_in_flight = 0
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def build_encoder(port: int, max_in_flight: int, rate: float) -> MushroomImageEncoder:
+    encoder = MushroomImageEncoder.__new__(MushroomImageEncoder)
+    encoder.llama_client = True
+    encoder.time_threshold = 60_000
+    encoder.llama_config = SimpleNamespace(
+        llama_host="127.0.0.1",
+        llama_port=port,
+        llama_completions="http://{0}:{1}/v1/chat/completions",
+        model="qwen/qwen3-vl-2b",
+        timeout=60,
+        image_width=768,
+        image_height=768,
+        max_in_flight=max_in_flight,
+        rate_limit_per_second=rate,
+        rate_limit_burst=max_in_flight,
+    )
+    encoder.get_data = SimpleNamespace(
+        get_mushroom_prompt=lambda: "Describe the mushroom growth stage.",
+        get_cached_prompt_meta=lambda: {},
+    )
+    return encoder
+
+
+def make_images(count: int) -> list[Image.Image]:
+    rng = np.random.default_rng(0)
+    return [
+        Image.fromarray(rng.integers(0, 255, (540, 960, 3), dtype=np.uint8))
+        for _ in range(count)
+    ]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--images", type=int, default=32)
+    parser.add_argument("--latency", type=float, default=0.3)
+    parser.add_argument("--levels", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--rate", type=float, default=0.0, help="令牌桶速率，0不限速")
+    args = parser.parse_args()
+
+    logger.remove()
+    logger.add(sys.stderr, level="INFO", filter=lambda r: "[BENCH]" in r["message"])
+
+    server = start_stub(args.latency)
+    images = make_images(args.images)
+
+    baseline = None
+    for level in args.levels:
+        server.max_in_flight = 0
+        encoder = build_encoder(server.server_address[1], level, args.rate)
+        start = time.perf_counter()
+        results = encoder._get_llama_descriptions_batch(images)
+        elapsed = time.perf_counter() - start
+
+        ok = sum(r["image_quality_score"] == 88 for r in results)
+        throughput = len(images) / elapsed
+        baseline = baseline or throughput
+        logger.info(
+            f"[BENCH] max_in_flight={level} | images={len(images)}, ok={ok}, "
+            f"elapsed={elapsed:.2f}s, throughput={throughput:.2f} img/s, "
+            f"server_max_in_flight={server.max_in_flight}, "
+            f"speedup={throughput / baseline:.2f}x"
+        )
+
+    server.shutdown()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
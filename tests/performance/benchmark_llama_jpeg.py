@@ -0,0 +1,197 @@
+"""
+Benchmark: LLaMA upload JPEG compression, legacy binary search vs adaptive encoder
+
+Generates synthetic frames for several cameras (stable scene + per-frame
+noise, 768x432 like the LLaMA input) and reports per image
+- ms/image and JPEG encodes/image
+- distribution of the chosen JPEG quality and SSIM
+for
+- before: the previous ``_binary_search_quality`` loop (full encode + decode +
+  float64 full-resolution SSIM per step, up to 4 downscale attempts)
+- after: ``AdaptiveJpegEncoder`` (size-model search, per-camera quality cache,
+  SSIM on a downsampled float32 luma plane for size-fitting candidates only)
+
+Usage:
+    python tests/performance/benchmark_llama_jpeg.py --cameras 6 --frames 10
+"""
+
+import argparse
+import io
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
+
+from loguru import logger
+
+from vision.adaptive_jpeg import AdaptiveJpegEncoder, encode_jpeg
+
+PARAMS = {
+    "max_image_bytes": 350 * 1024,
+    "min_jpeg_quality": 50,
+    "jpeg_quality": 80,
+    "ssim_threshold": 0.95,
+    "quality_search_steps": 7,
+    "downscale_step_percent": 15,
+    "max_downscale_attempts": 4,
+}
+
+
+def make_frames(
+    cameras: int, frames: int, max_bytes: int
+) -> list[tuple[str, Image.Image]]:
+    """每个摄像头一个固定场景，逐帧叠加少量噪声；噪声强度随摄像头变化以覆盖不同质量区间"""
+    rng = np.random.default_rng(0)
+    height, width = 432, 768
+    y, x = np.mgrid[0:height, 0:width]
+    result = []
+    for camera in range(cameras):
+        base = np.stack(
+            [
+                x / width * 120 + 40 + camera * 10,
+                y / height * 100 + 60,
+                (x + y) / (width + height) * 90 + 20,
+            ],
+            axis=-1,
+        )
+        texture = sum(
+            np.sin(x / (9 + 2 * k) + camera) * np.cos(y / (7 + k)) for k in range(5)
+        )
+        noise_level = 10 + camera * 6 * (max_bytes / (350 * 1024))
+        for _ in range(frames):
+            pixels = (
+                base
+                + texture[..., None] * 30
+                + rng.normal(0, noise_level, (height, width, 3))
+            )
+            image = Image.fromarray(np.clip(pixels, 0, 255).astype(np.uint8))
+            result.append((f"19216812{camera}", image))
+    return result
+
+
+# ---- 改造前实现（原 MushroomImageEncoder._binary_search_quality 流程）----
+
+
+def legacy_ssim(source: Image.Image, target: Image.Image) -> float:
+    src = np.asarray(source.convert("L"), dtype=np.float64)
+    tgt = np.asarray(target.convert("L"), dtype=np.float64)
+    c1, c2 = (0.01 * 255) ** 2, (0.03 * 255) ** 2
+    mu_s, mu_t = src.mean(), tgt.mean()
+    cov = ((src - mu_s) * (tgt - mu_t)).mean()
+    num = (2 * mu_s * mu_t + c1) * (2 * cov + c2)
+    den = (mu_s**2 + mu_t**2 + c1) * (src.var() + tgt.var() + c2)
+    return float(max(0.0, min(1.0, num / den))) if den > 0 else 0.0
+
+
+def legacy_search(image, max_bytes, low, high, ssim_threshold, steps, counter):
+    min_q, max_q = low, high
+    best_bytes = encode_jpeg(image, low)
+    counter[0] += 1
+    best_q, best_ssim = low, 0.0
+    for _ in range(steps):
+        if low > high:
+            break
+        mid = (low + high) // 2
+        encoded = encode_jpeg(image, mid)
+        counter[0] += 1
+        ssim = legacy_ssim(image, Image.open(io.BytesIO(encoded)).convert("RGB"))
+        if len(encoded) <= max_bytes and ssim >= ssim_threshold:
+            if mid >= best_q:
+                best_bytes, best_q, best_ssim = encoded, mid, ssim
+            low = mid + 1
+        else:
+            high = mid - 1
+    if best_ssim <= 0.0:
+        fallback = min_q
+        for q in range(max_q, min_q - 1, -5):
+            encoded = encode_jpeg(image, q)
+            counter[0] += 1
+            if len(encoded) <= max_bytes:
+                best_ssim = legacy_ssim(
+                    image, Image.open(io.BytesIO(encoded)).convert("RGB")
+                )
+                best_bytes, fallback = encoded, q
+                break
+        best_q = fallback
+    return best_bytes, best_q, best_ssim
+
+
+def legacy_encode(image, counter, p=PARAMS):
+    current, quality = image, p["jpeg_quality"]
+    for _ in range(p["max_downscale_attempts"]):
+        data, q, ssim = legacy_search(
+            current,
+            p["max_image_bytes"],
+            p["min_jpeg_quality"],
+            quality,
+            p["ssim_threshold"],
+            p["quality_search_steps"],
+            counter,
+        )
+        if len(data) <= p["max_image_bytes"]:
+            return data, q, ssim
+        w, h = current.size
+        current = current.resize(
+            (max(64, int(w * 0.85)), max(64, int(h * 0.85))), Image.Resampling.LANCZOS
+        )
+        quality = max(p["min_jpeg_quality"], quality - 5)
+    return encode_jpeg(current, p["min_jpeg_quality"]), p["min_jpeg_quality"], 0.0
+
+
+def describe(label, elapsed, encodes, qualities, ssims, count):
+    q = np.array(qualities)
+    s = np.array(ssims)
+    logger.info(
+        f"[BENCH] {label} | {elapsed / count * 1000:.1f} ms/image, "
+        f"encodes/image={encodes / count:.2f}, "
+        f"quality p10/p50/p90={np.percentile(q, 10):.0f}/{np.percentile(q, 50):.0f}/{np.percentile(q, 90):.0f}, "
+        f"ssim min/p50={s.min():.4f}/{np.median(s):.4f}"
+    )
+    logger.info(
+        f"[BENCH] {label} | quality histogram: {dict(sorted(Counter(qualities).items()))}"
+    )
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--cameras", type=int, default=6)
+    parser.add_argument("--frames", type=int, default=10)
+    parser.add_argument("--max-bytes", type=int, default=60 * 1024)
+    args = parser.parse_args()
+    PARAMS["max_image_bytes"] = args.max_bytes
+
+    frames = make_frames(args.cameras, args.frames, args.max_bytes)
+
+    counter = [0]
+    qualities, ssims = [], []
+    start = time.perf_counter()
+    for _, image in frames:
+        _, q, ssim = legacy_encode(image, counter)
+        qualities.append(q)
+        ssims.append(ssim)
+    before = time.perf_counter() - start
+    describe("legacy", before, counter[0], qualities, ssims, len(frames))
+
+    engine = AdaptiveJpegEncoder()
+    qualities, ssims, encodes = [], [], 0
+    start = time.perf_counter()
+    for camera, image in frames:
+        result = engine.encode(image, camera_key=camera, **PARAMS)
+        qualities.append(result.quality)
+        ssims.append(result.ssim)
+        encodes += result.encodes
+    after = time.perf_counter() - start
+    describe("adaptive", after, encodes, qualities, ssims, len(frames))
+
+    logger.info(f"[BENCH] speedup={before / after:.2f}x | {engine.get_stats()}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,152 @@
+"""
+Benchmark: row-by-row vs vectorised setpoint change detection
+
+Generates a synthetic 24h dataset (default 500 device points, one sample every
+5 minutes) and compares the original per-group ``group.iloc[i]`` loops
+(DeviceSetpointChangeMonitor.detect_setpoint_changes / detect_point_changes)
+against utils.setpoint_change_engine.detect_setpoint_changes_frame, checking
+that both report the same changes.
+
+Usage:
+    python tests/performance/benchmark_setpoint_change_detection.py --points 500 --hours 24 --interval-minutes 5
+"""
+
+import argparse
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
+
+from loguru import logger
+
+from utils.setpoint_change_engine import detect_setpoint_changes_frame
+
+CHANGE_TYPES = ["digital_on_off", "analog_value", "enum_state"]
+
+
+def build_dataset(points: int, hours: int, interval_minutes: int) -> pd.DataFrame:
+    """构造 points 个测点 × hours 小时的设定点时间序列（整体按时间排序）"""
+    rng = np.random.default_rng(0)
+    samples = hours * 60 // interval_minutes
+    start = datetime(2026, 1, 1)
+    times = pd.date_range(start, periods=samples, freq=f"{interval_minutes}min")
+
+    frames = []
+    for idx in range(points):
+        change_type = CHANGE_TYPES[idx % len(CHANGE_TYPES)]
+        if change_type == "analog_value":
+            # 设定值偶尔调整，大部分时间保持不变
+            steps = rng.normal(scale=0.8, size=samples) * (rng.random(samples) < 0.05)
+            values = np.round(18 + np.cumsum(steps), 1)
+        else:
+            flips = rng.random(samples) < 0.03
+            levels = 2 if change_type == "digital_on_off" else 4
+            values = (np.cumsum(flips) % levels).astype(float)
+        values[rng.random(samples) < 0.01] = np.nan
+        frames.append(
+            pd.DataFrame(
+                {
+                    "time": times,
+                    "device_name": f"device_{idx // 4}_611",
+                    "point_name": f"point_{idx % 4}",
+                    "value": values,
+                    "room_id": "611",
+                    "device_type": f"device_{idx // 4}",
+                    "change_type": change_type,
+                    "threshold": 0.5 if change_type == "analog_value" else None,
+                    "description": f"point {idx}",
+                }
+            )
+        )
+    return pd.concat(frames, ignore_index=True).sort_values("time", kind="mergesort")
+
+
+def legacy_detect(setpoint_data: pd.DataFrame) -> list[dict]:
+    """原逐行实现（group.iloc[i] / group.iloc[i-1]）"""
+    changes = []
+    for (device_name, point_name), group in setpoint_data.groupby(
+        ["device_name", "point_name"]
+    ):
+        if len(group) < 2:
+            continue
+        group = group.sort_values("time").reset_index(drop=True)
+        change_type = group.iloc[0]["change_type"]
+        threshold = group.iloc[0]["threshold"]
+        for i in range(1, len(group)):
+            current_row = group.iloc[i]
+            previous_row = group.iloc[i - 1]
+            current_value = current_row["value"]
+            previous_value = previous_row["value"]
+            if pd.isna(current_value) or pd.isna(previous_value):
+                continue
+            if change_type in ("digital_on_off", "enum_state"):
+                detected = int(current_value) != int(previous_value)
+            else:
+                detected = bool(
+                    threshold and abs(current_value - previous_value) >= threshold
+                )
+            if detected:
+                changes.append(
+                    {
+                        "room_id": group.iloc[0]["room_id"],
+                        "device_type": group.iloc[0]["device_type"],
+                        "device_name": device_name,
+                        "point_name": point_name,
+                        "point_description": group.iloc[0]["description"],
+                        "change_time": current_row["time"],
+                        "previous_value": float(previous_value),
+                        "current_value": float(current_value),
+                        "change_type": change_type,
+                        "detection_time": datetime.now(),
+                    }
+                )
+    return changes
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--points", type=int, default=500)
+    parser.add_argument("--hours", type=int, default=24)
+    parser.add_argument("--interval-minutes", type=int, default=5)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    data = build_dataset(args.points, args.hours, args.interval_minutes)
+    logger.info(f"[BENCH] dataset | points={args.points}, rows={len(data)}")
+
+    start = time.perf_counter()
+    legacy = legacy_detect(data)
+    legacy_elapsed = time.perf_counter() - start
+    logger.info(
+        f"[BENCH] row_loop | elapsed={legacy_elapsed:.3f}s, changes={len(legacy)}"
+    )
+
+    vector_elapsed = float("inf")
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        result = detect_setpoint_changes_frame(data)
+        vector_elapsed = min(vector_elapsed, time.perf_counter() - start)
+    logger.info(
+        f"[BENCH] vectorised | elapsed={vector_elapsed:.3f}s, changes={len(result)}, "
+        f"speedup={legacy_elapsed / max(vector_elapsed, 1e-9):.1f}x"
+    )
+
+    keys = ["device_name", "point_name", "change_time"]
+    legacy_df = pd.DataFrame(legacy).sort_values(keys).reset_index(drop=True)
+    result_df = result.sort_values(keys).reset_index(drop=True)
+    columns = keys + ["previous_value", "current_value", "change_type"]
+    if not legacy_df[columns].equals(result_df[columns]):
+        logger.error("[BENCH] parity check failed: change records differ")
+        return 1
+    logger.info("[BENCH] parity check passed")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
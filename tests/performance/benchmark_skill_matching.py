@@ -0,0 +1,139 @@
+"""
+Benchmark: linear scan vs indexed skill matching
+
+Generates a synthetic skill library (default 2,000 skills with random
+growth-day ranges, seasons, env bounds and statuses) and compares the original
+per-context scan over every skill (match_growth_day / match_season /
+match_env on each call) against CultivationSkillEngine.match_skills, which
+uses the season buckets and growth-day interval index built when the library
+is loaded. Both must return the same skills in the same order.
+
+Usage:
+    python tests/performance/benchmark_skill_matching.py --skills 2000 --contexts 5000
+"""
+
+import argparse
+import json
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+# Add src and tests to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from loguru import logger
+
+from decision_analysis.skills.cultivation_skill import (
+    CultivationSkillEngine,
+    SkillContext,
+)
+from skill_matching_reference import linear_match
+
+SEASONS = ["spring", "summer", "autumn", "winter"]
+
+
+def build_library(skills: int, seed: int = 0) -> dict:
+    """构造 skills 条规则：约 1/10 不限生长天，约 1/5 不限季节"""
+    rng = random.Random(seed)
+    items = []
+    for idx in range(skills):
+        conditions = {}
+        if rng.random() > 0.1:
+            low = rng.randint(0, 40)
+            conditions["growth_day_range"] = [low, low + rng.randint(0, 6)]
+        if rng.random() > 0.2:
+            conditions["season"] = rng.sample(SEASONS, rng.randint(1, 2))
+        env = {}
+        if rng.random() > 0.3:
+            low = rng.uniform(10, 20)
+            env["temperature"] = [round(low, 1), round(low + rng.uniform(1, 6), 1)]
+        if rng.random() > 0.3:
+            low = rng.uniform(75, 95)
+            env["humidity"] = [round(low, 1), round(low + rng.uniform(2, 10), 1)]
+        if rng.random() > 0.5:
+            low = rng.uniform(500, 2000)
+            env["co2"] = [round(low), round(low + rng.uniform(200, 1500))]
+        conditions["env"] = env
+        items.append(
+            {
+                "skill_id": f"bench_skill_{idx}",
+                "status": "active" if rng.random() > 0.1 else "candidate",
+                "priority": rng.choice(["high", "medium", "low"]),
+                "applicable_conditions": conditions,
+            }
+        )
+    return {"skill_library_version": "bench", "skills": items}
+
+
+def build_contexts(count: int, seed: int = 1) -> list:
+    rng = random.Random(seed)
+    return [
+        SkillContext(
+            room_id="611",
+            analysis_time=datetime(2026, 1, 1),
+            growth_day=rng.randint(0, 45),
+            season=rng.choice(SEASONS),
+            temperature=rng.uniform(10, 24),
+            humidity=rng.uniform(75, 100),
+            co2=rng.uniform(500, 3500),
+        )
+        for _ in range(count)
+    ]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--skills", type=int, default=2000)
+    parser.add_argument("--contexts", type=int, default=5000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        library_path = Path(tmp_dir) / "cultivation_skill_library.json"
+        library_path.write_text(
+            json.dumps(build_library(args.skills)), encoding="utf-8"
+        )
+        start = time.perf_counter()
+        engine = CultivationSkillEngine(config_path=library_path)
+        load_elapsed = time.perf_counter() - start
+    contexts = build_contexts(args.contexts)
+    logger.info(
+        f"[BENCH] library | skills={len(engine.skills)}, contexts={len(contexts)}, "
+        f"load+index={load_elapsed:.3f}s"
+    )
+
+    start = time.perf_counter()
+    legacy = [linear_match(engine, context) for context in contexts]
+    legacy_elapsed = time.perf_counter() - start
+    logger.info(
+        f"[BENCH] linear_scan | elapsed={legacy_elapsed:.3f}s, "
+        f"per_context={legacy_elapsed / len(contexts) * 1e6:.1f}us"
+    )
+
+    start = time.perf_counter()
+    indexed = [engine.match_skills(context) for context in contexts]
+    indexed_elapsed = time.perf_counter() - start
+    matches = sum(len(result) for result in indexed)
+    logger.info(
+        f"[BENCH] indexed | elapsed={indexed_elapsed:.3f}s, "
+        f"per_context={indexed_elapsed / len(contexts) * 1e6:.1f}us, "
+        f"avg_matches={matches / len(contexts):.1f}, "
+        f"speedup={legacy_elapsed / max(indexed_elapsed, 1e-9):.1f}x"
+    )
+
+    for context, expected, result in zip(contexts, legacy, indexed):
+        if [s["skill_id"] for s in expected] != [s["skill_id"] for s in result]:
+            logger.error(
+                f"[BENCH] parity check failed: growth_day={context.growth_day}, "
+                f"season={context.season}"
+            )
+            return 1
+    logger.info("[BENCH] parity check passed")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
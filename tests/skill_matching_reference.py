@@ -0,0 +1,64 @@
+"""
+Reference linear-scan skill matcher shared by the skill matching tests
+
+Keeps the original per-skill CultivationSkillEngine matching (status check,
+then match_growth_day / match_season / match_env on every call) as the oracle
+that the indexed CultivationSkillEngine.match_skills is compared against in
+tests/unit/test_cultivation_skill_matching.py and
+tests/performance/benchmark_skill_matching.py.
+"""
+
+from typing import Any, Dict, Optional
+
+
+# 原 CultivationSkillEngine 的逐条匹配条件，仅作为参照实现保留
+def match_growth_day(value: Optional[int], value_range: Any) -> bool:
+    if value is None:
+        return False
+    if not isinstance(value_range, list) or len(value_range) != 2:
+        return True
+    return int(value_range[0]) <= int(value) <= int(value_range[1])
+
+
+def match_season(value: Optional[str], seasons: Any) -> bool:
+    if not value:
+        return False
+    if not isinstance(seasons, list) or not seasons:
+        return True
+    lowered = {str(item).lower() for item in seasons}
+    return "all" in lowered or str(value).lower() in lowered
+
+
+def match_env(context, env_rules: Dict[str, Any]) -> bool:
+    def in_range(current: Optional[float], bounds: Any) -> bool:
+        if current is None:
+            return False
+        if not isinstance(bounds, list) or len(bounds) != 2:
+            return True
+        return float(bounds[0]) <= float(current) <= float(bounds[1])
+
+    return (
+        in_range(context.temperature, env_rules.get("temperature"))
+        and in_range(context.humidity, env_rules.get("humidity"))
+        and in_range(context.co2, env_rules.get("co2"))
+    )
+
+
+def linear_match(engine, context) -> list:
+    """原实现：逐条扫描并在每次调用时重新解析触发条件"""
+    matched = []
+    for skill in engine.skills:
+        if str(skill.get("status", "active")).lower() != "active":
+            continue
+        conditions = skill.get("applicable_conditions", {}) or {}
+        if not match_growth_day(context.growth_day, conditions.get("growth_day_range")):
+            continue
+        if not match_season(context.season, conditions.get("season")):
+            continue
+        if not match_env(context, conditions.get("env") or {}):
+            continue
+        matched.append(skill)
+    matched.sort(
+        key=lambda item: engine._priority_score(item.get("priority")), reverse=True
+    )
+    return matched
@@ -0,0 +1,182 @@
+"""
+Unit tests for the adaptive JPEG encoder used for LLaMA uploads
+
+Tests cover:
+- Size-model search returns the highest quality within the byte budget
+- Candidates must also pass the SSIM threshold; size-only fallback when none does
+- Per-camera quality cache shortens the search for the next frame
+- Downscaling when no quality fits; min-quality fallback
+- Downsampled float32 luma SSIM
+"""
+
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+from PIL import Image
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
+
+from vision.adaptive_jpeg import (
+    AdaptiveJpegEncoder,
+    decoded_luma,
+    encode_jpeg,
+    global_ssim,
+    luma_plane,
+)
+
+ENCODE_KWARGS = {
+    "min_jpeg_quality": 50,
+    "jpeg_quality": 80,
+    "quality_search_steps": 7,
+    "downscale_step_percent": 15,
+    "max_downscale_attempts": 4,
+}
+
+
+def scene(seed: int, noise: float = 12, size=(768, 432)) -> Image.Image:
+    """平滑渐变 + 纹理 + 噪声的合成场景，同一 seed 视为同一摄像头"""
+    rng = np.random.default_rng(seed)
+    width, height = size
+    y, x = np.mgrid[0:height, 0:width]
+    base = np.stack(
+        [x / width * 120 + 60, y / height * 100 + 80, (x + y) / (width + height) * 80],
+        axis=-1,
+    )
+    texture = sum(
+        np.sin(x / (17 + 3 * k) + seed) * np.cos(y / (11 + 2 * k)) for k in range(4)
+    )
+    pixels = base + texture[..., None] * 25 + rng.normal(0, noise, (height, width, 3))
+    return Image.fromarray(np.clip(pixels, 0, 255).astype(np.uint8))
+
+
+def best_quality(image, max_bytes, low=50, high=80):
+    fitting = [
+        q for q in range(low, high + 1) if len(encode_jpeg(image, q)) <= max_bytes
+    ]
+    return max(fitting) if fitting else None
+
+
+@pytest.mark.parametrize("max_bytes", [30_000, 40_000, 55_000, 200_000])
+def test_search_matches_exhaustive_best_quality(max_bytes):
+    image = scene(0)
+    data, quality, _, encodes = AdaptiveJpegEncoder().search_quality(
+        image, max_bytes, 50, 80, max_steps=7
+    )
+
+    assert quality == best_quality(image, max_bytes)
+    assert len(data) <= max_bytes
+    assert encodes <= 7
+
+
+def test_search_rejects_small_quality_below_ssim_threshold():
+    image = scene(0)
+    encoded = {q: encode_jpeg(image, q) for q in range(50, 81)}
+    max_bytes = len(encoded[70])
+    quality_of = {data: q for q, data in encoded.items()}
+
+    def fake_ssim(reference, data):
+        # 体积达标的最高质量（70）SSIM 不达标，其余质量达标
+        return 0.5 if quality_of[data] == 70 else 0.99
+
+    with patch.object(AdaptiveJpegEncoder, "_ssim", staticmethod(fake_ssim)):
+        data, quality, ssim, _ = AdaptiveJpegEncoder().search_quality(
+            image,
+            max_bytes,
+            50,
+            80,
+            max_steps=10,
+            reference=luma_plane(image),
+            ssim_threshold=0.95,
+        )
+
+    assert quality == 69
+    assert ssim == 0.99
+    assert data == encoded[69]
+
+
+def test_unreachable_ssim_falls_back_to_best_size_fit():
+    image = scene(0)
+    max_bytes = len(encode_jpeg(image, 70))
+    # SSIM 不超过 1，门限不可达时退回体积达标的最高质量
+    result = AdaptiveJpegEncoder().encode(
+        image, max_image_bytes=max_bytes, ssim_threshold=1.01, **ENCODE_KWARGS
+    )
+
+    assert result.attempts == 1
+    assert result.quality == 70
+    assert result.ssim < 1.01
+
+
+def test_camera_cache_shortens_search():
+    engine = AdaptiveJpegEncoder()
+    first = engine.encode(
+        scene(1), max_image_bytes=40_000, camera_key="1921681235", **ENCODE_KWARGS
+    )
+    second = engine.encode(
+        scene(1, noise=12.5),
+        max_image_bytes=40_000,
+        camera_key="1921681235",
+        **ENCODE_KWARGS,
+    )
+
+    assert engine.get_stats()["cache_hits"] == 1
+    assert second.encodes <= 2 < first.encodes
+    assert abs(second.quality - first.quality) <= 1
+    assert second.quality == best_quality(scene(1, noise=12.5), 40_000)
+
+
+def test_downscales_when_no_quality_fits():
+    image = scene(2, noise=40)
+    result = AdaptiveJpegEncoder().encode(
+        image, max_image_bytes=25_000, **ENCODE_KWARGS
+    )
+
+    assert result.attempts > 1
+    assert result.size[0] < image.size[0]
+    assert len(result.data) <= 25_000
+
+
+def test_min_quality_fallback_after_all_attempts():
+    result = AdaptiveJpegEncoder().encode(
+        scene(3, noise=60),
+        max_image_bytes=1_000,
+        **{**ENCODE_KWARGS, "max_downscale_attempts": 1},
+    )
+    assert result.quality == 50
+    assert len(result.data) > 1_000
+
+
+def test_luma_ssim_on_downsampled_plane():
+    image = scene(4)
+    reference = luma_plane(image, max_side=256)
+
+    assert reference.dtype == np.float32
+    assert max(reference.shape) <= 256
+    assert global_ssim(reference, reference) == pytest.approx(1.0)
+    high = global_ssim(reference, decoded_luma(encode_jpeg(image, 90), reference.shape))
+    low = global_ssim(reference, decoded_luma(encode_jpeg(image, 20), reference.shape))
+    assert 0 < low < high <= 1
+
+
+def test_encoder_llama_encoding_respects_budget():
+    pytest.importorskip("torch")
+    pytest.importorskip("transformers")
+    from vision.mushroom_image_encoder import MushroomImageEncoder
+
+    encoder = MushroomImageEncoder.__new__(MushroomImageEncoder)
+    encoder.llama_config = SimpleNamespace(
+        image_width=768, image_height=768, max_image_bytes=64 * 1024
+    )
+
+    image_data, compressed, resized = encoder._encode_image_for_llama_with_meta(
+        scene(5, noise=20, size=(1920, 1080)), camera_key="1921681236"
+    )
+
+    assert resized.size == (768, 432)
+    assert len(compressed) <= 64 * 1024
+    assert image_data
@@ -0,0 +1,250 @@
+"""
+Unit tests for parallel per-room execution in safe_batch_decision_analysis
+
+Tests cover:
+- Rooms run concurrently, up to max_workers at a time
+- Results and BATCH_ROOM_RESULT logs keep MUSHROOM_ROOM_IDS order
+- One batch_run_id shared by all rooms; crashes stay isolated per room
+- max_workers=1 keeps the serial behaviour
+- One shared analysis context is prepared per batch and handed to every room
+- Skill contexts of all rooms are prefetched with one query per batch
+- LLMClient requests are capped by the process-wide semaphore
+"""
+
+import sys
+import threading
+from pathlib import Path
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import pytest
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
+
+from decision_analysis import llm_client, tasks
+
+
+class FakeSkillEngine:
+    """记录批量预取调用，按库房返回占位上下文"""
+
+    def __init__(self):
+        self.calls = []
+
+    def build_contexts_from_db(self, room_ids, analysis_time, include_changes=True):
+        self.calls.append((list(room_ids), include_changes))
+        return {str(room_id): f"skill-{room_id}" for room_id in room_ids}
+
+
+SHARED_CONTEXT = SimpleNamespace(
+    built_at=0.0,
+    build_seconds=1.5,
+    prompt_meta={"source": "local"},
+    skill_engine=FakeSkillEngine(),
+)
+ROOM_IDS = ["607", "608", "611", "612"]
+
+
+class FakeRoomAnalysis:
+    """
+    返回固定结果，记录 batch_run_id 与最大并发
+
+    parties 不为空时每个库房在屏障处等待 parties 个库房同时在途，
+    并发度不足时屏障超时失败，因此不依赖耗时判断是否并行。
+    """
+
+    def __init__(self, crash_room=None, parties=None):
+        self.crash_room = crash_room
+        self.barrier = threading.Barrier(parties, timeout=5) if parties else None
+        self.lock = threading.Lock()
+        self.batch_ids = []
+        self.contexts = []
+        self.skill_contexts = {}
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    def __call__(
+        self, room_id, batch_run_id=None, analysis_context=None, skill_context=None
+    ):
+        with self.lock:
+            self.batch_ids.append(batch_run_id)
+            self.contexts.append(analysis_context)
+            self.skill_contexts[room_id] = skill_context
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            if self.barrier is not None:
+                self.barrier.wait()
+            if room_id == self.crash_room:
+                raise RuntimeError("extract failed")
+            return {
+                "success": True,
+                "decision_id": f"DEC-{room_id}",
+                "skill_enabled": True,
+                "skill_matched_count": 1,
+                "dynamic_results_count": 3,
+                "change_count": 1,
+                "setup_time": 0.001,
+            }
+        finally:
+            with self.lock:
+                self.in_flight -= 1
+
+
+def run_batch(fake, max_workers, load_context=None):
+    events = []
+
+    def capture(level, event, message, **context):
+        events.append((event, dict(context)))
+
+    with (
+        patch.object(tasks, "MUSHROOM_ROOM_IDS", list(ROOM_IDS)),
+        patch.object(tasks, "safe_decision_analysis_for_room", fake),
+        patch.object(tasks, "_log_event", side_effect=capture),
+        patch.object(
+            tasks,
+            "load_decision_analysis_context",
+            side_effect=load_context,
+            return_value=SHARED_CONTEXT,
+        ),
+        patch("utils.task_common.check_database_connection", return_value=True),
+    ):
+        tasks.safe_batch_decision_analysis(10, 0, max_workers=max_workers)
+    return events
+
+
+@pytest.mark.parametrize("max_workers", [2, 4])
+def test_rooms_run_in_parallel_up_to_max_workers(max_workers):
+    fake = FakeRoomAnalysis(parties=max_workers)
+    events = run_batch(fake, max_workers=max_workers)
+
+    assert fake.max_in_flight == max_workers
+    summary = next(ctx for event, ctx in events if event == "BATCH_SUMMARY")
+    assert summary["success_count"] == 4
+
+
+def test_summary_keeps_room_order():
+    fake = FakeRoomAnalysis(parties=4)
+    events = run_batch(fake, max_workers=4)
+
+    assert len(set(fake.batch_ids)) == 1
+
+    room_results = [ctx for event, ctx in events if event == "BATCH_ROOM_RESULT"]
+    assert [ctx["room_id"] for ctx in room_results] == list(ROOM_IDS)
+    assert {ctx["batch_id"] for ctx in room_results} == set(fake.batch_ids)
+
+    summary = next(ctx for event, ctx in events if event == "BATCH_SUMMARY")
+    assert summary["success_count"] == 4
+    db_summary = next(ctx for event, ctx in events if event == "BATCH_DB_SUMMARY")
+    assert db_summary["total_dynamic_results"] == 12
+
+
+def test_room_crash_is_isolated():
+    events = run_batch(FakeRoomAnalysis(crash_room="611"), max_workers=4)
+
+    crashes = [ctx for event, ctx in events if event == "ROOM_CRASH"]
+    assert [ctx["room_id"] for ctx in crashes] == ["611"]
+    summary = next(ctx for event, ctx in events if event == "BATCH_SUMMARY")
+    assert (summary["success_count"], summary["failed_count"]) == (3, 1)
+
+
+def test_single_worker_runs_serially():
+    fake = FakeRoomAnalysis()
+    run_batch(fake, max_workers=1)
+
+    assert fake.max_in_flight == 1
+
+
+def test_llm_requests_are_capped_across_clients():
+    limit = 2
+    lock = threading.Lock()
+    state = {"in_flight": 0, "max": 0}
+
+    # 每 limit 个请求在屏障处会合，保证确实出现 limit 个并发请求
+    barrier = threading.Barrier(limit, timeout=5)
+
+    def slow_post(*args, **kwargs):
+        with lock:
+            state["in_flight"] += 1
+            state["max"] = max(state["max"], state["in_flight"])
+        barrier.wait()
+        with lock:
+            state["in_flight"] -= 1
+        return SimpleNamespace(status_code=200)
+
+    clients = []
+    for _ in range(6):
+        client = llm_client.LLMClient.__new__(llm_client.LLMClient)
+        client.api_url = "http://llama/v1/chat/completions"
+        client.timeout = 5
+        clients.append(client)
+
+    with (
+        patch.object(
+            llm_client, "_LLM_REQUEST_SEMAPHORE", threading.BoundedSemaphore(limit)
+        ),
+        patch.object(llm_client.requests, "post", side_effect=slow_post),
+    ):
+        threads = [
+            threading.Thread(target=client._post, args=({}, {})) for client in clients
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    assert state["max"] == limit
+
+
+@pytest.mark.parametrize("max_workers", [0, 16])
+def test_worker_count_is_clamped(max_workers):
+    fake = FakeRoomAnalysis()
+    events = run_batch(fake, max_workers=max_workers)
+
+    assert 1 <= fake.max_in_flight <= len(ROOM_IDS)
+    assert len([e for e, _ in events if e == "BATCH_ROOM_RESULT"]) == 4
+
+
+def test_batch_shares_one_analysis_context():
+    fake = FakeRoomAnalysis()
+    calls = []
+
+    def load_context():
+        calls.append(1)
+        return SHARED_CONTEXT
+
+    events = run_batch(fake, max_workers=4, load_context=load_context)
+
+    assert len(calls) == 1
+    assert fake.contexts == [SHARED_CONTEXT] * 4
+    ready = next(ctx for event, ctx in events if event == "BATCH_CONTEXT_READY")
+    assert ready["reused"] is True
+    summary = next(ctx for event, ctx in events if event == "BATCH_SUMMARY")
+    assert summary["room_setup_sec"] == "0.004"
+
+
+def test_batch_prefetches_skill_contexts_once():
+    fake = FakeRoomAnalysis()
+    SHARED_CONTEXT.skill_engine.calls.clear()
+
+    with patch.object(tasks, "DECISION_ANALYSIS_ENABLE_SKILL_ENGINE", True):
+        events = run_batch(fake, max_workers=4)
+
+    assert SHARED_CONTEXT.skill_engine.calls == [(list(ROOM_IDS), False)]
+    assert fake.skill_contexts == {room: f"skill-{room}" for room in ROOM_IDS}
+    ready = next(ctx for event, ctx in events if event == "BATCH_SKILL_CONTEXT_READY")
+    assert ready["room_count"] == 4
+
+
+def test_context_failure_falls_back_to_per_room_setup():
+    fake = FakeRoomAnalysis()
+
+    def broken():
+        raise RuntimeError("prompt registry down")
+
+    events = run_batch(fake, max_workers=2, load_context=broken)
+
+    assert fake.contexts == [None] * 4
+    assert any(event == "BATCH_CONTEXT_ERROR" for event, _ in events)
+    summary = next(ctx for event, ctx in events if event == "BATCH_SUMMARY")
+    assert summary["success_count"] == 4
@@ -0,0 +1,148 @@
+"""
+Unit tests for the mushroom_batch_summary projection
+
+Tests cover:
+- Refresh recomputes only the requested (room_id, in_date) batches in one
+  locked transaction (delete + insert), duplicates collapsed
+- Aggregation uses the per-image LATERAL latest-quality lookup
+- refresh_batch_summary_since refreshes batches touched after the task start
+- Rebuild optionally limited to rooms; loader filters and column order
+"""
+
+import sys
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
+
+from utils import batch_summary
+from utils.batch_summary import (
+    BATCH_SUMMARY_COLUMNS,
+    load_batch_summary,
+    rebuild_batch_summary,
+    refresh_batch_summary,
+    refresh_batch_summary_since,
+)
+
+
+class FakeResult:
+    def __init__(self, rows=None, rowcount=0):
+        self.rows = rows or []
+        self.rowcount = rowcount
+
+    def fetchall(self):
+        return self.rows
+
+
+class FakeEngine:
+    """记录语句、参数与事务边界；SELECT 返回预置行"""
+
+    def __init__(self, rows=None, rowcount=3):
+        self.rows = rows or []
+        self.rowcount = rowcount
+        self.statements = []
+        self.transactions = 0
+
+    @contextmanager
+    def begin(self):
+        self.transactions += 1
+        yield self
+
+    @contextmanager
+    def connect(self):
+        yield self
+
+    def execute(self, statement, params=None):
+        sql = " ".join(str(statement).split())
+        self.statements.append((sql, params))
+        if sql.startswith("INSERT"):
+            return FakeResult(rowcount=self.rowcount)
+        return FakeResult(rows=self.rows)
+
+
+def test_refresh_recomputes_requested_batches_in_one_transaction():
+    engine = FakeEngine()
+    written = refresh_batch_summary(
+        [("612", date(2026, 1, 2)), (611, date(2026, 1, 1)), ("612", date(2026, 1, 2))],
+        db_engine=engine,
+    )
+
+    assert written == 3
+    assert engine.transactions == 1
+    (lock_sql, _), (delete_sql, params), (insert_sql, insert_params) = (
+        engine.statements
+    )
+    assert "pg_advisory_xact_lock" in lock_sql
+    assert delete_sql.startswith("DELETE FROM mushroom_batch_summary")
+    assert params == {
+        "room_ids": ["611", "612"],
+        "in_dates": [date(2026, 1, 1), date(2026, 1, 2)],
+    }
+    assert insert_params == params
+    assert "LEFT JOIN LATERAL" in insert_sql
+    assert "ORDER BY created_at DESC LIMIT 1" in insert_sql
+    assert "GROUP BY e.room_id, e.in_date, e.in_num" in insert_sql
+    assert "GROUP BY image_path" not in insert_sql
+
+
+def test_refresh_without_batches_skips_database():
+    engine = FakeEngine()
+
+    assert refresh_batch_summary([], db_engine=engine) == 0
+    assert engine.statements == []
+
+
+def test_refresh_since_uses_touched_batches(monkeypatch):
+    engine = FakeEngine(rows=[("611", date(2026, 1, 1))])
+    refreshed = []
+    monkeypatch.setattr(
+        batch_summary,
+        "refresh_batch_summary",
+        lambda batches, db_engine: refreshed.append(batches) or 1,
+    )
+    since = datetime(2026, 1, 15, 10)
+
+    assert refresh_batch_summary_since(since, db_engine=engine) == 1
+
+    sql, params = engine.statements[0]
+    assert "mushroom_embedding WHERE updated_at >= :since" in sql
+    assert "q.updated_at >= :since" in sql
+    assert params["since"] < since
+    assert since - params["since"] <= timedelta(minutes=10)
+    assert refreshed == [[("611", date(2026, 1, 1))]]
+
+
+def test_rebuild_optionally_limited_to_rooms():
+    engine = FakeEngine(rowcount=40)
+
+    assert rebuild_batch_summary(db_engine=engine) == 40
+    _, (delete_all, _), (insert_all, _) = engine.statements
+    assert delete_all == "DELETE FROM mushroom_batch_summary"
+    assert "WHERE" not in insert_all.split("ON TRUE")[1]
+
+    engine.statements.clear()
+    rebuild_batch_summary(room_ids=[611], db_engine=engine)
+    _, (delete_sql, params), (insert_sql, _) = engine.statements
+    assert delete_sql.endswith("WHERE room_id = ANY(:room_ids)")
+    assert "WHERE e.room_id = ANY(:room_ids)" in insert_sql
+    assert params == {"room_ids": ["611"]}
+
+
+def test_load_batch_summary_filters_and_columns():
+    row = ("611", date(2026, 1, 1), 1200, 1, 20, None, None, 81.5, 96)
+    engine = FakeEngine(rows=[row])
+
+    df = load_batch_summary(
+        room_ids=["611"],
+        date_range=(date(2026, 1, 1), date(2026, 1, 31)),
+        db_engine=engine,
+    )
+
+    sql, params = engine.statements[0]
+    assert "FROM mushroom_batch_summary" in sql
+    assert "room_id = ANY(:room_ids)" in sql and "in_date >= :start_date" in sql
+    assert params["end_date"] == date(2026, 1, 31)
+    assert list(df.columns) == BATCH_SUMMARY_COLUMNS
+    assert df.iloc[0]["avg_quality"] == 81.5
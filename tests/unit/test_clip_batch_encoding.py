@@ -0,0 +1,204 @@
+"""
+Unit tests for MushroomImageEncoder batched CLIP encoding
+
+Tests cover:
+- Batched multimodal embeddings match the single-image path
+- Batched image-only embeddings match the single-image path
+- Micro-batch size only changes the number of forward passes
+- Failed micro-batches fall back to per-image encoding
+- Repeated images/descriptions are served from the feature cache
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+torch = pytest.importorskip("torch")
+transformers = pytest.importorskip("transformers")
+
+from PIL import Image
+from transformers import BatchEncoding, CLIPConfig, CLIPModel
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
+
+from vision.embedding_cache import EmbeddingCache
+from vision.mushroom_image_encoder import MushroomImageEncoder
+
+IMAGE_SIZE = 32
+MAX_TEXT_LEN = 16
+
+
+class FakeCLIPProcessor:
+    """Minimal stand-in for CLIPProcessor (no tokenizer files needed)"""
+
+    def __call__(
+        self,
+        text=None,
+        images=None,
+        return_tensors="pt",
+        padding=False,
+        truncation=False,
+    ):
+        data = {}
+        if images is not None:
+            pixels = [
+                np.asarray(img.resize((IMAGE_SIZE, IMAGE_SIZE)), dtype=np.float32)
+                / 255.0
+                for img in images
+            ]
+            data["pixel_values"] = torch.from_numpy(
+                np.stack(pixels).transpose(0, 3, 1, 2).copy()
+            )
+        if text is not None:
+            texts = [text] if isinstance(text, str) else list(text)
+            # bos=1, eos=99 (config.eos_token_id), right padded with 0
+            token_rows = [
+                [1] + [3 + (ord(c) % 90) for c in t][: MAX_TEXT_LEN - 2] + [99]
+                for t in texts
+            ]
+            width = max(len(r) for r in token_rows)
+            input_ids = torch.zeros((len(token_rows), width), dtype=torch.long)
+            attention_mask = torch.zeros((len(token_rows), width), dtype=torch.long)
+            for i, row in enumerate(token_rows):
+                input_ids[i, : len(row)] = torch.tensor(row)
+                attention_mask[i, : len(row)] = 1
+            data["input_ids"] = input_ids
+            data["attention_mask"] = attention_mask
+        return BatchEncoding(data)
+
+
+@pytest.fixture(scope="module")
+def encoder():
+    """Encoder with a tiny randomly initialised CLIP model"""
+    torch.manual_seed(0)
+    config = CLIPConfig(
+        text_config={
+            "vocab_size": 100,
+            "hidden_size": 32,
+            "intermediate_size": 64,
+            "num_hidden_layers": 2,
+            "num_attention_heads": 4,
+            "max_position_embeddings": MAX_TEXT_LEN,
+            "eos_token_id": 99,
+        },
+        vision_config={
+            "image_size": IMAGE_SIZE,
+            "patch_size": 8,
+            "hidden_size": 32,
+            "intermediate_size": 64,
+            "num_hidden_layers": 2,
+            "num_attention_heads": 4,
+        },
+        projection_dim=16,
+    )
+    enc = MushroomImageEncoder.__new__(MushroomImageEncoder)
+    enc.device = "cpu"
+    enc.clip_model = CLIPModel(config).eval()
+    enc.clip_processor = FakeCLIPProcessor()
+    enc.clip_batch_size = 4
+    return enc
+
+
+@pytest.fixture(scope="module")
+def samples():
+    rng = np.random.default_rng(42)
+    images = [
+        Image.fromarray(rng.integers(0, 255, (48, 64, 3), dtype=np.uint8))
+        for _ in range(10)
+    ]
+    images[3] = images[3].convert("L")  # non-RGB input must be converted
+    texts = [
+        f"Mushroom Room 611, fruiting stage, Day {i}. " + "cap " * (i % 4)
+        for i in range(10)
+    ]
+    return images, texts
+
+
+def test_multimodal_batch_matches_single(encoder, samples):
+    images, texts = samples
+    batched = np.asarray(encoder.encode_clip_batch(images, texts))
+    single = np.asarray(
+        [encoder.get_multimodal_embedding(img, t) for img, t in zip(images, texts)]
+    )
+
+    assert batched.shape == single.shape == (10, 16)
+    np.testing.assert_allclose(batched, single, rtol=0, atol=1e-5)
+    np.testing.assert_allclose(np.linalg.norm(batched, axis=1), 1.0, atol=1e-6)
+
+
+def test_image_batch_matches_single(encoder, samples):
+    images, _ = samples
+    batched = np.asarray(encoder.encode_clip_batch(images))
+    single = np.asarray([encoder.get_image_embedding(img) for img in images])
+
+    np.testing.assert_allclose(batched, single, rtol=0, atol=1e-5)
+
+
+def test_micro_batch_size_controls_forward_passes(encoder, samples, mocker):
+    images, texts = samples
+    spy = mocker.spy(encoder.clip_model, "get_image_features")
+
+    encoder.encode_clip_batch(images, texts, batch_size=4)
+
+    assert spy.call_count == 3
+    assert [c.kwargs["pixel_values"].shape[0] for c in spy.call_args_list] == [4, 4, 2]
+
+
+def test_failed_micro_batch_falls_back_to_single(encoder, samples, mocker):
+    images, texts = samples
+    original = encoder._encode_clip_micro_batch
+
+    def flaky(chunk_images, chunk_texts=None):
+        if len(chunk_images) > 1:
+            raise RuntimeError("boom")
+        return original(chunk_images, chunk_texts)
+
+    mocker.patch.object(encoder, "_encode_clip_micro_batch", side_effect=flaky)
+    embeddings = encoder.encode_clip_batch(images[:3], texts[:3])
+
+    assert len(embeddings) == 3
+    assert all(e is not None for e in embeddings)
+
+
+def test_mismatched_lengths_rejected(encoder, samples):
+    images, texts = samples
+    with pytest.raises(ValueError):
+        encoder.encode_clip_batch(images, texts[:2])
+
+
+def test_feature_cache_skips_repeated_forward(
+    encoder, samples, mocker, monkeypatch, tmp_path
+):
+    images, texts = samples
+    images = [img.copy() for img in images[:4]]
+    texts = [texts[0], "  " + texts[0].replace(" ", "   "), texts[1], texts[2]]
+    uncached = np.asarray(encoder.encode_clip_batch(images, texts))
+
+    monkeypatch.setattr(encoder, "clip_model_version", "tiny-clip|fp32", raising=False)
+    monkeypatch.setattr(
+        encoder,
+        "embedding_cache",
+        EmbeddingCache(tmp_path / "features.sqlite3"),
+        raising=False,
+    )
+    image_spy = mocker.spy(encoder.clip_model, "get_image_features")
+    text_spy = mocker.spy(encoder.clip_model, "get_text_features")
+
+    first = np.asarray(encoder.encode_clip_batch(images, texts))
+    # 空白差异的描述规范化后只前向一次
+    assert [c.kwargs["pixel_values"].shape[0] for c in image_spy.call_args_list] == [4]
+    assert [c.kwargs["input_ids"].shape[0] for c in text_spy.call_args_list] == [3]
+
+    second = np.asarray(
+        encoder.encode_clip_batch([img.copy() for img in images], texts)
+    )
+    image_only = np.asarray(encoder.encode_clip_batch(images))
+
+    assert image_spy.call_count == 1
+    assert text_spy.call_count == 1
+    np.testing.assert_allclose(first, uncached, rtol=0, atol=1e-5)
+    np.testing.assert_array_equal(second, first)
+    assert image_only.shape == (4, 16)
@@ -0,0 +1,191 @@
+"""
+Unit tests for the opt-in CLIP CPU inference backends
+
+Tests cover:
+- Config parsing from settings sections, invalid values fall back to fp32
+- Dynamic INT8 quantisation replaces Linear layers and passes the cosine guard
+- Accuracy guard failure falls back to the fp32 eager model
+- TorchScript image tower matches eager output
+- Encoder micro-batch path routes through the prepared backend
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+torch = pytest.importorskip("torch")
+transformers = pytest.importorskip("transformers")
+
+from PIL import Image
+from transformers import BatchEncoding, CLIPConfig, CLIPModel
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
+
+from vision.clip_backend import (
+    BACKEND_FP32,
+    BACKEND_INT8_DYNAMIC,
+    GRAPH_MODE_NONE,
+    GRAPH_MODE_TORCHSCRIPT,
+    ClipInferenceConfig,
+    prepare_clip_inference,
+)
+from vision.mushroom_image_encoder import MushroomImageEncoder
+
+IMAGE_SIZE = 32
+MAX_TEXT_LEN = 16
+
+
+class FakeCLIPProcessor:
+    """Minimal stand-in for CLIPProcessor (no tokenizer files needed)"""
+
+    def __call__(
+        self,
+        text=None,
+        images=None,
+        return_tensors="pt",
+        padding=False,
+        truncation=False,
+    ):
+        data = {}
+        if images is not None:
+            pixels = [
+                np.asarray(img.resize((IMAGE_SIZE, IMAGE_SIZE)), dtype=np.float32)
+                / 255.0
+                for img in images
+            ]
+            data["pixel_values"] = torch.from_numpy(
+                np.stack(pixels).transpose(0, 3, 1, 2).copy()
+            )
+        if text is not None:
+            texts = [text] if isinstance(text, str) else list(text)
+            rows = [
+                [1] + [3 + (ord(c) % 90) for c in t][: MAX_TEXT_LEN - 2] + [99]
+                for t in texts
+            ]
+            width = max(len(r) for r in rows)
+            input_ids = torch.zeros((len(rows), width), dtype=torch.long)
+            attention_mask = torch.zeros((len(rows), width), dtype=torch.long)
+            for i, row in enumerate(rows):
+                input_ids[i, : len(row)] = torch.tensor(row)
+                attention_mask[i, : len(row)] = 1
+            data["input_ids"] = input_ids
+            data["attention_mask"] = attention_mask
+        return BatchEncoding(data)
+
+
+@pytest.fixture
+def clip_model():
+    torch.manual_seed(0)
+    config = CLIPConfig(
+        text_config={
+            "vocab_size": 100,
+            "hidden_size": 32,
+            "intermediate_size": 64,
+            "num_hidden_layers": 2,
+            "num_attention_heads": 4,
+            "max_position_embeddings": MAX_TEXT_LEN,
+            "eos_token_id": 99,
+        },
+        vision_config={
+            "image_size": IMAGE_SIZE,
+            "patch_size": 8,
+            "hidden_size": 32,
+            "intermediate_size": 64,
+            "num_hidden_layers": 2,
+            "num_attention_heads": 4,
+        },
+        projection_dim=16,
+    )
+    return CLIPModel(config).eval()
+
+
+def test_config_from_mapping():
+    assert ClipInferenceConfig.from_mapping(None).is_default
+
+    config = ClipInferenceConfig.from_mapping(
+        {"backend": "INT8_DYNAMIC", "num_threads": "4", "min_cosine": 0.98}
+    )
+    assert config.backend == BACKEND_INT8_DYNAMIC
+    assert config.num_threads == 4
+    assert config.min_cosine == 0.98
+    assert config.graph_mode == GRAPH_MODE_NONE
+
+    invalid = ClipInferenceConfig.from_mapping({"backend": "fp8", "graph_mode": "onnx"})
+    assert invalid.is_default
+
+
+def test_default_config_keeps_fp32_model(clip_model):
+    backend = prepare_clip_inference(
+        clip_model, FakeCLIPProcessor(), config=ClipInferenceConfig()
+    )
+    assert backend.model is clip_model
+    assert backend.report["backend"] == BACKEND_FP32
+
+
+def test_int8_dynamic_quantises_linear_layers(clip_model):
+    config = ClipInferenceConfig(backend=BACKEND_INT8_DYNAMIC, min_cosine=0.9)
+    backend = prepare_clip_inference(clip_model, FakeCLIPProcessor(), config=config)
+
+    assert backend.model is not clip_model
+    assert backend.report["guard_passed"]
+    assert backend.report["image_cosine_min"] >= 0.9
+    linear_types = {
+        type(m).__name__
+        for m in backend.model.modules()
+        if "Linear" in type(m).__name__
+    }
+    assert linear_types and "Linear" not in linear_types
+    # 原 fp32 模型不被修改
+    assert any(isinstance(m, torch.nn.Linear) for m in clip_model.modules())
+
+
+def test_guard_failure_falls_back_to_fp32(clip_model):
+    config = ClipInferenceConfig(backend=BACKEND_INT8_DYNAMIC, min_cosine=1.01)
+    backend = prepare_clip_inference(clip_model, FakeCLIPProcessor(), config=config)
+
+    assert backend.model is clip_model
+    assert backend.report["backend"] == BACKEND_FP32
+    assert backend.report["guard_passed"] is False
+
+
+def test_torchscript_image_tower_matches_eager(clip_model):
+    config = ClipInferenceConfig(graph_mode=GRAPH_MODE_TORCHSCRIPT)
+    backend = prepare_clip_inference(clip_model, FakeCLIPProcessor(), config=config)
+    assert backend.report["graph_mode"] == GRAPH_MODE_TORCHSCRIPT
+
+    pixels = torch.rand(3, 3, IMAGE_SIZE, IMAGE_SIZE)
+    with torch.no_grad():
+        eager = MushroomImageEncoder._to_feature_tensor(
+            clip_model.get_image_features(pixel_values=pixels)
+        )
+        traced = backend.image_features(pixels)
+    torch.testing.assert_close(traced, eager, rtol=1e-4, atol=1e-5)
+
+
+def test_encoder_uses_prepared_backend(clip_model):
+    config = ClipInferenceConfig(backend=BACKEND_INT8_DYNAMIC, min_cosine=0.9)
+    encoder = MushroomImageEncoder.__new__(MushroomImageEncoder)
+    encoder.device = "cpu"
+    encoder.clip_processor = FakeCLIPProcessor()
+    encoder.clip_batch_size = 4
+    encoder.clip_model = clip_model
+    rng = np.random.default_rng(1)
+    images = [
+        Image.fromarray(rng.integers(0, 255, (48, 64, 3), dtype=np.uint8))
+        for _ in range(4)
+    ]
+    texts = [f"Mushroom Room 611, Day {i}" for i in range(4)]
+    fp32 = np.asarray(encoder.encode_clip_batch(images, texts))
+
+    encoder.clip_inference = prepare_clip_inference(
+        clip_model, encoder.clip_processor, config=config
+    )
+    encoder.clip_model = encoder.clip_inference.model
+    int8 = np.asarray(encoder.encode_clip_batch(images, texts))
+
+    assert int8.shape == fp32.shape
+    cosine = np.sum(int8 * fp32, axis=1)
+    assert np.all(cosine > 0.9)
@@ -0,0 +1,250 @@
+"""
+Unit tests for the ONNX export and onnxruntime CLIP backend
+
+Tests cover:
+- export_onnx writes both towers, processor files and a manifest
+- ONNX Runtime image/text features match torch get_*_features
+- numpy preprocessing matches CLIPImageProcessor
+- MushroomImageEncoder encodes through onnxruntime with torch parity
+- Missing ONNX model directory falls back to the torch backend
+- Missing onnxruntime is reported at warning level before falling back
+"""
+
+import json
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+
+torch = pytest.importorskip("torch")
+transformers = pytest.importorskip("transformers")
+pytest.importorskip("onnxruntime")
+tokenizers = pytest.importorskip("tokenizers")
+
+from PIL import Image
+from tokenizers import Tokenizer, models, pre_tokenizers, processors
+from transformers import BatchEncoding, CLIPConfig, CLIPImageProcessor, CLIPModel
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
+
+from vision.clip_onnx import (
+    IMAGE_MODEL_FILE,
+    ONNX_MANIFEST_FILE,
+    TEXT_MODEL_FILE,
+    ClipOnnxPreprocessor,
+    OnnxClipModel,
+)
+from vision.clip_runtime import BACKEND_ONNX, ClipInferenceConfig
+from vision.fine_tuning.convert import export_onnx
+from vision.mushroom_image_encoder import MushroomImageEncoder
+
+IMAGE_SIZE = 32
+MAX_TEXT_LEN = 16
+TEXTS = [
+    "mushroom room 611 fruiting stage day 12",
+    "mushroom room 607 primordia stage day 5 humidity high",
+    "a photo of mushrooms",
+    "harvest stage",
+]
+
+
+def build_tokenizer() -> Tokenizer:
+    words = sorted({w for t in TEXTS for w in t.split()})
+    vocab = {"[UNK]": 0, "<|startoftext|>": 1, "<|endoftext|>": 99}
+    vocab.update({w: i + 2 for i, w in enumerate(words)})
+    tokenizer = Tokenizer(models.WordLevel(vocab, unk_token="[UNK]"))
+    tokenizer.pre_tokenizer = pre_tokenizers.Whitespace()
+    tokenizer.post_processor = processors.TemplateProcessing(
+        single="<|startoftext|> $A <|endoftext|>",
+        special_tokens=[("<|startoftext|>", 1), ("<|endoftext|>", 99)],
+    )
+    return tokenizer
+
+
+class FakeProcessor:
+    """CLIPFineTuner.processor stand-in: tokenizer + save_pretrained"""
+
+    def __init__(self):
+        self._tokenizer = build_tokenizer()
+        self._tokenizer.enable_padding(pad_id=99, pad_token="<|endoftext|>")
+
+    def tokenizer(self, texts, padding=True, return_tensors="pt"):
+        encodings = self._tokenizer.encode_batch(texts)
+        return BatchEncoding(
+            {
+                "input_ids": torch.tensor([e.ids for e in encodings]),
+                "attention_mask": torch.tensor([e.attention_mask for e in encodings]),
+            }
+        )
+
+    def save_pretrained(self, output_dir):
+        output_dir = Path(output_dir)
+        build_tokenizer().save(str(output_dir / "tokenizer.json"))
+        (output_dir / "tokenizer_config.json").write_text(
+            json.dumps({"model_max_length": MAX_TEXT_LEN, "pad_token": "<|endoftext|>"})
+        )
+        (output_dir / "preprocessor_config.json").write_text(
+            json.dumps(
+                {
+                    "size": {"shortest_edge": IMAGE_SIZE},
+                    "crop_size": {"height": IMAGE_SIZE, "width": IMAGE_SIZE},
+                    "resample": 3,
+                    "rescale_factor": 1 / 255,
+                    "image_mean": [0.48145466, 0.4578275, 0.40821073],
+                    "image_std": [0.26862954, 0.26130258, 0.27577711],
+                }
+            )
+        )
+
+
+@pytest.fixture(scope="module")
+def clip_model():
+    torch.manual_seed(0)
+    config = CLIPConfig(
+        text_config={
+            "vocab_size": 100,
+            "hidden_size": 32,
+            "intermediate_size": 64,
+            "num_hidden_layers": 2,
+            "num_attention_heads": 4,
+            "max_position_embeddings": MAX_TEXT_LEN,
+            "eos_token_id": 99,
+        },
+        vision_config={
+            "image_size": IMAGE_SIZE,
+            "patch_size": 8,
+            "hidden_size": 32,
+            "intermediate_size": 64,
+            "num_hidden_layers": 2,
+            "num_attention_heads": 4,
+        },
+        projection_dim=16,
+    )
+    return CLIPModel(config).eval()
+
+
+@pytest.fixture(scope="module")
+def onnx_dir(clip_model, tmp_path_factory):
+    output_dir = tmp_path_factory.mktemp("clip_onnx")
+    export_onnx(SimpleNamespace(clip=clip_model, processor=FakeProcessor()), output_dir)
+    return output_dir
+
+
+@pytest.fixture(scope="module")
+def images():
+    rng = np.random.default_rng(7)
+    images = [
+        Image.fromarray(rng.integers(0, 255, (48 + 8 * i, 64, 3), dtype=np.uint8))
+        for i in range(len(TEXTS))
+    ]
+    images[1] = images[1].convert("L")
+    return images
+
+
+def test_export_writes_towers_and_manifest(onnx_dir):
+    manifest = json.loads((onnx_dir / ONNX_MANIFEST_FILE).read_text())
+
+    assert (onnx_dir / IMAGE_MODEL_FILE).exists()
+    assert (onnx_dir / TEXT_MODEL_FILE).exists()
+    assert (onnx_dir / "tokenizer.json").exists()
+    assert manifest["projection_dim"] == 16
+    assert manifest["parity"]["image_cosine_min"] > 0.9999
+    assert manifest["parity"]["text_cosine_min"] > 0.9999
+
+
+def test_onnx_features_match_torch(clip_model, onnx_dir, images):
+    model = OnnxClipModel(onnx_dir, num_threads=1)
+    batch = model.preprocessor(text=TEXTS, images=images)
+
+    with torch.no_grad():
+        torch_image = clip_model.get_image_features(
+            pixel_values=torch.from_numpy(batch["pixel_values"])
+        )
+        torch_text = clip_model.get_text_features(
+            input_ids=torch.from_numpy(batch["input_ids"]),
+            attention_mask=torch.from_numpy(batch["attention_mask"]),
+        )
+
+    np.testing.assert_allclose(
+        model.image_features(batch["pixel_values"]),
+        MushroomImageEncoder._to_feature_tensor(torch_image).numpy(),
+        atol=1e-4,
+    )
+    np.testing.assert_allclose(
+        model.text_features(batch["input_ids"], batch["attention_mask"]),
+        MushroomImageEncoder._to_feature_tensor(torch_text).numpy(),
+        atol=1e-4,
+    )
+    assert model.memory_bytes() > 0
+
+
+def test_preprocessing_matches_clip_image_processor(onnx_dir, images):
+    reference = CLIPImageProcessor(
+        size={"shortest_edge": IMAGE_SIZE},
+        crop_size={"height": IMAGE_SIZE, "width": IMAGE_SIZE},
+    )
+    expected = reference(images=images, return_tensors="np")["pixel_values"]
+    actual = ClipOnnxPreprocessor(onnx_dir).preprocess_images(images)
+
+    assert actual.shape == expected.shape
+    np.testing.assert_allclose(actual, expected, atol=1e-3)
+
+
+def test_encoder_uses_onnx_backend(clip_model, onnx_dir, images):
+    encoder = MushroomImageEncoder.__new__(MushroomImageEncoder)
+    encoder.clip_config = ClipInferenceConfig(
+        backend=BACKEND_ONNX, onnx_dir=str(onnx_dir)
+    )
+    encoder.device = "cpu"
+    encoder.clip_batch_size = 2
+    encoder.clip_inference = None
+    encoder._init_clip_model()
+    assert isinstance(encoder.clip_model, OnnxClipModel)
+
+    embeddings = np.asarray(encoder.encode_clip_batch(images, TEXTS))
+
+    batch = encoder.clip_processor(text=TEXTS, images=images)
+    with torch.no_grad():
+        image_features = clip_model.get_image_features(
+            pixel_values=torch.from_numpy(batch["pixel_values"])
+        )
+        text_features = clip_model.get_text_features(
+            input_ids=torch.from_numpy(batch["input_ids"]),
+            attention_mask=torch.from_numpy(batch["attention_mask"]),
+        )
+    expected = encoder._fuse_multimodal_features(
+        MushroomImageEncoder._to_feature_tensor(image_features),
+        MushroomImageEncoder._to_feature_tensor(text_features),
+    )
+
+    assert embeddings.shape == (len(TEXTS), 16)
+    np.testing.assert_allclose(embeddings, expected, atol=1e-4)
+
+
+def test_missing_onnx_dir_reports_failure(tmp_path):
+    encoder = MushroomImageEncoder.__new__(MushroomImageEncoder)
+    config = ClipInferenceConfig(
+        backend=BACKEND_ONNX, onnx_dir=str(tmp_path / "missing")
+    )
+
+    assert encoder._init_onnx_clip_model(config) is False
+
+
+def test_missing_onnxruntime_warns(onnx_dir):
+    from vision import mushroom_image_encoder
+
+    encoder = MushroomImageEncoder.__new__(MushroomImageEncoder)
+    config = ClipInferenceConfig(backend=BACKEND_ONNX, onnx_dir=str(onnx_dir))
+
+    with (
+        patch.dict(sys.modules, {"onnxruntime": None}),
+        patch.object(mushroom_image_encoder.logger, "warning") as warning,
+    ):
+        assert encoder._init_onnx_clip_model(config) is False
+
+    warning.assert_called_once()
+    assert "onnxruntime" in warning.call_args.args[0]
@@ -0,0 +1,266 @@
+"""
+Unit tests for the in-process cluster knowledge base snapshot
+
+Tests cover:
+- Interval lookups match the SQL covering/ordering semantics (NULL bounds = open)
+- Nearest-rule ordering: day_gap ASC, sample_days DESC NULLS LAST
+- Rules are indexed by (device_type, point_key) and device type
+- The snapshot is loaded once; lookups within the check interval hit no SQL
+- A changed active run_id or invalidate_cluster_kb_snapshot reloads the rules
+- CultivationSkillEngine KB priors come from the snapshot
+"""
+
+import random
+import sys
+from contextlib import contextmanager
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
+
+from decision_analysis import cluster_kb
+from decision_analysis.cluster_kb import (
+    ClusterKBSnapshot,
+    ClusterRule,
+    get_cluster_kb_snapshot,
+    invalidate_cluster_kb_snapshot,
+)
+
+
+def make_rule(device_type="air_cooler", point_key="temp_set", **kwargs):
+    values = {
+        "point_display": point_key,
+        "value_median": 16.0,
+        "value_p25": 15.0,
+        "value_p75": 17.0,
+        "sample_days": 10,
+        "growth_window": "day_1_10",
+        "preferred_change_type": "up",
+        "preferred_hour": 8.0,
+        "growth_day_min": None,
+        "growth_day_max": None,
+        "growth_day_median": None,
+    }
+    values.update(kwargs)
+    return ClusterRule(device_type=device_type, point_key=point_key, **values)
+
+
+def random_rules(n, seed=0):
+    rng = random.Random(seed)
+    rules = []
+    for i in range(n):
+        low = rng.choice([None, rng.randint(0, 30)])
+        high = rng.choice([None, (low or 0) + rng.randint(0, 20)])
+        rules.append(
+            make_rule(
+                device_type=rng.choice(["air_cooler", "fresh_air_fan", "humidifier"]),
+                point_key=f"point_{i % 7}",
+                sample_days=rng.choice([None, rng.randint(1, 40)]),
+                growth_day_min=low,
+                growth_day_max=high,
+                growth_day_median=rng.choice([None, rng.uniform(0, 45)]),
+            )
+        )
+    return rules
+
+
+def sql_order(rules, day):
+    """ORDER BY ABS(COALESCE(median, day) - day), sample_days DESC NULLS LAST"""
+    return sorted(
+        rules,
+        key=lambda r: (
+            abs(
+                (r.growth_day_median if r.growth_day_median is not None else day) - day
+            ),
+            r.sample_days is None,
+            -(r.sample_days or 0),
+        ),
+    )
+
+
+def sql_covers(rule, day):
+    low = rule.growth_day_min if rule.growth_day_min is not None else day
+    high = rule.growth_day_max if rule.growth_day_max is not None else day
+    return low <= day <= high
+
+
+def sort_key(rule, day):
+    return (rule.day_gap(day), rule.sample_days is None, -(rule.sample_days or 0))
+
+
+@pytest.mark.parametrize("day", [0, 7, 15, 31, 60])
+def test_interval_lookup_matches_sql_semantics(day):
+    rules = random_rules(300)
+    snapshot = ClusterKBSnapshot("run-1", rules)
+
+    covering = snapshot.covering(day)
+    expected = [r for r in rules if sql_covers(r, day)]
+    assert sorted(map(id, covering)) == sorted(map(id, expected))
+
+    nearest = snapshot.nearest(day, limit=20, covering_only=True)
+    reference = sql_order(expected, day)[:20]
+    assert [sort_key(r, day) for r in nearest] == [sort_key(r, day) for r in reference]
+
+    nearest_all = snapshot.nearest(day, limit=8)
+    reference_all = sql_order(rules, day)[:8]
+    assert [sort_key(r, day) for r in nearest_all] == [
+        sort_key(r, day) for r in reference_all
+    ]
+
+
+def test_nearest_without_day_orders_by_sample_days():
+    rules = [
+        make_rule(point_key="a", sample_days=None),
+        make_rule(point_key="b", sample_days=5),
+        make_rule(point_key="c", sample_days=20),
+    ]
+    snapshot = ClusterKBSnapshot("run-1", rules)
+
+    assert [r.point_key for r in snapshot.nearest(None, limit=2)] == ["c", "b"]
+
+
+def test_rules_are_indexed_by_point_and_device_type():
+    rules = [
+        make_rule("air_cooler", "temp_set", sample_days=3),
+        make_rule("air_cooler", "temp_set", sample_days=9),
+        make_rule("humidifier", "on", sample_days=1),
+    ]
+    snapshot = ClusterKBSnapshot("run-1", rules)
+
+    assert [r.sample_days for r in snapshot.by_point[("air_cooler", "temp_set")]] == [
+        9,
+        3,
+    ]
+    assert len(snapshot.by_device_type["humidifier"]) == 1
+    assert len(snapshot) == 3
+
+
+class FakeResult:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def fetchone(self):
+        return self.rows[0] if self.rows else None
+
+    def fetchall(self):
+        return self.rows
+
+
+class FakeEngine:
+    """按 SQL 文本返回 run_id / 规则行，并记录查询次数"""
+
+    def __init__(self, run_id="run-1"):
+        self.run_id = run_id
+        self.run_queries = 0
+        self.rule_queries = 0
+
+    @contextmanager
+    def connect(self):
+        yield self
+
+    def execute(self, statement, params=None):
+        sql = str(statement)
+        if "control_strategy_kb_runs" in sql:
+            self.run_queries += 1
+            return FakeResult([(self.run_id,)] if self.run_id else [])
+        self.rule_queries += 1
+        return FakeResult(
+            [
+                (
+                    "air_cooler",
+                    "temp_set",
+                    "温度设定",
+                    16.5,
+                    15.5,
+                    17.5,
+                    12,
+                    "day_1_10",
+                    "up",
+                    9.0,
+                    1,
+                    10,
+                    5.0,
+                ),
+                (
+                    "fresh_air_fan",
+                    "on_time",
+                    "开启时间",
+                    5.0,
+                    4.0,
+                    6.0,
+                    None,
+                    "day_11_20",
+                    "flat",
+                    None,
+                    11,
+                    20,
+                    15.0,
+                ),
+            ]
+        )
+
+
+@pytest.fixture
+def fresh_snapshot():
+    invalidate_cluster_kb_snapshot()
+    yield
+    invalidate_cluster_kb_snapshot()
+
+
+def test_snapshot_loaded_once_and_served_from_memory(fresh_snapshot):
+    engine = FakeEngine()
+    with patch("global_const.const_config.CLUSTER_KB_SNAPSHOT_CHECK_SECONDS", 600):
+        first = get_cluster_kb_snapshot(engine)
+        for day in range(40):
+            assert get_cluster_kb_snapshot(engine) is first
+            first.nearest(day, limit=8)
+
+    assert (engine.run_queries, engine.rule_queries) == (1, 1)
+    assert [r.point_key for r in first.covering(15)] == ["on_time"]
+
+
+def test_new_run_or_invalidation_reloads_rules(fresh_snapshot):
+    engine = FakeEngine()
+    with patch("global_const.const_config.CLUSTER_KB_SNAPSHOT_CHECK_SECONDS", 0):
+        first = get_cluster_kb_snapshot(engine)
+        same_run = get_cluster_kb_snapshot(engine)
+        engine.run_id = "run-2"
+        new_run = get_cluster_kb_snapshot(engine)
+
+    assert same_run is first
+    assert new_run.run_id == "run-2"
+    assert engine.rule_queries == 2
+
+    invalidate_cluster_kb_snapshot()
+    with patch("global_const.const_config.CLUSTER_KB_SNAPSHOT_CHECK_SECONDS", 600):
+        reloaded = get_cluster_kb_snapshot(engine)
+    assert reloaded is not new_run
+    assert engine.rule_queries == 3
+
+
+def test_missing_run_returns_none(fresh_snapshot):
+    assert get_cluster_kb_snapshot(FakeEngine(run_id=None)) is None
+
+
+def test_skill_engine_priors_use_snapshot(fresh_snapshot, tmp_path):
+    from decision_analysis.skills import cultivation_skill
+    from decision_analysis.skills.cultivation_skill import (
+        CultivationSkillEngine,
+        SkillContext,
+    )
+
+    engine = CultivationSkillEngine(tmp_path / "missing.json", enable_kb_prior=True)
+    snapshot = cluster_kb.load_cluster_kb_snapshot(FakeEngine())
+    context = SkillContext(room_id="611", analysis_time=None, growth_day=5)
+
+    with patch.object(
+        cultivation_skill, "get_cluster_kb_snapshot", return_value=snapshot
+    ):
+        priors = engine._load_cluster_kb_priors(context)
+
+    assert len(priors) == 1
+    prior = next(iter(priors.values()))
+    assert (prior["kb_low"], prior["kb_high"], prior["sample_days"]) == (15.5, 17.5, 12)
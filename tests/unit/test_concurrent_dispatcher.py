@@ -0,0 +1,185 @@
+"""
+Unit tests for the concurrent request dispatcher used for LLaMA-VL descriptions
+
+Tests cover:
+- Results keep input order and the max-in-flight limit holds
+- Token bucket caps the request start rate
+- Errors propagate; contextvars reach worker threads
+- MushroomImageEncoder._get_llama_descriptions_batch dispatches concurrently
+- Text-quality persistence keeps the sequential rules (request errors fail,
+  empty descriptions are still written)
+"""
+
+import contextvars
+import sys
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import pytest
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
+
+from utils.concurrent_dispatcher import ConcurrentDispatcher, TokenBucket
+
+request_tag = contextvars.ContextVar("request_tag", default=None)
+
+
+class SlowEcho:
+    """记录并发度的慢速函数，返回值随输入变化以检查顺序"""
+
+    def __init__(self, latency=0.05):
+        self.latency = latency
+        self.lock = threading.Lock()
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    def __call__(self, item):
+        with self.lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        # 前面的条目更慢，乱序完成
+        time.sleep(self.latency * (1 + (item % 3 == 0)))
+        with self.lock:
+            self.in_flight -= 1
+        return item * 10
+
+
+def test_results_keep_order_and_respect_in_flight_limit():
+    fn = SlowEcho()
+    dispatcher = ConcurrentDispatcher(max_in_flight=4)
+
+    start = time.perf_counter()
+    results = dispatcher.map(fn, range(16))
+    elapsed = time.perf_counter() - start
+
+    assert results == [i * 10 for i in range(16)]
+    assert fn.max_in_flight == 4
+    assert dispatcher.get_stats()["max_in_flight"] == 4
+    assert elapsed < 16 * fn.latency / 2
+
+
+def test_token_bucket_limits_start_rate():
+    starts = []
+    dispatcher = ConcurrentDispatcher(max_in_flight=8, rate_per_second=20, burst=2)
+
+    dispatcher.map(lambda _: starts.append(time.monotonic()), range(12))
+
+    # 突发 2 个，其余 10 个按 20/s 发起
+    assert max(starts) - min(starts) >= 10 / 20 * 0.9
+    assert dispatcher.get_stats()["rate_limited_seconds"] > 0
+
+
+def test_token_bucket_disabled_when_rate_is_zero():
+    bucket = TokenBucket(rate=0)
+    assert all(bucket.acquire() == 0.0 for _ in range(100))
+
+
+def test_errors_propagate_after_other_tasks():
+    done = []
+
+    def fn(item):
+        if item == 2:
+            raise ValueError("boom")
+        time.sleep(0.02)
+        done.append(item)
+        return item
+
+    with pytest.raises(ValueError, match="boom"):
+        ConcurrentDispatcher(max_in_flight=3).map(fn, range(6))
+    assert sorted(done) == [0, 1, 3, 4, 5]
+
+
+def test_context_is_copied_into_workers():
+    request_tag.set("hourly-task")
+    results = ConcurrentDispatcher(max_in_flight=4).map(
+        lambda _: request_tag.get(), range(4)
+    )
+    assert results == ["hourly-task"] * 4
+
+
+def test_encoder_llama_batch_is_concurrent_and_ordered():
+    pytest.importorskip("torch")
+    pytest.importorskip("transformers")
+    from vision.mushroom_image_encoder import MushroomImageEncoder
+
+    encoder = MushroomImageEncoder.__new__(MushroomImageEncoder)
+    encoder.llama_config = SimpleNamespace(max_in_flight=4, rate_limit_per_second=0)
+    fn = SlowEcho()
+
+    def describe(image, camera_key=None):
+        if image == 5:
+            raise RuntimeError("llama down")
+        return {"growth_stage_description": str(fn(image))}
+
+    encoder._get_llama_description = describe
+
+    results = encoder._get_llama_descriptions_batch(list(range(8)))
+
+    assert [r and r["growth_stage_description"] for r in results] == [
+        str(i * 10) if i != 5 else None for i in range(8)
+    ]
+    assert fn.max_in_flight == 4
+    assert encoder._get_llama_dispatcher() is encoder._get_llama_dispatcher()
+
+
+def test_text_quality_persistence_matches_sequential_rules():
+    pytest.importorskip("torch")
+    pytest.importorskip("transformers")
+    from vision.mushroom_image_encoder import MushroomImageEncoder
+
+    encoder = MushroomImageEncoder.__new__(MushroomImageEncoder)
+    encoder.llama_config = SimpleNamespace(max_in_flight=2, rate_limit_per_second=0)
+    images = [
+        SimpleNamespace(
+            file_path=f"611/{name}.jpg",
+            file_name=f"{name}.jpg",
+            collection_ip="1921681235",
+            mushroom_id="611",
+            collection_datetime=datetime(2026, 1, 1, 10),
+        )
+        for name in ("ok", "raises", "empty")
+    ]
+    encoder.processor = SimpleNamespace(
+        iter_mushroom_images=lambda **kwargs: iter(images)
+    )
+    encoder.minio_client = SimpleNamespace(get_image=lambda path: path)
+    encoder.Session = MagicMock()
+    encoder.parse_time_from_path = lambda info: {
+        "collection_date": info.collection_datetime,
+        "collection_datetime": info.collection_datetime,
+    }
+    encoder._map_room_id = lambda room_id: room_id
+    encoder._insert_text_quality_record = MagicMock()
+
+    def describe(image, camera_key=None):
+        if "raises" in image:
+            raise RuntimeError("llama down")
+        if "empty" in image:
+            # _get_llama_description 解析失败时返回的默认结果，逐张处理时同样写入
+            return {
+                "growth_stage_description": "",
+                "image_quality_score": None,
+                "chinese_description": None,
+            }
+        return {
+            "growth_stage_description": "pileus visible",
+            "image_quality_score": 82,
+            "chinese_description": "菌盖可见",
+        }
+
+    encoder._get_llama_description = describe
+
+    stats = encoder.batch_process_text_quality(
+        reprocess=True, link_mushroom_embedding=False
+    )
+
+    assert stats == {"total": 3, "success": 2, "failed": 1, "skipped": 0}
+    written = [
+        call.args[1] for call in encoder._insert_text_quality_record.call_args_list
+    ]
+    assert written == ["611/ok.jpg", "611/empty.jpg"]
@@ -0,0 +1,164 @@
+"""
+Unit tests for indexed skill matching in CultivationSkillEngine
+
+Tests cover:
+- match_skills returns the same skills, in the same order, as a linear scan
+  over the library on randomly generated libraries
+- Only active skills are indexed; malformed trigger conditions are skipped
+- Missing growth_day / season / env values match nothing
+- Open growth-day ranges and "all"/empty seasons match every context
+"""
+
+import json
+import random
+import sys
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+
+# Add src and tests to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from decision_analysis.skills.cultivation_skill import (
+    CultivationSkillEngine,
+    SkillContext,
+)
+from skill_matching_reference import linear_match
+
+SEASONS = ["spring", "summer", "autumn", "winter"]
+
+
+def make_engine(tmp_path, skills):
+    path = tmp_path / "cultivation_skill_library.json"
+    path.write_text(json.dumps({"skills": skills}), encoding="utf-8")
+    return CultivationSkillEngine(config_path=path)
+
+
+def make_context(**kwargs):
+    values = {
+        "room_id": "611",
+        "analysis_time": datetime(2026, 1, 1),
+        "growth_day": 10,
+        "season": "winter",
+        "temperature": 16.0,
+        "humidity": 90.0,
+        "co2": 1200.0,
+    }
+    values.update(kwargs)
+    return SkillContext(**values)
+
+
+def random_skills(n, seed=0):
+    rng = random.Random(seed)
+    skills = []
+    for idx in range(n):
+        conditions = {}
+        if rng.random() > 0.2:
+            low = rng.randint(0, 30)
+            conditions["growth_day_range"] = [low, low + rng.randint(-2, 10)]
+        season_choice = rng.random()
+        if season_choice < 0.6:
+            conditions["season"] = [
+                s.upper() if rng.random() < 0.3 else s
+                for s in rng.sample(SEASONS, rng.randint(1, 3))
+            ]
+        elif season_choice < 0.7:
+            conditions["season"] = ["all"]
+        elif season_choice < 0.8:
+            conditions["season"] = []
+        env = {}
+        for key, base, width in (
+            ("temperature", 12, 6),
+            ("humidity", 80, 12),
+            ("co2", 600, 1500),
+        ):
+            if rng.random() > 0.4:
+                low = base + rng.uniform(0, width)
+                env[key] = [low, low + rng.uniform(0, width)]
+        conditions["env"] = env if rng.random() > 0.1 else None
+        skills.append(
+            {
+                "skill_id": f"skill_{idx}",
+                "status": rng.choice(["active", "active", "ACTIVE", "candidate"]),
+                "priority": rng.choice(["high", "medium", "low", None]),
+                "applicable_conditions": conditions,
+            }
+        )
+    return skills
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_indexed_matching_equals_linear_scan(tmp_path, seed):
+    engine = make_engine(tmp_path, random_skills(400, seed=seed))
+    rng = random.Random(seed + 100)
+
+    for _ in range(300):
+        context = make_context(
+            growth_day=rng.randint(-2, 45),
+            season=rng.choice(SEASONS + ["Winter", "unknown"]),
+            temperature=rng.uniform(10, 26),
+            humidity=rng.uniform(78, 100),
+            co2=rng.uniform(500, 3000),
+        )
+        expected = [s["skill_id"] for s in linear_match(engine, context)]
+        assert [s["skill_id"] for s in engine.match_skills(context)] == expected
+
+
+@pytest.mark.parametrize(
+    "overrides",
+    [
+        {"growth_day": None},
+        {"season": None},
+        {"season": ""},
+        {"temperature": None},
+        {"humidity": None},
+        {"co2": None},
+    ],
+)
+def test_missing_context_values_match_nothing(tmp_path, overrides):
+    engine = make_engine(
+        tmp_path,
+        [{"skill_id": "open", "status": "active", "applicable_conditions": {}}],
+    )
+
+    assert [s["skill_id"] for s in engine.match_skills(make_context())] == ["open"]
+    assert engine.match_skills(make_context(**overrides)) == []
+
+
+def test_inactive_and_malformed_skills_are_not_indexed(tmp_path):
+    engine = make_engine(
+        tmp_path,
+        [
+            {"skill_id": "candidate", "status": "candidate"},
+            {
+                "skill_id": "bad_range",
+                "status": "active",
+                "applicable_conditions": {"growth_day_range": ["x", 5]},
+            },
+            {
+                "skill_id": "ok",
+                "priority": "low",
+                "applicable_conditions": {"growth_day_range": [5, 15]},
+            },
+            {
+                "skill_id": "winter_only",
+                "priority": "high",
+                "applicable_conditions": {
+                    "season": ["WINTER"],
+                    "env": {"temperature": [15, 17], "co2": "any"},
+                },
+            },
+        ],
+    )
+
+    assert engine._skill_index.size == 2
+    assert [s["skill_id"] for s in engine.match_skills(make_context())] == [
+        "winter_only",
+        "ok",
+    ]
+    assert [
+        s["skill_id"] for s in engine.match_skills(make_context(season="summer"))
+    ] == ["ok"]
+    assert engine.match_skills(make_context(growth_day=20, temperature=18)) == []
@@ -0,0 +1,102 @@
+"""
+Unit tests for the "latest ImageTextQuality per image" join in DataExtractor
+
+Tests cover:
+- All embedding extractors use the correlated LATERAL lookup, never a
+  table-wide GROUP BY image_path
+- The lateral picks the newest non-null created_at row via ORDER BY ... LIMIT 1
+- Time/room filters stay on the embedding table
+"""
+
+import sys
+from datetime import date, datetime
+from pathlib import Path
+from unittest.mock import MagicMock, Mock, patch
+
+import numpy as np
+import pytest
+from sqlalchemy.dialects import postgresql
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
+
+from decision_analysis.data_extractor import DataExtractor
+
+TARGET = datetime(2026, 1, 12, 10)
+
+
+@pytest.fixture
+def extractor():
+    return DataExtractor(Mock())
+
+
+def run_and_capture_sql(call):
+    """执行提取函数并返回所有已执行语句编译后的 SQL"""
+    session = MagicMock()
+    session.__enter__.return_value = session
+    session.execute.return_value.first.return_value = (11,)
+    session.execute.return_value.fetchall.return_value = []
+
+    with patch("sqlalchemy.orm.Session", return_value=session):
+        call()
+
+    return [
+        str(c.args[0].compile(dialect=postgresql.dialect()))
+        for c in session.execute.call_args_list
+    ]
+
+
+def assert_lateral_latest_quality(sql):
+    assert "LEFT OUTER JOIN LATERAL" in sql
+    assert "GROUP BY" not in sql
+    assert "max(image_text_quality.created_at)" not in sql
+    assert "image_text_quality.image_path = mushroom_embedding.image_path" in sql
+    assert "image_text_quality.created_at IS NOT NULL" in sql
+    assert "ORDER BY image_text_quality.created_at DESC" in sql
+
+
+def test_best_quality_today_uses_lateral(extractor):
+    (sql,) = run_and_capture_sql(
+        lambda: extractor.extract_best_quality_embedding_today("611", TARGET)
+    )
+    assert_lateral_latest_quality(sql)
+    assert "mushroom_embedding.room_id =" in sql
+    assert "latest_quality.image_quality_score DESC NULLS LAST" in sql
+
+
+def test_current_embedding_uses_lateral(extractor):
+    reference_sql, sql = run_and_capture_sql(
+        lambda: extractor.extract_current_embedding_data("611", TARGET)
+    )
+    assert "image_text_quality" not in reference_sql
+    assert_lateral_latest_quality(sql)
+    assert "mushroom_embedding.growth_day >=" in sql
+
+
+def test_historical_similarity_uses_lateral(extractor):
+    (sql,) = run_and_capture_sql(
+        lambda: extractor.extract_historical_embedding_data_for_similarity(
+            "611",
+            current_in_date=date(2026, 1, 1),
+            target_growth_day=11,
+            analysis_datetime=TARGET,
+        )
+    )
+    assert_lateral_latest_quality(sql)
+    assert "mushroom_embedding.in_date !=" in sql
+    assert "mushroom_embedding.collection_datetime >=" in sql
+
+
+def test_candidate_rows_use_lateral(extractor):
+    (sql,) = run_and_capture_sql(
+        lambda: extractor._query_similar_candidates_pgvector(
+            current_embedding=np.ones(512, dtype=np.float32),
+            room_id="611",
+            current_in_date=date(2026, 1, 1),
+            target_growth_day=11,
+            growth_day_window=3,
+            limit=15,
+        )
+    )
+    assert "LEFT OUTER JOIN LATERAL" in sql
+    assert "GROUP BY" not in sql
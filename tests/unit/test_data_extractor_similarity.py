@@ -0,0 +1,291 @@
+"""
+Unit tests for DataExtractor.find_top_similar_historical_cases
+
+Tests cover:
+- pgvector search mode ranking and SQL shape (<=> ordering, filters, LIMIT)
+- Fallback to pandas mode when the pgvector query fails
+- index / pgvector / pandas modes return the same room-scoped cases
+- Vectorised environmental similarity scoring
+"""
+
+import sys
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from unittest.mock import MagicMock, Mock, patch
+
+import numpy as np
+import pandas as pd
+import pytest
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
+
+from decision_analysis.data_extractor import DataExtractor
+
+
+@pytest.fixture
+def extractor():
+    return DataExtractor(Mock())
+
+
+@pytest.fixture
+def candidates():
+    return pd.DataFrame(
+        {
+            "id": [1, 2, 3, 4],
+            "room_id": ["611"] * 4,
+            "in_date": [date(2025, 12, 1)] * 4,
+            "growth_day": [10, 11, 12, 10],
+            "collection_datetime": [datetime(2025, 12, 11, 10)] * 4,
+            "embedding_similarity": [0.95, 0.90, 0.60, 0.30],
+            "temperature": [25.0, 16.0, np.nan, 16.0],
+            "humidity": [60.0, 90.0, 91.0, 90.0],
+            "co2": [3000.0, 1200.0, 1200.0, 1200.0],
+        }
+    )
+
+
+def test_pgvector_mode_ranks_candidates(extractor, candidates):
+    with (
+        patch.object(
+            extractor, "_query_similar_candidates_pgvector", return_value=candidates
+        ) as pg,
+        patch.object(extractor, "_score_similar_candidates_pandas") as legacy,
+    ):
+        result = extractor.find_top_similar_historical_cases(
+            current_embedding=np.ones(512, dtype=np.float32),
+            current_env_params={"temperature": 16.0, "humidity": 90.0, "co2": 1200.0},
+            room_id="611",
+            current_in_date=date(2026, 1, 1),
+            target_growth_day=11,
+            top_k=2,
+            search_mode="pgvector",
+        )
+
+    assert pg.call_args.kwargs["limit"] == 10
+    legacy.assert_not_called()
+    assert list(result["id"]) == [2, 1]
+    assert result.iloc[0]["temp_diff"] == 0.0
+    assert result["combined_similarity"].is_monotonic_decreasing
+
+
+def test_pgvector_failure_falls_back_to_pandas(extractor, candidates):
+    with (
+        patch.object(
+            extractor,
+            "_query_similar_candidates_pgvector",
+            side_effect=RuntimeError("operator does not exist: vector <=> vector"),
+        ),
+        patch.object(
+            extractor, "_score_similar_candidates_pandas", return_value=candidates
+        ) as legacy,
+    ):
+        result = extractor.find_top_similar_historical_cases(
+            current_embedding=np.ones(512, dtype=np.float32),
+            current_env_params={},
+            room_id="611",
+            current_in_date=date(2026, 1, 1),
+            target_growth_day=11,
+            top_k=3,
+            search_mode="pgvector",
+        )
+
+    legacy.assert_called_once()
+    assert list(result["id"]) == [1, 2, 3]
+
+
+def test_pgvector_query_pushes_filters_into_sql(extractor):
+    session = MagicMock()
+    session.__enter__.return_value = session
+    session.execute.return_value.fetchall.return_value = []
+
+    with patch("sqlalchemy.orm.Session", return_value=session):
+        df = extractor._query_similar_candidates_pgvector(
+            current_embedding=np.ones(512, dtype=np.float32),
+            room_id="611",
+            current_in_date=date(2026, 1, 1),
+            target_growth_day=11,
+            growth_day_window=3,
+            limit=15,
+            analysis_datetime=datetime(2026, 1, 12, 10),
+            date_window_days=3,
+        )
+
+    assert df.empty
+    from sqlalchemy.dialects import postgresql
+
+    sql = str(session.execute.call_args.args[0].compile(dialect=postgresql.dialect()))
+    assert "<=>" in sql
+    assert "LIMIT" in sql
+    assert "mushroom_embedding.room_id =" in sql
+    assert "mushroom_embedding.in_date !=" in sql
+    # Embeddings themselves are not transferred back
+    assert "mushroom_embedding.embedding," not in sql
+
+
+def test_env_similarity_matches_scalar_formula(candidates):
+    params = {"temperature": 16.0, "humidity": 90.0, "co2": 1200.0}
+    df = DataExtractor._compute_env_similarity(candidates.copy(), params)
+
+    for _, row in df.iterrows():
+        expected = 0.0
+        for col, scale in (("temperature", 10.0), ("humidity", 20.0), ("co2", 500.0)):
+            if not pd.isna(row[col]):
+                expected += 1.0 / (1.0 + abs(row[col] - params[col]) / scale)
+        assert row["env_similarity_score"] == pytest.approx(expected)
+
+    assert np.isinf(df.loc[2, "temp_diff"])
+
+
+def test_env_similarity_missing_current_params(candidates):
+    df = DataExtractor._compute_env_similarity(candidates.copy(), {})
+
+    assert (df["env_similarity_score"] == 0.0).all()
+    assert np.isinf(df["co2_diff"]).all()
+
+
+class FakeEmbeddingTable:
+    """
+    In-memory mushroom_embedding table standing in for PostgreSQL
+
+    Evaluates the WHERE clause of the executed statement (or of its
+    ``ranked_candidates`` CTE) against the stored records, so every search
+    mode runs its real filter conditions.
+    """
+
+    def __init__(self, records):
+        self.records = records
+
+    def session(self, *args, **kwargs):
+        session = MagicMock()
+        session.__enter__.return_value = session
+        session.execute.side_effect = self.execute
+        return session
+
+    def execute(self, statement):
+        from sqlalchemy.orm.evaluator import _EvaluatorCompiler
+        from sqlalchemy.sql.selectable import CTE
+        from sqlalchemy.sql.visitors import iterate
+
+        from utils.create_table import MushroomImageEmbedding
+
+        ranked = next(
+            (
+                node
+                for node in iterate(statement)
+                if isinstance(node, CTE) and node.name == "ranked_candidates"
+            ),
+            None,
+        )
+        inner = ranked.element if ranked is not None else statement
+        matches = _EvaluatorCompiler(MushroomImageEmbedding).process(inner.whereclause)
+        selected = [r for r in self.records if matches(r)]
+
+        similarity = {}
+        if "embedding_similarity" in inner.selected_columns:
+            # pgvector: ORDER BY embedding <=> :query LIMIT :limit
+            # (1 - (embedding <=> :query)).label("embedding_similarity")
+            distance = inner.selected_columns["embedding_similarity"].element.right
+            query = np.asarray(distance.right.value, dtype=np.float32)
+            for r in selected:
+                vector = np.asarray(r.embedding, dtype=np.float32)
+                similarity[r.id] = float(
+                    vector @ query / np.linalg.norm(vector) / np.linalg.norm(query)
+                )
+            selected.sort(key=lambda r: -similarity[r.id])
+            selected = selected[: inner._limit]
+
+        result = MagicMock()
+        result.fetchall.return_value = [
+            tuple(
+                (
+                    similarity.get(r.id)
+                    if key == "embedding_similarity"
+                    else getattr(r, key, None)
+                )
+                for key in statement.selected_columns.keys()
+            )
+            for r in selected
+        ]
+        return result
+
+
+def test_all_search_modes_return_same_room_scoped_cases():
+    from decision_analysis.embedding_index import HistoricalEmbeddingIndex
+    from utils.create_table import MushroomImageEmbedding
+
+    rng = np.random.default_rng(0)
+    records = [
+        MushroomImageEmbedding(
+            id=i,
+            room_id=["611", "612"][i % 2],
+            in_date=[date(2025, 11, 1), date(2025, 12, 1), date(2026, 1, 1)][i % 3],
+            growth_day=8 + i % 7,
+            collection_datetime=datetime(2026, 1, 1) + timedelta(hours=i),
+            image_path=f"img_{i}.jpg",
+            env_sensor_status={"temperature": 16.0, "humidity": 90.0, "co2": 1200.0},
+            # Stored as lists so the evaluated `IS NOT NULL` stays a scalar
+            embedding=rng.normal(size=512).astype(np.float32).tolist(),
+        )
+        for i in range(1, 121)
+    ]
+    # Room 612 holds the nearest neighbours of the query
+    query = np.asarray(records[0].embedding, dtype=np.float32) + 0.01
+    assert records[0].room_id == "612"
+
+    table = FakeEmbeddingTable(records)
+    index = HistoricalEmbeddingIndex(Mock())
+    index.add_rows(
+        (
+            r.id,
+            r.room_id,
+            r.growth_day,
+            r.in_date,
+            r.collection_datetime,
+            None,
+            True,
+            np.asarray(r.embedding, dtype=np.float32),
+        )
+        for r in records
+    )
+    extractor = DataExtractor(Mock(), embedding_index=index)
+
+    results = {}
+    with (
+        patch("sqlalchemy.orm.Session", side_effect=table.session),
+        patch.object(index, "ensure_fresh"),
+        patch.object(
+            extractor,
+            "_score_similar_candidates_pandas",
+            wraps=extractor._score_similar_candidates_pandas,
+        ) as legacy,
+    ):
+        for mode in ("index", "pgvector", "pandas"):
+            legacy.reset_mock()
+            results[mode] = extractor.find_top_similar_historical_cases(
+                current_embedding=query,
+                current_env_params={
+                    "temperature": 16.0,
+                    "humidity": 90.0,
+                    "co2": 1200.0,
+                },
+                room_id="611",
+                current_in_date=date(2026, 1, 1),
+                target_growth_day=11,
+                top_k=3,
+                search_mode=mode,
+            )
+            # No silent fallback: each mode ran its own search path
+            assert legacy.called == (mode == "pandas"), mode
+
+    expected = results["pandas"]
+    assert len(expected) == 3
+    assert (expected["room_id"] == "611").all()
+    assert (expected["in_date"] != date(2026, 1, 1)).all()
+    for mode in ("index", "pgvector"):
+        assert list(results[mode]["id"]) == list(expected["id"]), mode
+        np.testing.assert_allclose(
+            results[mode]["embedding_similarity"],
+            expected["embedding_similarity"],
+            rtol=1e-5,
+        )
@@ -0,0 +1,113 @@
+"""
+Unit tests for the two-tier static device config cache in utils.dataframe_utils
+
+Tests cover:
+- In-process LRU hits skip Redis and return independent copies
+- Config file mtime change invalidates local entries
+- Stale-while-revalidate refresh after the soft TTL
+- Per-room entries for get_all_device_configs, LRU eviction and cache clearing
+"""
+
+import sys
+import time
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
+
+from utils import dataframe_utils
+
+
+@pytest.fixture
+def redis_conn():
+    """Redis 二级缓存始终未命中，便于统计调用次数"""
+    conn = MagicMock()
+    conn.exists.return_value = 0
+    with patch.object(dataframe_utils, "conn", conn):
+        dataframe_utils.clear_local_config_cache()
+        yield conn
+        dataframe_utils.clear_local_config_cache()
+
+
+def stats():
+    return dataframe_utils.get_config_cache_stats()
+
+
+def test_local_hit_skips_redis_and_returns_copy(redis_conn):
+    first = dataframe_utils.get_static_config_by_device_type("air_cooler")
+    redis_calls = redis_conn.method_calls.copy()
+    before = stats()
+
+    first["device_alias"] = "mutated"
+    second = dataframe_utils.get_static_config_by_device_type("air_cooler")
+
+    assert redis_conn.method_calls == redis_calls
+    assert stats()["local_hits"] == before["local_hits"] + 1
+    assert not (second["device_alias"] == "mutated").any()
+
+
+def test_file_mtime_change_invalidates(redis_conn):
+    with patch.object(dataframe_utils, "_get_file_modification_time", return_value=1.0):
+        dataframe_utils.get_static_config_by_device_type("humidifier")
+    misses = stats()["local_misses"]
+
+    with patch.object(dataframe_utils, "_get_file_modification_time", return_value=2.0):
+        dataframe_utils.get_static_config_by_device_type("humidifier")
+
+    assert stats()["local_misses"] == misses + 1
+
+
+def test_stale_entry_served_then_revalidated(redis_conn):
+    key = ("grow_light", None)
+    loader = MagicMock(side_effect=lambda: dataframe_utils.pd.DataFrame({"v": [2]}))
+    dataframe_utils._local_cache_put(
+        key,
+        dataframe_utils.pd.DataFrame({"v": [1]}),
+        dataframe_utils._get_file_modification_time(
+            dataframe_utils.STATIC_CONFIG_FILE_PATH
+        ),
+    )
+    before = stats()
+
+    with patch.object(dataframe_utils, "STATIC_CONFIG_LOCAL_CACHE_TTL_SECONDS", 0):
+        stale = dataframe_utils._get_local_cached_config(key, loader)
+        deadline = time.time() + 5
+        while stats()["revalidations"] == before["revalidations"]:
+            assert time.time() < deadline, "revalidation did not finish"
+            time.sleep(0.01)
+
+    assert list(stale["v"]) == [1]
+    assert stats()["stale_hits"] == before["stale_hits"] + 1
+    loader.assert_called_once()
+    fresh = dataframe_utils._get_local_cached_config(key, loader)
+    assert list(fresh["v"]) == [2]
+
+
+def test_room_configs_cached_per_room(redis_conn):
+    first = dataframe_utils.get_all_device_configs(room_id="611")
+    hits = stats()["local_hits"]
+    second = dataframe_utils.get_all_device_configs(room_id="611")
+
+    assert first.keys() == second.keys()
+    assert stats()["local_hits"] == hits + len(second)
+    room_devices = set(dataframe_utils.static_settings.mushroom.rooms["611"]["devices"])
+    for device_type, df in second.items():
+        assert df.equals(first[device_type])
+        assert set(df["device_alias"]) <= room_devices
+
+
+def test_lru_eviction_and_clear(redis_conn):
+    with patch.object(dataframe_utils, "STATIC_CONFIG_LOCAL_CACHE_MAXSIZE", 2):
+        for device_type in ("air_cooler", "fresh_air_fan", "humidifier"):
+            dataframe_utils.get_static_config_by_device_type(device_type)
+
+        assert list(dataframe_utils._LOCAL_CONFIG_CACHE) == [
+            ("fresh_air_fan", None),
+            ("humidifier", None),
+        ]
+
+    dataframe_utils.clear_device_config_cache("humidifier")
+    assert list(dataframe_utils._LOCAL_CONFIG_CACHE) == [("fresh_air_fan", None)]
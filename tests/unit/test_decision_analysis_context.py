@@ -0,0 +1,125 @@
+"""
+Unit tests for the shared decision analysis context
+
+Tests cover:
+- Repeated lookups reuse one context while the config version is unchanged
+- Touching a config file or publishing a new prompt rebuilds the context
+- Concurrent room threads build the context only once
+- Monitoring/static JSON configs are loaded once into the context
+"""
+
+import json
+import os
+import sys
+import threading
+from pathlib import Path
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import pytest
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
+
+from decision_analysis import analysis_context
+from decision_analysis.analysis_context import (
+    CONTEXT_CONFIG_FILES,
+    get_decision_analysis_context,
+    reset_decision_analysis_context,
+)
+
+
+class FakeComponent:
+    """DecisionAnalyzer / CultivationSkillEngine stand-in that counts builds"""
+
+    builds = 0
+    lock = threading.Lock()
+
+    def __init__(self, **kwargs):
+        with FakeComponent.lock:
+            FakeComponent.builds += 1
+        self.kwargs = kwargs
+
+
+@pytest.fixture
+def config_dir(tmp_path):
+    for name in CONTEXT_CONFIG_FILES:
+        (tmp_path / name).write_text("{}", encoding="utf-8")
+    (tmp_path / "monitoring_points_config.json").write_text(
+        json.dumps({"devices": {"air_cooler": []}}), encoding="utf-8"
+    )
+    return tmp_path
+
+
+@pytest.fixture
+def prompt():
+    state = {"template": "prompt v1"}
+
+    def resolve(settings, urls, fallback_template_path):
+        return state["template"], {"source": "local"}
+
+    FakeComponent.builds = 0
+    reset_decision_analysis_context()
+    with (
+        patch.object(analysis_context, "DecisionAnalyzer", FakeComponent),
+        patch.object(analysis_context, "CultivationSkillEngine", FakeComponent),
+        patch.object(analysis_context, "resolve_decision_prompt_template", resolve),
+    ):
+        yield state
+    reset_decision_analysis_context()
+
+
+def get_context(config_dir):
+    return get_decision_analysis_context(
+        db_engine=None,
+        settings=SimpleNamespace(data_source_url=None),
+        static_settings={},
+        config_dir=config_dir,
+        enable_skill_kb_prior=True,
+    )
+
+
+def test_context_is_reused_while_config_unchanged(config_dir, prompt):
+    first = get_context(config_dir)
+    second = get_context(config_dir)
+
+    assert second is first
+    assert FakeComponent.builds == 2  # analyzer + skill engine
+    assert first.monitoring_config == {"devices": {"air_cooler": []}}
+    assert first.analyzer.kwargs["template_content"] == "prompt v1"
+    assert first.prompt_meta == {"source": "local"}
+
+
+def test_config_change_rebuilds_context(config_dir, prompt):
+    first = get_context(config_dir)
+
+    threshold_path = config_dir / "setpoint_monitor_config.json"
+    mtime = threshold_path.stat().st_mtime + 10
+    os.utime(threshold_path, (mtime, mtime))
+    after_touch = get_context(config_dir)
+
+    prompt["template"] = "prompt v2"
+    after_prompt = get_context(config_dir)
+
+    assert after_touch is not first
+    assert after_prompt is not after_touch
+    assert after_prompt.analyzer.kwargs["template_content"] == "prompt v2"
+    assert FakeComponent.builds == 6
+
+
+def test_concurrent_rooms_build_once(config_dir, prompt):
+    barrier = threading.Barrier(4)
+    contexts = []
+
+    def room():
+        barrier.wait()
+        contexts.append(get_context(config_dir))
+
+    threads = [threading.Thread(target=room) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len({id(c) for c in contexts}) == 1
+    assert FakeComponent.builds == 2
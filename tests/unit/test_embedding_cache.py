@@ -0,0 +1,177 @@
+"""
+Unit tests for the content-addressed CLIP feature cache
+
+Tests cover:
+- Features persist across cache instances and are returned in input order
+- Size-based LRU eviction drops the least recently read entries
+- Image keys follow the byte hash, size and mode (pixel hash as fallback)
+- MinIOClient.get_image and the prefetcher tag images with the same key
+- Text keys are whitespace-normalised
+- lookup_features computes duplicate misses once and tolerates cache errors
+"""
+
+import io
+import sys
+from pathlib import Path
+from unittest.mock import MagicMock
+
+import numpy as np
+from PIL import Image
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
+
+from vision import embedding_cache
+from vision.embedding_cache import (
+    CONTENT_HASH_INFO_KEY,
+    KIND_IMAGE,
+    KIND_TEXT,
+    EmbeddingCache,
+    feature_key,
+    image_content_key,
+    lookup_features,
+    model_fingerprint,
+    normalize_text,
+)
+from vision.image_prefetcher import decode_image
+
+DIM = 16
+VECTOR_BYTES = DIM * 4
+
+
+def vectors(n, seed=0):
+    return np.random.default_rng(seed).standard_normal((n, DIM)).astype(np.float32)
+
+
+def jpeg_bytes(color=(90, 120, 60), size=(64, 48)) -> bytes:
+    buffer = io.BytesIO()
+    Image.new("RGB", size, color).save(buffer, format="JPEG")
+    return buffer.getvalue()
+
+
+def test_cache_persists_across_instances(tmp_path):
+    path = tmp_path / "features.sqlite3"
+    data = vectors(3)
+    cache = EmbeddingCache(path)
+    cache.put_many(KIND_IMAGE, {f"k{i}": data[i] for i in range(3)})
+    cache.close()
+
+    reopened = EmbeddingCache(path)
+    found = reopened.get_many(["k2", "missing", "k0"])
+
+    assert set(found) == {"k0", "k2"}
+    np.testing.assert_array_equal(found["k2"], data[2])
+    assert reopened.stats()["bytes"] == 3 * VECTOR_BYTES
+    assert reopened.stats()["hits"] == 2
+    assert reopened.stats()["misses"] == 1
+
+
+def test_eviction_keeps_recently_read_entries(tmp_path, monkeypatch):
+    clock = iter(range(1, 100))
+    monkeypatch.setattr(embedding_cache.time, "time", lambda: next(clock))
+    cache = EmbeddingCache(tmp_path / "features.sqlite3", max_bytes=4 * VECTOR_BYTES)
+    data = vectors(6)
+    cache.put_many(KIND_IMAGE, {"old": data[0]})
+    cache.put_many(KIND_IMAGE, {"hot": data[1]})
+    cache.put_many(KIND_IMAGE, {"k2": data[2], "k3": data[3]})
+    cache.get_many(["old"])  # 刷新访问时间，"hot" 变为最久未访问
+    cache.put_many(KIND_IMAGE, {"k4": data[4]})
+
+    found = cache.get_many(["old", "hot", "k2", "k3", "k4"])
+
+    assert "hot" not in found
+    assert {"old", "k4"} <= set(found)
+    assert cache.stats()["bytes"] <= 4 * VECTOR_BYTES
+    assert cache.stats()["evictions"] >= 1
+
+
+def test_image_key_uses_content_hash_size_and_mode():
+    data = jpeg_bytes()
+    first = decode_image(data)
+    second = decode_image(data)
+    other = decode_image(jpeg_bytes(color=(10, 20, 30)))
+
+    assert CONTENT_HASH_INFO_KEY in first.info
+    assert image_content_key(first) == image_content_key(second)
+    assert image_content_key(first) != image_content_key(other)
+    # convert/resize 保留 info，但模式/尺寸变化得到不同的键
+    assert image_content_key(first.convert("L")) != image_content_key(first)
+    assert image_content_key(first.resize((32, 24))) != image_content_key(first)
+    assert image_content_key(first.copy()) == image_content_key(first)
+
+
+def test_minio_get_image_tags_same_content_key():
+    from utils.minio_client import MinIOClient
+
+    data = jpeg_bytes()
+    client = MinIOClient.__new__(MinIOClient)
+    client.config = {"bucket": "mushroom"}
+    client.client = MagicMock()
+    client.client.get_object.return_value.read.return_value = data
+
+    image = client.get_image("611/20260101/img.jpg")
+
+    assert image_content_key(image) == image_content_key(decode_image(data))
+
+
+def test_image_key_falls_back_to_pixels():
+    image = Image.new("RGB", (8, 8), (1, 2, 3))
+
+    assert image_content_key(image).startswith("px:")
+    assert image_content_key(image) == image_content_key(image.copy())
+    assert image_content_key(image) != image_content_key(
+        Image.new("RGB", (8, 8), (1, 2, 4))
+    )
+
+
+def test_text_key_is_whitespace_normalised():
+    assert (
+        normalize_text("  Room 611,\n fruiting   stage ") == "Room 611, fruiting stage"
+    )
+    assert feature_key(KIND_TEXT, "m", "a b") == feature_key(
+        KIND_TEXT, "m", normalize_text("a \t b")
+    )
+    assert feature_key(KIND_TEXT, "m", "a b") != feature_key(KIND_TEXT, "m2", "a b")
+    assert feature_key(KIND_TEXT, "m", "a b") != feature_key(KIND_IMAGE, "m", "a b")
+
+
+def test_model_fingerprint_tracks_weight_files(tmp_path):
+    weights = tmp_path / "model.safetensors"
+    weights.write_bytes(b"\0" * 8)
+    before = model_fingerprint(tmp_path)
+    weights.write_bytes(b"\0" * 16)
+
+    assert (
+        model_fingerprint("openai/clip-vit-base-patch32")
+        == "openai/clip-vit-base-patch32"
+    )
+    assert model_fingerprint(tmp_path) != before
+
+
+def test_lookup_features_computes_unique_misses_once(tmp_path):
+    cache = EmbeddingCache(tmp_path / "features.sqlite3")
+    table = {c: v for c, v in zip("abc", vectors(3))}
+    calls = []
+
+    def compute(indices):
+        calls.append([contents[i] for i in indices])
+        return np.stack([table[contents[i]] for i in indices])
+
+    contents = ["a", "b", "a"]
+    first = lookup_features(cache, KIND_TEXT, "m", contents, compute)
+    contents = ["c", "a", "b"]
+    second = lookup_features(cache, KIND_TEXT, "m", contents, compute)
+
+    assert calls == [["a", "b"], ["c"]]
+    np.testing.assert_array_equal(first, np.stack([table["a"], table["b"], table["a"]]))
+    np.testing.assert_array_equal(second, np.stack([table[c] for c in "cab"]))
+
+
+def test_lookup_features_tolerates_cache_errors(tmp_path):
+    cache = EmbeddingCache(tmp_path / "features.sqlite3")
+    cache.close()
+    data = vectors(2)
+
+    result = lookup_features(cache, KIND_IMAGE, "m", ["a", "b"], lambda idx: data[idx])
+
+    np.testing.assert_array_equal(result, data)
@@ -0,0 +1,198 @@
+"""
+Unit tests for HistoricalEmbeddingIndex
+
+Tests cover:
+- Filtered top-k search matches brute-force cosine ranking
+- Room / growth-day / in_date / camera filters
+- Latest embedding per camera
+- Incremental append (last_seen_id) and .npy persistence round trip
+- Chunked refresh re-partitions once per load
+- CLIPMatcher / DataExtractor wiring of the "index" search mode
+"""
+
+import sys
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from unittest.mock import MagicMock, Mock, patch
+
+import numpy as np
+import pandas as pd
+import pytest
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
+
+from decision_analysis.clip_matcher import CLIPMatcher
+from decision_analysis.embedding_index import HistoricalEmbeddingIndex
+
+DIM = 32
+
+
+def make_rows(n: int, start_id: int = 1, seed: int = 0):
+    """Rows shaped like the refresh() query result"""
+    rng = np.random.default_rng(seed)
+    rows = []
+    for k in range(n):
+        row_id = start_id + k
+        rows.append(
+            (
+                row_id,
+                ["607", "611"][row_id % 2],
+                int(row_id % 20),
+                date(2025, 11, 1) + timedelta(days=30 * (row_id % 3)),
+                datetime(2026, 1, 1) + timedelta(hours=row_id),
+                f"192.168.1.{row_id % 4}" if row_id % 5 else None,
+                bool(row_id % 7),
+                rng.normal(size=DIM).astype(np.float32),
+            )
+        )
+    return rows
+
+
+@pytest.fixture
+def rows():
+    return make_rows(400)
+
+
+@pytest.fixture
+def index(rows):
+    idx = HistoricalEmbeddingIndex(Mock())
+    idx.add_rows(rows)
+    return idx
+
+
+def brute_force(rows, query, predicate, top_k):
+    q = query / np.linalg.norm(query)
+    scored = [
+        (r[0], float(r[7] @ q / np.linalg.norm(r[7]))) for r in rows if predicate(r)
+    ]
+    scored.sort(key=lambda x: -x[1])
+    return scored[:top_k]
+
+
+def test_search_matches_brute_force(index, rows):
+    query = np.random.default_rng(1).normal(size=DIM)
+    exclude = date(2025, 12, 1)
+
+    hits = index.search(
+        query,
+        top_k=7,
+        room_id="611",
+        growth_day_range=(5, 12),
+        exclude_in_date=exclude,
+        require_env_status=True,
+        refresh=False,
+    )
+    expected = brute_force(
+        rows,
+        query,
+        lambda r: r[1] == "611" and 5 <= r[2] <= 12 and r[3] != exclude and r[6],
+        7,
+    )
+
+    assert list(hits["id"]) == [e[0] for e in expected]
+    np.testing.assert_allclose(hits["similarity"], [e[1] for e in expected], atol=1e-5)
+    assert (hits["room_id"] == "611").all()
+    assert hits["growth_day"].between(5, 12).all()
+
+
+def test_search_camera_and_date_filters(index, rows):
+    query = rows[0][7]
+    window = (datetime(2026, 1, 3), datetime(2026, 1, 10))
+
+    hits = index.search(
+        query,
+        top_k=50,
+        exclude_collection_ip="192.168.1.1",
+        require_collection_ip=True,
+        date_range=window,
+        refresh=False,
+    )
+
+    assert not hits.empty
+    assert (hits["collection_ip"] != "192.168.1.1").all()
+    assert (hits["collection_ip"] != "").all()
+    assert hits["collection_datetime"].between(*window).all()
+
+
+def test_search_unknown_room_returns_empty(index):
+    hits = index.search(np.ones(DIM), room_id="999", refresh=False)
+    assert hits.empty
+
+
+def test_latest_by_camera(index, rows):
+    latest = index.latest_by_camera("611", refresh=False)
+
+    expected = {}
+    for r in rows:
+        if r[1] == "611" and r[5]:
+            if r[5] not in expected or r[4] > expected[r[5]][4]:
+                expected[r[5]] = r
+    assert set(latest) == set(expected)
+    for ip, vec in latest.items():
+        ref = expected[ip][7] / np.linalg.norm(expected[ip][7])
+        np.testing.assert_allclose(vec, ref, atol=1e-6)
+
+
+def test_incremental_append_and_persistence(tmp_path, rows):
+    idx = HistoricalEmbeddingIndex(Mock(), persist_path=str(tmp_path / "emb_index"))
+    idx.add_rows(rows[:100])
+    assert idx.last_seen_id == 100
+    idx.add_rows(rows[100:])
+    assert idx.size == 400 and idx.last_seen_id == 400
+    assert idx.save()
+
+    restored = HistoricalEmbeddingIndex(
+        Mock(), persist_path=str(tmp_path / "emb_index")
+    )
+    assert restored.load()
+    assert restored.size == 400 and restored.last_seen_id == 400
+
+    query = rows[10][7]
+    pd.testing.assert_frame_equal(
+        restored.search(query, top_k=5, room_id="607", refresh=False),
+        idx.search(query, top_k=5, room_id="607", refresh=False),
+    )
+
+    # Appending to a memory-mapped index copies it into a writable buffer
+    restored.add_rows(make_rows(5, start_id=401, seed=3))
+    assert restored.size == 405 and restored.last_seen_id == 405
+
+
+def test_chunked_refresh_partitions_once(index, rows):
+    chunks = [rows[i : i + 50] for i in range(0, len(rows), 50)]
+    conn = MagicMock()
+    result = conn.execution_options.return_value.execute.return_value
+    result.partitions.return_value = chunks
+    engine = MagicMock()
+    engine.connect.return_value.__enter__.return_value = conn
+    idx = HistoricalEmbeddingIndex(engine)
+
+    with patch.object(
+        idx, "_rebuild_partitions", wraps=idx._rebuild_partitions
+    ) as rebuild:
+        assert idx.refresh() == len(rows)
+
+    rebuild.assert_called_once()
+    query = rows[3][7]
+    pd.testing.assert_frame_equal(
+        idx.search(query, top_k=5, room_id="611", refresh=False),
+        index.search(query, top_k=5, room_id="611", refresh=False),
+    )
+
+
+def test_clip_matcher_uses_index_search_mode(index):
+    matcher = CLIPMatcher(Mock(), embedding_index=index)
+
+    with patch(
+        "decision_analysis.data_extractor.DataExtractor.find_top_similar_historical_cases",
+        return_value=pd.DataFrame(),
+    ) as find:
+        matcher.find_similar_cases(
+            query_embedding=np.ones(DIM, dtype=np.float32),
+            room_id="611",
+            in_date=date(2026, 1, 1),
+            growth_day=10,
+        )
+
+    assert find.call_args.kwargs["search_mode"] == "index"
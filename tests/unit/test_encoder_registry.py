@@ -0,0 +1,151 @@
+"""
+Unit tests for the warm-start encoder registry used by the vision scheduler tasks
+
+Tests cover:
+- One encoder build across runs, warm/cold call accounting
+- Lazy CLIP load for text-only callers, reload after idle unload
+- Idle unload skipped while the encoder is in use
+- CLIP reload waits until other users release the encoder
+- Stats exposed through the health API component providers
+"""
+
+import sys
+import threading
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
+
+from vision.encoder_registry import EncoderRegistry
+
+
+class FakeModel:
+    def parameters(self):
+        return [SimpleNamespace(numel=lambda: 1000, element_size=lambda: 4)]
+
+    def buffers(self):
+        return [SimpleNamespace(numel=lambda: 10, element_size=lambda: 8)]
+
+
+class FakeEncoder:
+    def __init__(self, load_clip=True):
+        self.clip_model = None
+        self.clip_processor = None
+        self.clip_loads = 0
+        if load_clip:
+            self._init_clip_model()
+
+    def _init_clip_model(self):
+        self.clip_loads += 1
+        self.clip_model = FakeModel()
+        self.clip_processor = object()
+
+
+@pytest.fixture
+def built():
+    return []
+
+
+@pytest.fixture
+def registry(built):
+    def factory(load_clip):
+        encoder = FakeEncoder(load_clip=load_clip)
+        built.append(encoder)
+        return encoder
+
+    return EncoderRegistry(idle_unload_seconds=60, factory=factory)
+
+
+def test_encoder_built_once_and_reused(registry, built):
+    with registry.acquire() as first:
+        pass
+    with registry.acquire() as second:
+        pass
+
+    assert first is second
+    assert len(built) == 1
+    stats = registry.stats()
+    assert stats["cold_calls"] == 1
+    assert stats["warm_calls"] == 1
+    assert stats["clip_loaded"]
+    assert stats["clip_memory_bytes"] == 4080
+    assert stats["encoder_init_seconds"] is not None
+
+
+def test_text_only_caller_does_not_load_clip(registry, built):
+    with registry.acquire(load_clip=False) as encoder:
+        assert encoder.clip_model is None
+    with registry.acquire(load_clip=True) as encoder:
+        assert encoder.clip_model is not None
+
+    assert len(built) == 1
+    assert encoder.clip_loads == 1
+    assert registry.stats()["cold_calls"] == 2
+
+
+def test_idle_unload_and_reload(registry):
+    with registry.acquire() as encoder:
+        # 使用中不卸载
+        assert not registry.unload_if_idle(now=time.monotonic() + 3600)
+
+    assert not registry.unload_if_idle(now=time.monotonic() + 1)
+    assert registry.unload_if_idle(now=time.monotonic() + 3600)
+    assert encoder.clip_model is None
+    assert registry.stats()["unloads"] == 1
+
+    with registry.acquire() as again:
+        assert again is encoder
+        assert again.clip_model is not None
+    assert encoder.clip_loads == 2
+
+
+def test_clip_reload_waits_for_other_users(registry):
+    loaded = []
+
+    def clip_job():
+        with registry.acquire() as clip_encoder:
+            loaded.append(clip_encoder.clip_model is not None)
+
+    with registry.acquire(load_clip=False) as encoder:
+        loader = threading.Thread(target=clip_job)
+        loader.start()
+        # 加载线程持有 _load_lock 后必然在等待本任务释放编码器
+        deadline = time.monotonic() + 5
+        while not registry._load_lock.locked() and time.monotonic() < deadline:
+            time.sleep(0.001)
+        assert registry._load_lock.locked()
+        assert encoder.clip_model is None
+        assert encoder.clip_loads == 0
+
+    loader.join(timeout=5)
+    assert not loader.is_alive()
+    assert loaded == [True]
+    assert encoder.clip_loads == 1
+
+
+def test_unload_disabled(built):
+    registry = EncoderRegistry(idle_unload_seconds=0, factory=FakeEncoder)
+    with registry.acquire():
+        pass
+    assert not registry.unload_if_idle(now=time.monotonic() + 10**6)
+
+
+def test_stats_exposed_to_health_api(registry):
+    pytest.importorskip("fastapi")
+    pytest.importorskip("apscheduler")
+    from utils import exception_listener
+
+    exception_listener.register_health_provider("test_encoder", registry.stats)
+    exception_listener.register_health_provider(
+        "broken", lambda: (_ for _ in ()).throw(RuntimeError("boom"))
+    )
+    with registry.acquire():
+        pass
+
+    components = exception_listener.get_component_health()
+    assert components["test_encoder"]["cold_calls"] == 1
+    assert components["broken"]["status"] == exception_listener.ERROR_STATUS
@@ -0,0 +1,173 @@
+"""
+Unit tests for the multi-room daily environment statistics pipeline
+
+Tests cover:
+- Grouped statistics match per-room pivot + calculate_env_statistics
+- Multi-row upsert statement layout
+- Orchestration: one fetch wave, 7-day info fallback only for missing rooms, one bulk store
+"""
+
+import sys
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from unittest.mock import patch
+
+import numpy as np
+import pandas as pd
+import pytest
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
+
+from environment import processor
+from environment.processor import (
+    calculate_env_statistics,
+    calculate_env_statistics_by_room,
+    process_daily_env_stats_multi,
+)
+
+STAT_DATE = date(2026, 1, 10)
+
+
+def make_env_long(room_ids, seed=0):
+    """生成长表环境数据：每库房两台传感器，每分钟一条，含少量缺失"""
+    rng = np.random.default_rng(seed)
+    times = pd.date_range(datetime(2026, 1, 10), periods=240, freq="min")
+    frames = []
+    for room_id in room_ids:
+        for device in ("env_a", "env_b"):
+            for point, base in (("temperature", 18), ("humidity", 90), ("co2", 1200)):
+                values = base + rng.normal(0, base * 0.05, len(times))
+                values[rng.random(len(times)) < 0.05] = np.nan
+                frames.append(
+                    pd.DataFrame(
+                        {
+                            "time": times,
+                            "value": values,
+                            "device_name": f"{room_id}_{device}",
+                            "point_name": point,
+                            "room_id": room_id,
+                            "device_type": processor.ENV_CONFIG_TYPE,
+                        }
+                    )
+                )
+    return pd.concat(frames, ignore_index=True)
+
+
+class TestGroupedStatistics:
+    def test_matches_per_room_calculation(self):
+        env_df = make_env_long(["607", "611", "612"])
+        grouped = calculate_env_statistics_by_room(env_df)
+
+        for room_id, room_df in env_df.groupby("room_id"):
+            pivot = room_df.pivot_table(
+                index="time", columns="point_name", values="value"
+            ).reset_index()
+            expected = calculate_env_statistics(pivot)
+            expected.pop("in_day_num")
+            expected.pop("is_growth_phase")
+            assert grouped[room_id].keys() == expected.keys()
+            for key, value in expected.items():
+                assert grouped[room_id][key] == pytest.approx(value)
+
+    def test_room_without_env_points_has_empty_stats(self):
+        env_df = make_env_long(["607"])
+        other = env_df.head(3).assign(room_id="608", point_name="light")
+        grouped = calculate_env_statistics_by_room(pd.concat([env_df, other]))
+        assert grouped["608"] == {}
+        assert "temp_median" in grouped["607"]
+
+
+def test_upsert_statement_has_one_values_tuple_per_row():
+    sql = processor._build_env_stats_upsert(("room_id", "stat_date", "temp_max"), 3)
+    assert sql.count("(:room_id_") == 3
+    assert ":temp_max_2" in sql
+    assert "temp_max = EXCLUDED.temp_max" in sql
+    assert "room_id = EXCLUDED" not in sql
+
+
+class TestMultiRoomPipeline:
+    def _configs(self, room_ids):
+        rows = [
+            {"room_id": r, "device_type": t, "device_alias": f"{r}_{t}"}
+            for r in room_ids
+            for t in (processor.ENV_CONFIG_TYPE, processor.INFO_CONFIG_TYPE)
+        ]
+        return pd.DataFrame(rows)
+
+    def _info_rows(self, room_id):
+        return pd.DataFrame(
+            {
+                "time": datetime(2026, 1, 10),
+                "value": [2026, 1, 1, 3],
+                "device_name": f"{room_id}_info",
+                "point_name": ["InYear", "InMonth", "InDay", "InNum"],
+                "room_id": room_id,
+                "device_type": processor.INFO_CONFIG_TYPE,
+            }
+        )
+
+    def test_single_wave_with_info_fallback_and_bulk_store(self):
+        room_ids = ["607", "611", "612"]
+        env = make_env_long(["607", "611"])
+        first_wave = pd.concat([env, self._info_rows("607")], ignore_index=True)
+        fetch_calls = []
+
+        def fake_fetch(configs, start_time, end_time):
+            fetch_calls.append((sorted(configs["room_id"].unique()), start_time))
+            if len(fetch_calls) == 1:
+                return first_wave
+            return pd.concat([self._info_rows(r) for r in configs["room_id"]])
+
+        stored = {}
+
+        def fake_store(stat_date, stats_by_room):
+            stored.update(stats_by_room)
+            return {room_id: 1 for room_id in stats_by_room}
+
+        with (
+            patch.object(
+                processor,
+                "_resolve_rooms_point_configs",
+                return_value=self._configs(room_ids),
+            ),
+            patch.object(processor, "_fetch_rooms_history", side_effect=fake_fetch),
+            patch.object(
+                processor, "store_env_statistics_bulk", side_effect=fake_store
+            ) as store,
+        ):
+            results = process_daily_env_stats_multi(room_ids, STAT_DATE)
+
+        day_start = datetime(2026, 1, 10)
+        assert fetch_calls == [
+            (room_ids, day_start),
+            (["611", "612"], day_start - timedelta(days=7)),
+        ]
+        store.assert_called_once()
+        assert set(stored) == {"607", "611"}
+        assert stored["607"]["batch_date"] == date(2026, 1, 1)
+        assert stored["607"]["in_day_num"] == 10
+        assert results["607"]["records_count"] == 1
+        assert results["612"] == {
+            "success": True,
+            "records_count": 0,
+            "message": "No data available",
+        }
+
+    def test_falls_back_to_per_room_processing_on_error(self):
+        with (
+            patch.object(
+                processor,
+                "_resolve_rooms_point_configs",
+                side_effect=RuntimeError("boom"),
+            ),
+            patch.object(
+                processor,
+                "process_daily_env_stats",
+                return_value={"success": True, "records_count": 1},
+            ) as single,
+        ):
+            results = process_daily_env_stats_multi(["607", "611"], STAT_DATE)
+
+        assert single.call_count == 2
+        assert all(r["success"] for r in results.values())
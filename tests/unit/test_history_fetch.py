@@ -0,0 +1,213 @@
+"""
+Unit tests for the concurrent history fetch used by query_data_by_batch_time
+
+Tests cover:
+- Concurrent fetch returns the same frame as the serial path, against a local stub HTTP server
+- Concurrent path keeps max_per_host requests in flight, serial path keeps one
+- Per-host in-flight limit, tracked separately for each limit value
+- Error propagation and fetch metrics
+- Time-slice expansion leaves the caller's query frame untouched
+"""
+
+import json
+import sys
+import threading
+import time
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from types import SimpleNamespace
+from unittest.mock import Mock, patch
+
+import pandas as pd
+import pytest
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
+
+from utils import data_preprocessing
+from utils.get_data import GetData
+
+STUB_LATENCY = 0.05
+
+
+class StubHistoryHandler(BaseHTTPRequestHandler):
+    """
+    模拟边缘侧 history_cal 接口：固定延迟后返回该测点的三条数据
+
+    server.barrier 不为空时请求在屏障处等待指定数量的请求同时在途，
+    并发度不足时屏障超时失败，因此不依赖耗时判断是否并发。
+    """
+
+    def do_POST(self):
+        server = self.server
+        with server.lock:
+            server.in_flight += 1
+            server.max_in_flight = max(server.max_in_flight, server.in_flight)
+        try:
+            body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            if server.barrier is not None:
+                server.barrier.wait()
+            time.sleep(STUB_LATENCY)
+            payload = {
+                "data": {
+                    "abscissa": [
+                        body["start"],
+                        body["start"][:-2] + "30",
+                        body["end"],
+                    ],
+                    "ordinate": [1, 2, len(body["pointCode"])],
+                }
+            }
+            data = json.dumps(payload).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+        finally:
+            with server.lock:
+                server.in_flight -= 1
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def stub_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHistoryHandler)
+    server.lock = threading.Lock()
+    server.in_flight = 0
+    server.max_in_flight = 0
+    server.barrier = None
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def get_data(stub_server):
+    host = f"127.0.0.1:{stub_server.server_address[1]}"
+    urls = SimpleNamespace(history_cal="http://{host}/history_cal")
+    return GetData(urls=urls, host=host, port=stub_server.server_address[1])
+
+
+@pytest.fixture
+def query_df():
+    return pd.DataFrame(
+        {
+            "device_alias": ["env_611_1"] * 4 + ["env_611_2"] * 4,
+            "device_name": ["dev1"] * 4 + ["dev2"] * 4,
+            "point_name": ["t", "hum", "co2x", "pt"] * 2,
+            "point_alias": ["temperature", "humidity", "co2", "pt"] * 2,
+        }
+    )
+
+
+def run_query(get_data, query_df, max_workers):
+    with patch.object(data_preprocessing, "create_get_data", return_value=get_data):
+        return data_preprocessing.query_data_by_batch_time(
+            query_df.copy(),
+            datetime(2026, 1, 1),
+            datetime(2026, 1, 3),
+            days=1,
+            max_workers=max_workers,
+        )
+
+
+def test_concurrent_matches_serial_and_runs_in_parallel(
+    stub_server, get_data, query_df
+):
+    serial = run_query(get_data, query_df, max_workers=1)
+    assert stub_server.max_in_flight == 1
+
+    per_host = data_preprocessing.HISTORY_FETCH_MAX_PER_HOST
+    stub_server.max_in_flight = 0
+    stub_server.barrier = threading.Barrier(per_host, timeout=5)
+    concurrent = run_query(get_data, query_df, max_workers=8)
+
+    # 8 个测点 × 2 个时间切片，每个请求 3 条数据
+    assert len(serial) == 16 * 3
+    pd.testing.assert_frame_equal(
+        serial.reset_index(drop=True), concurrent.reset_index(drop=True)
+    )
+    assert set(concurrent["device_name"]) == {"env_611_1", "env_611_2"}
+    assert stub_server.max_in_flight == per_host
+
+
+@pytest.mark.parametrize("max_per_host", [2, 4])
+def test_per_host_limit_caps_in_flight(stub_server, get_data, query_df, max_per_host):
+    # 屏障要求 max_per_host 个请求同时在途，超过上限时 max_in_flight 也会超过
+    stub_server.barrier = threading.Barrier(max_per_host, timeout=5)
+    with patch.dict(data_preprocessing._HOST_SEMAPHORES, clear=True):
+        results = data_preprocessing.fetch_history_concurrently(
+            query_df.assign(
+                start_time="2026-01-01 00:00:00", end_time="2026-01-01 12:00:00"
+            ),
+            max_workers=8,
+            max_per_host=max_per_host,
+            get_data=get_data,
+        )
+
+    assert len(results) == len(query_df)
+    assert stub_server.max_in_flight == max_per_host
+
+
+def test_host_semaphore_is_keyed_on_limit():
+    with patch.dict(data_preprocessing._HOST_SEMAPHORES, clear=True):
+        first = data_preprocessing._get_host_semaphore("stub-host", 2)
+        assert data_preprocessing._get_host_semaphore("stub-host", 2) is first
+
+        other = data_preprocessing._get_host_semaphore("stub-host", 5)
+        assert other is not first
+        for _ in range(5):
+            assert other.acquire(blocking=False)
+        assert not other.acquire(blocking=False)
+
+
+def test_fetch_error_propagates_and_is_counted(query_df):
+    failing = Mock(host="stub-failing-host")
+    failing.get_device_history_cal.side_effect = (
+        [pd.DataFrame()] * 3 + [RuntimeError("history_cal 500")] + [pd.DataFrame()] * 4
+    )
+    data_preprocessing.reset_history_fetch_metrics()
+
+    with pytest.raises(RuntimeError, match="history_cal 500"):
+        data_preprocessing.fetch_history_concurrently(
+            query_df.assign(start_time="s", end_time="e"),
+            max_workers=4,
+            get_data=failing,
+        )
+
+    metrics = data_preprocessing.get_history_fetch_metrics()
+    assert metrics["calls"] == 1
+    assert metrics["failed_requests"] == 1
+    assert metrics["requests"] == len(query_df)
+
+
+def test_metrics_report_throughput(get_data, query_df):
+    data_preprocessing.reset_history_fetch_metrics()
+    res = run_query(get_data, query_df, max_workers=8)
+
+    metrics = data_preprocessing.get_history_fetch_metrics()
+    assert metrics["requests"] == 16
+    assert metrics["rows"] == len(res)
+    assert metrics["avg_request_latency"] >= STUB_LATENCY
+    assert metrics["requests_per_second"] > 0
+
+
+def test_time_slice_requests_do_not_mutate_query_df(query_df):
+    original = query_df.copy()
+
+    requests = data_preprocessing.build_time_slice_requests(
+        query_df, datetime(2026, 1, 1), datetime(2026, 1, 3), days=1
+    )
+
+    pd.testing.assert_frame_equal(query_df, original)
+    assert len(requests) == 2 * len(query_df)
+    assert list(requests["start_time"].unique()) == [
+        "2026-01-01 00:00:00",
+        "2026-01-02 00:00:00",
+    ]
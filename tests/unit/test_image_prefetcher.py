@@ -0,0 +1,143 @@
+"""
+Unit tests for the prefetching MinIO image loader
+
+Tests cover:
+- Concurrent downloads preserve input order and beat the serial path
+- JPEG reduce-on-load never goes below the downstream target size
+- Bounded look-ahead and clean shutdown when the consumer stops early
+- Download/decode failures surface as None
+- RecentImageProcessor feeds prefetched images to the encoder batch by batch
+"""
+
+import io
+import sys
+import threading
+import time
+from pathlib import Path
+from unittest.mock import MagicMock
+
+import pytest
+from PIL import Image
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
+
+from vision.image_prefetcher import ImagePrefetcher, decode_image, fit_within
+
+LATENCY = 0.05
+
+
+def jpeg_bytes(size=(1920, 1080), color=(90, 120, 60)) -> bytes:
+    buffer = io.BytesIO()
+    Image.new("RGB", size, color).save(buffer, format="JPEG")
+    return buffer.getvalue()
+
+
+class FakeMinIO:
+    """按对象名返回 JPEG 字节，模拟固定网络延迟并记录请求"""
+
+    def __init__(self, latency=LATENCY, missing=()):
+        self.latency = latency
+        self.missing = set(missing)
+        self.data = jpeg_bytes()
+        self.requested = []
+        self.lock = threading.Lock()
+
+    def get_image_bytes(self, object_name):
+        with self.lock:
+            self.requested.append(object_name)
+        time.sleep(self.latency)
+        if object_name in self.missing:
+            return None
+        if object_name == "corrupt.jpg":
+            return b"not an image"
+        return self.data
+
+
+def test_prefetch_preserves_order_and_overlaps_io():
+    names = [f"{i}.jpg" for i in range(16)]
+    prefetcher = ImagePrefetcher(FakeMinIO(), download_workers=8)
+
+    start = time.perf_counter()
+    results = prefetcher.load_images(names)
+    elapsed = time.perf_counter() - start
+
+    assert [name for name, _ in results] == names
+    assert all(image.size == (1920, 1080) for _, image in results)
+    assert elapsed < len(names) * LATENCY / 2
+
+
+def test_draft_decode_keeps_target_size():
+    target = (768, 768)
+    image = decode_image(jpeg_bytes(), target)
+
+    fitted = fit_within((1920, 1080), target)
+    assert fitted == (768, 432)
+    assert image.size == (960, 540)
+    assert image.size[0] >= fitted[0] and image.size[1] >= fitted[1]
+    assert decode_image(jpeg_bytes((640, 480)), target).size == (640, 480)
+
+
+def test_failures_yield_none():
+    client = FakeMinIO(missing={"missing.jpg"})
+    results = dict(
+        ImagePrefetcher(client).load_images(["ok.jpg", "missing.jpg", "corrupt.jpg"])
+    )
+
+    assert results["ok.jpg"] is not None
+    assert results["missing.jpg"] is None
+    assert results["corrupt.jpg"] is None
+
+
+def test_lookahead_is_bounded_and_early_close_stops():
+    client = FakeMinIO(latency=0.0)
+    prefetcher = ImagePrefetcher(client, download_workers=2, queue_size=4)
+    stream = prefetcher.iter_images(f"{i}.jpg" for i in range(100))
+
+    next(stream)
+    time.sleep(0.2)
+    # 已消费 1 张 + 队列 4 张 + 生产线程手上 1 张
+    assert len(client.requested) <= 6
+
+    stream.close()
+    requested = len(client.requested)
+    time.sleep(0.1)
+    assert len(client.requested) == requested
+    assert not any(t.name.startswith("img-prefetch") for t in threading.enumerate())
+
+
+def test_recent_processor_batches_use_prefetched_images():
+    pytest.importorskip("torch")
+    pytest.importorskip("transformers")
+    from vision.mushroom_image_processor import MushroomImagePathParser
+    from vision.recent_image_processor import RecentImageProcessor
+
+    processor = RecentImageProcessor.__new__(RecentImageProcessor)
+    processor.parser = MushroomImagePathParser()
+    processor.minio_client = FakeMinIO()
+    processor.encoder = MagicMock()
+    processor.encoder.llama_config.image_width = 768
+    processor.encoder.llama_config.image_height = 768
+    processor.encoder.get_processed_paths.return_value = set()
+    processor.encoder.process_image_batch.side_effect = lambda data, save: [
+        {"success": item["image"].size == (960, 540)} for item in data
+    ]
+    images = [
+        {"object_name": f"611/20260101/611_1921681235_20251220_20260101{i:06d}.jpg"}
+        for i in range(7)
+    ]
+
+    room_stats, batch_stats = processor._process_room_images_batch(
+        "611", images, save_to_db=True, batch_size=3
+    )
+
+    assert batch_stats["batches"] == 3
+    assert room_stats["success"] == 7
+    assert sorted(processor.minio_client.requested) == [
+        img["object_name"] for img in images
+    ]
+    batch_sizes = [
+        len(call.args[0])
+        for call in processor.encoder.process_image_batch.call_args_list
+    ]
+    assert batch_sizes == [3, 3, 1]
@@ -0,0 +1,175 @@
+"""
+Unit tests for the parallel MinIO listing engine and its per-day listing cache
+
+Tests cover:
+- Precompiled object-name parsing matches the per-object helpers
+- Prefixes listed in parallel, results identical to the serial path
+- Closed days listed once, persisted and served from disk by a fresh cache
+- Today's prefix refreshed per camera with start_after
+- Upload/delete invalidates the affected day
+"""
+
+import sys
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("minio")
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
+
+from utils import minio_client as minio_module
+from utils.minio_client import MinIOClient
+from utils.minio_listing_cache import MinIOListingCache, parse_image_object_name
+
+LIST_LATENCY = 0.1
+BUCKET = "mogu"
+
+
+def object_name(room, day, camera, hhmmss):
+    return f"{room}/{day}/{room}_19216801{camera}_20251220_{day}{hhmmss}.jpg"
+
+
+class FakeMinio:
+    """模拟 list_objects：按字典序返回对象，支持 start_after，记录调用"""
+
+    def __init__(self, names, latency=LIST_LATENCY):
+        self.names = sorted(names)
+        self.latency = latency
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def list_objects(self, bucket, prefix="", recursive=False, start_after=None):
+        with self.lock:
+            self.calls.append((prefix, start_after))
+        time.sleep(self.latency)
+        for name in self.names:
+            if name.startswith(prefix) and (start_after is None or name > start_after):
+                yield SimpleNamespace(
+                    object_name=name,
+                    last_modified=datetime(2026, 1, 1, tzinfo=timezone.utc),
+                    size=len(name),
+                )
+
+
+def make_client(names, cache=None, latency=LIST_LATENCY):
+    client = MinIOClient.__new__(MinIOClient)
+    client.config = {"bucket": BUCKET}
+    client.client = FakeMinio(names, latency)
+    client._bucket_checked = set()
+    client.listing_cache = cache or MinIOListingCache()
+    return client
+
+
+ROOMS = ["607", "611", "612"]
+DAYS = ["20260101", "20260102", "20260103"]
+NAMES = [
+    object_name(room, day, camera, f"{hour:02d}0000")
+    for room in ROOMS
+    for day in DAYS
+    for camera in (11, 12)
+    for hour in range(0, 24, 3)
+] + ["611/20260101/readme.txt"]
+
+
+def test_parse_matches_per_object_helpers():
+    client = make_client([])
+    for name in NAMES[:10] + ["8/20260105/8192168123120261520260105121130.JPG"]:
+        room, capture_time, _ = parse_image_object_name(name)
+        assert room == client._parse_room_id_from_path(name)
+        assert capture_time == client._parse_image_time_from_path(name)
+    assert parse_image_object_name("611/20260101/readme.txt") is None
+    assert parse_image_object_name("611/20260101/611_x_20261399000000.jpg") is None
+
+
+def test_parallel_listing_matches_serial_and_is_faster(monkeypatch):
+    start, end = datetime(2026, 1, 1, 6), datetime(2026, 1, 3, 12)
+
+    def run(workers):
+        monkeypatch.setattr(minio_module, "MINIO_LIST_MAX_WORKERS", workers)
+        client = make_client(NAMES)
+        client.list_rooms = lambda bucket_name=None: ROOMS
+        t0 = time.perf_counter()
+        images = client.list_images_by_time_and_room(start_time=start, end_time=end)
+        return images, time.perf_counter() - t0
+
+    serial, serial_time = run(1)
+    parallel, parallel_time = run(9)
+
+    assert parallel == serial
+    assert [img["capture_time"] for img in serial] == sorted(
+        img["capture_time"] for img in serial
+    )
+    assert all(start <= img["capture_time"] <= end for img in serial)
+    assert parallel_time < serial_time / 3
+
+
+def test_closed_days_listed_once_and_persisted(tmp_path):
+    now = datetime(2026, 1, 3, 12)
+    cache = MinIOListingCache(persist_dir=tmp_path)
+    client = make_client(NAMES, cache, latency=0)
+    list_fn = lambda p, sa: client._list_prefix_records(BUCKET, p, sa)
+
+    first = cache.list_prefix(BUCKET, "611/20260101/", list_fn, now=now)
+    again = cache.list_prefix(BUCKET, "611/20260101/", list_fn, now=now)
+    assert again == first
+    assert len(client.client.calls) == 1
+    assert (tmp_path / BUCKET / "611" / "20260101.json").exists()
+
+    # 新进程：从磁盘加载，不访问MinIO
+    fresh = make_client(NAMES, MinIOListingCache(persist_dir=tmp_path), latency=0)
+    loaded = fresh.listing_cache.list_prefix(
+        BUCKET,
+        "611/20260101/",
+        lambda p, sa: fresh._list_prefix_records(BUCKET, p, sa),
+        now=now,
+    )
+    assert loaded == first
+    assert fresh.client.calls == []
+
+
+def test_today_refreshed_incrementally_per_camera():
+    now = datetime(2026, 1, 3, 12)
+    names = [n for n in NAMES if n.startswith("611/20260103/") and n < "611/20260103/611_1921680112"]
+    client = make_client(names, latency=0)
+    list_fn = lambda p, sa: client._list_prefix_records(BUCKET, p, sa)
+    cache = client.listing_cache
+
+    initial = cache.list_prefix(BUCKET, "611/20260103/", list_fn, now=now)
+    new_name = object_name("611", "20260103", 11, "230000")
+    client.client.names = sorted(client.client.names + [new_name])
+    client.client.calls.clear()
+
+    refreshed = cache.list_prefix(BUCKET, "611/20260103/", list_fn, now=now)
+    assert [r.object_name for r in refreshed] == [r.object_name for r in initial] + [
+        new_name
+    ]
+    (camera_prefix, start_after), = client.client.calls
+    assert camera_prefix == "611/20260103/611_1921680111_20251220_"
+    assert start_after == max(r.object_name for r in initial)
+
+    # 日期结束后做一次最终全量列举，此后视为不可变
+    later = now + timedelta(days=1)
+    client.client.calls.clear()
+    cache.list_prefix(BUCKET, "611/20260103/", list_fn, now=later)
+    cache.list_prefix(BUCKET, "611/20260103/", list_fn, now=later)
+    assert client.client.calls == [("611/20260103/", None)]
+
+
+def test_delete_invalidates_day(tmp_path):
+    now = datetime(2026, 1, 3, 12)
+    client = make_client(NAMES, MinIOListingCache(persist_dir=tmp_path), latency=0)
+    client.client.remove_object = lambda bucket, name: None
+    list_fn = lambda p, sa: client._list_prefix_records(BUCKET, p, sa)
+
+    client.listing_cache.list_prefix(BUCKET, "611/20260101/", list_fn, now=now)
+    assert client.delete_image(object_name("611", "20260101", 11, "000000"))
+    assert not (tmp_path / BUCKET / "611" / "20260101.json").exists()
+
+    client.listing_cache.list_prefix(BUCKET, "611/20260101/", list_fn, now=now)
+    assert len(client.client.calls) == 2
@@ -0,0 +1,130 @@
+"""
+Unit tests for the streaming MinIO listing API
+
+Tests cover:
+- ImageRecord is a compact __slots__ record
+- iter_images_by_time_and_room yields per prefix in time order, lazily
+- list_* wrappers return the same images as the iterators
+- Encoder batches start before the listing is exhausted
+"""
+
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import pytest
+
+pytest.importorskip("minio")
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
+
+from utils import minio_client as minio_module
+from utils.minio_client import ImageRecord, MinIOClient
+from utils.minio_listing_cache import MinIOListingCache
+
+ROOMS = ["607", "611"]
+DAYS = ["20260101", "20260102"]
+NAMES = [
+    f"{room}/{day}/{room}_192168011{camera}_20251220_{day}{hour:02d}0000.jpg"
+    for room in ROOMS
+    for day in DAYS
+    for camera in (1, 2)
+    for hour in range(0, 24, 4)
+]
+
+
+class FakeMinio:
+    def __init__(self, names):
+        self.names = sorted(names)
+        self.listed = []
+
+    def list_objects(self, bucket, prefix="", recursive=False, start_after=None):
+        self.listed.append(prefix)
+        for name in self.names:
+            if name.startswith(prefix) and (start_after is None or name > start_after):
+                yield SimpleNamespace(
+                    object_name=name,
+                    last_modified=datetime(2026, 1, 1, tzinfo=timezone.utc),
+                    size=1,
+                )
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(minio_module, "MINIO_LIST_MAX_WORKERS", 1)
+    client = MinIOClient.__new__(MinIOClient)
+    client.config = {"bucket": "mogu"}
+    client.client = FakeMinio(NAMES)
+    client._bucket_checked = set()
+    client.listing_cache = MinIOListingCache()
+    client.list_rooms = lambda bucket_name=None: ROOMS
+    return client
+
+
+def test_image_record_uses_slots():
+    record = ImageRecord("a", "611", datetime(2026, 1, 1), datetime(2026, 1, 1), 1)
+    assert not hasattr(record, "__dict__")
+
+
+def test_iterator_is_lazy_and_time_ordered_per_prefix(client):
+    stream = client.iter_images_by_time_and_room(
+        start_time=datetime(2026, 1, 1), end_time=datetime(2026, 1, 2, 23, 59, 59)
+    )
+    first = next(stream)
+    assert first.room_id == "607"
+    assert client.client.listed == ["607/20260101/"]
+
+    records = [first, *stream]
+    assert len(records) == len(NAMES)
+    for prefix in ("607/20260101/", "611/20260102/"):
+        times = [r.capture_time for r in records if r.object_name.startswith(prefix)]
+        assert times == sorted(times)
+
+
+def test_list_wrappers_match_iterators(client):
+    start, end = datetime(2026, 1, 1, 5), datetime(2026, 1, 2, 9)
+    listed = client.list_images_by_time_and_room(start_time=start, end_time=end)
+    streamed = sorted(
+        (r.to_dict() for r in client.iter_images_by_time_and_room(None, start, end)),
+        key=lambda x: x["capture_time"],
+    )
+    assert listed == streamed
+
+    by_date = client.get_images_by_date_range(room_id="611", date_start="20260102")
+    assert [r.object_name for r in client.iter_images_by_date_range("611", "20260102")] == [
+        img["object_name"] for img in by_date
+    ]
+    assert list(client.iter_images(prefix="611/")) == client.list_images(prefix="611/")
+
+
+def test_encoder_starts_before_listing_finishes():
+    pytest.importorskip("torch")
+    pytest.importorskip("transformers")
+    from vision.mushroom_image_encoder import MushroomImageEncoder
+
+    produced = []
+
+    def stream(**kwargs):
+        for i in range(25):
+            produced.append(i)
+            yield SimpleNamespace(file_path=f"p{i}", file_name=f"p{i}.jpg")
+
+    encoder = MushroomImageEncoder.__new__(MushroomImageEncoder)
+    encoder.processor = MagicMock()
+    encoder.processor.iter_mushroom_images.side_effect = stream
+    encoder.get_processed_paths = lambda paths: {p for p in paths if p == "p3"}
+    seen_at_first_call = []
+
+    def process(image_info, save_to_db=True):
+        if not seen_at_first_call:
+            seen_at_first_call.append(len(produced))
+        return {"saved_to_db": True}
+
+    encoder.process_single_image = process
+    stats = encoder.batch_process_images(batch_size=10)
+
+    assert seen_at_first_call == [10]
+    assert stats == {"total": 25, "success": 24, "failed": 0, "skipped": 1}
@@ -0,0 +1,132 @@
+"""
+Unit tests for the bulk "already processed" check used by image batches
+
+Tests cover:
+- One ``image_path = ANY(:paths)`` query per chunk instead of one query per image
+- Positive results cached on the encoder, expired after the TTL
+- Query failures treated as "not processed"
+- RecentImageProcessor checks each batch with a single lookup
+"""
+
+import sys
+import time
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+pytest.importorskip("torch")
+pytest.importorskip("transformers")
+
+from sqlalchemy.dialects import postgresql
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
+
+from vision import mushroom_image_encoder
+from vision.mushroom_image_encoder import MushroomImageEncoder
+from vision.mushroom_image_processor import MushroomImagePathParser
+from vision.recent_image_processor import RecentImageProcessor
+
+
+def image_path(i: int) -> str:
+    return f"611/20260101/611_1921681235_20251220_20260101{i:06d}.jpg"
+
+
+@pytest.fixture
+def db():
+    """模拟 mushroom_embedding 表：记录每次查询的参数，返回已入库的路径"""
+    stored = {image_path(i) for i in range(0, 40, 2)}
+    statements = []
+    session = MagicMock()
+
+    def execute(statement):
+        statements.append(statement)
+        paths = statement.compile().params["paths"]
+        return [(p,) for p in paths if p in stored]
+
+    session.execute.side_effect = execute
+    return session, statements
+
+
+@pytest.fixture
+def encoder(db):
+    session, _ = db
+    enc = MushroomImageEncoder.__new__(MushroomImageEncoder)
+    enc.Session = MagicMock(return_value=session)
+    enc._processed_path_cache = set()
+    enc._processed_path_cache_at = time.monotonic()
+    return enc
+
+
+def test_bulk_query_uses_any_and_chunks(encoder, db):
+    _, statements = db
+    paths = [image_path(i) for i in range(40)]
+
+    with patch.object(mushroom_image_encoder, "PROCESSED_PATH_QUERY_CHUNK_SIZE", 16):
+        processed = encoder.get_processed_paths(paths)
+
+    assert processed == {image_path(i) for i in range(0, 40, 2)}
+    assert len(statements) == 3
+    sql = str(statements[0].compile(dialect=postgresql.dialect()))
+    assert "= ANY (" in sql
+
+
+def test_positive_results_are_cached(encoder, db):
+    _, statements = db
+    paths = [image_path(i) for i in range(4)]
+    encoder.get_processed_paths(paths)
+
+    # 已处理路径命中缓存，只有未处理的路径再次查询
+    assert encoder.get_processed_paths(paths[:1] + paths[2:3]) == set(
+        paths[:1] + paths[2:3]
+    )
+    assert len(statements) == 1
+    assert encoder._is_already_processed(paths[1]) is False
+    assert len(statements) == 2
+    assert statements[1].compile().params["paths"] == [paths[1]]
+
+
+def test_cache_expires_after_ttl(encoder, db):
+    _, statements = db
+    encoder.get_processed_paths([image_path(0)])
+
+    with patch.object(mushroom_image_encoder, "PROCESSED_PATH_CACHE_TTL_SECONDS", -1):
+        encoder.get_processed_paths([image_path(0)])
+
+    assert len(statements) == 2
+
+
+def test_query_failure_treated_as_unprocessed(encoder, db):
+    session, _ = db
+    session.execute.side_effect = RuntimeError("connection lost")
+
+    assert encoder.get_processed_paths([image_path(0), image_path(2)]) == set()
+    session.close.assert_called_once()
+
+
+def test_recent_processor_checks_batch_once():
+    processor = RecentImageProcessor.__new__(RecentImageProcessor)
+    processor.parser = MushroomImagePathParser()
+    processor.minio_client = MagicMock()
+    processor.minio_client.get_image_bytes.return_value = None
+    processor.encoder = MagicMock()
+    processor.encoder.get_processed_paths.side_effect = lambda names: {
+        n for n in names if n.endswith(("000.jpg", "001.jpg"))
+    }
+    processor._process_image_batch = MagicMock(
+        side_effect=lambda batch, save_to_db, loaded=None: [
+            {"success": True} for _ in batch
+        ]
+    )
+    images = [{"object_name": image_path(i)} for i in (0, 1, 2, 3, 1000, 1001)]
+
+    room_stats, batch_stats = processor._process_room_images_batch(
+        "611", images, save_to_db=True, batch_size=3
+    )
+
+    assert processor.encoder.get_processed_paths.call_count == 2
+    processor.encoder._is_already_processed.assert_not_called()
+    assert batch_stats["batches"] == 2
+    assert room_stats["skipped"] == 4
+    assert room_stats["success"] == 2
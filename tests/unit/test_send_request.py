@@ -0,0 +1,108 @@
+"""
+Unit tests for the pooled SendRequest session and the shared GetData instance
+
+Tests cover:
+- SendRequest instances share one pooled keep-alive session
+- Connect/read timeouts passed separately
+- Sequential requests reuse a single TCP connection
+- create_get_data returns a process-wide instance
+"""
+
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
+
+from global_const import global_const
+from global_const.const_config import (
+    HTTP_CONNECT_TIMEOUT,
+    HTTP_POOL_MAXSIZE,
+    HTTP_POST_READ_TIMEOUT,
+)
+from utils import send_request
+from utils.send_request import SendRequest
+
+
+class KeepAliveHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        super().setup()
+        self.server.connections += 1
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        body = b'{"data": {}}'
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def stub_url():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), KeepAliveHandler)
+    server.daemon_threads = True
+    server.connections = 0
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server, f"http://127.0.0.1:{server.server_address[1]}/history_cal"
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture(autouse=True)
+def fresh_session():
+    send_request.close_http_session()
+    yield
+    send_request.close_http_session()
+
+
+def test_instances_share_pooled_session():
+    first, second = SendRequest(), SendRequest()
+
+    assert first.session is second.session
+    adapter = first.session.get_adapter("http://example")
+    assert adapter._pool_maxsize == HTTP_POOL_MAXSIZE
+    assert first.session.headers["Connection"] == "keep-alive"
+    assert "gzip" in first.session.headers["Accept-Encoding"]
+
+
+def test_post_uses_separate_connect_and_read_timeouts():
+    sender = SendRequest()
+    with patch.object(sender.session, "request") as request:
+        request.return_value.ok = True
+        sender.send_post_request("http://stub/history_cal", {}, "{}")
+
+    assert request.call_args.kwargs["timeout"] == (
+        HTTP_CONNECT_TIMEOUT,
+        HTTP_POST_READ_TIMEOUT,
+    )
+
+
+def test_sequential_requests_reuse_connection(stub_url):
+    server, url = stub_url
+    sender = SendRequest()
+
+    for _ in range(20):
+        assert sender.send_post_request(url, {}, "{}").json() == {"data": {}}
+
+    assert server.connections == 1
+
+
+def test_create_get_data_returns_shared_instance():
+    with patch.object(global_const, "_GET_DATA_INSTANCE", None):
+        first = global_const.create_get_data()
+        second = global_const.create_get_data()
+
+    assert first is second
+    assert first.session is send_request.get_http_session()
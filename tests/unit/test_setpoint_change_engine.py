@@ -0,0 +1,292 @@
+"""
+Unit tests for the vectorised setpoint change detection engine
+
+Tests cover:
+- Parity with the original row-by-row loops (utils monitor and monitoring tasks)
+- Threshold lookup via config merge for static-config detection
+- Static-config detection compares rounded digital/enum states
+- Change DataFrame accepted directly by store_setpoint_changes_to_database
+"""
+
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+from unittest.mock import patch
+
+import numpy as np
+import pandas as pd
+import pytest
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
+
+from monitoring import tasks as monitoring_tasks
+from utils.setpoint_change_engine import (
+    CHANGE_RECORD_COLUMNS,
+    detect_setpoint_changes_frame,
+)
+from utils.setpoint_change_monitor import DeviceSetpointChangeMonitor
+
+START = datetime(2026, 1, 1)
+
+POINTS = [
+    # device_name, point_name, change_type, threshold
+    ("air_cooler_611", "on_off", "digital_on_off", None),
+    ("air_cooler_611", "temp_set", "analog_value", 0.5),
+    ("air_cooler_611", "hum_set", "analog_value", None),
+    ("fresh_air_fan_611", "mode", "enum_state", None),
+    ("grow_light_611", "on_off", "digital_on_off", None),
+    ("humidifier_611", "single", "digital_on_off", None),
+]
+
+
+def make_series(change_type: str, n: int, rng) -> np.ndarray:
+    if change_type == "digital_on_off":
+        values = rng.integers(0, 2, n).astype(float)
+        # 非整数值按 int() 截断比较：0.6 与 0 视为相同状态
+        values[::7] = 0.6
+    elif change_type == "enum_state":
+        values = rng.integers(0, 4, n).astype(float)
+    else:
+        values = np.round(18 + rng.normal(scale=0.6, size=n), 1)
+        # 连续相同值：阈值为 0 时仍记为变化
+        values[1::5] = values[::5][: len(values[1::5])]
+    values[rng.random(n) < 0.05] = np.nan
+    return values
+
+
+@pytest.fixture
+def setpoint_data():
+    rng = np.random.default_rng(7)
+    frames = []
+    for device_name, point_name, change_type, threshold in POINTS:
+        n = 1 if point_name == "single" else 60
+        times = [START + timedelta(minutes=5 * i) for i in range(n)]
+        frames.append(
+            pd.DataFrame(
+                {
+                    "time": times,
+                    "device_name": device_name,
+                    "point_name": point_name,
+                    "value": make_series(change_type, n, rng),
+                    "room_id": "611",
+                    "device_type": device_name.rsplit("_", 1)[0],
+                    "change_type": change_type,
+                    "threshold": threshold,
+                    "description": f"{device_name}.{point_name}",
+                }
+            )
+        )
+    # 与查询结果一致：整体按时间排序
+    return pd.concat(frames, ignore_index=True).sort_values("time", kind="mergesort")
+
+
+def legacy_utils_detect(setpoint_data: pd.DataFrame) -> list:
+    """原 DeviceSetpointChangeMonitor.detect_setpoint_changes 的逐行实现"""
+    changes = []
+    for (device_name, point_name), group in setpoint_data.groupby(
+        ["device_name", "point_name"]
+    ):
+        if len(group) < 2:
+            continue
+        group = group.sort_values("time", kind="mergesort").reset_index(drop=True)
+        change_type = group.iloc[0]["change_type"]
+        threshold = group.iloc[0]["threshold"]
+        for i in range(1, len(group)):
+            cur = group.iloc[i]["value"]
+            prev = group.iloc[i - 1]["value"]
+            if pd.isna(cur) or pd.isna(prev):
+                continue
+            detected = False
+            if change_type in ("digital_on_off", "enum_state"):
+                detected = int(cur) != int(prev)
+            elif change_type == "analog_value":
+                detected = bool(threshold and abs(cur - prev) >= threshold)
+            if detected:
+                changes.append(
+                    {
+                        "room_id": group.iloc[0]["room_id"],
+                        "device_type": group.iloc[0]["device_type"],
+                        "device_name": device_name,
+                        "point_name": point_name,
+                        "point_description": group.iloc[0]["description"],
+                        "change_time": group.iloc[i]["time"],
+                        "previous_value": float(prev),
+                        "current_value": float(cur),
+                        "change_type": change_type,
+                    }
+                )
+    return changes
+
+
+def legacy_point_detect(group: pd.DataFrame, config: dict, to_state=int) -> list:
+    """
+    原 monitoring.tasks.detect_point_changes 的逐行实现
+
+    to_state=round 对应原 detect_changes_with_static_configs 的 .round().astype("Int64")
+    """
+    changes = []
+    threshold = config.get("threshold")
+    for i in range(1, len(group)):
+        cur = group.iloc[i]["value"]
+        prev = group.iloc[i - 1]["value"]
+        if pd.isna(cur) or pd.isna(prev):
+            continue
+        if config["change_type"] in ("digital_on_off", "enum_state"):
+            detected = to_state(cur) != to_state(prev)
+        else:
+            effective = 0.0 if threshold is None else threshold
+            detected = abs(cur - prev) >= effective
+        if detected:
+            changes.append(
+                {
+                    "room_id": config["room_id"],
+                    "device_type": config["device_type"],
+                    "device_name": config["device_name"],
+                    "point_name": config["point_name"],
+                    "point_description": config.get("remark", ""),
+                    "change_time": group.iloc[i]["time"],
+                    "previous_value": float(prev),
+                    "current_value": float(cur),
+                    "change_type": config["change_type"],
+                }
+            )
+    return changes
+
+
+def normalise(records: list) -> pd.DataFrame:
+    df = pd.DataFrame(records, columns=CHANGE_RECORD_COLUMNS)
+    df = df.drop(columns=["detection_time"])
+    return df.sort_values(["device_name", "point_name", "change_time"]).reset_index(
+        drop=True
+    )
+
+
+def test_utils_monitor_matches_legacy_loop(setpoint_data):
+    monitor = DeviceSetpointChangeMonitor.__new__(DeviceSetpointChangeMonitor)
+
+    changes = monitor.detect_setpoint_changes(setpoint_data)
+    expected = legacy_utils_detect(setpoint_data)
+
+    assert len(expected) > 0
+    pd.testing.assert_frame_equal(normalise(changes), normalise(expected))
+    # 阈值缺失的模拟量不检测
+    assert not any(c["point_name"] == "hum_set" for c in changes)
+
+
+@pytest.mark.parametrize("device_name, point_name, change_type, threshold", POINTS)
+def test_point_changes_match_legacy_loop(
+    setpoint_data, device_name, point_name, change_type, threshold
+):
+    group = setpoint_data[
+        (setpoint_data["device_name"] == device_name)
+        & (setpoint_data["point_name"] == point_name)
+    ].reset_index(drop=True)
+    config = {
+        "room_id": "611",
+        "device_type": device_name.rsplit("_", 1)[0],
+        "device_name": f"{device_name}_sys",
+        "point_name": f"{point_name}_sys",
+        "change_type": change_type,
+        "threshold": threshold,
+        "remark": "remark",
+    }
+
+    changes = monitoring_tasks.detect_point_changes(group, config)
+
+    pd.testing.assert_frame_equal(
+        normalise(changes), normalise(legacy_point_detect(group, config))
+    )
+
+
+def test_static_config_detection_merges_thresholds(setpoint_data):
+    realtime = setpoint_data[["time", "device_name", "point_name", "value"]].copy()
+    realtime["room_id"] = "611"
+    room_configs = [
+        {
+            "device_alias": device_name,
+            "point_alias": point_name,
+            "device_name": f"{device_name}_sys",
+            "point_name": f"{point_name}_sys",
+            "device_type": device_name.rsplit("_", 1)[0],
+            "change_type": change_type,
+            "threshold": threshold,
+            "remark": "remark",
+        }
+        for device_name, point_name, change_type, threshold in POINTS
+    ]
+
+    changes = monitoring_tasks.detect_changes_with_static_configs(
+        realtime, room_configs
+    )
+
+    expected = []
+    for config in room_configs:
+        group = realtime[
+            (realtime["device_name"] == config["device_alias"])
+            & (realtime["point_name"] == config["point_alias"])
+        ].reset_index(drop=True)
+        expected.extend(
+            legacy_point_detect(group, {**config, "room_id": "611"}, to_state=round)
+        )
+
+    pd.testing.assert_frame_equal(normalise(changes), normalise(expected))
+    assert {c["device_name"] for c in changes} <= {
+        c["device_name"] for c in room_configs
+    }
+
+
+def test_near_integer_states_compare_rounded():
+    values = [1.0, 0.9999, 1.0001, 1.9999, 2.0, 0.4, 0.0]
+    data = pd.DataFrame(
+        {
+            "time": [START + timedelta(minutes=i) for i in range(len(values))],
+            "device_name": "d",
+            "point_name": "p",
+            "value": values,
+            "change_type": "enum_state",
+        }
+    )
+
+    rounded = detect_setpoint_changes_frame(data)
+    truncated = detect_setpoint_changes_frame(data, truncate_states=True)
+
+    # 0.9999/1.0001 与 1.0 同一状态，1.9999 视为 2，0.4 视为 0
+    assert list(zip(rounded["previous_value"], rounded["current_value"])) == [
+        (1.0001, 1.9999),
+        (2.0, 0.4),
+    ]
+    assert len(truncated) > len(rounded)
+
+
+def test_engine_returns_empty_frame_with_columns():
+    df = detect_setpoint_changes_frame(
+        pd.DataFrame(
+            {
+                "time": [START, START + timedelta(minutes=1)],
+                "device_name": ["d", "d"],
+                "point_name": ["p", "p"],
+                "value": [1.0, 1.0],
+                "change_type": ["digital_on_off"] * 2,
+            }
+        )
+    )
+    assert df.empty
+    assert list(df.columns) == CHANGE_RECORD_COLUMNS
+
+
+def test_store_accepts_change_frame(setpoint_data):
+    monitor = DeviceSetpointChangeMonitor.__new__(DeviceSetpointChangeMonitor)
+    changes_df = monitor.detect_setpoint_changes_frame(setpoint_data)
+
+    with (
+        patch.object(monitoring_tasks.pd, "read_sql", return_value=pd.DataFrame()),
+        patch.object(pd.DataFrame, "to_sql") as to_sql,
+    ):
+        stored = monitoring_tasks.store_setpoint_changes_to_database(changes_df)
+
+    assert stored == len(changes_df) > 0
+    to_sql.assert_called_once()
+    assert (
+        monitoring_tasks.store_setpoint_changes_to_database(changes_df.iloc[0:0]) == 0
+    )
@@ -0,0 +1,212 @@
+"""
+Unit tests for the single-query skill context loader
+
+Tests cover:
+- build_contexts_from_db loads every room with one statement
+- Real-time embedding values override the daily statistics
+- Recent setpoint changes come from the aggregated JSON column
+- Analyzer-extracted device changes replace the change lookups
+- A failing query still yields a season-only context
+- Prefetched contexts are aligned to the room's analysis time
+"""
+
+import sys
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from pathlib import Path
+from unittest.mock import patch
+
+import pandas as pd
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
+
+from decision_analysis.skills import cultivation_skill
+from decision_analysis.skills.cultivation_skill import CultivationSkillEngine
+
+ANALYSIS_TIME = datetime(2026, 1, 15, 10, 0, 0)
+
+
+class FakeEngine:
+    """记录执行的语句与参数，返回预置行"""
+
+    def __init__(self, rows=None, error=None):
+        self.rows = rows or []
+        self.error = error
+        self.calls = []
+
+    @contextmanager
+    def connect(self):
+        yield self
+
+    def execute(self, statement, params=None):
+        if self.error:
+            raise self.error
+        self.calls.append((str(statement), params))
+        return self
+
+    def fetchall(self):
+        return self.rows
+
+
+def room_row(room_id, **overrides):
+    values = {
+        "in_day_num": 12,
+        "temp_median": 15.5,
+        "humidity_median": 88.0,
+        "co2_median": 1500.0,
+        "growth_day": None,
+        "env_sensor_status": None,
+        "light_config": None,
+        "collection_datetime": None,
+        "change_count": 0,
+        "recent_changes": None,
+    }
+    values.update(overrides)
+    return (room_id, *values.values())
+
+
+def make_engine(tmp_path):
+    return CultivationSkillEngine(tmp_path / "missing.json", enable_kb_prior=False)
+
+
+def test_all_rooms_loaded_with_one_query(tmp_path):
+    fake = FakeEngine(
+        rows=[
+            room_row(
+                "611",
+                growth_day=14,
+                env_sensor_status='{"temperature": 16.2, "hum": 91}',
+                light_config={"model": 1, "on_mset": 30, "off_mset": 90},
+                collection_datetime=ANALYSIS_TIME - timedelta(minutes=20),
+                change_count=11,
+                recent_changes=[
+                    {
+                        "device_type": "air_cooler",
+                        "point_name": "temp_set",
+                        "previous_value": 16,
+                        "current_value": 15.5,
+                        "change_time": "2026-01-15T09:30:00",
+                    }
+                ],
+            ),
+            room_row("612", in_day_num=None, temp_median=None),
+        ]
+    )
+
+    with patch.object(cultivation_skill, "pgsql_engine", fake):
+        contexts = make_engine(tmp_path).build_contexts_from_db(
+            ["611", "612", "607"], ANALYSIS_TIME
+        )
+
+    assert len(fake.calls) == 1
+    sql, params = fake.calls[0]
+    assert "LATERAL" in sql and "DISTINCT ON" in sql
+    assert params["room_ids"] == ["611", "612", "607"]
+    assert params["window_start"] == ANALYSIS_TIME - timedelta(hours=6)
+    assert params["include_changes"] is True
+
+    room = contexts["611"]
+    assert room.season == "winter"
+    assert (room.growth_day, room.temperature, room.humidity, room.co2) == (
+        14,
+        16.2,
+        91.0,
+        1500.0,
+    )
+    assert room.realtime_light_on_mset == 30.0
+    assert room.recent_setpoint_change_count_6h == 11
+    assert room.recent_setpoint_changes[0]["current_value"] == 15.5
+    assert room.recent_setpoint_changes[0]["change_time"] == "2026-01-15T09:30:00"
+
+    assert (contexts["612"].growth_day, contexts["612"].temperature) == (None, None)
+    assert contexts["607"].growth_day is None
+    assert contexts["607"].season == "winter"
+
+
+def test_extracted_device_changes_replace_change_lookups(tmp_path):
+    fake = FakeEngine(rows=[room_row("611", change_count=99)])
+    times = [ANALYSIS_TIME - timedelta(minutes=10 * i) for i in range(12)]
+    times.append(ANALYSIS_TIME - timedelta(hours=7))
+    device_changes = pd.DataFrame(
+        {
+            "device_type": "humidifier",
+            "point_name": [f"p{i}" for i in range(len(times))],
+            "previous_value": [float("nan")] + [1.0] * (len(times) - 1),
+            "current_value": 0.0,
+            "change_time": pd.to_datetime(times),
+        }
+    ).sample(frac=1, random_state=0)
+
+    with patch.object(cultivation_skill, "pgsql_engine", fake):
+        context = make_engine(tmp_path).build_context_from_db(
+            "611", ANALYSIS_TIME, device_changes=device_changes
+        )
+
+    assert fake.calls[0][1]["include_changes"] is False
+    assert context.growth_day == 12
+    assert context.recent_setpoint_change_count_6h == 12
+    assert [c["point_name"] for c in context.recent_setpoint_changes] == [
+        f"p{i}" for i in range(8)
+    ]
+    assert context.recent_setpoint_changes[0]["previous_value"] is None
+    assert context.recent_setpoint_changes[0]["change_time"] == (
+        ANALYSIS_TIME.isoformat()
+    )
+
+
+def test_empty_device_changes_frame_means_no_recent_changes(tmp_path):
+    fake = FakeEngine(rows=[room_row("611")])
+
+    with patch.object(cultivation_skill, "pgsql_engine", fake):
+        context = make_engine(tmp_path).build_context_from_db(
+            "611", ANALYSIS_TIME, device_changes=pd.DataFrame()
+        )
+
+    assert context.recent_setpoint_change_count_6h == 0
+    assert context.recent_setpoint_changes == []
+
+
+def test_query_failure_returns_season_only_context(tmp_path):
+    fake = FakeEngine(error=RuntimeError("connection refused"))
+
+    with patch.object(cultivation_skill, "pgsql_engine", fake):
+        context = make_engine(tmp_path).build_context_from_db("611", ANALYSIS_TIME)
+
+    assert context.room_id == "611"
+    assert context.season == "winter"
+    assert context.growth_day is None
+    assert context.recent_setpoint_changes == []
+
+
+def test_prefetched_context_aligned_to_analysis_time(tmp_path):
+    fake = FakeEngine(rows=[room_row("611", in_day_num=12)])
+    engine = make_engine(tmp_path)
+
+    with patch.object(cultivation_skill, "pgsql_engine", fake):
+        prefetched = engine.build_contexts_from_db(
+            ["611"], ANALYSIS_TIME, include_changes=False
+        )["611"]
+
+    later = ANALYSIS_TIME + timedelta(hours=3)
+    context = engine.align_prefetched_context(prefetched, later)
+    assert context.analysis_time == later
+    assert (context.growth_day, context.season) == (12, "winter")
+    assert prefetched.analysis_time == ANALYSIS_TIME
+
+
+def test_prefetched_context_rejected_across_days(tmp_path):
+    engine = make_engine(tmp_path)
+    prefetched = cultivation_skill.SkillContext(
+        room_id="611", analysis_time=datetime(2026, 2, 28, 23, 55), season="winter"
+    )
+
+    # 跨日（此处同时跨季）时生长天与季节均可能变化，需单库房重新查询
+    assert (
+        engine.align_prefetched_context(prefetched, datetime(2026, 3, 1, 0, 5)) is None
+    )
+    # 分析时间早于预取时间时，预取的实时数据可能晚于分析时间
+    assert (
+        engine.align_prefetched_context(prefetched, datetime(2026, 2, 28, 23, 0))
+        is None
+    )